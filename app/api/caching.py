@@ -0,0 +1,147 @@
+"""
+HTTP validators and cache headers for price endpoints.
+
+Responses carry an ETag built from the data version (row count and latest
+timestamp of the requested range, or the rows of a page) plus the request
+parameters that shape the body. Conditional requests are answered with 304
+before the full query runs.
+
+Price timestamps say nothing about when a row was written: backfill and gap
+repair insert old timestamps, and retention downsampling deletes them. So
+Last-Modified is the time this process first saw the current version of a
+response. That is never earlier than the write that produced it, so an
+If-Modified-Since check cannot miss a change.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+from fastapi import Request
+from app.config import settings
+
+# First time each ETag was seen, oldest first; evicted entries are re-dated,
+# which only makes clients revalidate once more
+MAX_TRACKED_ETAGS = 10000
+_first_seen: "OrderedDict[str, int]" = OrderedDict()
+
+
+def make_etag(*parts) -> str:
+    """
+    Build a strong ETag from the values that determine a response body.
+    
+    Args:
+        parts: Data version and request parameters
+        
+    Returns:
+        Quoted ETag value
+    """
+    digest = hashlib.blake2b(":".join(str(part) for part in parts).encode(), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def last_modified(etag: str) -> int:
+    """
+    Get the time the version behind an ETag was first seen.
+    
+    Args:
+        etag: ETag of the current version
+        
+    Returns:
+        Unix timestamp in seconds
+    """
+    seen = _first_seen.get(etag)
+    if seen is None:
+        seen = _first_seen[etag] = int(time.time())
+        if len(_first_seen) > MAX_TRACKED_ETAGS:
+            _first_seen.popitem(last=False)
+    return seen
+
+
+def history_max_age(end_timestamp: int, now: Optional[int] = None) -> int:
+    """
+    Get how long a range that ended in the past may be cached.
+    
+    Past ranges still change when history is backfilled, gap repair fills a
+    missed slot, or retention downsamples old partitions. Ranges within the
+    gap scan lookback can change on every repair run.
+    
+    Args:
+        end_timestamp: End of the requested range
+        now: Current time (optional, defaults to time.time())
+        
+    Returns:
+        max-age in seconds
+    """
+    now = int(time.time()) if now is None else now
+    if end_timestamp >= now - settings.gap_scan_lookback:
+        return min(settings.history_max_age, settings.gap_scan_interval)
+    return settings.history_max_age
+
+
+def cache_headers(etag: str, latest_timestamp: Optional[int], end_timestamp: Optional[int] = None) -> Dict[str, str]:
+    """
+    Build ETag, Last-Modified and Cache-Control headers.
+    
+    Ranges that end before the current ingest interval get no more new
+    prices and are cached for ``history_max_age``. Other responses may be
+    cached until the next ingest is expected, i.e. one ingest interval
+    after the latest timestamp.
+    
+    Args:
+        etag: ETag for the response
+        latest_timestamp: Latest price timestamp covered by the response (optional)
+        end_timestamp: End of the requested range (optional, open-ended if None)
+        
+    Returns:
+        Header mapping
+    """
+    now = int(time.time())
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(
+            datetime.fromtimestamp(last_modified(etag), tz=timezone.utc), usegmt=True
+        ),
+    }
+    
+    if end_timestamp is not None and end_timestamp < now - settings.ingest_interval:
+        headers["Cache-Control"] = f"public, max-age={history_max_age(end_timestamp, now)}"
+    else:
+        next_ingest = (latest_timestamp or now) + settings.ingest_interval
+        max_age = min(max(next_ingest - now, 0), settings.ingest_interval)
+        headers["Cache-Control"] = f"public, max-age={max_age}"
+    
+    return headers
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since against the current version.
+    
+    If-None-Match takes precedence; If-Modified-Since is only consulted
+    when the client sent no ETag.
+    
+    Args:
+        request: Incoming request
+        etag: Current ETag
+        
+    Returns:
+        True if a 304 Not Modified response should be sent
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified(etag) <= since.timestamp()
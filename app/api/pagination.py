@@ -0,0 +1,42 @@
+"""
+Opaque cursor encoding for keyset-paginated price endpoints.
+"""
+import base64
+import binascii
+from typing import Tuple
+
+
+def encode_cursor(timestamp: int, price_id: int) -> str:
+    """
+    Encode a (timestamp, id) keyset position as an opaque URL-safe token.
+    
+    Args:
+        timestamp: UNIX timestamp of the last row on the page
+        price_id: Primary key of the last row on the page
+        
+    Returns:
+        URL-safe cursor string
+    """
+    raw = f"{timestamp}:{price_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """
+    Decode a cursor produced by ``encode_cursor``.
+    
+    Args:
+        cursor: Cursor string received from the client
+        
+    Returns:
+        Tuple of (timestamp, id)
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        timestamp, price_id = base64.urlsafe_b64decode(padded).decode().split(":")
+        return int(timestamp), int(price_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
@@ -1,49 +1,299 @@
 """
 FastAPI routes for ticker price API.
 """
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
-from typing import Optional
+import asyncio
+import time
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response, WebSocket
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import HTTPConnection
+from typing import AsyncIterator, List, Optional, Tuple, Union
 from datetime import datetime
-from app.database import get_db
-from app.services.price_service import PriceService
+from app.config import settings
+from app.database import get_async_read_db
+from app.metrics import STREAM_SUBSCRIBERS
+from app.models import TickerPrice
+from app.services.price_service import AsyncPriceService
+from app.services.analytics_service import AsyncAnalyticsService
+from app.services.candle_service import AsyncCandleService
+from app.services.gap_service import AsyncGapService
+from app.services.price_cache import LatestPrice, LatestPriceCache
+from app.services.range_cache import RangeCache
+from app.api.caching import cache_headers, is_not_modified, make_etag
+from app.api.pagination import decode_cursor, encode_cursor
 from app.api.schemas import (
+    CandleInterval,
+    CandleListResponse,
+    CandleResponse,
+    ColumnarPriceListResponse,
+    DownsampleMethod,
+    GapReportResponse,
+    PriceFormat,
     PriceListResponse,
+    PriceStatsResponse,
     LatestPriceResponse,
+    LatestPricesResponse,
     TickerPriceResponse,
     ErrorResponse
 )
 
 router = APIRouter(prefix="/api/v1", tags=["prices"])
 
+# Number of NDJSON lines sent per chunk when streaming
+NDJSON_CHUNK_ROWS = 100
+
+
+def get_price_cache(connection: HTTPConnection) -> Optional[LatestPriceCache]:
+    """Return the process-wide latest-price cache, if the app started one."""
+    return getattr(connection.app.state, "price_cache", None)
+
+
+def get_range_cache(connection: HTTPConnection) -> Optional[RangeCache]:
+    """Return the process-wide historical range cache, if the app started one."""
+    return getattr(connection.app.state, "range_cache", None)
+
+
+def _parse_date(value: Optional[str], field_name: str) -> Optional[datetime]:
+    """
+    Parse an optional ISO date query parameter.
+    
+    Raises:
+        HTTPException: 400 if the value is not a valid ISO date
+    """
+    if not value:
+        return None
+    
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid {field_name} format. Use ISO format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)"
+        )
+
+
+def _parse_cursor(cursor: Optional[str]) -> Optional[Tuple[int, int]]:
+    """
+    Decode an optional pagination cursor query parameter.
+    
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    if not cursor:
+        return None
+    
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _parse_tickers(tickers: str) -> List[str]:
+    """
+    Split a comma-separated tickers query parameter.
+    
+    Raises:
+        HTTPException: 400 if no ticker is given
+    """
+    parsed = list(dict.fromkeys(ticker.strip() for ticker in tickers.split(",") if ticker.strip()))
+    if not parsed:
+        raise HTTPException(status_code=400, detail="At least one ticker is required")
+    return parsed
+
+
+def _require_stream_cache(price_cache: Optional[LatestPriceCache]) -> LatestPriceCache:
+    """
+    Return the cache whose subscription feeds /prices/stream.
+    
+    Raises:
+        HTTPException: 503 if the latest-price cache is disabled
+    """
+    if price_cache is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Live price stream is unavailable (PRICE_CACHE_ENABLED is off)"
+        )
+    return price_cache
+
+
+async def _sse_events(price_cache: LatestPriceCache, tickers: List[str]) -> AsyncIterator[bytes]:
+    """
+    Yield Server-Sent Events for new prices of ``tickers``.
+    
+    Starts with the cached latest price of each ticker, then one ``price``
+    event per update. A comment line is sent when no update arrived for
+    ``stream_heartbeat_interval`` seconds, keeping proxies from closing the
+    connection. The subscription is removed when the client disconnects.
+    """
+    subscription = price_cache.subscribe(tickers)
+    STREAM_SUBSCRIBERS.labels(transport="sse").inc()
+    try:
+        yield b": connected\n\n"
+        for message in price_cache.snapshot(tickers):
+            yield f"event: price\ndata: {message}\n\n".encode()
+        
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), settings.stream_heartbeat_interval)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            yield f"event: price\ndata: {message}\n\n".encode()
+    finally:
+        price_cache.unsubscribe(subscription)
+        STREAM_SUBSCRIBERS.labels(transport="sse").dec()
+
+
+async def _ndjson_lines(prices: AsyncIterator[TickerPrice]) -> AsyncIterator[bytes]:
+    """Serialize prices as newline-delimited JSON, a few rows per chunk."""
+    chunk = []
+    async for price in prices:
+        chunk.append(TickerPriceResponse.model_validate(price).model_dump_json())
+        if len(chunk) >= NDJSON_CHUNK_ROWS:
+            yield ("\n".join(chunk) + "\n").encode()
+            chunk = []
+    if chunk:
+        yield ("\n".join(chunk) + "\n").encode()
+
+
+async def _price_list(
+    service: AsyncPriceService,
+    ticker: str,
+    start_dt: Optional[datetime],
+    end_dt: Optional[datetime],
+    limit: Optional[int],
+    cursor: Optional[str],
+    response_format: PriceFormat,
+    request: Optional[Request] = None,
+    max_points: Optional[int] = None,
+    method: DownsampleMethod = DownsampleMethod.lttb,
+    range_cache: Optional[RangeCache] = None
+):
+    """
+    Build a price list response in the requested format.
+    
+    JSON bodies are built from (id, price, timestamp) tuples and encoded with
+    orjson, skipping per-row Pydantic models and FastAPI's response
+    validation. The payload still matches PriceListResponse, or
+    ColumnarPriceListResponse for ``format=columnar``.
+    
+    When ``request`` is given, whole ranges and downsampled ranges read the
+    range's row count and latest timestamp first to build the ETag; a
+    matching conditional request gets a 304 without the rows being read or
+    serialized. Pages (``limit`` or ``cursor``) are validated by the rows
+    they read instead, so a page costs one query and a 304 only saves the
+    body. NDJSON streams carry no validators.
+    
+    With ``max_points``, the whole range is downsampled to at most that
+    many prices with ``method`` instead of being paginated.
+    
+    With ``range_cache``, a whole range with a start date is assembled from
+    cached sealed blocks plus a live read of the open tail, checked against
+    the row count read for the ETag.
+    """
+    if max_points is not None and (limit is not None or cursor or response_format == PriceFormat.ndjson):
+        raise HTTPException(
+            status_code=400,
+            detail="max_points cannot be combined with limit, cursor or format=ndjson"
+        )
+    
+    keyset = _parse_cursor(cursor)
+    paged = limit is not None or keyset is not None
+    start_timestamp = int(start_dt.timestamp()) if start_dt else None
+    end_timestamp = int(end_dt.timestamp()) if end_dt else None
+    headers = {}
+    
+    count = None
+    if request is not None and not paged and response_format != PriceFormat.ndjson:
+        count, latest_timestamp = await service.get_price_version(ticker, start_dt, end_dt)
+        etag = make_etag(
+            ticker, start_timestamp, end_timestamp, response_format.value,
+            max_points, method.value if max_points else None, count, latest_timestamp
+        )
+        headers = cache_headers(etag, latest_timestamp, end_timestamp)
+        if is_not_modified(request, etag):
+            return Response(status_code=304, headers=headers)
+    
+    if response_format == PriceFormat.ndjson:
+        prices = service.iter_prices(
+            ticker, start_dt, end_dt, keyset, batch_size=settings.stream_batch_size
+        )
+        return StreamingResponse(_ndjson_lines(prices), media_type="application/x-ndjson", headers=headers)
+    
+    if keyset is not None and limit is None:
+        limit = settings.max_page_size
+    
+    if max_points is not None:
+        analytics = AsyncAnalyticsService(service.db)
+        if method == DownsampleMethod.minmax:
+            rows = await analytics.get_minmax_rows(ticker, start_dt, end_dt, max_points)
+        else:
+            rows = await analytics.get_lttb_rows(ticker, start_dt, end_dt, max_points)
+        next_keyset = None
+    elif range_cache is not None and start_dt is not None and limit is None:
+        rows = await range_cache.get_price_rows(service, ticker, start_dt, end_dt, count)
+        next_keyset = None
+    else:
+        rows, next_keyset = await service.get_price_rows(ticker, start_dt, end_dt, limit, keyset)
+        if request is not None and paged:
+            latest_timestamp = max((timestamp for _, _, timestamp in rows), default=None)
+            etag = make_etag(
+                ticker, start_timestamp, end_timestamp, limit, cursor, response_format.value, next_keyset, *rows
+            )
+            headers = cache_headers(etag, latest_timestamp, end_timestamp)
+            if is_not_modified(request, etag):
+                return Response(status_code=304, headers=headers)
+    content = {"ticker": ticker, "count": len(rows)}
+    
+    if response_format == PriceFormat.columnar:
+        content["timestamps"] = [timestamp for _, _, timestamp in rows]
+        content["prices"] = [price for _, price, _ in rows]
+    else:
+        content["prices"] = [
+            {"id": price_id, "ticker": ticker, "price": price, "timestamp": timestamp}
+            for price_id, price, timestamp in rows
+        ]
+    
+    content["next_cursor"] = encode_cursor(*next_keyset) if next_keyset else None
+    return ORJSONResponse(content, headers=headers)
+
 
 @router.get(
     "/prices",
-    response_model=PriceListResponse,
+    response_model=Union[PriceListResponse, ColumnarPriceListResponse],
     summary="Get all saved prices for a ticker",
     description="Retrieves all saved price data for the specified currency ticker"
 )
 async def get_all_prices(
+    request: Request,
     ticker: str = Query(..., description="Currency ticker (e.g., BTC_USD, ETH_USD)"),
-    db: Session = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=settings.max_page_size, description="Page size for keyset pagination"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    response_format: PriceFormat = Query(PriceFormat.json, alias="format", description="json, columnar or ndjson (streamed)"),
+    max_points: Optional[int] = Query(None, ge=3, le=settings.max_page_size, description="Downsample the range to at most this many prices"),
+    method: DownsampleMethod = Query(DownsampleMethod.lttb, description="Downsampling method: lttb or minmax"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get all saved prices for a given ticker.
     
     Args:
+        request: Incoming request, for If-None-Match / If-Modified-Since
         ticker: Currency ticker (required query parameter)
-        db: Database session dependency
+        limit: Page size; enables keyset pagination (optional)
+        cursor: Opaque cursor returned as next_cursor (optional)
+        response_format: json (default), columnar, or ndjson to stream every row
+        max_points: Downsample the range to at most this many prices (optional)
+        method: Downsampling method, lttb (default) or minmax
+        db: Async database session dependency
         
     Returns:
-        List of all prices for the ticker
+        List of all prices for the ticker, one page of them, a downsampled
+        selection, a stream, or 304 Not Modified
     """
-    service = PriceService(db)
-    prices = service.get_all_prices(ticker)
-    
-    return PriceListResponse(
-        ticker=ticker,
-        count=len(prices),
-        prices=[TickerPriceResponse.model_validate(price) for price in prices]
+    service = AsyncPriceService(db)
+    return await _price_list(
+        service, ticker, None, None, limit, cursor, response_format, request, max_points, method
     )
 
 
@@ -54,85 +304,397 @@ async def get_all_prices(
     description="Retrieves the most recent price for the specified currency ticker"
 )
 async def get_latest_price(
+    request: Request,
+    response: Response,
     ticker: str = Query(..., description="Currency ticker (e.g., BTC_USD, ETH_USD)"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db),
+    price_cache: Optional[LatestPriceCache] = Depends(get_price_cache)
 ):
     """
     Get the latest price for a given ticker.
     
+    Served from the in-process cache when it holds the ticker; otherwise
+    read from the database (and cached while the subscription is live).
+    The ETag is derived from the latest timestamp, and Cache-Control lets
+    clients reuse the response until the next ingest is due.
+    
     Args:
+        request: Incoming request, for If-None-Match / If-Modified-Since
+        response: Response whose cache headers are set
         ticker: Currency ticker (required query parameter)
-        db: Database session dependency
+        db: Async database session dependency
+        price_cache: Latest-price cache dependency (None when disabled)
         
     Returns:
-        Latest price data or null if no data exists
+        Latest price data, null if no data exists, or 304 Not Modified
     """
-    service = PriceService(db)
-    latest_price = service.get_latest_price(ticker)
+    async def load_latest(ticker: str) -> Optional[LatestPrice]:
+        latest_price = await AsyncPriceService(db).get_latest_price(ticker)
+        if latest_price is None:
+            return None
+        return float(latest_price.price), latest_price.timestamp
     
-    if latest_price is None:
+    if price_cache is not None:
+        latest = await price_cache.get_or_load(ticker, load_latest)
+    else:
+        latest = await load_latest(ticker)
+    
+    latest_timestamp = latest[1] if latest is not None else None
+    etag = make_etag(ticker, latest_timestamp)
+    headers = cache_headers(etag, latest_timestamp)
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    
+    if latest is None:
         return LatestPriceResponse(ticker=ticker, price=None, timestamp=None)
     
-    return LatestPriceResponse(
-        ticker=ticker,
-        price=float(latest_price.price),
-        timestamp=latest_price.timestamp
+    price, timestamp = latest
+    return LatestPriceResponse(ticker=ticker, price=price, timestamp=timestamp)
+
+
+@router.get(
+    "/prices/latest/batch",
+    response_model=LatestPricesResponse,
+    summary="Get latest prices for many tickers",
+    description="Retrieves the most recent price of each given ticker in one request and one query"
+)
+async def get_latest_prices(
+    request: Request,
+    tickers: str = Query(..., description="Comma-separated currency tickers (e.g., BTC_USD,ETH_USD)"),
+    db: AsyncSession = Depends(get_async_read_db),
+    price_cache: Optional[LatestPriceCache] = Depends(get_price_cache)
+):
+    """
+    Get the latest prices of many tickers.
+    
+    Tickers held by the in-process cache are answered from memory; the
+    rest are read together with a single LATERAL join query. The ETag
+    covers every ticker's latest timestamp.
+    
+    Args:
+        request: Incoming request, for If-None-Match / If-Modified-Since
+        tickers: Comma-separated currency tickers (required query parameter)
+        db: Async database session dependency
+        price_cache: Latest-price cache dependency (None when disabled)
+        
+    Returns:
+        Mapping of ticker to its latest price (null if no data exists), or
+        304 Not Modified
+        
+    Raises:
+        HTTPException: 400 if no tickers or more than max_latest_tickers are given
+    """
+    ticker_list = _parse_tickers(tickers)
+    if len(ticker_list) > settings.max_latest_tickers:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.max_latest_tickers} tickers can be requested at once"
+        )
+    
+    load_latest = AsyncPriceService(db).get_latest_prices
+    if price_cache is not None:
+        latest = await price_cache.get_many_or_load(ticker_list, load_latest)
+    else:
+        latest = await load_latest(ticker_list)
+    
+    latest_timestamp = max((timestamp for _, timestamp in latest.values()), default=None)
+    etag = make_etag(*(f"{ticker}={latest[ticker][1] if ticker in latest else ''}" for ticker in ticker_list))
+    headers = cache_headers(etag, latest_timestamp)
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    
+    prices = {}
+    for ticker in ticker_list:
+        if ticker in latest:
+            price, timestamp = latest[ticker]
+            prices[ticker] = {"price": price, "timestamp": timestamp}
+        else:
+            prices[ticker] = None
+    
+    return ORJSONResponse({"count": len(latest), "prices": prices}, headers=headers)
+
+
+@router.get(
+    "/prices/stream",
+    response_class=StreamingResponse,
+    summary="Stream new prices (Server-Sent Events)",
+    description="Pushes each newly saved price for the given tickers as a Server-Sent Event. "
+                "The same path accepts WebSocket connections."
+)
+async def stream_prices(
+    tickers: str = Query(..., description="Comma-separated currency tickers (e.g., BTC_USD,ETH_USD)"),
+    price_cache: Optional[LatestPriceCache] = Depends(get_price_cache)
+):
+    """
+    Stream new prices for some tickers as Server-Sent Events.
+    
+    Every client is fed from the process's single Redis subscription, so
+    streaming clients cost no database queries.
+    
+    Args:
+        tickers: Comma-separated currency tickers (required query parameter)
+        price_cache: Latest-price cache dependency (None when disabled)
+        
+    Returns:
+        text/event-stream response with one ``price`` event per update
+    """
+    ticker_list = _parse_tickers(tickers)
+    price_cache = _require_stream_cache(price_cache)
+    
+    return StreamingResponse(
+        _sse_events(price_cache, ticker_list),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
+@router.websocket("/prices/stream")
+async def stream_prices_ws(
+    websocket: WebSocket,
+    tickers: str = Query(..., description="Comma-separated currency tickers (e.g., BTC_USD,ETH_USD)"),
+    price_cache: Optional[LatestPriceCache] = Depends(get_price_cache)
+):
+    """
+    Stream new prices for some tickers over a WebSocket.
+    
+    Sends the cached latest price of each ticker, then one JSON text message
+    per update. Messages from the client are ignored. Closes with code 1008
+    for an empty ticker list and 1013 when the stream is unavailable.
+    
+    Args:
+        websocket: WebSocket connection
+        tickers: Comma-separated currency tickers (required query parameter)
+        price_cache: Latest-price cache dependency (None when disabled)
+    """
+    try:
+        ticker_list = _parse_tickers(tickers)
+        price_cache = _require_stream_cache(price_cache)
+    except HTTPException as e:
+        await websocket.close(code=1008 if e.status_code == 400 else 1013, reason=e.detail)
+        return
+    
+    await websocket.accept()
+    subscription = price_cache.subscribe(ticker_list)
+    STREAM_SUBSCRIBERS.labels(transport="websocket").inc()
+    
+    async def send_updates():
+        for message in price_cache.snapshot(ticker_list):
+            await websocket.send_text(message)
+        while True:
+            await websocket.send_text(await subscription.get())
+    
+    sender = asyncio.create_task(send_updates())
+    try:
+        # Wait for the client to go away; a failed send ends the sender early
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+        price_cache.unsubscribe(subscription)
+        STREAM_SUBSCRIBERS.labels(transport="websocket").dec()
+
+
 @router.get(
     "/prices/filter",
-    response_model=PriceListResponse,
+    response_model=Union[PriceListResponse, ColumnarPriceListResponse],
     summary="Get prices filtered by date",
     description="Retrieves prices for a ticker within a specified date range"
 )
 async def get_price_by_date(
+    request: Request,
     ticker: str = Query(..., description="Currency ticker (e.g., BTC_USD, ETH_USD)"),
     start_date: Optional[str] = Query(None, description="Start date in ISO format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)"),
     end_date: Optional[str] = Query(None, description="End date in ISO format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)"),
-    db: Session = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=settings.max_page_size, description="Page size for keyset pagination"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    response_format: PriceFormat = Query(PriceFormat.json, alias="format", description="json, columnar or ndjson (streamed)"),
+    max_points: Optional[int] = Query(None, ge=3, le=settings.max_page_size, description="Downsample the range to at most this many prices"),
+    method: DownsampleMethod = Query(DownsampleMethod.lttb, description="Downsampling method: lttb or minmax"),
+    db: AsyncSession = Depends(get_async_read_db),
+    range_cache: Optional[RangeCache] = Depends(get_range_cache)
 ):
     """
     Get prices for a ticker filtered by date range.
     
+    Ranges ending before the current ingest interval get no new prices, so
+    they are cached for HISTORY_MAX_AGE (less while gap repair may still
+    fill them). Unpaginated ranges with a start date are served from the
+    range cache's sealed blocks.
+    
     Args:
+        request: Incoming request, for If-None-Match / If-Modified-Since
         ticker: Currency ticker (required query parameter)
         start_date: Start date in ISO format (optional)
         end_date: End date in ISO format (optional)
-        db: Database session dependency
+        limit: Page size; enables keyset pagination (optional)
+        cursor: Opaque cursor returned as next_cursor (optional)
+        response_format: json (default), columnar, or ndjson to stream every row
+        max_points: Downsample the range to at most this many prices (optional)
+        method: Downsampling method, lttb (default) or minmax
+        db: Async database session dependency
+        range_cache: Historical range cache (None if disabled)
         
     Returns:
-        List of prices within the date range
+        List of prices within the date range, one page of them, a downsampled
+        selection, a stream, or 304 Not Modified
     """
-    service = PriceService(db)
+    service = AsyncPriceService(db)
     
     # Parse dates if provided
-    start_dt = None
-    end_dt = None
-    
-    if start_date:
-        try:
-            start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-        except ValueError:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid start_date format. Use ISO format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)"
-            )
+    start_dt = _parse_date(start_date, "start_date")
+    end_dt = _parse_date(end_date, "end_date")
     
-    if end_date:
-        try:
-            end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-        except ValueError:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid end_date format. Use ISO format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)"
-            )
+    return await _price_list(
+        service, ticker, start_dt, end_dt, limit, cursor, response_format, request, max_points, method, range_cache
+    )
+
+
+@router.get(
+    "/prices/gaps",
+    response_model=GapReportResponse,
+    summary="Get missed ingestion intervals",
+    description="Lists the runs of expected ingestion slots without a stored price, per ticker"
+)
+async def get_price_gaps(
+    tickers: Optional[str] = Query(None, description="Comma-separated currency tickers (default: all ingested tickers)"),
+    start_date: Optional[str] = Query(None, description="Start date in ISO format (default: GAP_SCAN_LOOKBACK before end_date)"),
+    end_date: Optional[str] = Query(None, description="End date in ISO format (default: now)"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Report gaps in the ingested prices.
+    
+    Each ticker is expected to have one price per slot of its ingest
+    cadence. The gaps of all tickers are found with a single query that
+    walks the (ticker, timestamp) index; slots still being ingested are
+    not reported. The ``repair_price_gaps`` task fetches the same gaps
+    again on a schedule.
+    
+    Args:
+        tickers: Comma-separated currency tickers (optional, defaults to settings.tickers)
+        start_date: Start date in ISO format (optional)
+        end_date: End date in ISO format (optional)
+        db: Async database session dependency
+        
+    Returns:
+        Gaps ordered by ticker and start, and the missing slots per ticker
+        
+    Raises:
+        HTTPException: 400 if a date is invalid or more than max_latest_tickers are given
+    """
+    ticker_list = _parse_tickers(tickers) if tickers is not None else settings.tickers
+    if len(ticker_list) > settings.max_latest_tickers:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.max_latest_tickers} tickers can be requested at once"
+        )
+    
+    end_dt = _parse_date(end_date, "end_date")
+    start_dt = _parse_date(start_date, "start_date")
+    end = int(end_dt.timestamp()) if end_dt else int(time.time())
+    start = int(start_dt.timestamp()) if start_dt else end - settings.gap_scan_lookback
+    
+    gaps = await AsyncGapService(db).find_gaps(ticker_list, start, end)
+    missing = dict.fromkeys(ticker_list, 0)
+    for gap in gaps:
+        missing[gap.ticker] += gap.missing
     
-    prices = service.get_price_by_date(ticker, start_dt, end_dt)
+    return ORJSONResponse({
+        "start": start,
+        "end": end,
+        "count": len(gaps),
+        "missing": missing,
+        "gaps": [gap._asdict() for gap in gaps],
+    })
+
+
+@router.get(
+    "/prices/stats",
+    response_model=PriceStatsResponse,
+    summary="Get price statistics for a ticker",
+    description="Computes returns, realized volatility, TWAP, min/max/mean and max drawdown "
+                "over a ticker's prices within a date range"
+)
+async def get_price_stats(
+    request: Request,
+    ticker: str = Query(..., description="Currency ticker (e.g., BTC_USD, ETH_USD)"),
+    start_date: Optional[str] = Query(None, description="Start date in ISO format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)"),
+    end_date: Optional[str] = Query(None, description="End date in ISO format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)"),
+    window: int = Query(60, ge=2, le=100000, description="Returns per rolling volatility window"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Get price statistics for a ticker within a date range.
+    
+    The range is loaded as NumPy arrays and every statistic is computed with
+    vectorized operations. Responses carry the same validators as the price
+    lists, so an unchanged range is answered with 304 without loading it.
+    
+    Args:
+        request: Incoming request, for If-None-Match / If-Modified-Since
+        ticker: Currency ticker (required query parameter)
+        start_date: Start date in ISO format (optional)
+        end_date: End date in ISO format (optional)
+        window: Number of returns per rolling volatility window
+        db: Async database session dependency
+        
+    Returns:
+        Statistics of the range (mostly null when it holds too few prices),
+        or 304 Not Modified
+    """
+    start_dt = _parse_date(start_date, "start_date")
+    end_dt = _parse_date(end_date, "end_date")
+    
+    count, latest_timestamp = await AsyncPriceService(db).get_price_version(ticker, start_dt, end_dt)
+    start_timestamp = int(start_dt.timestamp()) if start_dt else None
+    end_timestamp = int(end_dt.timestamp()) if end_dt else None
+    etag = make_etag(ticker, start_timestamp, end_timestamp, window, "stats", count, latest_timestamp)
+    headers = cache_headers(etag, latest_timestamp, end_timestamp)
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    
+    stats = await AsyncAnalyticsService(db).get_stats(ticker, start_dt, end_dt, window)
+    return ORJSONResponse({"ticker": ticker, **stats}, headers=headers)
+
+
+@router.get(
+    "/prices/candles",
+    response_model=CandleListResponse,
+    summary="Get OHLC candles for a ticker",
+    description="Retrieves open/high/low/close candles for a ticker from the rollup tables"
+)
+async def get_candles(
+    ticker: str = Query(..., description="Currency ticker (e.g., BTC_USD, ETH_USD)"),
+    interval: CandleInterval = Query(..., description="Candle interval (1m, 5m, 1h, 1d)"),
+    start_date: Optional[str] = Query(None, description="Start date in ISO format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)"),
+    end_date: Optional[str] = Query(None, description="End date in ISO format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Get OHLC candles for a ticker within a date range.
+    
+    Args:
+        ticker: Currency ticker (required query parameter)
+        interval: Candle interval (required query parameter)
+        start_date: Start date in ISO format (optional)
+        end_date: End date in ISO format (optional)
+        db: Async database session dependency
+        
+    Returns:
+        List of candles ordered by bucket ascending
+    """
+    service = AsyncCandleService(db)
+    
+    start_dt = _parse_date(start_date, "start_date")
+    end_dt = _parse_date(end_date, "end_date")
     
-    return PriceListResponse(
+    candles = await service.get_candles(ticker, interval.value, start_dt, end_dt)
+    
+    return CandleListResponse(
         ticker=ticker,
-        count=len(prices),
-        prices=[TickerPriceResponse.model_validate(price) for price in prices]
+        interval=interval.value,
+        count=len(candles),
+        candles=[CandleResponse.model_validate(candle) for candle in candles]
     )
-
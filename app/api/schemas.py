@@ -1,8 +1,30 @@
 """
 Pydantic schemas for API request/response validation.
 """
+from enum import Enum
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, Optional
+
+
+class PriceFormat(str, Enum):
+    """Output formats supported by the price list endpoints."""
+    json = "json"
+    columnar = "columnar"
+    ndjson = "ndjson"
+
+
+class DownsampleMethod(str, Enum):
+    """Downsampling methods supported by the price list endpoints."""
+    lttb = "lttb"
+    minmax = "minmax"
+
+
+class CandleInterval(str, Enum):
+    """Candle intervals served by the candles endpoint."""
+    m1 = "1m"
+    m5 = "5m"
+    h1 = "1h"
+    d1 = "1d"
 
 
 class TickerPriceResponse(BaseModel):
@@ -22,6 +44,16 @@ class PriceListResponse(BaseModel):
     ticker: str
     count: int
     prices: list[TickerPriceResponse]
+    next_cursor: Optional[str] = None
+
+
+class ColumnarPriceListResponse(BaseModel):
+    """Response schema for a list of prices as parallel arrays (format=columnar)."""
+    ticker: str
+    count: int
+    timestamps: list[int]
+    prices: list[float]
+    next_cursor: Optional[str] = None
 
 
 class LatestPriceResponse(BaseModel):
@@ -31,6 +63,88 @@ class LatestPriceResponse(BaseModel):
     timestamp: Optional[int] = None
 
 
+class PricePointResponse(BaseModel):
+    """A price and the UNIX timestamp it was recorded at."""
+    price: float
+    timestamp: int
+
+
+class LatestPricesResponse(BaseModel):
+    """Response schema for the latest prices of many tickers."""
+    count: int
+    prices: Dict[str, Optional[PricePointResponse]]
+
+
+class PriceGapResponse(BaseModel):
+    """Response schema for a run of missed ingestion slots."""
+    ticker: str
+    start: int
+    end: int
+    missing: int
+
+
+class GapReportResponse(BaseModel):
+    """Response schema for the gap report of several tickers."""
+    start: int
+    end: int
+    count: int
+    missing: Dict[str, int]
+    gaps: list[PriceGapResponse]
+
+
+class CandleResponse(BaseModel):
+    """Response schema for a single OHLC candle."""
+    bucket: int
+    open: float
+    high: float
+    low: float
+    close: float
+    count: int
+    
+    class Config:
+        from_attributes = True
+
+
+class CandleListResponse(BaseModel):
+    """Response schema for list of candles."""
+    ticker: str
+    interval: str
+    count: int
+    candles: list[CandleResponse]
+
+
+class RollingVolatilityResponse(BaseModel):
+    """Summary of the rolling realized volatility series."""
+    last: float
+    min: float
+    max: float
+    mean: float
+
+
+class PriceStatsResponse(BaseModel):
+    """Response schema for price statistics over a date range."""
+    ticker: str
+    count: int
+    window: int
+    start_timestamp: Optional[int] = None
+    end_timestamp: Optional[int] = None
+    first: Optional[float] = None
+    last: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    twap: Optional[float] = None
+    simple_return: Optional[float] = None
+    log_return: Optional[float] = None
+    mean_simple_return: Optional[float] = None
+    mean_log_return: Optional[float] = None
+    volatility: Optional[float] = None
+    rolling_volatility: Optional[RollingVolatilityResponse] = None
+    max_drawdown: Optional[float] = None
+    drawdown_peak_timestamp: Optional[int] = None
+    drawdown_trough_timestamp: Optional[int] = None
+
+
 class ErrorResponse(BaseModel):
     """Error response schema."""
     error: str
@@ -0,0 +1,127 @@
+"""
+Circuit breakers that fail Deribit requests fast while an endpoint is down.
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+import aiohttp
+from app.config import settings
+from app.metrics import DERIBIT_CIRCUIT_OPEN
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(aiohttp.ClientError):
+    """Raised instead of sending a request while the endpoint's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one endpoint.
+    
+    After ``failure_threshold`` failures in a row the circuit opens and
+    calls fail immediately. Once ``reset_timeout`` has passed, a single
+    trial call is let through (half-open): success closes the circuit,
+    failure opens it for another ``reset_timeout``.
+    """
+    
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        """
+        Initialize the breaker.
+        
+        Args:
+            name: Endpoint name, used in errors and metrics
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial call
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """Current state: 'closed', 'open' or 'half_open'."""
+        if self._opened_at is None:
+            return CLOSED
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return OPEN
+        return HALF_OPEN
+    
+    def before_call(self):
+        """
+        Check that a call may be made.
+        
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a
+                trial call already in flight
+        """
+        with self._lock:
+            state = self.state
+            if state == CLOSED:
+                return
+            
+            now = time.monotonic()
+            if state == HALF_OPEN and (
+                self._trial_started is None or now - self._trial_started >= self.reset_timeout
+            ):
+                # A trial that never reported back (e.g. cancelled) expires too
+                self._trial_started = now
+                return
+        
+        raise CircuitOpenError(f"Deribit {self.name} circuit is open after {self.failures} failures")
+    
+    def record_success(self):
+        """Close the circuit and reset the failure count."""
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial_started = None
+        DERIBIT_CIRCUIT_OPEN.labels(endpoint=self.name).set(0)
+    
+    def record_failure(self):
+        """Count a failure, opening (or reopening) the circuit at the threshold."""
+        with self._lock:
+            self.failures += 1
+            if self._opened_at is None and self.failures < self.failure_threshold:
+                return
+            self._opened_at = time.monotonic()
+            self._trial_started = None
+        DERIBIT_CIRCUIT_OPEN.labels(endpoint=self.name).set(1)
+
+
+_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(base_url: str, endpoint: str) -> CircuitBreaker:
+    """
+    Return the process-wide breaker for an endpoint of a Deribit API.
+    
+    Args:
+        base_url: API base URL
+        endpoint: JSON-RPC method (e.g., 'public/get_index_price')
+        
+    Returns:
+        CircuitBreaker configured from settings
+    """
+    key = (base_url, endpoint)
+    with _breakers_lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker(
+                endpoint,
+                settings.deribit_breaker_failure_threshold,
+                settings.deribit_breaker_reset_timeout
+            )
+        return _breakers[key]
+
+
+def reset_circuit_breakers():
+    """Forget every breaker, closing all circuits."""
+    with _breakers_lock:
+        _breakers.clear()
@@ -1,27 +1,68 @@
 """
 Deribit API client for fetching cryptocurrency index prices.
 """
+import asyncio
+import itertools
+import random
+import time
 import aiohttp
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from app.config import settings
+from app.clients.circuit_breaker import get_circuit_breaker
+from app.clients.rate_limit import AsyncRateLimiter, get_rate_limiter
+from app.metrics import DERIBIT_REQUEST_SECONDS, DERIBIT_RETRIES
+
+PRICE_INDEX_CHANNEL = "deribit_price_index.{}"
+# Deribit error code for exceeded request credits
+TOO_MANY_REQUESTS = 10028
+
+
+class _RetryableError(Exception):
+    """A failed attempt that is worth retrying."""
+    
+    def __init__(self, message: str, reason: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
 
 
 class DeribitClient:
     """
     Client for interacting with Deribit API to fetch index prices.
     
-    Uses aiohttp for asynchronous HTTP requests.
+    Uses aiohttp for asynchronous HTTP requests and for the JSON-RPC
+    WebSocket subscription feed. HTTP requests are rate limited in Deribit
+    credits, retried on throttling and transient errors, and fail fast
+    through a per-endpoint circuit breaker while Deribit is degraded.
     """
     
-    def __init__(self, base_url: str = None):
+    def __init__(
+        self,
+        base_url: str = None,
+        ws_url: str = None,
+        rate_limiter: Optional[AsyncRateLimiter] = None,
+        max_retries: Optional[int] = None,
+        session: Optional[aiohttp.ClientSession] = None
+    ):
         """
         Initialize Deribit client.
         
         Args:
             base_url: Base URL for Deribit API. Defaults to settings value.
+            ws_url: WebSocket URL for Deribit API. Defaults to settings value.
+            rate_limiter: Credit limiter every HTTP request waits on (optional,
+                defaults to the process-wide one from get_rate_limiter)
+            max_retries: Retries per request (optional, defaults to settings value)
+            session: Shared aiohttp session to send requests on (optional); it
+                is left open by close(), its owner closes it
         """
         self.base_url = base_url or settings.deribit_api_url
-        self._session: Optional[aiohttp.ClientSession] = None
+        self.ws_url = ws_url or settings.deribit_ws_url
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.max_retries = settings.deribit_max_retries if max_retries is None else max_retries
+        self._session = session
+        self._owns_session = session is None
+        self._request_ids = itertools.count(1)
     
     async def _get_session(self) -> aiohttp.ClientSession:
         """
@@ -33,11 +74,12 @@ class DeribitClient:
         if self._session is None or self._session.closed:
             timeout = aiohttp.ClientTimeout(total=10)
             self._session = aiohttp.ClientSession(timeout=timeout)
+            self._owns_session = True
         return self._session
     
     async def close(self):
-        """Close the aiohttp session."""
-        if self._session and not self._session.closed:
+        """Close the aiohttp session, unless it was passed in."""
+        if self._owns_session and self._session and not self._session.closed:
             await self._session.close()
     
     async def get_index_price(self, currency: str) -> Dict[str, float]:
@@ -45,46 +87,255 @@ class DeribitClient:
         Fetch index price for a given currency from Deribit.
         
         Args:
-            currency: Currency code (e.g., 'BTC', 'ETH')
-            
+            currency: Currency code (e.g., 'BTC', 'ETH'), quoted in USD, or a
+                full index name (e.g., 'SOL_USDC')
+                
         Returns:
             Dictionary containing 'index_price' and 'timestamp'
             
         Raises:
-            aiohttp.ClientError: If request fails
+            aiohttp.ClientError: If request fails after retries, or the
+                endpoint's circuit is open (CircuitOpenError)
             ValueError: If currency is invalid or response is malformed
         """
+        index_name = currency if "_" in currency else f"{currency}_USD"
+        result = await self._request("public/get_index_price", {"index_name": index_name.lower()})
+        
+        index_price = result.get("index_price")
+        timestamp = result.get("timestamp")
+        
+        if index_price is None or timestamp is None:
+            raise ValueError("Invalid response format from Deribit API")
+        
+        # Deribit returns timestamp in milliseconds, convert to seconds (UNIX timestamp)
+        timestamp_value = int(timestamp)
+        # If timestamp is in milliseconds (13 digits), convert to seconds
+        timestamp_seconds = timestamp_value // 1000 if timestamp_value > 1e10 else timestamp_value
+        
+        return {
+            "index_price": float(index_price),
+            "timestamp": timestamp_seconds
+        }
+    
+    async def get_chart_data(
+        self,
+        instrument_name: str,
+        start_timestamp: int,
+        end_timestamp: int,
+        resolution: str = "1"
+    ) -> List[Tuple[int, float]]:
+        """
+        Fetch historical candles from ``public/get_tradingview_chart_data``.
+        
+        Args:
+            instrument_name: Deribit instrument (e.g., 'BTC-PERPETUAL')
+            start_timestamp: Range start, UNIX seconds (inclusive)
+            end_timestamp: Range end, UNIX seconds (inclusive)
+            resolution: Candle resolution in minutes, or '1D'
+            
+        Returns:
+            List of (timestamp in seconds, close price), oldest first; empty
+            if Deribit has no data for the range
+            
+        Raises:
+            aiohttp.ClientError: If request fails after retries, or the
+                endpoint's circuit is open (CircuitOpenError)
+            ValueError: If Deribit returns an error or the response is malformed
+        """
+        result = await self._request("public/get_tradingview_chart_data", {
+            "instrument_name": instrument_name,
+            "start_timestamp": start_timestamp * 1000,
+            "end_timestamp": end_timestamp * 1000,
+            "resolution": resolution,
+        })
+        
+        if result.get("status") == "no_data":
+            return []
+        
+        ticks = result.get("ticks")
+        closes = result.get("close")
+        if ticks is None or closes is None or len(ticks) != len(closes):
+            raise ValueError("Invalid response format from Deribit API")
+        
+        return [(int(tick) // 1000, float(close)) for tick, close in zip(ticks, closes)]
+    
+    async def _request(self, method: str, params: Dict) -> Dict:
+        """
+        Call a public HTTP method and return its ``result``.
+        
+        Each attempt spends ``settings.deribit_request_cost`` credits from
+        the rate limiter and goes through the method's circuit breaker.
+        Throttling (HTTP 429 or error 10028), 5xx responses, timeouts and
+        connection errors are retried with full-jitter exponential backoff;
+        all but throttling count as failures for the breaker.
+        
+        Args:
+            method: JSON-RPC method (e.g., 'public/get_index_price')
+            params: Query parameters
+            
+        Returns:
+            The response's ``result`` object
+            
+        Raises:
+            aiohttp.ClientError: If every attempt failed, the error is not
+                retryable, or the circuit is open (CircuitOpenError)
+            ValueError: If Deribit returns a non-retryable error
+        """
+        breaker = get_circuit_breaker(self.base_url, method)
+        name = method.split("/")[-1]
+        attempt = 0
+        
+        while True:
+            breaker.before_call()
+            await self.rate_limiter.acquire(settings.deribit_request_cost)
+            started = time.perf_counter()
+            status = "error"
+            
+            try:
+                result = await self._request_once(method, params)
+                status = "ok"
+            except _RetryableError as e:
+                # Throttling is our own excess, not Deribit being degraded
+                if e.reason != "throttled":
+                    breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise aiohttp.ClientError(f"Deribit {method} failed after {attempt + 1} attempts: {e}")
+                failure = e
+            except (aiohttp.ClientError, ValueError):
+                # Deribit answered; the request itself was wrong
+                breaker.record_success()
+                raise
+            else:
+                breaker.record_success()
+                return result
+            finally:
+                DERIBIT_REQUEST_SECONDS.labels(method=name, status=status).observe(
+                    time.perf_counter() - started
+                )
+            
+            DERIBIT_RETRIES.labels(method=name, reason=failure.reason).inc()
+            await asyncio.sleep(self._backoff(attempt, failure.retry_after))
+            attempt += 1
+    
+    async def _request_once(self, method: str, params: Dict) -> Dict:
+        """Send one request, classifying failures as retryable or not."""
         session = await self._get_session()
-        url = f"{self.base_url}/public/get_index_price"
-        params = {"index_name": f"{currency}_USD"}
         
         try:
-            async with session.get(url, params=params) as response:
+            async with session.get(f"{self.base_url}/{method}", params=params) as response:
+                if response.status == 429 or response.status >= 500:
+                    retry_after = response.headers.get("Retry-After")
+                    raise _RetryableError(
+                        f"HTTP {response.status}",
+                        "throttled" if response.status == 429 else "server_error",
+                        float(retry_after) if retry_after and retry_after.isdigit() else None
+                    )
                 response.raise_for_status()
                 data = await response.json()
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            raise _RetryableError(str(e) or type(e).__name__, "connection")
+        
+        if data.get("error"):
+            error = data["error"]
+            if error.get("code") == TOO_MANY_REQUESTS:
+                raise _RetryableError("too_many_requests", "throttled")
+            raise ValueError(f"Deribit API error: {error.get('message', 'Unknown error')}")
+        
+        return data.get("result", {})
+    
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential delay before retry ``attempt + 1``."""
+        ceiling = min(settings.deribit_retry_max_delay, settings.deribit_retry_base_delay * 2 ** attempt)
+        delay = random.uniform(0, ceiling)
+        return max(delay, retry_after) if retry_after else delay
+    
+    async def stream_index_prices(
+        self,
+        index_names: List[str],
+        heartbeat_interval: Optional[float] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Subscribe to index price channels and yield updates as they arrive.
+        
+        Keeps a single WebSocket open for all indexes. Deribit heartbeats are
+        enabled and answered; if the connection drops or goes silent for
+        several heartbeat intervals, the client reconnects with exponential
+        backoff and resubscribes. Iteration only ends when the caller stops.
+        
+        Args:
+            index_names: Index names to subscribe to (e.g., ['BTC_USD', 'SOL_USDC'])
+            heartbeat_interval: Heartbeat interval in seconds. Defaults to settings value.
+            
+        Yields:
+            Dictionary containing 'index_name', 'index_price' and 'timestamp'
+            
+        Raises:
+            ValueError: If Deribit rejects the subscription
+        """
+        channels = [PRICE_INDEX_CHANNEL.format(name.lower()) for name in index_names]
+        interval = heartbeat_interval or settings.deribit_ws_heartbeat_interval
+        delay = settings.deribit_ws_reconnect_min_delay
+        
+        while True:
+            try:
+                async for update in self._subscribe(channels, interval):
+                    delay = settings.deribit_ws_reconnect_min_delay
+                    yield update
+            except (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError) as e:
+                print(f"Deribit WebSocket disconnected: {str(e)}; reconnecting in {delay:.1f}s")
+            
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.deribit_ws_reconnect_max_delay)
+    
+    async def _subscribe(self, channels: List[str], heartbeat_interval: float) -> AsyncIterator[Dict]:
+        """
+        Run one WebSocket connection: subscribe, answer heartbeats, yield prices.
+        
+        Raises:
+            ConnectionError: When the server closes the connection
+            asyncio.TimeoutError: When nothing is received for three heartbeat intervals
+            ValueError: If Deribit returns an error for a request
+        """
+        session = await self._get_session()
+        
+        async with session.ws_connect(self.ws_url, receive_timeout=heartbeat_interval * 3) as ws:
+            await self._ws_request(ws, "public/set_heartbeat", {"interval": heartbeat_interval})
+            await self._ws_request(ws, "public/subscribe", {"channels": channels})
+            
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    break
+                
+                data = msg.json()
+                method = data.get("method")
                 
                 if data.get("error"):
-                    error_msg = data.get("error", {}).get("message", "Unknown error")
+                    error_msg = data["error"].get("message", "Unknown error")
                     raise ValueError(f"Deribit API error: {error_msg}")
                 
-                result = data.get("result", {})
-                index_price = result.get("index_price")
-                timestamp = result.get("timestamp")
-                
-                if index_price is None or timestamp is None:
-                    raise ValueError("Invalid response format from Deribit API")
-                
-                # Deribit returns timestamp in milliseconds, convert to seconds (UNIX timestamp)
-                timestamp_value = int(timestamp)
-                # If timestamp is in milliseconds (13 digits), convert to seconds
-                timestamp_seconds = timestamp_value // 1000 if timestamp_value > 1e10 else timestamp_value
-                
-                return {
-                    "index_price": float(index_price),
-                    "timestamp": timestamp_seconds
-                }
-        except aiohttp.ClientError as e:
-            raise aiohttp.ClientError(f"Failed to fetch price from Deribit: {str(e)}")
+                if method == "heartbeat":
+                    if data.get("params", {}).get("type") == "test_request":
+                        await self._ws_request(ws, "public/test", {})
+                elif method == "subscription":
+                    price = data["params"]["data"]
+                    timestamp = int(price["timestamp"])
+                    yield {
+                        "index_name": price["index_name"],
+                        "index_price": float(price["price"]),
+                        "timestamp": timestamp // 1000 if timestamp > 1e10 else timestamp,
+                    }
+        
+        raise ConnectionError("WebSocket closed by server")
+    
+    async def _ws_request(self, ws: aiohttp.ClientWebSocketResponse, method: str, params: Dict):
+        """Send a JSON-RPC request; the reply is handled by the receive loop."""
+        await ws.send_json({
+            "jsonrpc": "2.0",
+            "id": next(self._request_ids),
+            "method": method,
+            "params": params,
+        })
     
     async def __aenter__(self):
         """Async context manager entry."""
@@ -0,0 +1,335 @@
+"""
+Local stand-in for the Deribit API, for offline tests and benchmarks.
+
+Implements the subset of the Deribit API used by DeribitClient:
+
+- HTTP ``GET /api/v2/public/get_index_price`` and
+  ``GET /api/v2/public/get_tradingview_chart_data`` (synthetic one-minute
+  history), with configurable latency, error rate and throttling
+- JSON-RPC over WebSocket: ``public/subscribe`` on
+  ``deribit_price_index.<index>`` channels, ``public/set_heartbeat`` /
+  ``public/test`` and periodic price notifications
+  
+Run standalone with ``python -m app.clients.deribit_stub --port 8765``.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, Optional, Set
+from aiohttp import web, WSMsgType
+
+PRICE_INDEX_PREFIX = "deribit_price_index."
+
+
+class DeribitStubServer:
+    """
+    Minimal Deribit-compatible server backed by aiohttp.web.
+    
+    Prices follow a small random walk per index. Counters for subscriptions
+    and heartbeat replies let tests assert on client behaviour.
+    """
+    
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        publish_interval: float = 0.1,
+        prices: Optional[Dict[str, float]] = None,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: float = 0.0,
+        rate_burst: int = 1
+    ):
+        """
+        Initialize the stub server.
+        
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            publish_interval: Seconds between price notifications per channel
+            prices: Initial prices keyed by lowercase index name
+            latency: Seconds each HTTP request is delayed before responding
+            error_rate: Fraction of HTTP requests (0-1) answered with a 500 error
+            rate_limit: HTTP requests per second before requests are throttled
+                with a 429 ``too_many_requests`` error (0 disables throttling)
+            rate_burst: Requests allowed at once before ``rate_limit`` applies
+        """
+        self.host = host
+        self.port = port
+        self.publish_interval = publish_interval
+        self.prices: Dict[str, float] = dict(prices or {"btc_usd": 45000.0, "eth_usd": 2500.0})
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+        self._tokens = float(rate_burst)
+        self._tokens_updated = time.monotonic()
+        self.subscribe_count = 0
+        self.heartbeat_replies = 0
+        self.http_requests = 0
+        self.http_errors = 0
+        self.http_throttled = 0
+        self._peers: Set = set()
+        self._sockets: Set[web.WebSocketResponse] = set()
+        self._runner: Optional[web.AppRunner] = None
+        
+        self.app = web.Application()
+        self.app.router.add_get("/ws/api/v2", self._handle_ws)
+        self.app.router.add_get("/api/v2/public/get_index_price", self._handle_get_index_price)
+        self.app.router.add_get("/api/v2/public/get_tradingview_chart_data", self._handle_get_chart_data)
+    
+    @property
+    def http_connections(self) -> int:
+        """Distinct client connections that sent HTTP requests."""
+        return len(self._peers)
+    
+    @property
+    def ws_url(self) -> str:
+        """WebSocket URL clients should connect to."""
+        return f"ws://{self.host}:{self.port}/ws/api/v2"
+    
+    @property
+    def api_url(self) -> str:
+        """HTTP API base URL clients should use."""
+        return f"http://{self.host}:{self.port}/api/v2"
+    
+    async def start(self):
+        """Start serving in the current event loop."""
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+    
+    async def stop(self):
+        """Close client connections and stop serving."""
+        await self.drop_connections()
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+    
+    async def drop_connections(self):
+        """Close every open WebSocket, as Deribit does during maintenance."""
+        for ws in list(self._sockets):
+            await ws.close()
+    
+    def _next_price(self, index_name: str) -> float:
+        """Advance the random walk for an index and return the new price."""
+        price = self.prices.setdefault(index_name, 100.0)
+        price = round(price * (1 + random.uniform(-0.0005, 0.0005)), 2)
+        self.prices[index_name] = price
+        return price
+    
+    def _throttled(self) -> bool:
+        """Take a request token, as Deribit spends credits; True if none is left."""
+        if not self.rate_limit:
+            return False
+        
+        now = time.monotonic()
+        self._tokens = min(self.rate_burst, self._tokens + (now - self._tokens_updated) * self.rate_limit)
+        self._tokens_updated = now
+        if self._tokens < 1:
+            return True
+        self._tokens -= 1
+        return False
+    
+    async def _simulate_request(self, request: web.Request) -> Optional[web.Response]:
+        """Apply throttling and latency; return an error response for failed requests."""
+        self.http_requests += 1
+        self._peers.add(request.transport.get_extra_info("peername"))
+        if self._throttled():
+            self.http_throttled += 1
+            return web.json_response(
+                {"jsonrpc": "2.0", "error": {"code": 10028, "message": "too_many_requests"}},
+                status=429
+            )
+        
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        
+        if self.error_rate and random.random() < self.error_rate:
+            self.http_errors += 1
+            return web.json_response(
+                {"jsonrpc": "2.0", "error": {"code": 11999, "message": "stub failure"}},
+                status=500
+            )
+        return None
+    
+    @staticmethod
+    def history_price(instrument_name: str, timestamp: int) -> float:
+        """Deterministic synthetic close price of an instrument at a timestamp."""
+        base = 45000.0 if instrument_name.upper().startswith("BTC") else 2500.0
+        return round(base + (timestamp // 60) % 1000 / 10, 2)
+    
+    async def _handle_get_chart_data(self, request: web.Request) -> web.Response:
+        """Serve ``public/get_tradingview_chart_data`` with one candle per resolution step."""
+        error = await self._simulate_request(request)
+        if error is not None:
+            return error
+        
+        instrument_name = request.query.get("instrument_name", "")
+        step = int(request.query.get("resolution", "1")) * 60
+        start = int(request.query["start_timestamp"]) // 1000
+        end = int(request.query["end_timestamp"]) // 1000
+        ticks = list(range(start + (-start) % step, end + 1, step))
+        
+        if not ticks:
+            return web.json_response({"jsonrpc": "2.0", "result": {"status": "no_data"}})
+        
+        closes = [self.history_price(instrument_name, tick) for tick in ticks]
+        return web.json_response({
+            "jsonrpc": "2.0",
+            "result": {
+                "status": "ok",
+                "ticks": [tick * 1000 for tick in ticks],
+                "open": closes,
+                "high": closes,
+                "low": closes,
+                "close": closes,
+                "volume": [0.0] * len(ticks),
+            },
+        })
+    
+    async def _handle_get_index_price(self, request: web.Request) -> web.Response:
+        """Serve ``public/get_index_price`` after the configured latency."""
+        error = await self._simulate_request(request)
+        if error is not None:
+            return error
+        
+        index_name = request.query.get("index_name", "")
+        return web.json_response({
+            "jsonrpc": "2.0",
+            "result": {
+                "index_price": self._next_price(index_name),
+                "estimated_delivery_price": self.prices[index_name],
+                "timestamp": int(time.time() * 1000),
+            },
+        })
+    
+    async def _publish(self, ws: web.WebSocketResponse, channels: Set[str]):
+        """Push price notifications for subscribed channels until closed."""
+        try:
+            await self._publish_loop(ws, channels)
+        except ConnectionResetError:
+            pass
+    
+    async def _publish_loop(self, ws: web.WebSocketResponse, channels: Set[str]):
+        """Send one notification per channel every publish interval."""
+        while not ws.closed:
+            for channel in list(channels):
+                index_name = channel[len(PRICE_INDEX_PREFIX):]
+                await ws.send_json({
+                    "jsonrpc": "2.0",
+                    "method": "subscription",
+                    "params": {
+                        "channel": channel,
+                        "data": {
+                            "index_name": index_name,
+                            "price": self._next_price(index_name),
+                            "timestamp": int(time.time() * 1000),
+                        },
+                    },
+                })
+            await asyncio.sleep(self.publish_interval)
+    
+    async def _heartbeat(self, ws: web.WebSocketResponse, interval: float):
+        """Send heartbeat test requests the way Deribit does."""
+        while not ws.closed:
+            await asyncio.sleep(interval)
+            try:
+                await ws.send_json({
+                    "jsonrpc": "2.0",
+                    "method": "heartbeat",
+                    "params": {"type": "test_request"},
+                })
+            except ConnectionResetError:
+                return
+    
+    async def _handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        """Serve one JSON-RPC WebSocket connection."""
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._sockets.add(ws)
+        
+        channels: Set[str] = set()
+        tasks = [asyncio.create_task(self._publish(ws, channels))]
+        
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                
+                request_data = json.loads(msg.data)
+                method = request_data.get("method")
+                params = request_data.get("params", {})
+                reply = {"jsonrpc": "2.0", "id": request_data.get("id")}
+                
+                if method == "public/subscribe":
+                    requested = params.get("channels", [])
+                    invalid = [c for c in requested if not c.startswith(PRICE_INDEX_PREFIX)]
+                    if invalid:
+                        reply["error"] = {"code": 10001, "message": f"Invalid channels: {invalid}"}
+                    else:
+                        channels.update(requested)
+                        self.subscribe_count += 1
+                        reply["result"] = requested
+                elif method == "public/set_heartbeat":
+                    tasks.append(asyncio.create_task(self._heartbeat(ws, float(params["interval"]))))
+                    reply["result"] = "ok"
+                elif method == "public/test":
+                    self.heartbeat_replies += 1
+                    reply["result"] = {"version": "stub"}
+                else:
+                    reply["error"] = {"code": -32601, "message": "Method not found"}
+                
+                await ws.send_json(reply)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._sockets.discard(ws)
+        
+        return ws
+    
+    async def __aenter__(self):
+        """Async context manager entry."""
+        await self.start()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit."""
+        await self.stop()
+
+
+async def _serve_forever(server: DeribitStubServer):
+    """Run the stub until cancelled."""
+    async with server:
+        print(f"Deribit stub listening on {server.api_url} and {server.ws_url}")
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local Deribit API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--publish-interval", type=float, default=1.0)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every HTTP request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of HTTP requests that fail")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second before 429s (0: off)")
+    parser.add_argument("--rate-burst", type=int, default=1, help="Requests allowed at once under --rate-limit")
+    args = parser.parse_args()
+    
+    server = DeribitStubServer(
+        args.host,
+        args.port,
+        args.publish_interval,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        rate_burst=args.rate_burst
+    )
+    try:
+        asyncio.run(_serve_forever(server))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,81 @@
+"""
+Client-side rate limiting for Deribit requests.
+"""
+import asyncio
+import threading
+import time
+from typing import Optional
+from app.config import settings
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket shared by every coroutine that calls Deribit.
+    
+    Tokens refill continuously at ``rate`` per second up to ``burst``. A
+    request takes its cost in tokens, waiting until they are available, so
+    any number of concurrent callers together stay under the limit.
+    
+    Waits are reserved up front (the balance may go negative), so callers
+    are served in arrival order and no asyncio primitive ties the limiter to
+    one event loop; Celery tasks that each run their own loop can share it.
+    """
+    
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """
+        Initialize the limiter.
+        
+        Args:
+            rate: Tokens added per second
+            burst: Bucket size (optional, defaults to one second of ``rate``)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst or max(1, rate)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _reserve(self, tokens: float) -> float:
+        """Take ``tokens`` and return how long the caller must wait for them."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+    
+    async def acquire(self, tokens: float = 1.0):
+        """
+        Wait until ``tokens`` are available and take them.
+        
+        Callers are served in arrival order.
+        
+        Args:
+            tokens: Tokens to take (at most ``burst``)
+        """
+        delay = self._reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+_shared_limiter: Optional[AsyncRateLimiter] = None
+
+
+def get_rate_limiter() -> AsyncRateLimiter:
+    """
+    Return the process-wide limiter for Deribit's credit model.
+    
+    Deribit gives each client a pool of ``DERIBIT_CREDIT_LIMIT`` credits that
+    refills at ``DERIBIT_CREDIT_REFILL_RATE`` per second; every request
+    spends ``DERIBIT_REQUEST_COST``. All DeribitClients in the process draw
+    from the same bucket unless they are given their own limiter.
+    
+    Returns:
+        Shared AsyncRateLimiter measured in credits
+    """
+    global _shared_limiter
+    if _shared_limiter is None:
+        _shared_limiter = AsyncRateLimiter(settings.deribit_credit_refill_rate, settings.deribit_credit_limit)
+    return _shared_limiter
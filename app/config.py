@@ -2,7 +2,7 @@
 Application configuration settings.
 """
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -20,8 +20,101 @@ class Settings(BaseSettings):
     redis_port: int = 6379
     redis_db: int = 0
     
+    # Latest-price cache settings (Redis pub/sub)
+    price_cache_enabled: bool = True
+    price_channel: str = "prices:latest"
+    price_cache_reconnect_min_delay: float = 0.5
+    price_cache_reconnect_max_delay: float = 10.0
+    
     # Deribit API settings
     deribit_api_url: str = "https://www.deribit.com/api/v2"
+    deribit_ws_url: str = "wss://www.deribit.com/ws/api/v2"
+    deribit_ws_heartbeat_interval: int = 10
+    deribit_ws_reconnect_min_delay: float = 1.0
+    deribit_ws_reconnect_max_delay: float = 30.0
+    # Deribit credit model: a pool that refills per second, a cost per request
+    deribit_credit_limit: int = 50000
+    deribit_credit_refill_rate: int = 10000
+    deribit_request_cost: int = 500
+    deribit_max_retries: int = 3
+    deribit_retry_base_delay: float = 0.2
+    deribit_retry_max_delay: float = 5.0
+    deribit_breaker_failure_threshold: int = 5
+    deribit_breaker_reset_timeout: float = 30.0
+    # Worker-lifetime HTTP pool; keep-alive must outlast the ingest interval
+    deribit_pool_size: int = 100
+    deribit_keepalive_timeout: float = 75.0
+    deribit_dns_cache_ttl: int = 300
+    
+    # Ingestion settings
+    tickers: List[str] = ["BTC_USD", "ETH_USD"]
+    ingest_concurrency: int = 10
+    ingest_interval: int = 60
+    # Per-ticker polling cadence in seconds for the ingestion daemon
+    ingest_cadences: Dict[str, int] = {}
+    # "daemon" (app.tasks.poll_ingestion) or "beat" (fetch_and_save_prices via Celery beat)
+    ingest_scheduler: str = "daemon"
+    
+    # History backfill settings
+    backfill_resolution: str = "1"
+    backfill_chunk_size: int = 1000
+    backfill_concurrency: int = 8
+    backfill_instruments: Dict[str, str] = {}
+    
+    # Gap scan and repair of missed ingestion slots (Celery beat)
+    gap_scan_interval: int = 900
+    gap_scan_lookback: int = 86400
+    
+    # Buffered writer settings
+    write_batch_size: int = 500
+    write_flush_interval: float = 1.0
+    write_buffer_size: int = 10000
+    write_put_timeout: float = 5.0
+    write_use_copy: bool = False
+    # Retries of a failed flush, with exponential backoff between attempts
+    write_max_retries: int = 3
+    write_retry_base_delay: float = 0.5
+    write_retry_max_delay: float = 5.0
+    
+    # Partitioning and retention settings for ticker_prices
+    price_partitioning: bool = False
+    partition_months_ahead: int = 2
+    partition_raw_retention_days: int = 90
+    partition_downsample_interval: int = 3600
+    partition_drop_after_days: Optional[int] = None
+    
+    # Compact storage layout for ticker_prices (after compact_prices.py migrate)
+    compact_prices: bool = False
+    
+    # Read replicas for API queries (postgresql:// URLs); empty reads from the primary
+    read_replica_urls: List[str] = []
+    replica_pool_size: int = 10
+    replica_max_overflow: int = 20
+    replica_check_interval: float = 5.0
+    # Replay lag in seconds above which reads fall back to the primary
+    replica_max_lag: Optional[float] = None
+    
+    # Result cache of sealed historical blocks for range reads
+    range_cache_enabled: bool = True
+    range_cache_bucket: int = 3600
+    range_cache_max_bytes: int = 64 * 1024 * 1024
+    # Share blocks between API processes through Redis
+    range_cache_redis: bool = False
+    range_cache_redis_ttl: int = 86400
+    range_cache_redis_prefix: str = "prices:range"
+    
+    # API settings
+    max_page_size: int = 10000
+    max_latest_tickers: int = 100
+    stream_batch_size: int = 1000
+    # max-age of ranges that ended in the past; history still changes on
+    # backfill, gap repair and retention downsampling
+    history_max_age: int = 3600
+    stream_queue_size: int = 16
+    stream_heartbeat_interval: float = 15.0
+    
+    # Metrics settings (HTTP port for worker processes; the API serves /metrics)
+    metrics_port: int = 9100
     
     # Celery settings
     celery_broker_url: Optional[str] = None
@@ -37,12 +130,17 @@ class Settings(BaseSettings):
         """Construct async PostgreSQL database URL."""
         return f"postgresql+asyncpg://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
     
+    @property
+    def redis_url(self) -> str:
+        """Construct Redis URL."""
+        return f"redis://{self.redis_host}:{self.redis_port}/{self.redis_db}"
+    
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         if self.celery_broker_url is None:
-            self.celery_broker_url = f"redis://{self.redis_host}:{self.redis_port}/{self.redis_db}"
+            self.celery_broker_url = self.redis_url
         if self.celery_result_backend is None:
-            self.celery_result_backend = f"redis://{self.redis_host}:{self.redis_port}/{self.redis_db}"
+            self.celery_result_backend = self.redis_url
     
     class Config:
         env_file = ".env"
@@ -2,9 +2,11 @@
 Database connection and session management.
 """
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.replicas import create_read_router
 
 # Create database engine
 engine = create_engine(
@@ -17,6 +19,25 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create async database engine (asyncpg) for the API
+async_engine = create_async_engine(
+    settings.async_database_url,
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20
+)
+
+# Create async session factory
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Round-robin router of API reads over the read replicas (primary if none)
+read_router = create_read_router(AsyncSessionLocal)
+
 # Base class for models
 Base = declarative_base()
 
@@ -32,3 +53,21 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    """
+    Dependency function to get an async database session.
+    Yields an AsyncSession and ensures it's closed after use.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """
+    Dependency function to get an async session for read-only queries.
+    Yields a session on a healthy read replica, or on the primary if none
+    is configured or available, and ensures it's closed after use.
+    """
+    async with read_router.session() as db:
+        yield db
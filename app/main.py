@@ -1,20 +1,52 @@
 """
 FastAPI application entry point.
 """
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from app.api.routes import router
-from app.database import engine, Base
+from app.config import settings
+from app.database import engine, read_router, Base
+from app.metrics import MetricsMiddleware, metrics_payload
+from app.services.price_cache import LatestPriceCache
+from app.services.range_cache import create_range_cache
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the latest-price and range caches and replica health checks for the process lifetime."""
+    price_cache = LatestPriceCache() if settings.price_cache_enabled else None
+    if price_cache:
+        await price_cache.start()
+    app.state.price_cache = price_cache
+    range_cache = create_range_cache() if settings.range_cache_enabled else None
+    app.state.range_cache = range_cache
+    await read_router.start()
+    
+    yield
+    
+    await read_router.close()
+    app.state.range_cache = None
+    if range_cache:
+        await range_cache.close()
+    app.state.price_cache = None
+    if price_cache:
+        await price_cache.close()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Deribit Price API",
     description="API for retrieving cryptocurrency index prices from Deribit",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Record per-route latency and response size
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(router)
 
@@ -34,3 +66,9 @@ async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
 
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint."""
+    body, content_type = metrics_payload()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,310 @@
+"""
+Prometheus metrics for the API, the Celery worker and the ingestion worker.
+
+Metrics live in the default prometheus_client registry. The API serves them
+at ``/metrics``; worker processes serve them from a small HTTP server started
+with ``start_metrics_server``. When ``PROMETHEUS_MULTIPROC_DIR`` is set
+(prefork Celery workers, several uvicorn workers), values from every process
+are aggregated through prometheus_client's multiprocess mode.
+"""
+import functools
+import inspect
+import os
+import time
+from typing import Callable, Dict, Optional, Tuple
+from celery import signals
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from app.config import settings
+
+# Buckets tuned for sub-millisecond queries up to slow external calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_seconds",
+    "API request handling time",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_RESPONSE_BYTES = Counter(
+    "http_response_bytes",
+    "Response body bytes serialized by the API",
+    ["route"]
+)
+DERIBIT_REQUEST_SECONDS = Histogram(
+    "deribit_request_seconds",
+    "Deribit API request time",
+    ["method", "status"],
+    buckets=LATENCY_BUCKETS
+)
+DERIBIT_RETRIES = Counter(
+    "deribit_retries",
+    "Deribit requests retried after a retryable failure",
+    ["method", "reason"]
+)
+DERIBIT_CIRCUIT_OPEN = Gauge(
+    "deribit_circuit_open",
+    "1 while the circuit breaker of a Deribit endpoint is open",
+    ["endpoint"],
+    multiprocess_mode="livemax"
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_seconds",
+    "Database time per service operation, including commits",
+    ["operation"],
+    buckets=LATENCY_BUCKETS
+)
+DB_ROWS = Counter(
+    "db_rows",
+    "Rows returned or written per service operation",
+    ["operation"]
+)
+DB_READ_SESSIONS = Counter(
+    "db_read_sessions",
+    "API read sessions by target (primary or replica name)",
+    ["target"]
+)
+REPLICA_EJECTIONS = Counter(
+    "db_replica_ejections",
+    "Read replicas taken out of rotation",
+    ["replica", "reason"]
+)
+REPLICA_LAG_SECONDS = Gauge(
+    "db_replica_lag_seconds",
+    "Replay lag of a read replica at its last health check",
+    ["replica"],
+    multiprocess_mode="livemax"
+)
+TASK_SECONDS = Histogram(
+    "celery_task_seconds",
+    "Celery task run time",
+    ["task", "state"],
+    buckets=LATENCY_BUCKETS
+)
+INGEST_ERRORS = Counter(
+    "ingest_errors",
+    "Price ingestion failures",
+    ["ticker", "stage"]
+)
+INGEST_DUPLICATES = Counter(
+    "ingest_duplicates",
+    "Prices skipped because their ticker and timestamp were already stored",
+    ["ticker"]
+)
+SCHEDULER_TICKS = Counter(
+    "scheduler_ticks",
+    "Ingestion scheduler ticks by outcome (ok, error, overrun, missed)",
+    ["job", "outcome"]
+)
+PRICE_GAP_SLOTS = Gauge(
+    "price_gap_slots",
+    "Expected ingestion slots without a price, found by the last gap scan",
+    ["ticker"],
+    multiprocess_mode="livemax"
+)
+SCHEDULER_LAG_SECONDS = Histogram(
+    "scheduler_lag_seconds",
+    "Delay between a scheduled boundary and the start of its run",
+    ["job"],
+    buckets=LATENCY_BUCKETS
+)
+SCHEDULER_RUN_SECONDS = Histogram(
+    "scheduler_run_seconds",
+    "Run time of a scheduled ingestion tick",
+    ["job"],
+    buckets=LATENCY_BUCKETS
+)
+STREAM_SUBSCRIBERS = Gauge(
+    "price_stream_subscribers",
+    "Connected /prices/stream clients",
+    ["transport"],
+    multiprocess_mode="livesum"
+)
+STREAM_DROPPED = Counter(
+    "price_stream_dropped",
+    "Price updates dropped for slow /prices/stream clients"
+)
+RANGE_CACHE_LOOKUPS = Counter(
+    "range_cache_lookups",
+    "Range cache block lookups by tier (memory, redis) and result (hit, miss)",
+    ["tier", "result"]
+)
+RANGE_CACHE_EVICTIONS = Counter(
+    "range_cache_evictions",
+    "Range cache blocks evicted from memory to stay within the size budget"
+)
+RANGE_CACHE_BYTES = Gauge(
+    "range_cache_bytes",
+    "Bytes of price blocks held in the in-process range cache",
+    multiprocess_mode="livesum"
+)
+RANGE_CACHE_BLOCKS = Gauge(
+    "range_cache_blocks",
+    "Price blocks held in the in-process range cache",
+    multiprocess_mode="livesum"
+)
+
+
+def _row_count(result) -> int:
+    """Count rows in a service method's return value."""
+    if result is None:
+        return 0
+    if isinstance(result, int):
+        return result
+    if isinstance(result, tuple) and hasattr(result[0], "__len__"):
+        # (rows, next_cursor) pages and (timestamps, prices) arrays
+        return len(result[0])
+    if isinstance(result, tuple) and isinstance(result[0], int):
+        # (inserted, duplicates) save results
+        return result[0]
+    if isinstance(result, list):
+        return len(result)
+    return 1
+
+
+def track_query(operation: str, rows: Optional[int] = None) -> Callable:
+    """
+    Decorate a sync or async service method to record its duration and row count.
+    
+    The duration is recorded even when the method raises, so failing
+    queries still show up in the histogram.
+    
+    Args:
+        operation: Value of the ``operation`` label
+        rows: Fixed row count per call (optional, for methods whose return
+            value is not a row collection, like single-row aggregates;
+            defaults to counting the return value)
+        
+    Returns:
+        Decorator
+    """
+    histogram = DB_QUERY_SECONDS.labels(operation=operation)
+    row_counter = DB_ROWS.labels(operation=operation)
+    
+    def count(result) -> int:
+        return _row_count(result) if rows is None else rows
+    
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - started)
+                row_counter.inc(count(result))
+                return result
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+            row_counter.inc(count(result))
+            return result
+        return wrapper
+    
+    return decorator
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency and response bytes per route.
+    
+    Routes are labelled by their path template (``/api/v1/prices``), never
+    by the raw URL, so label cardinality stays bounded. Implemented as plain
+    ASGI rather than BaseHTTPMiddleware so streamed responses are not
+    buffered and the per-request overhead stays small.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        status = 500
+        body_bytes = 0
+        
+        async def send_wrapper(message):
+            nonlocal status, body_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                body_bytes += len(message.get("body", b""))
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route_path, str(status)).observe(
+                time.perf_counter() - started
+            )
+            HTTP_RESPONSE_BYTES.labels(route_path).inc(body_bytes)
+
+
+def _registry() -> CollectorRegistry:
+    """Return the registry to expose, aggregating processes in multiprocess mode."""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_payload() -> Tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format.
+    
+    Returns:
+        Tuple of (body, content type)
+    """
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: Optional[int] = None) -> None:
+    """
+    Serve ``/metrics`` over HTTP from a background thread (for workers).
+    
+    Args:
+        port: Port to listen on (optional, defaults to settings.metrics_port)
+    """
+    start_http_server(port or settings.metrics_port, registry=_registry())
+
+
+_task_started: Dict[str, float] = {}
+
+
+def instrument_celery() -> None:
+    """Record the duration of every Celery task and serve worker metrics over HTTP."""
+    @signals.task_prerun.connect(weak=False)
+    def on_task_prerun(task_id=None, **kwargs):
+        _task_started[task_id] = time.perf_counter()
+    
+    @signals.task_postrun.connect(weak=False)
+    def on_task_postrun(task_id=None, task=None, state=None, **kwargs):
+        started = _task_started.pop(task_id, None)
+        if started is not None:
+            TASK_SECONDS.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - started)
+    
+    @signals.worker_init.connect(weak=False)
+    def on_worker_init(**kwargs):
+        start_metrics_server()
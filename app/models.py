@@ -1,7 +1,7 @@
 """
 Database models for storing ticker price data.
 """
-from sqlalchemy import Column, String, Numeric, BigInteger, Index
+from sqlalchemy import Column, String, Numeric, BigInteger, Integer, SmallInteger, Index
 from app.database import Base
 
 
@@ -17,16 +17,142 @@ class TickerPrice(Base):
     """
     __tablename__ = "ticker_prices"
     
-    id = Column(BigInteger, primary_key=True, index=True, autoincrement=True)
-    ticker = Column(String(20), nullable=False, index=True)
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    ticker = Column(String(20), nullable=False)
     price = Column(Numeric(20, 8), nullable=False)
-    timestamp = Column(BigInteger, nullable=False, index=True)
+    timestamp = Column(BigInteger, nullable=False)
     
-    # Composite index for efficient queries by ticker and timestamp
+    # At most one price per ticker and timestamp; also serves every lookup
+    # by ticker or by ticker and time range
     __table_args__ = (
-        Index('idx_ticker_timestamp', 'ticker', 'timestamp'),
+        Index('uq_ticker_timestamp', 'ticker', 'timestamp', unique=True),
     )
     
     def __repr__(self) -> str:
         return f"<TickerPrice(ticker={self.ticker}, price={self.price}, timestamp={self.timestamp})>"
 
+
+# Fixed-point scale of CompactTickerPrice.price (the 8 decimals of Numeric(20, 8))
+PRICE_SCALE = 100_000_000
+
+
+class Ticker(Base):
+    """
+    Dictionary of ticker symbols for the compact price layout.
+    
+    Attributes:
+        id: Small integer stored in every compact price row
+        symbol: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+    """
+    __tablename__ = "tickers"
+    
+    id = Column(SmallInteger, primary_key=True, autoincrement=True)
+    symbol = Column(String(20), nullable=False, unique=True)
+    
+    def __repr__(self) -> str:
+        return f"<Ticker(id={self.id}, symbol={self.symbol})>"
+
+
+class CompactTickerPrice(Base):
+    """
+    Model for ticker prices in the compact storage layout.
+    
+    Once ``compact_prices.py migrate`` has run, ``ticker_prices`` is a view
+    over this table joined to ``tickers``, so reads through TickerPrice are
+    unchanged. Columns are ordered widest first to avoid alignment padding.
+    
+    Attributes:
+        id: Row id, drawn from the sequence of the original ticker_prices table
+        timestamp: UNIX timestamp when the price was recorded
+        price: Price multiplied by PRICE_SCALE
+        ticker_id: Id of the ticker in ``tickers``
+    """
+    __tablename__ = "ticker_prices_compact"
+    
+    id = Column(BigInteger, nullable=False)
+    timestamp = Column(BigInteger, nullable=False)
+    price = Column(BigInteger, nullable=False)
+    ticker_id = Column(SmallInteger, nullable=False)
+    
+    # The only index: unique per ticker and timestamp, and covering, so
+    # range reads are answered from the index alone
+    __table_args__ = (
+        Index(
+            'uq_compact_ticker_timestamp', 'ticker_id', 'timestamp',
+            unique=True, postgresql_include=['id', 'price']
+        ),
+    )
+    __mapper_args__ = {"primary_key": [ticker_id, timestamp]}
+    
+    def __repr__(self) -> str:
+        return f"<CompactTickerPrice(ticker_id={self.ticker_id}, price={self.price}, timestamp={self.timestamp})>"
+
+
+class PriceCandle(Base):
+    """
+    Model for OHLC candle rollups of ticker prices.
+    
+    Candles are maintained incrementally as prices are ingested, so chart
+    queries read one row per bucket instead of every raw price.
+    
+    Attributes:
+        ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+        interval: Candle interval code (e.g., '1m', '5m', '1h', '1d')
+        bucket: UNIX timestamp of the start of the candle's bucket
+        open: First price in the bucket
+        high: Highest price in the bucket
+        low: Lowest price in the bucket
+        close: Last price in the bucket
+        open_timestamp: UNIX timestamp of the opening price
+        close_timestamp: UNIX timestamp of the closing price
+        count: Number of raw prices aggregated into the candle
+    """
+    __tablename__ = "price_candles"
+    
+    ticker = Column(String(20), primary_key=True)
+    interval = Column(String(4), primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    open = Column(Numeric(20, 8), nullable=False)
+    high = Column(Numeric(20, 8), nullable=False)
+    low = Column(Numeric(20, 8), nullable=False)
+    close = Column(Numeric(20, 8), nullable=False)
+    open_timestamp = Column(BigInteger, nullable=False)
+    close_timestamp = Column(BigInteger, nullable=False)
+    count = Column(Integer, nullable=False)
+    
+    def __repr__(self) -> str:
+        return (
+            f"<PriceCandle(ticker={self.ticker}, interval={self.interval}, bucket={self.bucket}, "
+            f"open={self.open}, high={self.high}, low={self.low}, close={self.close})>"
+        )
+
+
+class BackfillChunk(Base):
+    """
+    Progress record for one completed chunk of a history backfill.
+    
+    Chunks are aligned to a fixed grid, so a rerun of an interrupted or
+    overlapping backfill recognizes the chunks it already stored and skips
+    them.
+    
+    Attributes:
+        ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+        resolution: Deribit chart resolution the chunk was fetched at
+        chunk_start: UNIX timestamp of the first second of the chunk
+        chunk_end: UNIX timestamp of the last second of the chunk
+        fetched: Number of prices returned by Deribit
+        inserted: Number of prices inserted (fetched minus existing ones)
+        completed_at: UNIX timestamp when the chunk was stored
+    """
+    __tablename__ = "backfill_chunks"
+    
+    ticker = Column(String(20), primary_key=True)
+    resolution = Column(String(4), primary_key=True)
+    chunk_start = Column(BigInteger, primary_key=True)
+    chunk_end = Column(BigInteger, nullable=False)
+    fetched = Column(Integer, nullable=False)
+    inserted = Column(Integer, nullable=False)
+    completed_at = Column(BigInteger, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<BackfillChunk(ticker={self.ticker}, resolution={self.resolution}, chunk_start={self.chunk_start})>"
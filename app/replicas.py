@@ -0,0 +1,217 @@
+"""
+Routing of API read sessions to PostgreSQL read replicas.
+
+When ``settings.read_replica_urls`` is set, read-only API queries run on the
+replicas in round-robin order, and writes (Celery, ingestion) keep using the
+primary engine. A replica is ejected from the rotation when it cannot be
+reached, or when its replay lag exceeds ``settings.replica_max_lag``, and is
+restored by the next passing health check. With every replica ejected,
+reads fall back to the primary, so a lagging replica never serves data
+older than the lag threshold.
+"""
+import asyncio
+import contextlib
+import itertools
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from app.config import settings
+from app.metrics import DB_READ_SESSIONS, REPLICA_EJECTIONS, REPLICA_LAG_SECONDS
+
+# Errors that mean the replica itself is unusable, not the query
+CONNECTION_ERRORS = (OperationalError, InterfaceError, OSError, asyncio.TimeoutError)
+
+# Seconds behind the primary; 0 on a primary or a standby that replayed all it received
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+@dataclass
+class Replica:
+    """A read replica and its health."""
+    name: str
+    engine: AsyncEngine
+    sessionmaker: async_sessionmaker
+    ejected: bool = False
+    lag: Optional[float] = None
+
+
+class ReplicaRouter:
+    """
+    Round-robin router of read sessions over healthy replicas.
+    
+    A background task checks every replica each ``check_interval`` seconds:
+    unreachable or lagging replicas are ejected, recovered ones restored.
+    A replica that fails to connect for a request is ejected at once, and
+    the request moves on to the next replica or the primary.
+    """
+    
+    def __init__(
+        self,
+        urls: List[str],
+        primary_sessionmaker: Callable[[], AsyncSession],
+        max_lag: Optional[float] = None,
+        check_interval: float = 5.0,
+        **engine_kwargs
+    ):
+        """
+        Initialize the router.
+        
+        Args:
+            urls: Replica database URLs (asyncpg URLs)
+            primary_sessionmaker: Session factory of the primary, used when
+                no replica is available
+            max_lag: Replay lag in seconds above which a replica is ejected
+                (optional, lag is ignored if None)
+            check_interval: Seconds between health checks
+            engine_kwargs: Extra arguments for each replica engine
+        """
+        self.primary_sessionmaker = primary_sessionmaker
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.replicas: List[Replica] = []
+        for index, url in enumerate(urls):
+            engine = create_async_engine(url, **engine_kwargs)
+            self.replicas.append(Replica(
+                name=f"replica{index}",
+                engine=engine,
+                sessionmaker=async_sessionmaker(
+                    bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+                )
+            ))
+        self._rotation = itertools.cycle(self.replicas)
+        self._task: Optional[asyncio.Task] = None
+    
+    def choose(self) -> Optional[Replica]:
+        """
+        Pick the next replica in round-robin order, skipping ejected ones.
+        
+        Returns:
+            A healthy replica, or None if there is none
+        """
+        for _ in range(len(self.replicas)):
+            replica = next(self._rotation)
+            if not replica.ejected:
+                return replica
+        return None
+    
+    def eject(self, replica: Replica, reason: str):
+        """Take a replica out of the rotation until a health check passes."""
+        if not replica.ejected:
+            print(f"Ejecting read {replica.name} ({reason})")
+            REPLICA_EJECTIONS.labels(replica=replica.name, reason=reason).inc()
+        replica.ejected = True
+    
+    @contextlib.asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        """
+        Open a read session on the next healthy replica, or on the primary.
+        
+        The replica's connection is checked out before the session is
+        handed over, so an unreachable replica is ejected and skipped
+        instead of failing the request.
+        
+        Yields:
+            AsyncSession for read-only queries
+        """
+        for _ in range(len(self.replicas)):
+            replica = self.choose()
+            if replica is None:
+                break
+            
+            db = replica.sessionmaker()
+            try:
+                await db.connection()
+            except CONNECTION_ERRORS:
+                await db.close()
+                self.eject(replica, "unreachable")
+                continue
+            
+            DB_READ_SESSIONS.labels(target=replica.name).inc()
+            try:
+                yield db
+            except CONNECTION_ERRORS:
+                self.eject(replica, "unreachable")
+                raise
+            finally:
+                await db.close()
+            return
+        
+        DB_READ_SESSIONS.labels(target="primary").inc()
+        async with self.primary_sessionmaker() as db:
+            yield db
+    
+    async def check(self):
+        """Check every replica once, ejecting or restoring it."""
+        await asyncio.gather(*(self._check_replica(replica) for replica in self.replicas))
+    
+    async def _check_replica(self, replica: Replica):
+        """Measure a replica's lag and update its state."""
+        async def measure() -> float:
+            async with replica.engine.connect() as connection:
+                return float(await connection.scalar(LAG_QUERY))
+        
+        try:
+            replica.lag = await asyncio.wait_for(measure(), timeout=self.check_interval)
+        except CONNECTION_ERRORS:
+            self.eject(replica, "unreachable")
+            return
+        
+        REPLICA_LAG_SECONDS.labels(replica=replica.name).set(replica.lag)
+        if self.max_lag is not None and replica.lag > self.max_lag:
+            self.eject(replica, "lag")
+        elif replica.ejected:
+            print(f"Restoring read {replica.name} (lag {replica.lag:.1f}s)")
+            replica.ejected = False
+    
+    async def start(self):
+        """Start the background health checks (no-op without replicas)."""
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def close(self):
+        """Stop the health checks and dispose of the replica engines."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+    
+    async def _run(self):
+        """Check the replicas forever."""
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+
+def create_read_router(primary_sessionmaker: Callable[[], AsyncSession]) -> ReplicaRouter:
+    """
+    Build the router for the replicas configured in settings.
+    
+    Args:
+        primary_sessionmaker: Session factory of the primary
+    
+    Returns:
+        ReplicaRouter (without replicas if none are configured)
+    """
+    urls = [make_url(url).set(drivername="postgresql+asyncpg") for url in settings.read_replica_urls]
+    return ReplicaRouter(
+        urls,
+        primary_sessionmaker,
+        max_lag=settings.replica_max_lag,
+        check_interval=settings.replica_check_interval,
+        pool_pre_ping=True,
+        pool_size=settings.replica_pool_size,
+        max_overflow=settings.replica_max_overflow
+    )
@@ -0,0 +1,352 @@
+"""
+Service layer for price statistics and chart downsampling computed with NumPy.
+"""
+import asyncio
+from typing import List, Optional, Tuple
+from datetime import datetime
+import numpy as np
+from sqlalchemy import Float, cast, desc, func, select, union_all
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.metrics import track_query
+from app.models import TickerPrice
+from app.services.price_service import price_range_conditions
+
+# Candidates preselected by the database per point kept by LTTB
+LTTB_CANDIDATES = 4
+
+
+def price_stats(timestamps: np.ndarray, prices: np.ndarray, window: int) -> dict:
+    """
+    Compute summary statistics of a price series with vectorized operations.
+    
+    Returns are taken between consecutive samples. Realized volatility is
+    the square root of the sum of squared log returns: over the whole range,
+    and over every ``window`` consecutive returns for the rolling figures.
+    TWAP weights each price by the time until the next sample. Max drawdown
+    is the largest fall from a running peak, as a fraction of the peak.
+    
+    Args:
+        timestamps: UNIX timestamps, ascending
+        prices: Prices matching ``timestamps``
+        window: Number of returns per rolling volatility window
+    
+    Returns:
+        Dictionary matching PriceStatsResponse (without the ticker); values
+        that need more samples than available are None
+    """
+    count = len(prices)
+    stats = {
+        "count": count,
+        "window": window,
+        "start_timestamp": None,
+        "end_timestamp": None,
+        "first": None,
+        "last": None,
+        "min": None,
+        "max": None,
+        "mean": None,
+        "twap": None,
+        "simple_return": None,
+        "log_return": None,
+        "mean_simple_return": None,
+        "mean_log_return": None,
+        "volatility": None,
+        "rolling_volatility": None,
+        "max_drawdown": None,
+        "drawdown_peak_timestamp": None,
+        "drawdown_trough_timestamp": None,
+    }
+    if count == 0:
+        return stats
+    
+    stats.update(
+        start_timestamp=int(timestamps[0]),
+        end_timestamp=int(timestamps[-1]),
+        first=float(prices[0]),
+        last=float(prices[-1]),
+        min=float(prices.min()),
+        max=float(prices.max()),
+        mean=float(prices.mean()),
+    )
+    
+    duration = timestamps[-1] - timestamps[0]
+    if duration > 0:
+        stats["twap"] = float(np.dot(prices[:-1], np.diff(timestamps)) / duration)
+    else:
+        stats["twap"] = float(prices[-1])
+    
+    running_peak = np.maximum.accumulate(prices)
+    drawdowns = 1.0 - prices / running_peak
+    trough = int(drawdowns.argmax())
+    stats["max_drawdown"] = float(drawdowns[trough])
+    if drawdowns[trough] > 0:
+        stats["drawdown_peak_timestamp"] = int(timestamps[int(prices[:trough + 1].argmax())])
+        stats["drawdown_trough_timestamp"] = int(timestamps[trough])
+    
+    if count < 2:
+        return stats
+    
+    simple_returns = prices[1:] / prices[:-1] - 1.0
+    log_returns = np.diff(np.log(prices))
+    squared = log_returns * log_returns
+    
+    stats.update(
+        simple_return=float(prices[-1] / prices[0] - 1.0),
+        log_return=float(log_returns.sum()),
+        mean_simple_return=float(simple_returns.mean()),
+        mean_log_return=float(log_returns.mean()),
+        volatility=float(np.sqrt(squared.sum())),
+    )
+    
+    if len(squared) >= window:
+        # Window sums as differences of one cumulative sum
+        cumulative = np.concatenate(([0.0], np.cumsum(squared)))
+        rolling = np.sqrt(np.maximum(cumulative[window:] - cumulative[:-window], 0.0))
+        stats["rolling_volatility"] = {
+            "last": float(rolling[-1]),
+            "min": float(rolling.min()),
+            "max": float(rolling.max()),
+            "mean": float(rolling.mean()),
+        }
+    
+    return stats
+
+
+def lttb_indices(timestamps: np.ndarray, prices: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Select the points of a series to draw with Largest-Triangle-Three-Buckets.
+    
+    The first and last points are always kept. The points between them are
+    split into ``max_points - 2`` buckets of equal size, and from each
+    bucket the point forming the largest triangle with the point kept from
+    the previous bucket and the average of the next bucket is kept. Spikes
+    survive, unlike with averaging or taking every n-th point.
+    
+    Args:
+        timestamps: UNIX timestamps, ascending
+        prices: Prices matching ``timestamps``
+        max_points: Number of points to keep (at least 3)
+    
+    Returns:
+        Ascending indices of the kept points; every index if the series
+        has no more than ``max_points`` points
+    """
+    count = len(prices)
+    if count <= max_points:
+        return np.arange(count)
+    
+    x = timestamps.astype(np.float64)
+    # Bucket i is edges[i]:edges[i + 1]; the last "bucket" is the final point
+    edges = np.append(np.linspace(1, count - 1, max_points - 1).astype(np.int64), count)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = count - 1
+    
+    previous = 0
+    for i in range(max_points - 2):
+        start, end, next_end = edges[i], edges[i + 1], edges[i + 2]
+        next_x = x[end:next_end].mean()
+        next_y = prices[end:next_end].mean()
+        # Twice the triangle areas; the constant factor does not change the argmax
+        areas = np.abs(
+            (x[previous] - next_x) * (prices[start:end] - prices[previous])
+            - (x[previous] - x[start:end]) * (next_y - prices[previous])
+        )
+        previous = start + int(areas.argmax())
+        selected[i + 1] = previous
+    
+    return selected
+
+
+class AsyncAnalyticsService:
+    """Computes statistics over a ticker's price history for the API."""
+    
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize async analytics service.
+        
+        Args:
+            db: Async database session
+        """
+        self.db = db
+    
+    @track_query("get_price_arrays")
+    async def get_price_arrays(
+        self,
+        ticker: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Load a ticker's timestamps and prices as NumPy arrays, oldest first.
+        
+        Each column is aggregated into one PostgreSQL array, so the driver
+        decodes two values instead of a row per price, and no ORM objects
+        or Decimals are built.
+        
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            start_date: Start of date range (optional)
+            end_date: End of date range (optional)
+        
+        Returns:
+            Tuple of (int64 timestamps, float64 prices)
+        """
+        timestamps, prices = await self._load_arrays(
+            ticker, start_date, end_date, TickerPrice.timestamp, cast(TickerPrice.price, Float)
+        )
+        return (
+            np.array(timestamps or [], dtype=np.int64),
+            np.array(prices or [], dtype=np.float64),
+        )
+    
+    async def _load_arrays(
+        self,
+        ticker: str,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        *columns
+    ) -> tuple:
+        """Aggregate each column of a ticker's date range into a list, oldest first."""
+        stmt = select(
+            *(func.array_agg(aggregate_order_by(column, TickerPrice.timestamp)) for column in columns)
+        ).where(*price_range_conditions(ticker, start_date, end_date))
+        return tuple((await self.db.execute(stmt)).one())
+    
+    async def get_stats(
+        self,
+        ticker: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        window: int = 60
+    ) -> dict:
+        """
+        Compute price statistics for a ticker within a date range.
+        
+        The computation runs in a worker thread, so large ranges do not
+        stall the event loop.
+        
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            start_date: Start of date range (optional)
+            end_date: End of date range (optional)
+            window: Number of returns per rolling volatility window
+        
+        Returns:
+            Statistics as returned by price_stats
+        """
+        timestamps, prices = await self.get_price_arrays(ticker, start_date, end_date)
+        return await asyncio.to_thread(price_stats, timestamps, prices, window)
+    
+    @track_query("get_lttb_rows")
+    async def get_lttb_rows(
+        self,
+        ticker: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        max_points: int = 1000
+    ) -> List[Tuple[int, float, int]]:
+        """
+        Downsample a ticker's date range with Largest-Triangle-Three-Buckets.
+        
+        LTTB picks each point relative to the one picked before it, so it
+        cannot run as one GROUP BY. The database preselects candidates
+        instead (MinMaxLTTB): the range is split into ``LTTB_CANDIDATES *
+        max_points / 2`` buckets of equal time, and one hashed GROUP BY
+        returns the lowest and highest price of each, plus the first and
+        last price of the range. LTTB then runs in a worker thread over those
+        candidates only. The range is never sent to the API or held in its
+        memory, and the extremes LTTB is meant to keep are always candidates.
+        
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            start_date: Start of date range (optional)
+            end_date: End of date range (optional)
+            max_points: Number of points to return at most
+        
+        Returns:
+            (id, price, timestamp) tuples of the kept prices, newest first
+        """
+        conditions = price_range_conditions(ticker, start_date, end_date)
+        bounds = select(func.count(), func.min(TickerPrice.timestamp), func.max(TickerPrice.timestamp))
+        count, first_timestamp, last_timestamp = (await self.db.execute(bounds.where(*conditions))).one()
+        
+        if count <= max_points:
+            stmt = select(
+                TickerPrice.id, cast(TickerPrice.price, Float), TickerPrice.timestamp
+            ).where(*conditions).order_by(desc(TickerPrice.timestamp))
+            return (await self.db.execute(stmt)).tuples().all()
+        
+        buckets = LTTB_CANDIDATES * max_points // 2
+        span = last_timestamp - first_timestamp + 1
+        # numeric[] compares faster than a float8[] built with a cast per row
+        point = array((TickerPrice.price, TickerPrice.timestamp, TickerPrice.id))
+        extremes = select(func.min(point), func.max(point)).where(*conditions).group_by(
+            (TickerPrice.timestamp - first_timestamp) * buckets // span
+        )
+        endpoints = select(point, point).where(
+            *conditions, TickerPrice.timestamp.in_((first_timestamp, last_timestamp))
+        )
+        
+        candidates = sorted({
+            (int(timestamp), float(price), int(price_id))
+            for row in (await self.db.execute(union_all(extremes, endpoints))).all()
+            for price, timestamp, price_id in row
+        })
+        timestamps = np.array([timestamp for timestamp, _, _ in candidates], dtype=np.int64)
+        prices = np.array([price for _, price, _ in candidates], dtype=np.float64)
+        selected = await asyncio.to_thread(lttb_indices, timestamps, prices, max_points)
+        return [
+            (candidates[i][2], candidates[i][1], candidates[i][0])
+            for i in selected[::-1].tolist()
+        ]
+    
+    @track_query("get_minmax_rows")
+    async def get_minmax_rows(
+        self,
+        ticker: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        max_points: int = 1000
+    ) -> List[Tuple[int, float, int]]:
+        """
+        Downsample a ticker's date range to the lowest and highest price per bucket.
+        
+        The range is split into ``max_points // 2`` buckets of equal time.
+        One hashed GROUP BY picks each bucket's extremes as the min and max
+        of ARRAY[price, timestamp, id], so the database sorts nothing and
+        sends only the kept rows.
+        
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            start_date: Start of date range (optional)
+            end_date: End of date range (optional)
+            max_points: Number of points to return at most
+        
+        Returns:
+            (id, price, timestamp) tuples of the kept prices, newest first
+        """
+        conditions = price_range_conditions(ticker, start_date, end_date)
+        bounds = select(func.count(), func.min(TickerPrice.timestamp), func.max(TickerPrice.timestamp))
+        count, first_timestamp, last_timestamp = (await self.db.execute(bounds.where(*conditions))).one()
+        
+        if count <= max_points:
+            stmt = select(
+                TickerPrice.id, cast(TickerPrice.price, Float), TickerPrice.timestamp
+            ).where(*conditions).order_by(desc(TickerPrice.timestamp))
+            return (await self.db.execute(stmt)).tuples().all()
+        
+        buckets = max_points // 2
+        span = last_timestamp - first_timestamp + 1
+        point = array((cast(TickerPrice.price, Float), TickerPrice.timestamp, TickerPrice.id))
+        stmt = select(func.min(point), func.max(point)).where(*conditions).group_by(
+            (TickerPrice.timestamp - first_timestamp) * buckets // span
+        )
+        
+        points = {
+            (int(price_id), price, int(timestamp))
+            for low, high in (await self.db.execute(stmt)).all()
+            for price, timestamp, price_id in (low, high)
+        }
+        return sorted(points, key=lambda row: row[2], reverse=True)
@@ -0,0 +1,381 @@
+"""
+Service layer for backfilling price history from Deribit chart data.
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.clients.deribit_client import DeribitClient
+from app.metrics import INGEST_ERRORS, track_query
+from app.models import BackfillChunk, TickerPrice
+from app.services.candle_service import CandleService
+from app.services.gap_service import PriceGap, ingest_cadence
+from app.services.partition_service import raw_retention_start
+from app.services.price_service import insert_new_prices
+
+# Deribit chart resolutions in minutes, finest first
+CHART_RESOLUTIONS = ["1", "3", "5", "10", "15", "30", "60", "120", "180", "360", "720", "1D"]
+
+
+def resolution_seconds(resolution: str) -> int:
+    """Return the length in seconds of a Deribit chart resolution ('1', '60', '1D', ...)."""
+    if resolution.upper() == "1D":
+        return 86400
+    return int(resolution) * 60
+
+
+def repair_resolution(cadence: int) -> Optional[str]:
+    """
+    Return the coarsest chart resolution with a point in every ingest slot.
+    
+    Any window of ``cadence`` seconds contains a multiple of a resolution no
+    longer than ``cadence``, so every missed slot can be filled.
+    
+    Args:
+        cadence: Seconds between expected prices of a ticker
+        
+    Returns:
+        Deribit resolution, or None for cadences below one minute, whose
+        slots chart data cannot fill
+    """
+    fitting = [resolution for resolution in CHART_RESOLUTIONS if resolution_seconds(resolution) <= cadence]
+    return fitting[-1] if fitting else None
+
+
+def one_per_slot(rows: List[Tuple[int, float]], cadence: int) -> List[Tuple[int, float]]:
+    """
+    Keep the first chart point of each ingest slot, as a tick would store.
+    
+    Args:
+        rows: (timestamp, price) pairs, oldest first
+        cadence: Seconds per slot
+        
+    Returns:
+        At most one pair per slot, oldest first
+    """
+    slots: Dict[int, Tuple[int, float]] = {}
+    for timestamp, price in rows:
+        slots.setdefault(timestamp // cadence, (timestamp, price))
+    return list(slots.values())
+
+
+def backfill_instrument(ticker: str) -> str:
+    """
+    Return the Deribit instrument whose chart data is used as a ticker's history.
+    
+    Deribit serves chart data for instruments, not indexes, so the perpetual
+    on the index (which tracks it closely) stands in for it unless
+    ``settings.backfill_instruments`` maps the ticker explicitly.
+    
+    Args:
+        ticker: Currency ticker (e.g., 'BTC_USD', 'SOL_USDC')
+        
+    Returns:
+        Instrument name (e.g., 'BTC-PERPETUAL', 'SOL_USDC-PERPETUAL')
+    """
+    if ticker in settings.backfill_instruments:
+        return settings.backfill_instruments[ticker]
+    
+    base, _, quote = ticker.upper().partition("_")
+    if quote in ("", "USD"):
+        return f"{base}-PERPETUAL"
+    return f"{base}_{quote}-PERPETUAL"
+
+
+def chunk_ranges(start: int, end: int, chunk_seconds: int) -> List[Tuple[int, int, bool]]:
+    """
+    Split [start, end] into chunks aligned to multiples of ``chunk_seconds``.
+    
+    Args:
+        start: Range start, UNIX seconds (inclusive)
+        end: Range end, UNIX seconds (inclusive)
+        chunk_seconds: Chunk length
+        
+    Returns:
+        List of (lower, upper, full) with inclusive bounds; ``full`` is False
+        for the chunks clipped by ``start`` or ``end``
+    """
+    chunks = []
+    lower = start - start % chunk_seconds
+    while lower <= end:
+        upper = lower + chunk_seconds - 1
+        chunks.append((max(lower, start), min(upper, end), lower >= start and upper <= end))
+        lower += chunk_seconds
+    return chunks
+
+
+class BackfillService:
+    """
+    Service for filling ticker_prices with historical Deribit data.
+    
+    A range is split into fixed, grid-aligned chunks that are fetched
+    concurrently, with every request waiting on one shared rate limiter.
+    Each chunk is written in its own transaction together with its
+    ``backfill_chunks`` progress row, so an interrupted backfill resumes
+    where it stopped. Like a tick, each slot of the ticker's ingest cadence
+    gets at most one price, so slots already holding one (e.g. from live
+    ingestion) are skipped.
+    """
+    
+    def __init__(
+        self,
+        db: Session,
+        client: Optional[DeribitClient] = None,
+        resolution: Optional[str] = None
+    ):
+        """
+        Initialize backfill service.
+        
+        Args:
+            db: Database session
+            client: Deribit client (optional, defaults to one on the
+                process-wide credit limiter)
+            resolution: Chart resolution (optional, defaults to settings.backfill_resolution)
+        """
+        self.db = db
+        self.deribit_client = client or DeribitClient()
+        self.candle_service = CandleService(db)
+        self.resolution = resolution or settings.backfill_resolution
+        self._write_lock = asyncio.Lock()
+    
+    def completed_chunks(self, ticker: str) -> Set[int]:
+        """
+        Return the start timestamps of the chunks already stored for a ticker.
+        
+        Args:
+            ticker: Currency ticker
+            
+        Returns:
+            Set of chunk_start values
+        """
+        return set(self.db.scalars(
+            select(BackfillChunk.chunk_start).where(
+                BackfillChunk.ticker == ticker,
+                BackfillChunk.resolution == self.resolution
+            )
+        ))
+    
+    async def backfill(
+        self,
+        tickers: List[str],
+        start: int,
+        end: int,
+        concurrency: Optional[int] = None
+    ) -> Dict[str, dict]:
+        """
+        Backfill prices for several tickers over a time range.
+        
+        Args:
+            tickers: Currency tickers (e.g., ['BTC_USD', 'ETH_USD'])
+            start: Range start, UNIX seconds (inclusive)
+            end: Range end, UNIX seconds (inclusive)
+            concurrency: Maximum chunks fetched at once (optional, defaults
+                to settings.backfill_concurrency)
+                
+        Returns:
+            Mapping of ticker to counts of chunks (total, skipped, failed) and
+            prices (fetched, inserted)
+        """
+        step = resolution_seconds(self.resolution)
+        chunk_seconds = step * settings.backfill_chunk_size
+        semaphore = asyncio.Semaphore(concurrency or settings.backfill_concurrency)
+        # Only chunks that ended a full step ago can be complete
+        complete_before = int(time.time()) - step
+        
+        summary: Dict[str, dict] = {}
+        jobs = []
+        for ticker in tickers:
+            done = self.completed_chunks(ticker)
+            chunks = chunk_ranges(start, end, chunk_seconds)
+            pending = [chunk for chunk in chunks if not (chunk[2] and chunk[0] in done)]
+            summary[ticker] = {
+                "chunks": len(chunks),
+                "skipped": len(chunks) - len(pending),
+                "failed": 0,
+                "fetched": 0,
+                "inserted": 0,
+            }
+            instrument = backfill_instrument(ticker)
+            cadence = ingest_cadence(ticker)
+            for lower, upper, full in pending:
+                complete = full and upper < complete_before
+                jobs.append(self._backfill_chunk(
+                    ticker, instrument, lower, upper, complete, semaphore, summary, cadence=cadence
+                ))
+        
+        await asyncio.gather(*jobs)
+        return summary
+    
+    async def repair(self, gaps: List[PriceGap], concurrency: Optional[int] = None) -> Dict[str, dict]:
+        """
+        Fetch the chart data of specific gaps found by GapService.
+        
+        Unlike ``backfill``, the gaps are fetched even if their chunks are
+        recorded as complete, and repairs are not recorded, so a gap that
+        Deribit could not fill is retried by the next scan.
+        
+        Each ticker's gaps are fetched at the coarsest chart resolution that
+        has a point in every slot of its ingest cadence, and only the first
+        point per slot is stored, so a repaired slot holds one price like a
+        tick. Slots chart data cannot fill are skipped: all slots of
+        sub-minute cadences, and with partitioning, slots older than the raw
+        retention window, which retention downsamples anyway.
+        
+        Args:
+            gaps: Gaps to repair
+            concurrency: Maximum chunks fetched at once (optional, defaults
+                to settings.backfill_concurrency)
+                
+        Returns:
+            Mapping of ticker to counts of gaps, missing and skipped slots,
+            chunks (total, failed) and prices (fetched, inserted)
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.backfill_concurrency)
+        retention_start = raw_retention_start()
+        
+        summary: Dict[str, dict] = {}
+        jobs = []
+        for gap in gaps:
+            counts = summary.setdefault(gap.ticker, {
+                "gaps": 0,
+                "missing": 0,
+                "skipped": 0,
+                "chunks": 0,
+                "failed": 0,
+                "fetched": 0,
+                "inserted": 0,
+            })
+            counts["gaps"] += 1
+            counts["missing"] += gap.missing
+            
+            cadence = ingest_cadence(gap.ticker)
+            resolution = repair_resolution(cadence)
+            # First whole slot inside the retention window
+            start = gap.start if retention_start is None else max(gap.start, -(-retention_start // cadence) * cadence)
+            if resolution is None or start > gap.end:
+                counts["skipped"] += gap.missing
+                continue
+            counts["skipped"] += (start - gap.start) // cadence
+            
+            # Chunks end on slot boundaries, so no slot is split between two
+            chunk_seconds = max(resolution_seconds(resolution) * settings.backfill_chunk_size // cadence, 1) * cadence
+            instrument = backfill_instrument(gap.ticker)
+            for lower, upper, _ in chunk_ranges(start, gap.end, chunk_seconds):
+                counts["chunks"] += 1
+                jobs.append(self._backfill_chunk(
+                    gap.ticker, instrument, lower, upper, False, semaphore, summary, resolution, cadence
+                ))
+        
+        await asyncio.gather(*jobs)
+        return summary
+    
+    async def _backfill_chunk(
+        self,
+        ticker: str,
+        instrument: str,
+        lower: int,
+        upper: int,
+        complete: bool,
+        semaphore: asyncio.Semaphore,
+        summary: Dict[str, dict],
+        resolution: Optional[str] = None,
+        cadence: Optional[int] = None
+    ):
+        """Fetch and store one chunk, recording failures instead of raising."""
+        try:
+            async with semaphore:
+                rows = await self.deribit_client.get_chart_data(
+                    instrument, lower, upper, resolution or self.resolution
+                )
+            
+            # One writer at a time on the session, off the event loop so
+            # other chunks keep downloading
+            async with self._write_lock:
+                try:
+                    inserted = await asyncio.to_thread(
+                        self.save_chunk, ticker, lower, upper, rows, complete, cadence
+                    )
+                except Exception:
+                    await asyncio.to_thread(self.db.rollback)
+                    raise
+        except Exception as e:
+            INGEST_ERRORS.labels(ticker=ticker, stage="backfill").inc()
+            print(f"Error backfilling {ticker} {lower}-{upper}: {str(e)}")
+            summary[ticker]["failed"] += 1
+            return
+        
+        summary[ticker]["fetched"] += len(rows)
+        summary[ticker]["inserted"] += inserted
+    
+    @track_query("save_backfill_chunk")
+    def save_chunk(
+        self,
+        ticker: str,
+        lower: int,
+        upper: int,
+        rows: List[Tuple[int, float]],
+        complete: bool = True,
+        cadence: Optional[int] = None
+    ) -> int:
+        """
+        Insert a chunk's prices for ingest slots that hold none yet, and record the chunk.
+        
+        Only the first point of each slot is kept. Live ticks land on
+        Deribit's own seconds and downsampled rows keep their original
+        timestamps, so a stored price rarely shares a chart point's exact
+        timestamp; its whole slot is skipped instead.
+        
+        Args:
+            ticker: Currency ticker
+            lower: Chunk start, UNIX seconds (inclusive)
+            upper: Chunk end, UNIX seconds (inclusive)
+            rows: (timestamp, price) pairs fetched for the chunk
+            complete: Record the chunk in backfill_chunks so reruns skip it
+            cadence: Seconds per slot (optional, defaults to the ticker's
+                ingest cadence)
+            
+        Returns:
+            Number of prices inserted
+        """
+        cadence = cadence or ingest_cadence(ticker)
+        # Cover the whole first and last slot, which may reach into neighbouring chunks
+        stored = {
+            timestamp // cadence
+            for timestamp in self.db.scalars(
+                select(TickerPrice.timestamp).where(
+                    TickerPrice.ticker == ticker,
+                    TickerPrice.timestamp >= lower - lower % cadence,
+                    TickerPrice.timestamp < (upper // cadence + 1) * cadence
+                )
+            )
+        }
+        points = one_per_slot([row for row in rows if lower <= row[0] <= upper], cadence)
+        prices = insert_new_prices(self.db, [
+            (ticker, price, timestamp)
+            for timestamp, price in points
+            if timestamp // cadence not in stored
+        ])
+        if prices:
+            self.candle_service.apply_prices(prices)
+        
+        if complete:
+            stmt = pg_insert(BackfillChunk).values(
+                ticker=ticker,
+                resolution=self.resolution,
+                chunk_start=lower,
+                chunk_end=upper,
+                fetched=len(rows),
+                inserted=len(prices),
+                completed_at=int(time.time())
+            )
+            self.db.execute(stmt.on_conflict_do_nothing())
+        
+        self.db.commit()
+        return len(prices)
+    
+    async def close(self):
+        """Close the Deribit client session."""
+        await self.deribit_client.close()
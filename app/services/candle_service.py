@@ -0,0 +1,291 @@
+"""
+Service layer for OHLC candle rollups.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import Select, case, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from app.metrics import track_query
+from app.models import PriceCandle, TickerPrice
+
+# Supported candle intervals in seconds. The finest interval must divide
+# every other one, since coarser candles are rebuilt from it.
+CANDLE_INTERVALS: Dict[str, int] = {
+    "1m": 60,
+    "5m": 300,
+    "1h": 3600,
+    "1d": 86400,
+}
+
+BASE_INTERVAL = "1m"
+
+
+def candles_query(
+    ticker: str,
+    interval: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> Select:
+    """
+    Build the candle range query shared by the sync and async services.
+    
+    Args:
+        ticker: Currency ticker
+        interval: Candle interval code (see CANDLE_INTERVALS)
+        start_date: Start of date range (optional)
+        end_date: End of date range (optional)
+        
+    Returns:
+        Select over PriceCandle, ordered by bucket ascending
+    """
+    seconds = CANDLE_INTERVALS[interval]
+    stmt = select(PriceCandle).where(
+        PriceCandle.ticker == ticker,
+        PriceCandle.interval == interval
+    )
+    
+    if start_date:
+        start_timestamp = int(start_date.timestamp())
+        stmt = stmt.where(PriceCandle.bucket >= start_timestamp - start_timestamp % seconds)
+    
+    if end_date:
+        end_timestamp = int(end_date.timestamp())
+        stmt = stmt.where(PriceCandle.bucket <= end_timestamp)
+    
+    return stmt.order_by(PriceCandle.bucket)
+
+
+class CandleService:
+    """
+    Service for maintaining and reading OHLC candle rollups.
+    
+    Candles are upserted in the same transaction as the raw prices they
+    aggregate, so rollups never drift from ``ticker_prices``.
+    """
+    
+    def __init__(self, db: Session):
+        """
+        Initialize candle service.
+        
+        Args:
+            db: Database session
+        """
+        self.db = db
+    
+    def apply_price(self, ticker_price: TickerPrice) -> None:
+        """
+        Fold a single newly inserted price into every candle interval.
+        
+        Args:
+            ticker_price: Price row being saved (not yet committed)
+        """
+        self.apply_prices([(ticker_price.ticker, ticker_price.price, ticker_price.timestamp)])
+    
+    @track_query("apply_candles")
+    def apply_prices(self, prices: Iterable[Tuple[str, float, int]]) -> None:
+        """
+        Fold a batch of newly inserted prices into every candle interval.
+        
+        Prices are pre-aggregated per bucket so each candle is touched by a
+        single upsert row, then merged into existing candles with
+        ``INSERT ... ON CONFLICT DO UPDATE``. The caller commits.
+        
+        Args:
+            prices: Iterable of (ticker, price, timestamp) tuples
+        """
+        candles: Dict[Tuple[str, str, int], dict] = {}
+        
+        for ticker, price, timestamp in prices:
+            for interval, seconds in CANDLE_INTERVALS.items():
+                bucket = timestamp - timestamp % seconds
+                key = (ticker, interval, bucket)
+                candle = candles.get(key)
+                
+                if candle is None:
+                    candles[key] = {
+                        "ticker": ticker,
+                        "interval": interval,
+                        "bucket": bucket,
+                        "open": price,
+                        "high": price,
+                        "low": price,
+                        "close": price,
+                        "open_timestamp": timestamp,
+                        "close_timestamp": timestamp,
+                        "count": 1,
+                    }
+                    continue
+                
+                if timestamp < candle["open_timestamp"]:
+                    candle["open"], candle["open_timestamp"] = price, timestamp
+                if timestamp >= candle["close_timestamp"]:
+                    candle["close"], candle["close_timestamp"] = price, timestamp
+                candle["high"] = max(candle["high"], price)
+                candle["low"] = min(candle["low"], price)
+                candle["count"] += 1
+        
+        if not candles:
+            return
+        
+        # Executemany over a fixed statement keeps its compiled form cached;
+        # inlining a different number of VALUES rows each call does not
+        stmt = insert(PriceCandle)
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PriceCandle.ticker, PriceCandle.interval, PriceCandle.bucket],
+            set_={
+                "open": case(
+                    (excluded.open_timestamp < PriceCandle.open_timestamp, excluded.open),
+                    else_=PriceCandle.open
+                ),
+                "open_timestamp": func.least(PriceCandle.open_timestamp, excluded.open_timestamp),
+                "high": func.greatest(PriceCandle.high, excluded.high),
+                "low": func.least(PriceCandle.low, excluded.low),
+                "close": case(
+                    (excluded.close_timestamp >= PriceCandle.close_timestamp, excluded.close),
+                    else_=PriceCandle.close
+                ),
+                "close_timestamp": func.greatest(PriceCandle.close_timestamp, excluded.close_timestamp),
+                "count": PriceCandle.count + excluded.count,
+            }
+        )
+        self.db.execute(stmt, list(candles.values()))
+    
+    @track_query("get_candles")
+    def get_candles(
+        self,
+        ticker: str,
+        interval: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[PriceCandle]:
+        """
+        Get candles for a ticker and interval within a date range.
+        
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            interval: Candle interval code (see CANDLE_INTERVALS)
+            start_date: Start of date range (optional)
+            end_date: End of date range (optional)
+            
+        Returns:
+            List of PriceCandle instances, ordered by bucket ascending
+        """
+        return list(self.db.scalars(candles_query(ticker, interval, start_date, end_date)))
+    
+    def rebuild(self, ticker: Optional[str] = None) -> Dict[str, int]:
+        """
+        Rebuild candles from existing price history.
+        
+        The base interval is aggregated from raw prices; coarser intervals
+        are aggregated from base candles, which is far cheaper than
+        re-scanning raw prices for each interval.
+        
+        Args:
+            ticker: Only rebuild this ticker (optional, defaults to all)
+            
+        Returns:
+            Mapping of interval code to number of candles written
+        """
+        ticker_filter = "AND ticker = :ticker" if ticker else ""
+        params = {"ticker": ticker} if ticker else {}
+        written: Dict[str, int] = {}
+        
+        self.db.execute(
+            text(f"DELETE FROM price_candles WHERE TRUE {ticker_filter}"),
+            params
+        )
+        
+        base_seconds = CANDLE_INTERVALS[BASE_INTERVAL]
+        result = self.db.execute(
+            text(f"""
+                INSERT INTO price_candles (
+                    ticker, interval, bucket, open, high, low, close,
+                    open_timestamp, close_timestamp, count
+                )
+                SELECT
+                    ticker,
+                    :interval,
+                    timestamp - timestamp % :seconds AS bucket,
+                    (array_agg(price ORDER BY timestamp, id))[1],
+                    max(price),
+                    min(price),
+                    (array_agg(price ORDER BY timestamp DESC, id DESC))[1],
+                    min(timestamp),
+                    max(timestamp),
+                    count(*)
+                FROM ticker_prices
+                WHERE TRUE {ticker_filter}
+                GROUP BY ticker, bucket
+            """),
+            {"interval": BASE_INTERVAL, "seconds": base_seconds, **params}
+        )
+        written[BASE_INTERVAL] = result.rowcount
+        
+        for interval, seconds in CANDLE_INTERVALS.items():
+            if interval == BASE_INTERVAL:
+                continue
+            result = self.db.execute(
+                text(f"""
+                    INSERT INTO price_candles (
+                        ticker, interval, bucket, open, high, low, close,
+                        open_timestamp, close_timestamp, count
+                    )
+                    SELECT
+                        ticker,
+                        :interval,
+                        bucket - bucket % :seconds AS coarse_bucket,
+                        (array_agg(open ORDER BY bucket))[1],
+                        max(high),
+                        min(low),
+                        (array_agg(close ORDER BY bucket DESC))[1],
+                        min(open_timestamp),
+                        max(close_timestamp),
+                        sum(count)
+                    FROM price_candles
+                    WHERE interval = :base_interval {ticker_filter}
+                    GROUP BY ticker, coarse_bucket
+                """),
+                {"interval": interval, "seconds": seconds, "base_interval": BASE_INTERVAL, **params}
+            )
+            written[interval] = result.rowcount
+        
+        self.db.commit()
+        return written
+
+
+class AsyncCandleService:
+    """Read-only counterpart of CandleService for an AsyncSession."""
+    
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize async candle service.
+        
+        Args:
+            db: Async database session
+        """
+        self.db = db
+    
+    @track_query("get_candles")
+    async def get_candles(
+        self,
+        ticker: str,
+        interval: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[PriceCandle]:
+        """
+        Get candles for a ticker and interval within a date range.
+        
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            interval: Candle interval code (see CANDLE_INTERVALS)
+            start_date: Start of date range (optional)
+            end_date: End of date range (optional)
+            
+        Returns:
+            List of PriceCandle instances, ordered by bucket ascending
+        """
+        return list(await self.db.scalars(candles_query(ticker, interval, start_date, end_date)))
@@ -0,0 +1,324 @@
+"""
+Service layer for the compact storage layout of ticker_prices.
+
+The compact layout is optional (``settings.compact_prices``). Prices are
+stored in ticker_prices_compact with the ticker as a smallint id from the
+``tickers`` dictionary and the price as a BIGINT scaled by PRICE_SCALE,
+under a single covering index. Once migrated, ``ticker_prices`` is a view
+with the original columns, so every read through TickerPrice is unchanged.
+Writes go through ``insert_compact_prices``; inserts into the view are
+redirected to the compact table by a trigger, for processes that do not
+know about the layout yet.
+"""
+import io
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models import PRICE_SCALE, CompactTickerPrice, Ticker
+
+PRICE_TABLE = "ticker_prices"
+COMPACT_TABLE = "ticker_prices_compact"
+LEGACY_TABLE = "ticker_prices_legacy"
+COMPACT_INDEX = "uq_compact_ticker_timestamp"
+MIRROR_TRIGGER = "ticker_prices_mirror_compact"
+VIEW_INSERT_TRIGGER = "ticker_prices_view_insert"
+
+
+def to_fixed(price: float) -> int:
+    """Return ``price`` as a PRICE_SCALE fixed-point integer."""
+    return round(price * PRICE_SCALE)
+
+
+def ticker_ids(db: Session, symbols: Iterable[str]) -> Dict[str, int]:
+    """
+    Look up the dictionary ids of ticker symbols, registering new ones.
+    
+    Only symbols that are missing are inserted: ``ON CONFLICT DO NOTHING``
+    still draws a value from the smallint id sequence for every row.
+    
+    Args:
+        db: Database session
+        symbols: Currency tickers
+    
+    Returns:
+        Mapping of symbol to ticker id
+    """
+    symbols = sorted(set(symbols))
+    lookup = select(Ticker.symbol, Ticker.id)
+    ids = dict(db.execute(lookup.where(Ticker.symbol.in_(symbols))).tuples().all())
+    
+    missing = [symbol for symbol in symbols if symbol not in ids]
+    if missing:
+        db.execute(
+            pg_insert(Ticker).on_conflict_do_nothing(index_elements=[Ticker.symbol]),
+            [{"symbol": symbol} for symbol in missing]
+        )
+        ids.update(db.execute(lookup.where(Ticker.symbol.in_(missing))).tuples().all())
+    
+    return ids
+
+
+def insert_compact_prices(
+    db: Session,
+    prices: Dict[Tuple[str, int], float],
+    use_copy: bool = False
+) -> List[Tuple[int, str, int]]:
+    """
+    Insert prices into ticker_prices_compact, skipping stored (ticker, timestamp) pairs.
+    
+    The compact counterpart of ``insert_new_prices``; the caller commits.
+    
+    Args:
+        db: Database session
+        prices: Mapping of (ticker, timestamp) to price
+        use_copy: Load rows with PostgreSQL COPY into a staging table first
+    
+    Returns:
+        (id, ticker, timestamp) of the rows that were inserted
+    """
+    ids = ticker_ids(db, (ticker for ticker, _ in prices))
+    symbols = {ticker_id: symbol for symbol, ticker_id in ids.items()}
+    rows = [(timestamp, to_fixed(price), ids[ticker]) for (ticker, timestamp), price in prices.items()]
+    
+    if use_copy:
+        inserted = _copy_compact_prices(db, rows)
+    else:
+        stmt = pg_insert(CompactTickerPrice).on_conflict_do_nothing(
+            index_elements=[CompactTickerPrice.ticker_id, CompactTickerPrice.timestamp]
+        ).returning(CompactTickerPrice.id, CompactTickerPrice.ticker_id, CompactTickerPrice.timestamp)
+        inserted = db.execute(
+            stmt,
+            [{"timestamp": timestamp, "price": price, "ticker_id": ticker_id} for timestamp, price, ticker_id in rows]
+        ).tuples().all()
+    
+    return [(price_id, symbols[ticker_id], timestamp) for price_id, ticker_id, timestamp in inserted]
+
+
+def _copy_compact_prices(db: Session, rows: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    """COPY rows into a session-local staging table, then move the new ones into ticker_prices_compact."""
+    db.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS ticker_prices_compact_staging "
+        "(timestamp BIGINT, price BIGINT, ticker_id SMALLINT) ON COMMIT DELETE ROWS"
+    ))
+    
+    buffer = io.StringIO()
+    for timestamp, price, ticker_id in rows:
+        buffer.write(f"{timestamp}\t{price}\t{ticker_id}\n")
+    buffer.seek(0)
+    
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert("COPY ticker_prices_compact_staging (timestamp, price, ticker_id) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+    
+    return db.execute(text(f"""
+        INSERT INTO {COMPACT_TABLE} (timestamp, price, ticker_id)
+        SELECT timestamp, price, ticker_id FROM ticker_prices_compact_staging
+        ON CONFLICT (ticker_id, timestamp) DO NOTHING
+        RETURNING id, ticker_id, timestamp
+    """)).tuples().all()
+
+
+class CompactStorageService:
+    """
+    Service for migrating ticker_prices to the compact layout and sizing it.
+    
+    The migration is online: ingestion and the API keep working while rows
+    are copied, and only the final swap takes a brief exclusive lock.
+    """
+    
+    def __init__(self, db: Session):
+        """
+        Initialize compact storage service.
+        
+        Args:
+            db: Database session
+        """
+        self.db = db
+    
+    def _relkind(self, relation: str) -> Optional[str]:
+        """Return the pg_class relkind of ``relation``, or None if it does not exist."""
+        return self.db.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:relation)"),
+            {"relation": relation}
+        ).scalar()
+    
+    def is_compact(self) -> bool:
+        """Return True if ticker_prices is the view over the compact table."""
+        return self._relkind(PRICE_TABLE) == "v"
+    
+    def migrate(self, batch_size: int = 50000, progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Move a plain ticker_prices table to the compact layout.
+        
+        1. An insert trigger on ticker_prices mirrors every new row into
+           ticker_prices_compact from now on.
+        2. Existing rows are copied in id order, ``batch_size`` rows per
+           committed transaction. Rows the trigger already mirrored are
+           skipped by the unique index.
+        3. In one short transaction, ticker_prices is renamed to
+           ticker_prices_legacy and a view with its columns takes its place.
+           The id sequence moves to the compact table, so ids continue.
+        4. The covering index is rebuilt concurrently. The copy inserts the
+           tickers interleaved, which leaves index pages about half full.
+        
+        Reads keep working throughout. After the swap, an INSTEAD OF INSERT
+        trigger on the view stores inserts in the compact table and skips
+        duplicates. So processes still running without ``COMPACT_PRICES``
+        keep writing. With the flag they write to the compact table
+        directly, which is faster. The legacy table is kept until
+        ``drop_legacy`` is called.
+        
+        Args:
+            batch_size: Rows copied per transaction
+            progress: Called with the number of rows copied after each batch (optional)
+        
+        Returns:
+            Number of rows in the compact table (0 if already migrated)
+        
+        Raises:
+            ValueError: If ticker_prices is partitioned
+        """
+        if self.is_compact():
+            return 0
+        if self._relkind(PRICE_TABLE) == "p":
+            raise ValueError("ticker_prices is partitioned; the compact layout does not support partitioning")
+        
+        sequence = self.db.execute(
+            text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": PRICE_TABLE}
+        ).scalar()
+        connection = self.db.connection()
+        Ticker.__table__.create(connection, checkfirst=True)
+        CompactTickerPrice.__table__.create(connection, checkfirst=True)
+        self.db.execute(text(
+            f"ALTER TABLE {COMPACT_TABLE} ALTER COLUMN id SET DEFAULT nextval('{sequence}'::regclass)"
+        ))
+        
+        # Waits for in-flight inserts, so every row the trigger misses is
+        # committed before the copy below starts
+        self.db.execute(text(f"""
+            CREATE OR REPLACE FUNCTION {MIRROR_TRIGGER}() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO tickers (symbol)
+                SELECT NEW.ticker WHERE NOT EXISTS (SELECT 1 FROM tickers WHERE symbol = NEW.ticker)
+                ON CONFLICT (symbol) DO NOTHING;
+                INSERT INTO {COMPACT_TABLE} (id, timestamp, price, ticker_id)
+                SELECT NEW.id, NEW.timestamp, round(NEW.price * {PRICE_SCALE})::bigint, id
+                FROM tickers WHERE symbol = NEW.ticker
+                ON CONFLICT (ticker_id, timestamp) DO NOTHING;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        """))
+        self.db.execute(text(f"DROP TRIGGER IF EXISTS {MIRROR_TRIGGER} ON {PRICE_TABLE}"))
+        self.db.execute(text(
+            f"CREATE TRIGGER {MIRROR_TRIGGER} AFTER INSERT ON {PRICE_TABLE} "
+            f"FOR EACH ROW EXECUTE FUNCTION {MIRROR_TRIGGER}()"
+        ))
+        self.db.commit()
+        
+        copied = 0
+        after = 0
+        while True:
+            upper = self.db.execute(text(f"""
+                SELECT max(id) FROM (
+                    SELECT id FROM {PRICE_TABLE} WHERE id > :after ORDER BY id LIMIT :batch_size
+                ) batch
+            """), {"after": after, "batch_size": batch_size}).scalar()
+            if upper is None:
+                break
+            
+            bounds = {"after": after, "upper": upper}
+            self.db.execute(text(f"""
+                INSERT INTO tickers (symbol)
+                SELECT DISTINCT ticker FROM {PRICE_TABLE}
+                WHERE id > :after AND id <= :upper
+                  AND NOT EXISTS (SELECT 1 FROM tickers WHERE symbol = ticker)
+                ON CONFLICT (symbol) DO NOTHING
+            """), bounds)
+            copied += self.db.execute(text(f"""
+                INSERT INTO {COMPACT_TABLE} (id, timestamp, price, ticker_id)
+                SELECT p.id, p.timestamp, round(p.price * {PRICE_SCALE})::bigint, t.id
+                FROM {PRICE_TABLE} p JOIN tickers t ON t.symbol = p.ticker
+                WHERE p.id > :after AND p.id <= :upper
+                ON CONFLICT (ticker_id, timestamp) DO NOTHING
+            """), bounds).rowcount
+            self.db.commit()
+            after = upper
+            if progress:
+                progress(copied)
+        
+        self.db.execute(text(f"LOCK TABLE {PRICE_TABLE} IN ACCESS EXCLUSIVE MODE"))
+        self.db.execute(text(f"DROP TRIGGER {MIRROR_TRIGGER} ON {PRICE_TABLE}"))
+        self.db.execute(text(f"DROP FUNCTION {MIRROR_TRIGGER}()"))
+        self.db.execute(text(f"ALTER TABLE {PRICE_TABLE} RENAME TO {LEGACY_TABLE}"))
+        self.db.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {COMPACT_TABLE}.id"))
+        self.db.execute(text(f"""
+            CREATE VIEW {PRICE_TABLE} AS
+            SELECT p.id, t.symbol AS ticker, p.price::float8 / {PRICE_SCALE} AS price, p.timestamp
+            FROM {COMPACT_TABLE} p
+            JOIN tickers t ON t.id = p.ticker_id
+        """))
+        # Returns no row for a duplicate, like ON CONFLICT DO NOTHING
+        self.db.execute(text(f"""
+            CREATE OR REPLACE FUNCTION {VIEW_INSERT_TRIGGER}() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO tickers (symbol)
+                SELECT NEW.ticker WHERE NOT EXISTS (SELECT 1 FROM tickers WHERE symbol = NEW.ticker)
+                ON CONFLICT (symbol) DO NOTHING;
+                INSERT INTO {COMPACT_TABLE} (id, timestamp, price, ticker_id)
+                SELECT coalesce(NEW.id, nextval('{sequence}'::regclass)), NEW.timestamp,
+                       round(NEW.price * {PRICE_SCALE})::bigint, id
+                FROM tickers WHERE symbol = NEW.ticker
+                ON CONFLICT (ticker_id, timestamp) DO NOTHING
+                RETURNING id INTO NEW.id;
+                IF NOT FOUND THEN
+                    RETURN NULL;
+                END IF;
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """))
+        self.db.execute(text(
+            f"CREATE TRIGGER {VIEW_INSERT_TRIGGER} INSTEAD OF INSERT ON {PRICE_TABLE} "
+            f"FOR EACH ROW EXECUTE FUNCTION {VIEW_INSERT_TRIGGER}()"
+        ))
+        self.db.execute(text(f"ANALYZE {COMPACT_TABLE}"))
+        self.db.commit()
+        
+        # REINDEX CONCURRENTLY cannot run inside a transaction block
+        with self.db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text(f"REINDEX INDEX CONCURRENTLY {COMPACT_INDEX}"))
+        
+        return self.db.execute(text(f"SELECT count(*) FROM {COMPACT_TABLE}")).scalar()
+    
+    def drop_legacy(self) -> bool:
+        """
+        Drop the ticker_prices_legacy table left by ``migrate``.
+        
+        Returns:
+            True if the table existed
+        """
+        if self._relkind(LEGACY_TABLE) is None:
+            return False
+        self.db.execute(text(f"DROP TABLE {LEGACY_TABLE}"))
+        self.db.commit()
+        return True
+    
+    def storage_sizes(self) -> Dict[str, int]:
+        """
+        Get the on-disk size of the price table in use and its indexes.
+        
+        Returns:
+            Dictionary with table_bytes (heap and TOAST) and index_bytes, of
+            ticker_prices_compact and tickers once migrated, else of
+            ticker_prices
+        """
+        tables = [COMPACT_TABLE, "tickers"] if self.is_compact() else [PRICE_TABLE]
+        table_bytes, index_bytes = self.db.execute(text("""
+            SELECT coalesce(sum(pg_table_size(oid)), 0), coalesce(sum(pg_indexes_size(oid)), 0)
+            FROM pg_class WHERE oid = ANY(ARRAY(SELECT to_regclass(name) FROM unnest(CAST(:tables AS text[])) name))
+        """), {"tables": tables}).one()
+        return {"table_bytes": int(table_bytes), "index_bytes": int(index_bytes)}
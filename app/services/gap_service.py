@@ -0,0 +1,157 @@
+"""
+Service layer for finding missed ingestion intervals in ticker_prices.
+"""
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import TextClause, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.types import BigInteger, String
+from app.config import settings
+from app.metrics import track_query
+
+# Per ticker, an index-only walk of uq_ticker_timestamp in timestamp order:
+# consecutive rows whose slots (timestamp / cadence) are more than one
+# apart enclose missing slots. lag() defaults to the slot before the range,
+# and the newest row's slot is compared with the slot after it, so leading
+# and trailing gaps are found too; a ticker without rows is one whole gap.
+GAP_QUERY = text("""
+    SELECT r.ticker, r.cadence, g.prev_slot + 1 AS first_missing, g.slot - 1 AS last_missing
+    FROM unnest(:tickers, :cadences, :first_slots, :last_slots) AS r(ticker, cadence, first_slot, last_slot)
+    CROSS JOIN LATERAL (
+        SELECT slot, prev_slot FROM (
+            SELECT p.timestamp / r.cadence AS slot,
+                   lag(p.timestamp / r.cadence, 1, r.first_slot - 1) OVER (ORDER BY p.timestamp) AS prev_slot
+            FROM ticker_prices p
+            WHERE p.ticker = r.ticker
+              AND p.timestamp >= r.first_slot * r.cadence
+              AND p.timestamp < (r.last_slot + 1) * r.cadence
+        ) steps
+        WHERE slot - prev_slot > 1
+        UNION ALL
+        SELECT r.last_slot + 1, coalesce(max(p.timestamp) / r.cadence, r.first_slot - 1)
+        FROM ticker_prices p
+        WHERE p.ticker = r.ticker
+          AND p.timestamp >= r.first_slot * r.cadence
+          AND p.timestamp < (r.last_slot + 1) * r.cadence
+    ) g
+    WHERE g.slot - g.prev_slot > 1
+    ORDER BY r.ticker, first_missing
+""").bindparams(
+    bindparam("tickers", type_=ARRAY(String)),
+    bindparam("cadences", type_=ARRAY(BigInteger)),
+    bindparam("first_slots", type_=ARRAY(BigInteger)),
+    bindparam("last_slots", type_=ARRAY(BigInteger)),
+)
+
+
+class PriceGap(NamedTuple):
+    """A run of expected ingestion slots without a stored price."""
+    ticker: str
+    start: int
+    end: int
+    missing: int
+
+
+def ingest_cadence(ticker: str) -> int:
+    """Return the seconds between expected prices of a ticker."""
+    return settings.ingest_cadences.get(ticker, settings.ingest_interval)
+
+
+def gap_query(
+    tickers: List[str],
+    start: int,
+    end: int,
+    now: Optional[int] = None
+) -> Tuple[TextClause, Dict[str, list]]:
+    """
+    Build the gap scan shared by the sync and async services.
+    
+    A ticker is expected to have one price per slot of its ingest cadence.
+    Only slots that lie entirely within [start, end] and ended one cadence
+    ago (so their tick had time to run) are checked.
+    
+    Args:
+        tickers: Currency tickers
+        start: Range start, UNIX seconds (inclusive)
+        end: Range end, UNIX seconds (inclusive)
+        now: Current time (optional, for tests)
+    
+    Returns:
+        Tuple of (statement, bind parameters)
+    """
+    now = int(time.time()) if now is None else now
+    cadences = [ingest_cadence(ticker) for ticker in tickers]
+    return GAP_QUERY, {
+        "tickers": tickers,
+        "cadences": cadences,
+        "first_slots": [-(-start // cadence) for cadence in cadences],
+        "last_slots": [(min(end, now - cadence) + 1) // cadence - 1 for cadence in cadences],
+    }
+
+
+def to_gaps(rows) -> List[PriceGap]:
+    """Convert gap scan rows of slots into PriceGap time ranges."""
+    return [
+        PriceGap(ticker, first * cadence, (last + 1) * cadence - 1, last - first + 1)
+        for ticker, cadence, first, last in rows
+    ]
+
+
+class GapService:
+    """Service for finding missed ingestion intervals."""
+    
+    def __init__(self, db: Session):
+        """
+        Initialize gap service.
+        
+        Args:
+            db: Database session
+        """
+        self.db = db
+    
+    @track_query("find_gaps")
+    def find_gaps(self, tickers: List[str], start: int, end: int) -> List[PriceGap]:
+        """
+        Find runs of expected slots without a price, in one query for all tickers.
+        
+        Args:
+            tickers: Currency tickers (e.g., ['BTC_USD', 'ETH_USD'])
+            start: Range start, UNIX seconds (inclusive)
+            end: Range end, UNIX seconds (inclusive)
+        
+        Returns:
+            List of PriceGap, ordered by ticker and start
+        """
+        stmt, params = gap_query(tickers, start, end)
+        return to_gaps(self.db.execute(stmt, params).all())
+
+
+class AsyncGapService:
+    """Counterpart of GapService for an AsyncSession, used by the API."""
+    
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize async gap service.
+        
+        Args:
+            db: Async database session
+        """
+        self.db = db
+    
+    @track_query("find_gaps")
+    async def find_gaps(self, tickers: List[str], start: int, end: int) -> List[PriceGap]:
+        """
+        Find runs of expected slots without a price (see GapService.find_gaps).
+        
+        Args:
+            tickers: Currency tickers (e.g., ['BTC_USD', 'ETH_USD'])
+            start: Range start, UNIX seconds (inclusive)
+            end: Range end, UNIX seconds (inclusive)
+        
+        Returns:
+            List of PriceGap, ordered by ticker and start
+        """
+        stmt, params = gap_query(tickers, start, end)
+        return to_gaps((await self.db.execute(stmt, params)).all())
@@ -0,0 +1,424 @@
+"""
+Service layer for monthly partitioning of ticker_prices.
+
+Partitioning is optional (``settings.price_partitioning``). Once the table
+has been converted, ``ticker_prices`` is a parent table range-partitioned on
+``timestamp`` with one partition per calendar month (UTC), plus a default
+partition that catches rows outside every month created so far.
+"""
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import TickerPrice
+from app.services.compact_service import CompactStorageService
+
+PARENT_TABLE = "ticker_prices"
+DEFAULT_PARTITION = "ticker_prices_default"
+DOWNSAMPLED_SUFFIX = "_ds"
+# Name of the partitioned parent while ``convert`` fills it
+STAGING_TABLE = "ticker_prices_partitioned"
+MIRROR_TRIGGER = "ticker_prices_mirror_partitioned"
+
+_BOUND_PATTERN = re.compile(r"FROM \('?(-?\d+)'?\) TO \('?(-?\d+)'?\)")
+
+
+@dataclass
+class PricePartition:
+    """A monthly partition of ticker_prices."""
+    name: str
+    lower: int
+    upper: int
+    downsampled: bool
+
+
+def month_start(timestamp: int) -> int:
+    """Return the UNIX timestamp of the first second of the UTC month containing ``timestamp``."""
+    moment = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    return int(datetime(moment.year, moment.month, 1, tzinfo=timezone.utc).timestamp())
+
+
+def next_month(lower: int) -> int:
+    """Return the start of the month following the month starting at ``lower``."""
+    moment = datetime.fromtimestamp(lower, tz=timezone.utc)
+    year, month = (moment.year + 1, 1) if moment.month == 12 else (moment.year, moment.month + 1)
+    return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp())
+
+
+def raw_retention_start(now: Optional[int] = None) -> Optional[int]:
+    """
+    Return the start of the window whose raw prices are kept.
+    
+    Older months are downsampled by ``apply_retention``, so they no longer
+    hold one price per ingest slot and must not be scanned for gaps.
+    
+    Args:
+        now: Current time (optional, defaults to time.time())
+        
+    Returns:
+        UNIX seconds, or None if partitioning (and so retention) is disabled
+    """
+    if not settings.price_partitioning:
+        return None
+    now = int(time.time()) if now is None else now
+    return now - settings.partition_raw_retention_days * 86400
+
+
+def partition_name(lower: int) -> str:
+    """Return the partition table name for the month starting at ``lower``."""
+    moment = datetime.fromtimestamp(lower, tz=timezone.utc)
+    return f"{PARENT_TABLE}_p{moment.year:04d}{moment.month:02d}"
+
+
+class PartitionService:
+    """
+    Service for creating, downsampling and dropping ticker_prices partitions.
+    
+    Every maintenance method runs in the session's transaction and commits
+    on success, so a failed step leaves the table unchanged. ``convert``
+    commits in batches; a failed conversion leaves ticker_prices as it was
+    and is restarted from scratch by the next call.
+    """
+    
+    def __init__(self, db: Session):
+        """
+        Initialize partition service.
+        
+        Args:
+            db: Database session
+        """
+        self.db = db
+    
+    def is_partitioned(self) -> bool:
+        """Return True if ticker_prices is a partitioned table."""
+        relkind = self.db.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": PARENT_TABLE}
+        ).scalar()
+        return relkind == "p"
+    
+    def list_partitions(self, parent: str = PARENT_TABLE) -> List[PricePartition]:
+        """
+        List the monthly partitions, excluding the default partition.
+        
+        Args:
+            parent: Partitioned table (optional, defaults to ticker_prices)
+        
+        Returns:
+            Partitions ordered by lower bound
+        """
+        rows = self.db.execute(text("""
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(:table)
+        """), {"table": parent}).all()
+        
+        partitions = []
+        for name, bound in rows:
+            match = _BOUND_PATTERN.search(bound)
+            if match is None:
+                continue
+            partitions.append(PricePartition(
+                name=name,
+                lower=int(match.group(1)),
+                upper=int(match.group(2)),
+                downsampled=name.endswith(DOWNSAMPLED_SUFFIX)
+            ))
+        
+        return sorted(partitions, key=lambda partition: partition.lower)
+    
+    def convert(
+        self,
+        months_ahead: Optional[int] = None,
+        batch_size: int = 50000,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> int:
+        """
+        Convert a plain ticker_prices table into a monthly partitioned one.
+        
+        The conversion is online, like the compact migration:
+        
+        1. An empty partitioned table with the same columns, sequence and
+           indexes is created next to ticker_prices, with partitions for
+           every month the data covers. An insert trigger on ticker_prices
+           mirrors every new row into it from now on.
+        2. Existing rows are copied in id order, ``batch_size`` rows per
+           committed transaction. Rows the trigger already mirrored are
+           skipped by the unique indexes.
+        3. In one short transaction, ticker_prices is dropped and the
+           partitioned table is renamed into its place. Only this step
+           takes an exclusive lock.
+        
+        Args:
+            months_ahead: Future months to create partitions for (optional,
+                defaults to settings.partition_months_ahead)
+            batch_size: Rows copied per transaction
+            progress: Called with the number of rows copied after each batch (optional)
+                
+        Returns:
+            Number of rows in the partitioned table (0 if the table was
+            already partitioned)
+            
+        Raises:
+            ValueError: If ticker_prices uses the compact storage layout
+        """
+        if self.is_partitioned():
+            return 0
+        if CompactStorageService(self.db).is_compact():
+            raise ValueError("ticker_prices uses the compact layout, which does not support partitioning")
+        
+        sequence = self.db.execute(
+            text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": PARENT_TABLE}
+        ).scalar()
+        
+        # Start over if an earlier conversion failed halfway
+        self.db.execute(text(f"DROP TRIGGER IF EXISTS {MIRROR_TRIGGER} ON {PARENT_TABLE}"))
+        self.db.execute(text(f"DROP TABLE IF EXISTS {STAGING_TABLE}"))
+        
+        # The partition key must be part of the primary key
+        self.db.execute(text(f"""
+            CREATE TABLE {STAGING_TABLE} (
+                id BIGINT NOT NULL DEFAULT nextval('{sequence}'::regclass),
+                ticker VARCHAR(20) NOT NULL,
+                price NUMERIC(20, 8) NOT NULL,
+                timestamp BIGINT NOT NULL,
+                CONSTRAINT {STAGING_TABLE}_pkey PRIMARY KEY (id, timestamp)
+            ) PARTITION BY RANGE (timestamp)
+        """))
+        # Index names are taken by ticker_prices until the swap
+        for index in TickerPrice.__table__.indexes:
+            self.db.execute(text(
+                f"CREATE {'UNIQUE ' if index.unique else ''}INDEX {index.name}_partitioned "
+                f"ON {STAGING_TABLE} ({', '.join(column.name for column in index.columns)})"
+            ))
+        self.db.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {STAGING_TABLE} DEFAULT"))
+        
+        first, last = self.db.execute(
+            text(f"SELECT min(timestamp), max(timestamp) FROM {PARENT_TABLE}")
+        ).one()
+        self._create_month_partitions(first, last, months_ahead, STAGING_TABLE)
+        
+        # Waits for in-flight inserts, so every row the trigger misses is
+        # committed before the copy below starts
+        self.db.execute(text(f"""
+            CREATE OR REPLACE FUNCTION {MIRROR_TRIGGER}() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO {STAGING_TABLE} (id, ticker, price, timestamp)
+                VALUES (NEW.id, NEW.ticker, NEW.price, NEW.timestamp)
+                ON CONFLICT DO NOTHING;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        """))
+        self.db.execute(text(
+            f"CREATE TRIGGER {MIRROR_TRIGGER} AFTER INSERT ON {PARENT_TABLE} "
+            f"FOR EACH ROW EXECUTE FUNCTION {MIRROR_TRIGGER}()"
+        ))
+        self.db.commit()
+        
+        # Rows inserted from here on are already mirrored by the trigger
+        last_id = self.db.execute(text(f"SELECT max(id) FROM {PARENT_TABLE}")).scalar() or 0
+        copied = 0
+        after = 0
+        while True:
+            upper = self.db.execute(text(f"""
+                SELECT max(id) FROM (
+                    SELECT id FROM {PARENT_TABLE} WHERE id > :after AND id <= :last_id ORDER BY id LIMIT :batch_size
+                ) batch
+            """), {"after": after, "last_id": last_id, "batch_size": batch_size}).scalar()
+            if upper is None:
+                break
+            
+            copied += self.db.execute(text(f"""
+                INSERT INTO {STAGING_TABLE} (id, ticker, price, timestamp)
+                SELECT id, ticker, price, timestamp FROM {PARENT_TABLE}
+                WHERE id > :after AND id <= :upper
+                ON CONFLICT DO NOTHING
+            """), {"after": after, "upper": upper}).rowcount
+            self.db.commit()
+            after = upper
+            if progress:
+                progress(copied)
+        
+        self.db.execute(text(f"LOCK TABLE {PARENT_TABLE} IN ACCESS EXCLUSIVE MODE"))
+        self.db.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {STAGING_TABLE}.id"))
+        self.db.execute(text(f"DROP TABLE {PARENT_TABLE}"))
+        self.db.execute(text(f"DROP FUNCTION {MIRROR_TRIGGER}()"))
+        self.db.execute(text(f"ALTER TABLE {STAGING_TABLE} RENAME TO {PARENT_TABLE}"))
+        self.db.execute(text(f"ALTER TABLE {PARENT_TABLE} RENAME CONSTRAINT {STAGING_TABLE}_pkey TO {PARENT_TABLE}_pkey"))
+        for index in TickerPrice.__table__.indexes:
+            self.db.execute(text(f"ALTER INDEX {index.name}_partitioned RENAME TO {index.name}"))
+        self.db.commit()
+        
+        self.db.execute(text(f"ANALYZE {PARENT_TABLE}"))
+        self.db.commit()
+        return self.db.execute(text(f"SELECT count(*) FROM {PARENT_TABLE}")).scalar()
+    
+    def ensure_partitions(self, months_ahead: Optional[int] = None) -> List[str]:
+        """
+        Create partitions for the current and upcoming months.
+        
+        Months that only have rows in the default partition (e.g. after a
+        history backfill) get a partition too, and their rows are moved out
+        of the default partition.
+        
+        Args:
+            months_ahead: Future months to create (optional, defaults to
+                settings.partition_months_ahead)
+                
+        Returns:
+            Names of the partitions created
+        """
+        first, last = self.db.execute(
+            text(f"SELECT min(timestamp), max(timestamp) FROM {DEFAULT_PARTITION}")
+        ).one()
+        created = self._create_month_partitions(first, last, months_ahead)
+        self.db.commit()
+        return created
+    
+    def apply_retention(
+        self,
+        raw_days: Optional[int] = None,
+        drop_days: Optional[int] = None,
+        interval: Optional[int] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Downsample old partitions and drop expired ones.
+        
+        A partition whose whole month is older than ``raw_days`` is replaced
+        by a copy holding only the last price per ticker per ``interval``
+        seconds. The copy is attached in place of the raw partition, so
+        nothing is deleted row by row and no vacuum debt builds up. A
+        partition older than ``drop_days`` is dropped entirely. Candles are
+        not touched and keep their full-resolution OHLC history.
+        
+        Each partition is handled in its own transaction, so the exclusive
+        lock on ``ticker_prices`` is held for one swap or drop at a time
+        and writes and reads continue in between.
+        
+        Args:
+            raw_days: Days of raw ticks to keep (optional, defaults to
+                settings.partition_raw_retention_days)
+            drop_days: Days after which partitions are dropped (optional,
+                defaults to settings.partition_drop_after_days; None keeps
+                downsampled data forever)
+            interval: Seconds per downsampled row (optional, defaults to
+                settings.partition_downsample_interval)
+                
+        Returns:
+            Dictionary with the names of downsampled and dropped partitions
+        """
+        raw_days = raw_days if raw_days is not None else settings.partition_raw_retention_days
+        drop_days = drop_days if drop_days is not None else settings.partition_drop_after_days
+        interval = interval or settings.partition_downsample_interval
+        now = int(datetime.now(tz=timezone.utc).timestamp())
+        result: Dict[str, List[str]] = {"downsampled": [], "dropped": []}
+        
+        for partition in self.list_partitions():
+            if drop_days is not None and partition.upper <= now - drop_days * 86400:
+                self.db.execute(text(f"DROP TABLE {partition.name}"))
+                self.db.commit()
+                result["dropped"].append(partition.name)
+            elif not partition.downsampled and partition.upper <= now - raw_days * 86400:
+                result["downsampled"].append(self._downsample(partition, interval))
+        
+        return result
+    
+    def _create_month_partitions(
+        self,
+        first: Optional[int],
+        last: Optional[int],
+        months_ahead: Optional[int],
+        parent: str = PARENT_TABLE
+    ) -> List[str]:
+        """Create missing monthly partitions from ``first``'s month through the look-ahead window."""
+        months_ahead = settings.partition_months_ahead if months_ahead is None else months_ahead
+        now = int(datetime.now(tz=timezone.utc).timestamp())
+        
+        lower = month_start(min(first, now) if first is not None else now)
+        upper = month_start(now)
+        for _ in range(months_ahead + 1):
+            upper = next_month(upper)
+        if last is not None:
+            upper = max(upper, next_month(month_start(last)))
+        
+        existing = {partition.lower for partition in self.list_partitions(parent)}
+        created = []
+        while lower < upper:
+            month_end = next_month(lower)
+            if lower not in existing:
+                self._create_partition(lower, month_end, parent)
+                created.append(partition_name(lower))
+            lower = month_end
+        
+        return created
+    
+    def _create_partition(self, lower: int, upper: int, parent: str = PARENT_TABLE):
+        """Create one monthly partition, moving matching rows out of the default partition."""
+        name = partition_name(lower)
+        params = {"lower": lower, "upper": upper}
+        
+        has_rows = self.db.execute(text(f"""
+            SELECT EXISTS (
+                SELECT 1 FROM {DEFAULT_PARTITION}
+                WHERE timestamp >= :lower AND timestamp < :upper
+            )
+        """), params).scalar()
+        
+        if not has_rows:
+            self.db.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {parent} FOR VALUES FROM ({lower}) TO ({upper})"
+            ))
+            return
+        
+        # Postgres refuses a new partition while the default one holds rows
+        # for its range, so build it detached and attach it once filled
+        self.db.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)"))
+        self.db.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE timestamp >= :lower AND timestamp < :upper
+                RETURNING id, ticker, price, timestamp
+            )
+            INSERT INTO {name} (id, ticker, price, timestamp) SELECT * FROM moved
+        """), params)
+        self._attach(name, lower, upper)
+    
+    def _downsample(self, partition: PricePartition, interval: int) -> str:
+        """Swap a raw partition for one with the last price per ticker per interval."""
+        name = partition.name + DOWNSAMPLED_SUFFIX
+        
+        # Build the copy before touching the parent. SHARE only blocks writes
+        # to this old month, so the parent's exclusive lock covers just the swap
+        self.db.execute(text(f"LOCK TABLE {partition.name} IN SHARE MODE"))
+        self.db.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)"))
+        self.db.execute(text(f"""
+            INSERT INTO {name} (id, ticker, price, timestamp)
+            SELECT DISTINCT ON (ticker, timestamp - timestamp % :interval) id, ticker, price, timestamp
+            FROM {partition.name}
+            ORDER BY ticker, timestamp - timestamp % :interval, timestamp DESC, id DESC
+        """), {"interval": interval})
+        
+        self.db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {partition.name}"))
+        self._attach(name, partition.lower, partition.upper)
+        self.db.execute(text(f"DROP TABLE {partition.name}"))
+        self.db.commit()
+        
+        return name
+    
+    def _attach(self, name: str, lower: int, upper: int):
+        """Attach a filled table as the partition for [lower, upper)."""
+        # A matching CHECK constraint lets ATTACH skip its validation scan
+        self.db.execute(text(
+            f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds "
+            f"CHECK (timestamp >= {lower} AND timestamp < {upper})"
+        ))
+        self.db.execute(text(
+            f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ({lower}) TO ({upper})"
+        ))
+        self.db.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds"))
@@ -0,0 +1,418 @@
+"""
+Latest-price fan-out over Redis pub/sub.
+
+The ingestion path publishes every committed price on a Redis channel with
+PricePublisher. Each API process keeps a LatestPriceCache subscribed to that
+channel, so ``/prices/latest`` can answer from memory and only queries the
+database on a miss. The same subscription feeds ``/prices/stream``: every
+new price is encoded once and handed to the PriceSubscription queue of each
+streaming client interested in its ticker.
+"""
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import orjson
+import redis
+import redis.asyncio as aioredis
+from app.config import settings
+from app.metrics import STREAM_DROPPED
+
+# (price, timestamp) of the newest known price for a ticker
+LatestPrice = Tuple[float, int]
+
+
+def latest_by_ticker(prices: Iterable[Tuple[str, float, int]]) -> Dict[str, LatestPrice]:
+    """
+    Reduce a batch of prices to the newest one per ticker.
+    
+    Args:
+        prices: Iterable of (ticker, price, timestamp) tuples
+        
+    Returns:
+        Mapping of ticker to (price, timestamp)
+    """
+    latest: Dict[str, LatestPrice] = {}
+    for ticker, price, timestamp in prices:
+        current = latest.get(ticker)
+        if current is None or timestamp >= current[1]:
+            latest[ticker] = (float(price), timestamp)
+    return latest
+
+
+def price_message(ticker: str, price: float, timestamp: int) -> str:
+    """Encode a price update as sent to streaming clients."""
+    return orjson.dumps({"ticker": ticker, "price": price, "timestamp": timestamp}).decode()
+
+
+class PricePublisher:
+    """
+    Publishes newly committed prices on the latest-price channel.
+    
+    Publishing is best effort: a Redis outage is logged and never fails the
+    write that triggered it. Subscribers fall back to the database anyway.
+    """
+    
+    def __init__(self, client: Optional[redis.Redis] = None, channel: Optional[str] = None):
+        """
+        Initialize the publisher.
+        
+        Args:
+            client: Redis client (optional, created from settings on first use)
+            channel: Channel name (optional, defaults to settings.price_channel)
+        """
+        self._client = client
+        self.channel = channel or settings.price_channel
+    
+    @property
+    def client(self) -> redis.Redis:
+        """Redis client, created lazily."""
+        if self._client is None:
+            self._client = redis.Redis.from_url(settings.redis_url)
+        return self._client
+    
+    def publish_prices(self, prices: Iterable[Tuple[str, float, int]]) -> int:
+        """
+        Publish the newest price per ticker from a committed batch.
+        
+        Args:
+            prices: Iterable of (ticker, price, timestamp) tuples
+            
+        Returns:
+            Number of messages published
+        """
+        published = 0
+        try:
+            for ticker, (price, timestamp) in latest_by_ticker(prices).items():
+                self.client.publish(
+                    self.channel,
+                    json.dumps({"ticker": ticker, "price": price, "timestamp": timestamp})
+                )
+                published += 1
+        except redis.RedisError as e:
+            print(f"Error publishing prices to Redis: {str(e)}")
+        return published
+
+
+_publisher: Optional[PricePublisher] = None
+
+
+def get_price_publisher() -> PricePublisher:
+    """Return the process-wide PricePublisher."""
+    global _publisher
+    if _publisher is None:
+        _publisher = PricePublisher()
+    return _publisher
+
+
+class PriceSubscription:
+    """
+    Bounded queue of encoded price updates for one streaming client.
+    
+    Putting never blocks: when a slow client's queue is full, its oldest
+    update is dropped, so it catches up on the newest prices and never holds
+    up delivery to anyone else.
+    """
+    
+    def __init__(self, tickers: Iterable[str], maxsize: int):
+        """
+        Initialize the subscription.
+        
+        Args:
+            tickers: Tickers the client wants updates for
+            maxsize: Maximum queued updates before the oldest is dropped
+        """
+        self.tickers = frozenset(tickers)
+        self.dropped = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+    
+    def put(self, message: str) -> None:
+        """Queue an update, dropping the oldest one if the queue is full."""
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+            STREAM_DROPPED.inc()
+        self._queue.put_nowait(message)
+    
+    async def get(self) -> str:
+        """Wait for the next update."""
+        return await self._queue.get()
+    
+    def pending(self) -> int:
+        """Return the number of queued updates."""
+        return self._queue.qsize()
+
+
+class LatestPriceCache:
+    """
+    In-memory latest price per ticker, kept current by a Redis subscription.
+    
+    Entries are only trusted while the subscription is live. Every
+    disconnect and resubscribe clears the map and bumps ``generation``, so a
+    database read that started before a gap in the message stream is never
+    stored afterwards.
+    """
+    
+    def __init__(self, client: Optional[aioredis.Redis] = None, channel: Optional[str] = None):
+        """
+        Initialize the cache.
+        
+        Args:
+            client: Async Redis client (optional, created from settings)
+            channel: Channel name (optional, defaults to settings.price_channel)
+        """
+        self.client = client or aioredis.Redis.from_url(settings.redis_url, socket_keepalive=True)
+        self.channel = channel or settings.price_channel
+        self.connected = False
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._prices: Dict[str, LatestPrice] = {}
+        self._subscriptions: Dict[str, Set[PriceSubscription]] = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    def get(self, ticker: str) -> Optional[LatestPrice]:
+        """
+        Return the cached (price, timestamp) for a ticker.
+        
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            
+        Returns:
+            Cached value, or None on a miss or while disconnected
+        """
+        if not self.connected:
+            return None
+        return self._prices.get(ticker)
+    
+    def update(self, ticker: str, price: float, timestamp: int, generation: Optional[int] = None) -> bool:
+        """
+        Store a price unless it is older than the cached one.
+        
+        Args:
+            ticker: Currency ticker
+            price: Index price
+            timestamp: UNIX timestamp of the price
+            generation: Generation observed when the value was read (optional);
+                the value is discarded if the subscription has been reset since
+                
+        Returns:
+            True if the entry was stored
+        """
+        if not self.connected:
+            return False
+        if generation is not None and generation != self.generation:
+            return False
+        
+        current = self._prices.get(ticker)
+        if current is not None and current[1] > timestamp:
+            return False
+        
+        self._prices[ticker] = (price, timestamp)
+        return True
+    
+    async def get_or_load(
+        self,
+        ticker: str,
+        loader: Callable[[str], Awaitable[Optional[LatestPrice]]]
+    ) -> Optional[LatestPrice]:
+        """
+        Return the cached price, loading and caching it on a miss.
+        
+        Args:
+            ticker: Currency ticker
+            loader: Coroutine function returning (price, timestamp) or None
+            
+        Returns:
+            Latest (price, timestamp), or None if the ticker has no prices
+        """
+        cached = self.get(ticker)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        
+        self.misses += 1
+        generation = self.generation
+        loaded = await loader(ticker)
+        if loaded is not None:
+            self.update(ticker, loaded[0], loaded[1], generation=generation)
+        return loaded
+    
+    async def get_many_or_load(
+        self,
+        tickers: List[str],
+        loader: Callable[[List[str]], Awaitable[Dict[str, LatestPrice]]]
+    ) -> Dict[str, LatestPrice]:
+        """
+        Return the cached prices of many tickers, loading all misses at once.
+        
+        Args:
+            tickers: Currency tickers
+            loader: Coroutine function taking the missed tickers and returning
+                a mapping of ticker to (price, timestamp)
+                
+        Returns:
+            Mapping of ticker to latest (price, timestamp), in ``tickers``
+            order; tickers without prices are left out
+        """
+        found: Dict[str, LatestPrice] = {}
+        missing = []
+        for ticker in tickers:
+            cached = self.get(ticker)
+            if cached is None:
+                missing.append(ticker)
+            else:
+                found[ticker] = cached
+        
+        self.hits += len(found)
+        if missing:
+            self.misses += len(missing)
+            generation = self.generation
+            loaded = await loader(missing)
+            for ticker, (price, timestamp) in loaded.items():
+                self.update(ticker, price, timestamp, generation=generation)
+            found.update(loaded)
+        
+        return {ticker: found[ticker] for ticker in tickers if ticker in found}
+    
+    def subscribe(self, tickers: Iterable[str], maxsize: Optional[int] = None) -> PriceSubscription:
+        """
+        Register a streaming client for new prices of some tickers.
+        
+        Args:
+            tickers: Tickers to receive updates for
+            maxsize: Queue bound (optional, defaults to settings.stream_queue_size)
+            
+        Returns:
+            Subscription to read updates from; pass it to unsubscribe when done
+        """
+        subscription = PriceSubscription(tickers, maxsize or settings.stream_queue_size)
+        for ticker in subscription.tickers:
+            self._subscriptions.setdefault(ticker, set()).add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: PriceSubscription) -> None:
+        """
+        Stop delivering updates to a subscription.
+        
+        Args:
+            subscription: Subscription returned by subscribe
+        """
+        for ticker in subscription.tickers:
+            subscribers = self._subscriptions.get(ticker)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscriptions[ticker]
+    
+    def snapshot(self, tickers: Iterable[str]) -> List[str]:
+        """
+        Encode the cached prices of some tickers as stream updates.
+        
+        Args:
+            tickers: Tickers to include; those without a cached price are skipped
+            
+        Returns:
+            Encoded updates, one per cached ticker
+        """
+        messages = []
+        for ticker in tickers:
+            cached = self.get(ticker)
+            if cached is not None:
+                messages.append(price_message(ticker, *cached))
+        return messages
+    
+    def broadcast(self, ticker: str, price: float, timestamp: int) -> int:
+        """
+        Hand a new price to every subscription for its ticker.
+        
+        The update is encoded once and shared by all subscribers.
+        
+        Args:
+            ticker: Currency ticker
+            price: Index price
+            timestamp: UNIX timestamp of the price
+            
+        Returns:
+            Number of subscriptions the update was queued for
+        """
+        subscribers = self._subscriptions.get(ticker)
+        if not subscribers:
+            return 0
+        
+        message = price_message(ticker, price, timestamp)
+        for subscription in subscribers:
+            subscription.put(message)
+        return len(subscribers)
+    
+    def handle_message(self, data) -> None:
+        """
+        Apply one published price message and push it to streaming clients.
+        
+        Args:
+            data: JSON payload (bytes or str) produced by PricePublisher
+        """
+        try:
+            message = json.loads(data)
+            ticker, price, timestamp = message["ticker"], float(message["price"]), int(message["timestamp"])
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring malformed price message: {str(e)}")
+            return
+        
+        # Out-of-order (older) prices are neither cached nor pushed
+        if self.update(ticker, price, timestamp):
+            self.broadcast(ticker, price, timestamp)
+    
+    def _reset(self, connected: bool):
+        """Drop every entry and start a new generation."""
+        self._prices.clear()
+        self.generation += 1
+        self.connected = connected
+    
+    async def start(self):
+        """Start the background subscription."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def close(self):
+        """Stop the subscription and close the Redis client."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._reset(connected=False)
+        await self.client.aclose()
+    
+    async def _run(self):
+        """Keep the subscription alive, reconnecting with exponential backoff."""
+        delay = settings.price_cache_reconnect_min_delay
+        while True:
+            try:
+                await self._listen()
+            except (redis.RedisError, OSError) as e:
+                print(f"Price cache subscription lost: {str(e)}. Reconnecting in {delay:.1f}s")
+            
+            # Back off only while subscribing keeps failing
+            if self.connected:
+                delay = settings.price_cache_reconnect_min_delay
+            self._reset(connected=False)
+            
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.price_cache_reconnect_max_delay)
+    
+    async def _listen(self):
+        """Subscribe and apply messages until the connection drops."""
+        pubsub = self.client.pubsub()
+        try:
+            await pubsub.subscribe(self.channel)
+            async for message in pubsub.listen():
+                if message["type"] == "subscribe":
+                    # Anything cached before this point may have missed messages
+                    self._reset(connected=True)
+                elif message["type"] == "message":
+                    self.handle_message(message["data"])
+        finally:
+            await pubsub.aclose()
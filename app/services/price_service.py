@@ -1,12 +1,183 @@
 """
 Service layer for managing ticker price data.
 """
-from typing import List, Optional
+import asyncio
+import io
+import time
+from collections import Counter
+from typing import AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Tuple
 from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session
+from sqlalchemy import Float, String, cast, desc, func, literal, select, text, true, tuple_
+from app.metrics import DB_QUERY_SECONDS, INGEST_DUPLICATES, INGEST_ERRORS, track_query
+from app.config import settings
 from app.models import TickerPrice
 from app.clients.deribit_client import DeribitClient
+from app.services.candle_service import CandleService
+from app.services.compact_service import insert_compact_prices
+from app.services.price_cache import LatestPrice, PricePublisher, get_price_publisher
+
+
+def price_range_conditions(
+    ticker: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    cursor: Optional[Tuple[int, int]] = None
+) -> list:
+    """
+    Build the WHERE conditions shared by the range read methods.
+    
+    Args:
+        ticker: Currency ticker
+        start_date: Start of date range (optional)
+        end_date: End of date range (optional)
+        cursor: (timestamp, id) keyset bound, exclusive (optional)
+        
+    Returns:
+        List of SQLAlchemy conditions over TickerPrice
+    """
+    conditions = [TickerPrice.ticker == ticker]
+    
+    if start_date:
+        start_timestamp = int(start_date.timestamp())
+        conditions.append(TickerPrice.timestamp >= start_timestamp)
+    
+    if end_date:
+        end_timestamp = int(end_date.timestamp())
+        conditions.append(TickerPrice.timestamp <= end_timestamp)
+    
+    if cursor:
+        conditions.append(
+            tuple_(TickerPrice.timestamp, TickerPrice.id) < tuple_(*cursor)
+        )
+    
+    return conditions
+
+
+class SaveResult(NamedTuple):
+    """Row counts of an idempotent price insert."""
+    inserted: int
+    duplicates: int
+
+
+def insert_new_prices(
+    db: Session,
+    prices: List[Tuple[str, float, int]],
+    use_copy: bool = False
+) -> List[Tuple[str, float, int]]:
+    """
+    Insert prices, skipping any whose (ticker, timestamp) is already stored.
+    
+    Rows go through ``INSERT ... ON CONFLICT DO NOTHING``, which skips
+    rows that hit uq_ticker_timestamp, so a retried task or an overlapping
+    run cannot store a price twice; the first write wins. Repeats within
+    the batch are dropped before sending. With ``settings.compact_prices``
+    the rows go into ticker_prices_compact instead. The conflict has no
+    target, so the insert also works against the compact layout's view
+    when the setting is missing. The caller commits.
+    
+    Args:
+        db: Database session
+        prices: List of (ticker, price, timestamp) tuples
+        use_copy: Load rows with PostgreSQL COPY into a staging table first
+        
+    Returns:
+        The (ticker, price, timestamp) tuples that were inserted
+    """
+    unique: Dict[Tuple[str, int], float] = {}
+    for ticker, price, timestamp in prices:
+        unique.setdefault((ticker, timestamp), price)
+    
+    if not unique:
+        return []
+    
+    if settings.compact_prices:
+        keys = [(ticker, timestamp) for _, ticker, timestamp in insert_compact_prices(db, unique, use_copy)]
+    elif use_copy:
+        keys = _copy_new_prices(db, unique)
+    else:
+        stmt = pg_insert(TickerPrice).on_conflict_do_nothing().returning(TickerPrice.ticker, TickerPrice.timestamp)
+        keys = db.execute(
+            stmt,
+            [{"ticker": ticker, "price": price, "timestamp": timestamp} for (ticker, timestamp), price in unique.items()]
+        ).tuples().all()
+    
+    return [(ticker, unique[(ticker, timestamp)], timestamp) for ticker, timestamp in keys]
+
+
+def _copy_new_prices(db: Session, prices: Dict[Tuple[str, int], float]) -> List[Tuple[str, int]]:
+    """COPY rows into a session-local staging table, then move the new ones into ticker_prices."""
+    # COPY has no ON CONFLICT clause; the staging table is emptied on commit
+    db.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS ticker_prices_staging "
+        "(ticker VARCHAR(20), price NUMERIC(20, 8), timestamp BIGINT) ON COMMIT DELETE ROWS"
+    ))
+    
+    buffer = io.StringIO()
+    for (ticker, timestamp), price in prices.items():
+        buffer.write(f"{ticker}\t{price}\t{timestamp}\n")
+    buffer.seek(0)
+    
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert("COPY ticker_prices_staging (ticker, price, timestamp) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+    
+    return db.execute(text("""
+        INSERT INTO ticker_prices (ticker, price, timestamp)
+        SELECT ticker, price, timestamp FROM ticker_prices_staging
+        ON CONFLICT DO NOTHING
+        RETURNING ticker, timestamp
+    """)).tuples().all()
+
+
+@track_query("save_prices")
+def save_new_prices(
+    db: Session,
+    prices: List[Tuple[str, float, int]],
+    use_copy: bool = False,
+    publisher: Optional[PricePublisher] = None
+) -> SaveResult:
+    """
+    Bulk insert prices and update their candle rollups in one transaction.
+    
+    Prices whose (ticker, timestamp) is already stored are skipped (see
+    insert_new_prices); only new rows reach the candles and, after the
+    commit, the publisher.
+    
+    Args:
+        db: Database session
+        prices: List of (ticker, price, timestamp) tuples
+        use_copy: Load rows with PostgreSQL COPY instead of a multi-row INSERT
+        publisher: Publisher notified after the commit (optional, defaults
+            to the process-wide Redis publisher)
+        
+    Returns:
+        Counts of inserted and duplicate rows
+    """
+    if not prices:
+        return SaveResult(0, 0)
+    
+    inserted = insert_new_prices(db, prices, use_copy)
+    
+    if inserted:
+        CandleService(db).apply_prices(inserted)
+    with DB_QUERY_SECONDS.labels(operation="commit").time():
+        db.commit()
+    
+    if inserted:
+        (publisher or get_price_publisher()).publish_prices(inserted)
+    
+    duplicates = Counter(ticker for ticker, _, _ in prices)
+    duplicates.subtract(ticker for ticker, _, _ in inserted)
+    for ticker, count in duplicates.items():
+        if count:
+            INGEST_DUPLICATES.labels(ticker=ticker).inc(count)
+    
+    return SaveResult(len(inserted), len(prices) - len(inserted))
 
 
 class PriceService:
@@ -16,17 +187,27 @@ class PriceService:
     Handles fetching prices from Deribit and storing/retrieving from database.
     """
     
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        publisher: Optional[PricePublisher] = None,
+        deribit_client: Optional[DeribitClient] = None
+    ):
         """
         Initialize price service.
         
         Args:
             db: Database session
+            publisher: Publisher notified after prices are committed
+                (optional, defaults to the process-wide Redis publisher)
+            deribit_client: Deribit client (optional, defaults to a new one)
         """
         self.db = db
-        self.deribit_client = DeribitClient()
+        self.deribit_client = deribit_client or DeribitClient()
+        self.candle_service = CandleService(db)
+        self.publisher = publisher or get_price_publisher()
     
-    async def fetch_and_save_price(self, ticker: str) -> TickerPrice:
+    async def fetch_and_save_price(self, ticker: str) -> Optional[TickerPrice]:
         """
         Fetch price from Deribit API and save to database.
         
@@ -34,30 +215,143 @@ class PriceService:
             ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
             
         Returns:
-            Saved TickerPrice instance
+            Saved TickerPrice instance, or None if a price with the same
+            timestamp was already stored
             
         Raises:
             ValueError: If ticker format is invalid or API call fails
         """
-        # Extract currency from ticker (e.g., 'BTC' from 'BTC_USD')
-        currency = ticker.split('_')[0].upper()
+        # Fetch price from Deribit (the ticker is the index name, e.g. 'BTC_USD')
+        price_data = await self.deribit_client.get_index_price(ticker)
+        
+        return self.save_price(ticker, price_data["index_price"], price_data["timestamp"])
+    
+    @track_query("save_price")
+    def save_price(self, ticker: str, price: float, timestamp: int) -> Optional[TickerPrice]:
+        """
+        Save a single price and update its candle rollups in one transaction.
         
-        # Fetch price from Deribit
-        price_data = await self.deribit_client.get_index_price(currency)
+        Idempotent: if the ticker already has a price at ``timestamp``, the
+        stored row is kept and nothing is written.
         
-        # Create database record
-        ticker_price = TickerPrice(
-            ticker=ticker,
-            price=price_data["index_price"],
-            timestamp=price_data["timestamp"]
-        )
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            price: Index price
+            timestamp: UNIX timestamp of the price
+            
+        Returns:
+            Saved TickerPrice instance, or None if the price was a duplicate
+        """
+        if settings.compact_prices:
+            inserted = insert_compact_prices(self.db, {(ticker, timestamp): price})
+            ticker_price = None
+            if inserted:
+                ticker_price = TickerPrice(id=inserted[0][0], ticker=ticker, price=price, timestamp=timestamp)
+        else:
+            stmt = pg_insert(TickerPrice).values(
+                ticker=ticker,
+                price=price,
+                timestamp=timestamp
+            ).on_conflict_do_nothing().returning(TickerPrice)
+            ticker_price = self.db.scalar(stmt)
         
-        self.db.add(ticker_price)
-        self.db.commit()
-        self.db.refresh(ticker_price)
+        if ticker_price is None:
+            INGEST_DUPLICATES.labels(ticker=ticker).inc()
+            self.db.rollback()
+            return None
+        
+        self.candle_service.apply_prices([(ticker, price, timestamp)])
+        with DB_QUERY_SECONDS.labels(operation="commit").time():
+            self.db.commit()
+        
+        # Publish only after commit, so a cache miss never reads an older row
+        self.publisher.publish_prices([(ticker, price, timestamp)])
         
         return ticker_price
     
+    async def fetch_and_save_prices(
+        self,
+        tickers: List[str],
+        concurrency: int = 10,
+        timestamp: Optional[int] = None
+    ) -> Dict[str, dict]:
+        """
+        Fetch and save prices for many tickers concurrently.
+        
+        Deribit requests run in parallel, bounded by ``concurrency``, and the
+        fetched prices are then saved with one bulk insert. The save runs in
+        a worker thread, so the blocking database round-trips do not stall
+        other coroutines on the loop (e.g. other cadence groups of the
+        polling daemon). A ticker whose fetch fails is reported without
+        affecting the others.
+        
+        Args:
+            tickers: Currency tickers to fetch (e.g., ['BTC_USD', 'SOL_USDC'])
+            concurrency: Maximum number of in-flight Deribit requests
+            timestamp: UNIX timestamp to store every price under, e.g. the
+                scheduler tick (optional, defaults to Deribit's timestamps)
+            
+        Returns:
+            Mapping of ticker to its result: status ('ok' or 'error'), price and
+            timestamp or error message, and elapsed_ms
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def fetch_one(ticker: str) -> Tuple[str, dict]:
+            started = time.perf_counter()
+            try:
+                async with semaphore:
+                    price_data = await self.deribit_client.get_index_price(ticker)
+                result = {
+                    "status": "ok",
+                    "price": price_data["index_price"],
+                    "timestamp": price_data["timestamp"] if timestamp is None else timestamp,
+                }
+            except Exception as e:
+                INGEST_ERRORS.labels(ticker=ticker, stage="fetch").inc()
+                result = {"status": "error", "error": str(e)}
+            result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            return ticker, result
+        
+        results = dict(await asyncio.gather(*(fetch_one(ticker) for ticker in tickers)))
+        
+        # Save every fetched price in a single transaction
+        fetched = [
+            (ticker, result["price"], result["timestamp"])
+            for ticker, result in results.items()
+            if result["status"] == "ok"
+        ]
+        if fetched:
+            try:
+                await asyncio.to_thread(self.save_prices, fetched)
+            except Exception as e:
+                await asyncio.to_thread(self.db.rollback)
+                for ticker, _, _ in fetched:
+                    INGEST_ERRORS.labels(ticker=ticker, stage="save").inc()
+                    results[ticker] = {
+                        "status": "error",
+                        "error": f"Failed to save price: {str(e)}",
+                        "elapsed_ms": results[ticker]["elapsed_ms"],
+                    }
+        
+        return results
+    
+    def save_prices(self, prices: List[Tuple[str, float, int]], use_copy: bool = False) -> SaveResult:
+        """
+        Bulk insert prices and update their candle rollups in one transaction.
+        
+        See save_new_prices; the service's publisher is notified.
+        
+        Args:
+            prices: List of (ticker, price, timestamp) tuples
+            use_copy: Load rows with PostgreSQL COPY instead of a multi-row INSERT
+            
+        Returns:
+            Counts of inserted and duplicate rows
+        """
+        return save_new_prices(self.db, prices, use_copy, self.publisher)
+    
+    @track_query("get_all_prices")
     def get_all_prices(self, ticker: str) -> List[TickerPrice]:
         """
         Get all saved prices for a given ticker.
@@ -72,6 +366,7 @@ class PriceService:
             TickerPrice.ticker == ticker
         ).order_by(desc(TickerPrice.timestamp)).all()
     
+    @track_query("get_latest_price")
     def get_latest_price(self, ticker: str) -> Optional[TickerPrice]:
         """
         Get the most recent price for a given ticker.
@@ -86,6 +381,7 @@ class PriceService:
             TickerPrice.ticker == ticker
         ).order_by(desc(TickerPrice.timestamp)).first()
     
+    @track_query("get_price_by_date")
     def get_price_by_date(
         self, 
         ticker: str, 
@@ -103,21 +399,332 @@ class PriceService:
         Returns:
             List of TickerPrice instances within the date range
         """
-        query = self.db.query(TickerPrice).filter(
-            TickerPrice.ticker == ticker
-        )
+        query = self._range_query(ticker, start_date, end_date)
+        return query.order_by(desc(TickerPrice.timestamp)).all()
+    
+    @track_query("get_prices_page")
+    def get_prices_page(
+        self,
+        ticker: str,
+        limit: int,
+        cursor: Optional[Tuple[int, int]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Tuple[List[TickerPrice], Optional[Tuple[int, int]]]:
+        """
+        Get one page of prices using keyset pagination on (timestamp, id).
         
-        if start_date:
-            start_timestamp = int(start_date.timestamp())
-            query = query.filter(TickerPrice.timestamp >= start_timestamp)
+        Rows are ordered newest first. The cursor is the (timestamp, id) of
+        the last row of the previous page, so each page is a bounded index
+        range scan no matter how deep the client has paged.
         
-        if end_date:
-            end_timestamp = int(end_date.timestamp())
-            query = query.filter(TickerPrice.timestamp <= end_timestamp)
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            limit: Maximum number of rows to return
+            cursor: (timestamp, id) of the last row already seen (optional)
+            start_date: Start of date range (optional)
+            end_date: End of date range (optional)
+            
+        Returns:
+            Tuple of (prices, next_cursor); next_cursor is None on the last page
+        """
+        query = self._range_query(ticker, start_date, end_date, cursor)
+        rows = query.order_by(
+            desc(TickerPrice.timestamp), desc(TickerPrice.id)
+        ).limit(limit + 1).all()
         
-        return query.order_by(desc(TickerPrice.timestamp)).all()
+        if len(rows) <= limit:
+            return rows, None
+        
+        last = rows[limit - 1]
+        return rows[:limit], (last.timestamp, last.id)
+    
+    def iter_prices(
+        self,
+        ticker: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        cursor: Optional[Tuple[int, int]] = None,
+        batch_size: int = 1000
+    ) -> Iterator[TickerPrice]:
+        """
+        Stream prices for a ticker without materializing the whole result.
+        
+        Rows are pulled from a server-side cursor ``batch_size`` at a time,
+        so memory use stays flat regardless of the range length.
+        
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            start_date: Start of date range (optional)
+            end_date: End of date range (optional)
+            cursor: (timestamp, id) to resume after (optional)
+            batch_size: Number of rows fetched per round-trip
+            
+        Yields:
+            TickerPrice instances, ordered by timestamp descending
+        """
+        query = self._range_query(ticker, start_date, end_date, cursor)
+        query = query.order_by(desc(TickerPrice.timestamp), desc(TickerPrice.id))
+        
+        for price in query.yield_per(batch_size):
+            yield price
+    
+    def _range_query(
+        self,
+        ticker: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        cursor: Optional[Tuple[int, int]] = None
+    ) -> Query:
+        """
+        Build the filtered (unordered) query shared by the range read methods.
+        
+        Args:
+            ticker: Currency ticker
+            start_date: Start of date range (optional)
+            end_date: End of date range (optional)
+            cursor: (timestamp, id) keyset bound, exclusive (optional)
+            
+        Returns:
+            SQLAlchemy query over TickerPrice
+        """
+        conditions = price_range_conditions(ticker, start_date, end_date, cursor)
+        return self.db.query(TickerPrice).filter(*conditions)
     
     async def close(self):
         """Close the Deribit client session."""
         await self.deribit_client.close()
 
+
+class AsyncPriceService:
+    """
+    Read-only counterpart of PriceService for an AsyncSession.
+    
+    Used by the API routes so queries await the database instead of
+    blocking the event loop. Method contracts mirror PriceService.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize async price service.
+        
+        Args:
+            db: Async database session
+        """
+        self.db = db
+    
+    @track_query("get_all_prices")
+    async def get_all_prices(self, ticker: str) -> List[TickerPrice]:
+        """
+        Get all saved prices for a given ticker.
+        
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            
+        Returns:
+            List of TickerPrice instances, ordered by timestamp descending
+        """
+        stmt = select(TickerPrice).where(
+            TickerPrice.ticker == ticker
+        ).order_by(desc(TickerPrice.timestamp))
+        return list(await self.db.scalars(stmt))
+    
+    @track_query("get_latest_price")
+    async def get_latest_price(self, ticker: str) -> Optional[TickerPrice]:
+        """
+        Get the most recent price for a given ticker.
+        
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            
+        Returns:
+            Most recent TickerPrice instance or None if not found
+        """
+        stmt = select(TickerPrice).where(
+            TickerPrice.ticker == ticker
+        ).order_by(desc(TickerPrice.timestamp)).limit(1)
+        return await self.db.scalar(stmt)
+    
+    @track_query("get_latest_prices")
+    async def get_latest_prices(self, tickers: List[str]) -> Dict[str, LatestPrice]:
+        """
+        Get the most recent price of many tickers in one query.
+        
+        The tickers are unnested into a row set and each one is joined
+        LATERAL to its newest row, so every ticker costs a single backward
+        step on uq_ticker_timestamp, however much history it has.
+        
+        Args:
+            tickers: Currency tickers (e.g., ['BTC_USD', 'ETH_USD'])
+            
+        Returns:
+            Mapping of ticker to (price, timestamp); tickers without prices
+            are left out
+        """
+        requested = func.unnest(literal(tickers, ARRAY(String))).table_valued("ticker").render_derived("requested")
+        latest = select(
+            cast(TickerPrice.price, Float).label("price"), TickerPrice.timestamp
+        ).where(
+            TickerPrice.ticker == requested.c.ticker
+        ).order_by(desc(TickerPrice.timestamp)).limit(1).lateral("latest")
+        
+        stmt = select(requested.c.ticker, latest.c.price, latest.c.timestamp).select_from(
+            requested.join(latest, true())
+        )
+        rows = (await self.db.execute(stmt)).tuples().all()
+        return {ticker: (price, timestamp) for ticker, price, timestamp in rows}
+    
+    @track_query("get_price_by_date")
+    async def get_price_by_date(
+        self,
+        ticker: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[TickerPrice]:
+        """
+        Get prices for a ticker filtered by date range.
+        
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            start_date: Start of date range (optional)
+            end_date: End of date range (optional)
+            
+        Returns:
+            List of TickerPrice instances within the date range
+        """
+        stmt = select(TickerPrice).where(
+            *price_range_conditions(ticker, start_date, end_date)
+        ).order_by(desc(TickerPrice.timestamp))
+        return list(await self.db.scalars(stmt))
+    
+    @track_query("get_prices_page")
+    async def get_prices_page(
+        self,
+        ticker: str,
+        limit: int,
+        cursor: Optional[Tuple[int, int]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Tuple[List[TickerPrice], Optional[Tuple[int, int]]]:
+        """
+        Get one page of prices using keyset pagination on (timestamp, id).
+        
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            limit: Maximum number of rows to return
+            cursor: (timestamp, id) of the last row already seen (optional)
+            start_date: Start of date range (optional)
+            end_date: End of date range (optional)
+            
+        Returns:
+            Tuple of (prices, next_cursor); next_cursor is None on the last page
+        """
+        stmt = select(TickerPrice).where(
+            *price_range_conditions(ticker, start_date, end_date, cursor)
+        ).order_by(desc(TickerPrice.timestamp), desc(TickerPrice.id)).limit(limit + 1)
+        rows = list(await self.db.scalars(stmt))
+        
+        if len(rows) <= limit:
+            return rows, None
+        
+        last = rows[limit - 1]
+        return rows[:limit], (last.timestamp, last.id)
+    
+    @track_query("get_price_rows")
+    async def get_price_rows(
+        self,
+        ticker: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[Tuple[int, int]] = None
+    ) -> Tuple[List[Tuple[int, float, int]], Optional[Tuple[int, int]]]:
+        """
+        Get prices as plain (id, price, timestamp) tuples, newest first.
+        
+        Selects only the columns the API returns, with the price cast to a
+        float in SQL, so no ORM objects or Decimals are built per row.
+        
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            start_date: Start of date range (optional)
+            end_date: End of date range (optional)
+            limit: Maximum number of rows to return (optional, all rows by default)
+            cursor: (timestamp, id) of the last row already seen (optional)
+            
+        Returns:
+            Tuple of (rows, next_cursor); next_cursor is None on the last page
+        """
+        stmt = select(
+            TickerPrice.id, cast(TickerPrice.price, Float), TickerPrice.timestamp
+        ).where(
+            *price_range_conditions(ticker, start_date, end_date, cursor)
+        ).order_by(desc(TickerPrice.timestamp), desc(TickerPrice.id))
+        
+        if limit is not None:
+            stmt = stmt.limit(limit + 1)
+        
+        rows = (await self.db.execute(stmt)).tuples().all()
+        
+        if limit is None or len(rows) <= limit:
+            return rows, None
+        
+        price_id, _, timestamp = rows[limit - 1]
+        return rows[:limit], (timestamp, price_id)
+    
+    @track_query("get_price_version", rows=1)
+    async def get_price_version(
+        self,
+        ticker: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Tuple[int, Optional[int]]:
+        """
+        Get the row count and latest timestamp of a ticker's date range.
+        
+        Any insert into the range changes one of the two values, so together
+        they identify the range's contents for HTTP validators. Answered
+        from uq_ticker_timestamp without reading the price column.
+        
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            start_date: Start of date range (optional)
+            end_date: End of date range (optional)
+            
+        Returns:
+            Tuple of (row count, latest timestamp or None if the range is empty)
+        """
+        stmt = select(func.count(), func.max(TickerPrice.timestamp)).where(
+            *price_range_conditions(ticker, start_date, end_date)
+        )
+        count, latest_timestamp = (await self.db.execute(stmt)).one()
+        return count, latest_timestamp
+    
+    async def iter_prices(
+        self,
+        ticker: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        cursor: Optional[Tuple[int, int]] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[TickerPrice]:
+        """
+        Stream prices for a ticker from a server-side cursor.
+        
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            start_date: Start of date range (optional)
+            end_date: End of date range (optional)
+            cursor: (timestamp, id) to resume after (optional)
+            batch_size: Number of rows fetched per round-trip
+            
+        Yields:
+            TickerPrice instances, ordered by timestamp descending
+        """
+        stmt = select(TickerPrice).where(
+            *price_range_conditions(ticker, start_date, end_date, cursor)
+        ).order_by(desc(TickerPrice.timestamp), desc(TickerPrice.id))
+        
+        result = await self.db.stream_scalars(stmt.execution_options(yield_per=batch_size))
+        async for price in result:
+            yield price
@@ -0,0 +1,206 @@
+"""
+Buffered write-behind inserter for ticker prices.
+"""
+import asyncio
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.metrics import INGEST_ERRORS
+from app.services.price_service import SaveResult, save_new_prices
+
+
+class BufferedPriceWriter:
+    """
+    Collects prices in memory and bulk inserts them in the background.
+    
+    A flush happens when ``batch_size`` rows are buffered or every
+    ``flush_interval`` seconds, whichever comes first. Each flush is one
+    transaction that writes the rows with a multi-row INSERT (or COPY) and
+    updates candle rollups, executed in a worker thread so the event loop
+    keeps receiving prices.
+    
+    Rows already stored under the same ticker and timestamp are skipped
+    by the insert and counted as duplicates.
+    
+    When ``max_buffer`` rows are waiting, ``put`` blocks until a flush frees
+    space; rows that still do not fit after ``put_timeout`` are dropped and
+    counted.
+    
+    A failed write is retried up to ``max_retries`` times with exponential
+    backoff while new prices keep buffering; only then is the batch counted
+    as failed.
+    """
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_buffer: Optional[int] = None,
+        put_timeout: Optional[float] = None,
+        use_copy: Optional[bool] = None,
+        max_retries: Optional[int] = None
+    ):
+        """
+        Initialize the writer. Unset options default to settings values.
+        
+        Args:
+            session_factory: Callable returning a new database session
+            batch_size: Buffered row count that triggers a flush
+            flush_interval: Maximum seconds a row waits before being flushed
+            max_buffer: Maximum number of buffered rows
+            put_timeout: Seconds ``put`` waits for space before dropping a row
+            use_copy: Use PostgreSQL COPY instead of a multi-row INSERT
+            max_retries: Retries of a failed flush before its rows are dropped
+        """
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.write_batch_size
+        self.flush_interval = flush_interval or settings.write_flush_interval
+        self.max_buffer = max_buffer or settings.write_buffer_size
+        self.put_timeout = settings.write_put_timeout if put_timeout is None else put_timeout
+        self.use_copy = settings.write_use_copy if use_copy is None else use_copy
+        self.max_retries = settings.write_max_retries if max_retries is None else max_retries
+        
+        self.flushed_rows = 0
+        self.duplicate_rows = 0
+        self.dropped_rows = 0
+        self.failed_rows = 0
+        self.retries = 0
+        self.flushes = 0
+        
+        self._buffer: List[Tuple[str, float, int]] = []
+        self._batch_ready = asyncio.Event()
+        self._space_available = asyncio.Event()
+        self._space_available.set()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+    
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Counters for buffered, flushed, duplicate, dropped and failed rows, and flush retries."""
+        return {
+            "buffered": len(self._buffer),
+            "flushed_rows": self.flushed_rows,
+            "duplicate_rows": self.duplicate_rows,
+            "dropped_rows": self.dropped_rows,
+            "failed_rows": self.failed_rows,
+            "retries": self.retries,
+            "flushes": self.flushes,
+        }
+    
+    async def start(self):
+        """Start the background flush loop."""
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+    
+    async def close(self):
+        """Stop the flush loop and flush everything still buffered."""
+        self._closing = True
+        self._batch_ready.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+    
+    async def put(self, ticker: str, price: float, timestamp: int) -> bool:
+        """
+        Buffer a price for the next flush.
+        
+        Args:
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            price: Index price
+            timestamp: UNIX timestamp of the price
+            
+        Returns:
+            True if the row was buffered, False if it was dropped
+        """
+        while len(self._buffer) >= self.max_buffer:
+            self._space_available.clear()
+            self._batch_ready.set()
+            try:
+                await asyncio.wait_for(self._space_available.wait(), self.put_timeout)
+            except asyncio.TimeoutError:
+                self.dropped_rows += 1
+                INGEST_ERRORS.labels(ticker=ticker, stage="dropped").inc()
+                return False
+        
+        self._buffer.append((ticker, price, timestamp))
+        if len(self._buffer) >= self.batch_size:
+            self._batch_ready.set()
+        return True
+    
+    async def flush(self) -> int:
+        """
+        Write all buffered rows in one transaction.
+        
+        Failed writes are retried with backoff; the buffer is released first,
+        so ``put`` keeps accepting prices meanwhile.
+        
+        Returns:
+            Number of rows taken from the buffer
+        """
+        async with self._flush_lock:
+            if not self._buffer:
+                return 0
+            
+            rows, self._buffer = self._buffer, []
+            self._space_available.set()
+            
+            for attempt in range(self.max_retries + 1):
+                try:
+                    result = await asyncio.to_thread(self._write, rows)
+                except Exception as e:
+                    print(f"Error flushing {len(rows)} prices (attempt {attempt + 1}): {str(e)}")
+                    if attempt < self.max_retries:
+                        self.retries += 1
+                        await asyncio.sleep(self._backoff(attempt))
+                    continue
+                
+                self.flushed_rows += len(rows)
+                self.duplicate_rows += result.duplicates
+                self.flushes += 1
+                return len(rows)
+            
+            self.failed_rows += len(rows)
+            for ticker, count in Counter(row[0] for row in rows).items():
+                INGEST_ERRORS.labels(ticker=ticker, stage="save").inc(count)
+            return len(rows)
+    
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Exponential delay before retry ``attempt + 1``."""
+        return min(settings.write_retry_max_delay, settings.write_retry_base_delay * 2 ** attempt)
+    
+    async def _run(self):
+        """Flush on size or time threshold until closed."""
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            await self.flush()
+    
+    def _write(self, rows: List[Tuple[str, float, int]]) -> SaveResult:
+        """Insert a batch using a dedicated session (runs in a worker thread)."""
+        db = self.session_factory()
+        try:
+            return save_new_prices(db, rows, use_copy=self.use_copy)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    async def __aenter__(self):
+        """Async context manager entry."""
+        await self.start()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit."""
+        await self.close()
@@ -0,0 +1,313 @@
+"""
+Result cache for historical price ranges, in time-aligned blocks.
+
+A ticker's history is split into buckets of ``settings.range_cache_bucket``
+seconds. Once a bucket ends more than one ingest interval ago it is sealed:
+its rows are kept as one immutable block, keyed by (ticker, bucket start).
+A range read is assembled from the sealed blocks it overlaps, sliced at the
+range edges, plus a live query for the still-open tail after the last sealed
+bucket.
+
+Blocks live in an in-process LRU bounded by ``settings.range_cache_max_bytes``
+and, optionally, in Redis so API processes share them. Writes into sealed
+buckets (backfills, gap repairs) are caught by comparing the assembled row
+count with the range's count from ``get_price_version``; on a mismatch the
+overlapped blocks are dropped and reloaded from the database.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import redis
+import redis.asyncio as aioredis
+from app.config import settings
+from app.metrics import RANGE_CACHE_BLOCKS, RANGE_CACHE_BYTES, RANGE_CACHE_EVICTIONS, RANGE_CACHE_LOOKUPS
+from app.services.price_service import AsyncPriceService
+
+# One cached row; the layout is also the Redis value format
+BLOCK_DTYPE = np.dtype([("id", "<i8"), ("price", "<f8"), ("timestamp", "<i8")])
+
+# Bytes charged per block on top of its rows (key, array header, LRU entry)
+BLOCK_OVERHEAD = 200
+
+BlockKey = Tuple[str, int]
+
+
+def to_datetime(timestamp: int) -> datetime:
+    """Convert a Unix timestamp to the aware datetime the range queries expect."""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def split_blocks(rows: np.ndarray, bucket_starts: List[int], bucket: int) -> Dict[int, np.ndarray]:
+    """
+    Split rows ordered newest first into one block per bucket.
+    
+    Args:
+        rows: Structured BLOCK_DTYPE array, timestamp descending
+        bucket_starts: Start timestamps of the buckets to cut
+        bucket: Bucket length in seconds
+    
+    Returns:
+        Mapping of bucket start to its rows (empty arrays for empty buckets)
+    """
+    negated = -rows["timestamp"]
+    blocks = {}
+    for start in bucket_starts:
+        first = np.searchsorted(negated, -(start + bucket - 1), side="left")
+        last = np.searchsorted(negated, -start, side="right")
+        blocks[start] = rows[first:last].copy()
+    return blocks
+
+
+class RangeCache:
+    """
+    Two-tier cache of sealed price blocks with size-based LRU eviction.
+    
+    The memory tier is an OrderedDict of NumPy arrays charged by their byte
+    size. The Redis tier is best effort: errors are logged and the block is
+    read from the database instead.
+    """
+    
+    def __init__(
+        self,
+        bucket: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        client: Optional[aioredis.Redis] = None,
+        redis_ttl: Optional[int] = None
+    ):
+        """
+        Initialize the cache.
+        
+        Args:
+            bucket: Bucket length in seconds (optional, defaults to settings.range_cache_bucket)
+            max_bytes: Memory tier budget (optional, defaults to settings.range_cache_max_bytes)
+            client: Redis client for the shared tier (optional, no Redis tier if None)
+            redis_ttl: Seconds a block is kept in Redis (optional, defaults to settings.range_cache_redis_ttl)
+        """
+        self.bucket = bucket or settings.range_cache_bucket
+        self.max_bytes = max_bytes or settings.range_cache_max_bytes
+        self.client = client
+        self.redis_ttl = redis_ttl or settings.range_cache_redis_ttl
+        self.size = 0
+        self._blocks: "OrderedDict[BlockKey, np.ndarray]" = OrderedDict()
+    
+    def sealed_until(self, now: Optional[float] = None) -> int:
+        """
+        Return the end of the newest sealed bucket.
+        
+        A bucket is sealed once it ended one ingest interval ago, the same
+        rule that gives past ranges a long max-age in HTTP caches.
+        """
+        now = time.time() if now is None else now
+        return int(now - settings.ingest_interval) // self.bucket * self.bucket
+    
+    def _redis_key(self, key: BlockKey) -> str:
+        """Redis key of a block."""
+        ticker, start = key
+        return f"{settings.range_cache_redis_prefix}:{self.bucket}:{ticker}:{start}"
+    
+    def _get(self, key: BlockKey) -> Optional[np.ndarray]:
+        """Look up a block in memory, marking it recently used."""
+        block = self._blocks.get(key)
+        if block is not None:
+            self._blocks.move_to_end(key)
+        return block
+    
+    def _put(self, key: BlockKey, block: np.ndarray) -> None:
+        """Store a block in memory, evicting the least recently used ones."""
+        self._discard(key)
+        cost = block.nbytes + BLOCK_OVERHEAD
+        if cost > self.max_bytes:
+            return
+        
+        self._blocks[key] = block
+        self.size += cost
+        while self.size > self.max_bytes:
+            _, evicted = self._blocks.popitem(last=False)
+            self.size -= evicted.nbytes + BLOCK_OVERHEAD
+            RANGE_CACHE_EVICTIONS.inc()
+        self._update_gauges()
+    
+    def _discard(self, key: BlockKey) -> None:
+        """Remove a block from memory if present."""
+        block = self._blocks.pop(key, None)
+        if block is not None:
+            self.size -= block.nbytes + BLOCK_OVERHEAD
+            self._update_gauges()
+    
+    def _update_gauges(self) -> None:
+        """Export the memory tier's size."""
+        RANGE_CACHE_BYTES.set(self.size)
+        RANGE_CACHE_BLOCKS.set(len(self._blocks))
+    
+    async def _redis_get(self, keys: List[BlockKey]) -> Dict[BlockKey, np.ndarray]:
+        """Fetch blocks from Redis with one MGET."""
+        if self.client is None or not keys:
+            return {}
+        try:
+            values = await self.client.mget([self._redis_key(key) for key in keys])
+        except redis.RedisError as e:
+            print(f"Error reading range cache from Redis: {str(e)}")
+            return {}
+        return {
+            key: np.frombuffer(value, dtype=BLOCK_DTYPE)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+    
+    async def _redis_set(self, blocks: Dict[BlockKey, np.ndarray]) -> None:
+        """Store blocks in Redis with the configured TTL."""
+        if self.client is None or not blocks:
+            return
+        try:
+            await asyncio.gather(*(
+                self.client.set(self._redis_key(key), block.tobytes(), ex=self.redis_ttl)
+                for key, block in blocks.items()
+            ))
+        except redis.RedisError as e:
+            print(f"Error writing range cache to Redis: {str(e)}")
+    
+    async def _redis_delete(self, keys: List[BlockKey]) -> None:
+        """Delete stale blocks from Redis."""
+        if self.client is None or not keys:
+            return
+        try:
+            await self.client.delete(*(self._redis_key(key) for key in keys))
+        except redis.RedisError as e:
+            print(f"Error deleting range cache blocks from Redis: {str(e)}")
+    
+    async def _load_blocks(
+        self,
+        service: AsyncPriceService,
+        ticker: str,
+        starts: List[int],
+        use_redis: bool = True
+    ) -> Dict[int, np.ndarray]:
+        """
+        Get the blocks of the given buckets from memory, Redis or the database.
+        
+        Missing buckets are read with one query per run of adjacent buckets.
+        """
+        blocks: Dict[int, np.ndarray] = {}
+        missing = []
+        for start in starts:
+            block = self._get((ticker, start))
+            if block is None:
+                missing.append(start)
+            else:
+                blocks[start] = block
+        RANGE_CACHE_LOOKUPS.labels(tier="memory", result="hit").inc(len(blocks))
+        RANGE_CACHE_LOOKUPS.labels(tier="memory", result="miss").inc(len(missing))
+        
+        if use_redis and self.client is not None and missing:
+            shared = await self._redis_get([(ticker, start) for start in missing])
+            RANGE_CACHE_LOOKUPS.labels(tier="redis", result="hit").inc(len(shared))
+            RANGE_CACHE_LOOKUPS.labels(tier="redis", result="miss").inc(len(missing) - len(shared))
+            for (_, start), block in shared.items():
+                blocks[start] = block
+                self._put((ticker, start), block)
+            missing = [start for start in missing if start not in blocks]
+        
+        loaded: Dict[BlockKey, np.ndarray] = {}
+        runs: List[List[int]] = []
+        for start in sorted(missing):
+            if runs and runs[-1][-1] + self.bucket == start:
+                runs[-1].append(start)
+            else:
+                runs.append([start])
+        for run in runs:
+            rows, _ = await service.get_price_rows(
+                ticker, to_datetime(run[0]), to_datetime(run[-1] + self.bucket - 1)
+            )
+            for start, block in split_blocks(np.array(list(map(tuple, rows)), dtype=BLOCK_DTYPE), run, self.bucket).items():
+                blocks[start] = block
+                loaded[(ticker, start)] = block
+                self._put((ticker, start), block)
+        await self._redis_set(loaded)
+        
+        return blocks
+    
+    async def get_price_rows(
+        self,
+        service: AsyncPriceService,
+        ticker: str,
+        start_date: datetime,
+        end_date: Optional[datetime] = None,
+        expected_count: Optional[int] = None
+    ) -> List[Tuple[int, float, int]]:
+        """
+        Get a range's prices as (id, price, timestamp) tuples, newest first.
+        
+        Same result as ``AsyncPriceService.get_price_rows`` without a limit.
+        
+        Args:
+            service: Price service used for the tail and for missing blocks
+            ticker: Currency ticker (e.g., 'BTC_USD', 'ETH_USD')
+            start_date: Start of date range
+            end_date: End of date range (optional, open-ended if None)
+            expected_count: Row count of the range from get_price_version
+                (optional); on a mismatch the blocks are reloaded
+        
+        Returns:
+            List of (id, price, timestamp) tuples
+        """
+        start_timestamp = int(start_date.timestamp())
+        end_timestamp = int(end_date.timestamp()) if end_date else None
+        sealed_until = self.sealed_until()
+        
+        tail: List[Tuple[int, float, int]] = []
+        if end_timestamp is None or end_timestamp >= sealed_until:
+            tail, _ = await service.get_price_rows(
+                ticker, to_datetime(max(start_timestamp, sealed_until)), end_date
+            )
+        
+        last_sealed = min(end_timestamp + 1, sealed_until) if end_timestamp is not None else sealed_until
+        first_bucket = start_timestamp // self.bucket * self.bucket
+        starts = list(range(first_bucket, last_sealed, self.bucket))[::-1]
+        if not starts:
+            return tail
+        
+        rows = await self._assemble(service, ticker, starts, start_timestamp, end_timestamp, True)
+        if expected_count is not None and len(tail) + len(rows) != expected_count:
+            # Rows were written into sealed buckets after they were cached
+            keys = [(ticker, start) for start in starts]
+            for key in keys:
+                self._discard(key)
+            await self._redis_delete(keys)
+            rows = await self._assemble(service, ticker, starts, start_timestamp, end_timestamp, False)
+        
+        return tail + rows.tolist()
+    
+    async def _assemble(
+        self,
+        service: AsyncPriceService,
+        ticker: str,
+        starts: List[int],
+        start_timestamp: int,
+        end_timestamp: Optional[int],
+        use_redis: bool
+    ) -> np.ndarray:
+        """Concatenate the blocks of ``starts`` (newest first), sliced to the range."""
+        blocks = await self._load_blocks(service, ticker, starts, use_redis)
+        rows = np.concatenate([blocks[start] for start in starts])
+        if rows.size and (rows["timestamp"][-1] < start_timestamp or (
+            end_timestamp is not None and rows["timestamp"][0] > end_timestamp
+        )):
+            in_range = rows["timestamp"] >= start_timestamp
+            if end_timestamp is not None:
+                in_range &= rows["timestamp"] <= end_timestamp
+            rows = rows[in_range]
+        return rows
+    
+    async def close(self) -> None:
+        """Close the Redis client, if any."""
+        if self.client is not None:
+            await self.client.aclose()
+
+
+def create_range_cache() -> RangeCache:
+    """Build the process-wide range cache from settings."""
+    client = aioredis.Redis.from_url(settings.redis_url) if settings.range_cache_redis else None
+    return RangeCache(client=client)
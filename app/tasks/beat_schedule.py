@@ -1,13 +1,25 @@
 """
 Celery beat schedule configuration.
 """
+from app.config import settings
 from app.tasks.celery_app import celery_app
 
 # Configure periodic task schedule
 celery_app.conf.beat_schedule = {
-    "fetch-prices-every-minute": {
-        "task": "fetch_and_save_prices",
-        "schedule": 60.0,  # Run every 60 seconds (1 minute)
+    "maintain-price-partitions-daily": {
+        "task": "maintain_price_partitions",
+        "schedule": 86400.0,  # Run once a day; a no-op unless partitioning is enabled
+    },
+    "repair-price-gaps": {
+        "task": "repair_price_gaps",
+        "schedule": float(settings.gap_scan_interval),  # Every GAP_SCAN_INTERVAL seconds (default 15 minutes)
     },
 }
 
+# Price polling runs in the ingestion daemon unless INGEST_SCHEDULER=beat
+if settings.ingest_scheduler == "beat":
+    celery_app.conf.beat_schedule["fetch-prices-every-minute"] = {
+        "task": "fetch_and_save_prices",
+        "schedule": float(settings.ingest_interval),  # Every INGEST_INTERVAL seconds (default 1 minute)
+    }
+
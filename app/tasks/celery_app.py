@@ -3,12 +3,14 @@ Celery application configuration.
 """
 from celery import Celery
 from app.config import settings
+from app.metrics import instrument_celery
 
 # Create Celery instance
 celery_app = Celery(
     "derbit_tasks",
     broker=settings.celery_broker_url,
-    backend=settings.celery_result_backend
+    backend=settings.celery_result_backend,
+    include=["app.tasks.price_tasks", "app.tasks.maintenance_tasks"]
 )
 
 # Celery configuration
@@ -23,6 +25,9 @@ celery_app.conf.update(
     task_soft_time_limit=25,
 )
 
+# Record task durations and serve worker metrics on settings.metrics_port
+instrument_celery()
+
 # Import beat schedule to register periodic tasks
 # Import at module level after celery_app is defined
 import app.tasks.beat_schedule  # noqa: F401
@@ -0,0 +1,43 @@
+"""
+Celery tasks for database maintenance.
+"""
+from app.config import settings
+from app.tasks.celery_app import celery_app
+from app.database import SessionLocal
+from app.services.partition_service import PartitionService
+
+
+@celery_app.task(name="maintain_price_partitions", time_limit=3600, soft_time_limit=3300)
+def maintain_price_partitions():
+    """
+    Celery task to keep ticker_prices partitions ahead of time and apply retention.
+    
+    Creates partitions for the upcoming months, then downsamples and drops
+    old partitions according to the retention settings. Does nothing unless
+    ``settings.price_partitioning`` is enabled and the table has been
+    converted with ``manage_partitions.py convert``.
+    
+    Returns:
+        Dictionary with the names of created, downsampled and dropped
+        partitions, or the reason the task was skipped
+    """
+    if not settings.price_partitioning:
+        return {"skipped": "partitioning disabled"}
+    
+    db = SessionLocal()
+    try:
+        service = PartitionService(db)
+        
+        if not service.is_partitioned():
+            print("ticker_prices is not partitioned yet; run manage_partitions.py convert")
+            return {"skipped": "table not partitioned"}
+        
+        created = service.ensure_partitions()
+        retention = service.apply_retention()
+    except Exception as e:
+        print(f"Error maintaining price partitions: {str(e)}")
+        raise
+    finally:
+        db.close()
+    
+    return {"created": created, **retention}
@@ -0,0 +1,106 @@
+"""
+Standalone polling ingestion daemon.
+
+Polls ``public/get_index_price`` on an AlignedScheduler instead of Celery
+beat: tickers are grouped by cadence (``INGEST_INTERVAL`` unless set in
+``INGEST_CADENCES``), each group fires on exact multiples of its cadence,
+and every price is stored under the boundary it was fetched for. Runs
+that would overlap skip a tick instead of queueing.
+
+Run with ``python -m app.tasks.poll_ingestion``.
+"""
+import argparse
+import asyncio
+import signal
+from typing import Dict, List, Optional
+from app.config import settings
+from app.clients.deribit_client import DeribitClient
+from app.database import SessionLocal
+from app.metrics import start_metrics_server
+from app.services.price_service import PriceService
+from app.tasks.scheduler import AlignedScheduler
+
+
+def cadence_groups(tickers: List[str], cadences: Optional[Dict[str, int]] = None) -> Dict[int, List[str]]:
+    """
+    Group tickers by polling cadence.
+    
+    Args:
+        tickers: Tickers to ingest
+        cadences: Seconds per ticker (optional, defaults to settings.ingest_cadences);
+            tickers not listed use settings.ingest_interval
+            
+    Returns:
+        Mapping of cadence in seconds to its tickers
+    """
+    cadences = settings.ingest_cadences if cadences is None else cadences
+    groups: Dict[int, List[str]] = {}
+    for ticker in tickers:
+        groups.setdefault(int(cadences.get(ticker, settings.ingest_interval)), []).append(ticker)
+    return groups
+
+
+async def run_poll_ingestion(
+    tickers: List[str],
+    stop: Optional[asyncio.Event] = None,
+    client: Optional[DeribitClient] = None
+) -> Dict[str, dict]:
+    """
+    Poll and save index prices on aligned per-cadence schedules until stopped.
+    
+    Args:
+        tickers: Tickers to ingest (e.g., ['BTC_USD', 'ETH_USD'])
+        stop: Event that ends ingestion (optional, runs forever by default)
+        client: Deribit client (optional); one keep-alive session is shared by
+            every cadence group
+            
+    Returns:
+        Scheduler stats per cadence job at shutdown
+    """
+    client = client or DeribitClient()
+    scheduler = AlignedScheduler()
+    sessions = []
+    
+    for cadence, group in sorted(cadence_groups(tickers).items()):
+        # One DB session per group, since groups can run at the same time
+        db = SessionLocal()
+        sessions.append(db)
+        service = PriceService(db, deribit_client=client)
+        
+        async def ingest(tick: float, service: PriceService = service, group: List[str] = group):
+            results = await service.fetch_and_save_prices(group, settings.ingest_concurrency, timestamp=int(tick))
+            for ticker, result in results.items():
+                if result["status"] != "ok":
+                    print(f"Error fetching price for {ticker}: {result['error']}")
+        
+        scheduler.add_job(f"ingest_{cadence}s", cadence, ingest)
+        print(f"Polling {', '.join(group)} every {cadence}s")
+    
+    try:
+        await scheduler.run(stop)
+    finally:
+        await client.close()
+        for db in sessions:
+            db.close()
+    
+    return scheduler.stats
+
+
+async def _main(tickers: List[str]):
+    """Run until SIGINT or SIGTERM."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    
+    stats = await run_poll_ingestion(tickers, stop)
+    print(f"Ingestion stopped: {stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Poll Deribit index prices on aligned schedules")
+    parser.add_argument("--tickers", nargs="+", default=settings.tickers)
+    args = parser.parse_args()
+    
+    start_metrics_server()
+    asyncio.run(_main(args.tickers))
@@ -1,44 +1,158 @@
 """
-Celery tasks for periodic price fetching.
+Celery tasks for periodic price fetching, history backfill and gap repair.
 """
-import asyncio
+import time
+from typing import List, Optional
+from app.config import settings
 from app.tasks.celery_app import celery_app
 from app.database import SessionLocal
+from app.metrics import PRICE_GAP_SLOTS
+from app.services.backfill_service import BackfillService
+from app.services.gap_service import GapService
+from app.services.partition_service import raw_retention_start
 from app.services.price_service import PriceService
+from app.tasks.worker_runtime import runtime
+
+
+async def _closing(service, coro):
+    """Await a service coroutine, then close the service's Deribit client in the same loop."""
+    try:
+        return await coro
+    finally:
+        # Leaves the worker's pooled HTTP session open
+        await service.close()
 
 
 @celery_app.task(name="fetch_and_save_prices")
 def fetch_and_save_prices():
     """
-    Celery task to fetch and save BTC_USD and ETH_USD prices.
+    Celery task to fetch and save prices for all configured tickers.
     
     This task runs periodically (every minute) to fetch index prices
-    from Deribit and save them to the database.
+    from Deribit and save them to the database. Tickers are taken from
+    ``settings.tickers`` and fetched concurrently, so a tick takes about
+    as long as the slowest Deribit round-trip rather than their sum.
+    In a prefork worker the tick runs on the process's event loop and
+    reuses its pooled Deribit connections (see worker_runtime).
+    
+    Returns:
+        Dictionary with per-ticker results and timings, success/failure
+        counts and the total elapsed time in milliseconds
     """
+    started = time.perf_counter()
     db = SessionLocal()
     try:
-        service = PriceService(db)
+        service = PriceService(db, deribit_client=runtime.deribit_client())
         
-        # Run async operations in sync context
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            # Fetch and save BTC_USD price
-            loop.run_until_complete(service.fetch_and_save_price("BTC_USD"))
-            
-            # Fetch and save ETH_USD price
-            loop.run_until_complete(service.fetch_and_save_price("ETH_USD"))
-            
-            # Close service connections
-            loop.run_until_complete(service.close())
-        finally:
-            loop.close()
-            
+        # Run async operations on the worker's event loop
+        results = runtime.run(_closing(
+            service,
+            service.fetch_and_save_prices(settings.tickers, settings.ingest_concurrency)
+        ))
     except Exception as e:
         # Log error but don't fail the task completely
         print(f"Error fetching prices: {str(e)}")
         raise
     finally:
         db.close()
+    
+    failed = {ticker: result["error"] for ticker, result in results.items() if result["status"] != "ok"}
+    for ticker, error in failed.items():
+        print(f"Error fetching price for {ticker}: {error}")
+    
+    if results and len(failed) == len(results):
+        raise RuntimeError(f"Failed to fetch prices for all tickers: {failed}")
+    
+    return {
+        "tickers": results,
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
 
+@celery_app.task(name="backfill_prices", time_limit=21600, soft_time_limit=21300)
+def backfill_prices(tickers: Optional[List[str]] = None, start: Optional[int] = None, end: Optional[int] = None):
+    """
+    Celery task to backfill price history from Deribit chart data.
+    
+    Resumable: chunks stored by an earlier, interrupted run are skipped, so
+    the task can simply be sent again with the same arguments. Runs under
+    its own time limits instead of the 30-second default of ingest ticks;
+    a run stopped by them keeps every chunk it stored.
+    
+    Args:
+        tickers: Tickers to backfill (optional, defaults to settings.tickers)
+        start: Range start, UNIX seconds (optional, defaults to 30 days ago)
+        end: Range end, UNIX seconds (optional, defaults to now)
+        
+    Returns:
+        Mapping of ticker to chunk and price counts
+    """
+    end = end or int(time.time())
+    start = start or end - 30 * 86400
+    db = SessionLocal()
+    try:
+        service = BackfillService(db, runtime.deribit_client())
+        
+        summary = runtime.run(_closing(service, service.backfill(tickers or settings.tickers, start, end)))
+    except Exception as e:
+        print(f"Error backfilling prices: {str(e)}")
+        raise
+    finally:
+        db.close()
+    
+    return summary
+
+
+# At most one default GAP_SCAN_INTERVAL, so runs do not pile up behind a slow one
+@celery_app.task(name="repair_price_gaps", time_limit=900, soft_time_limit=840)
+def repair_price_gaps(tickers: Optional[List[str]] = None, lookback: Optional[int] = None):
+    """
+    Celery task to find missed ingestion slots and fetch them again.
+    
+    Scans the last ``lookback`` seconds of every ticker (at most the raw
+    retention window when partitioning is enabled) for slots of its
+    ingest cadence without a price (e.g. a tick lost to a worker restart
+    or a Deribit timeout), then fetches just those ranges from Deribit
+    chart data. Gaps Deribit cannot fill are reported again next run, as
+    are gaps left by a run stopped by the task's time limits.
+    
+    Args:
+        tickers: Tickers to scan (optional, defaults to settings.tickers)
+        lookback: Seconds to scan back from now (optional, defaults to
+            settings.gap_scan_lookback)
+        
+    Returns:
+        Dictionary with the number of gaps, missing slots, and the per-ticker
+        repair counts
+    """
+    tickers = tickers or settings.tickers
+    end = int(time.time())
+    start = end - (lookback or settings.gap_scan_lookback)
+    # Downsampled history has no price per slot to find
+    retention_start = raw_retention_start(end)
+    if retention_start is not None:
+        start = max(start, retention_start)
+    db = SessionLocal()
+    try:
+        gaps = GapService(db).find_gaps(tickers, start, end)
+        db.commit()
+        
+        missing = dict.fromkeys(tickers, 0)
+        for gap in gaps:
+            missing[gap.ticker] += gap.missing
+        for ticker, slots in missing.items():
+            PRICE_GAP_SLOTS.labels(ticker=ticker).set(slots)
+        
+        repaired = {}
+        if gaps:
+            service = BackfillService(db, runtime.deribit_client())
+            repaired = runtime.run(_closing(service, service.repair(gaps)))
+    except Exception as e:
+        print(f"Error repairing price gaps: {str(e)}")
+        raise
+    finally:
+        db.close()
+    
+    return {"gaps": len(gaps), "missing": sum(missing.values()), "tickers": repaired}
@@ -0,0 +1,150 @@
+"""
+Drift-free periodic scheduler aligned to wall-clock boundaries.
+"""
+import asyncio
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.metrics import SCHEDULER_LAG_SECONDS, SCHEDULER_RUN_SECONDS, SCHEDULER_TICKS
+
+# A wall clock that moved this far from the monotonic clock was stepped
+CLOCK_STEP_TOLERANCE = 0.5
+
+
+class _Job:
+    """A periodic job and its counters."""
+    
+    def __init__(self, name: str, interval: float, func: Callable[[float], Awaitable[Any]]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.runs = 0
+        self.errors = 0
+        self.overruns = 0
+        self.missed = 0
+        self.running: Optional[asyncio.Task] = None
+
+
+class AlignedScheduler:
+    """
+    Run async jobs on exact multiples of their interval in UNIX time.
+    
+    A job with a 10s interval fires at :00, :10, :20, ... and is passed that
+    boundary as its tick, so every run is stamped with a deterministic
+    timestamp whatever the actual start latency. Deadlines are derived
+    from the boundaries and slept on the monotonic clock, so they do not
+    drift; the wall clock is only compared against it to detect steps
+    (e.g. an NTP correction), which realign the schedule.
+    
+    - **Missed ticks** (the loop was blocked past one or more boundaries)
+      are skipped, not queued: only the latest due tick runs.
+    - **Overruns** (the previous run of a job has not finished by its next
+      tick) skip that tick instead of stacking runs.
+    """
+    
+    def __init__(self):
+        """Initialize a scheduler without jobs."""
+        self.jobs: List[_Job] = []
+        self._anchor()
+    
+    def _anchor(self):
+        """Pin the wall clock to the monotonic clock."""
+        self._wall_anchor = time.time()
+        self._mono_anchor = time.monotonic()
+    
+    def _now(self) -> float:
+        """Current UNIX time as tracked on the monotonic clock."""
+        return self._wall_anchor + (time.monotonic() - self._mono_anchor)
+    
+    def add_job(self, name: str, interval: float, func: Callable[[float], Awaitable[Any]]):
+        """
+        Register a job.
+        
+        Args:
+            name: Job name, used in logs and metrics
+            interval: Seconds between runs; runs fire on multiples of it
+            func: Coroutine function called with the tick's UNIX timestamp
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.jobs.append(_Job(name, interval, func))
+    
+    @property
+    def stats(self) -> Dict[str, dict]:
+        """Per-job counts of runs, errors, overruns and missed ticks."""
+        return {
+            job.name: {"runs": job.runs, "errors": job.errors, "overruns": job.overruns, "missed": job.missed}
+            for job in self.jobs
+        }
+    
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        """
+        Run every job until ``stop`` is set (or forever).
+        
+        Runs still in flight when stopping are awaited before returning.
+        
+        Args:
+            stop: Event that ends the schedule (optional)
+        """
+        stop = stop or asyncio.Event()
+        loops = [asyncio.create_task(self._schedule(job)) for job in self.jobs]
+        try:
+            await stop.wait()
+        finally:
+            for task in loops:
+                task.cancel()
+            await asyncio.gather(*loops, return_exceptions=True)
+            running = [job.running for job in self.jobs if job.running is not None]
+            await asyncio.gather(*running, return_exceptions=True)
+    
+    async def _sleep_until(self, tick: float):
+        """Sleep until a boundary, re-anchoring if the wall clock was stepped."""
+        # Loop timers may fire up to the clock resolution early
+        while self._now() < tick:
+            await asyncio.sleep(tick - self._now())
+            
+            if abs(time.time() - self._now()) > CLOCK_STEP_TOLERANCE:
+                print("Wall clock was stepped; realigning the ingestion schedule")
+                self._anchor()
+    
+    async def _schedule(self, job: _Job):
+        """Fire a job on every boundary of its interval."""
+        index = math.floor(self._now() / job.interval) + 1
+        
+        while True:
+            await self._sleep_until(index * job.interval)
+            
+            # Skip boundaries that passed while we were blocked
+            behind = math.floor(self._now() / job.interval) - index
+            if behind > 0:
+                job.missed += behind
+                SCHEDULER_TICKS.labels(job=job.name, outcome="missed").inc(behind)
+                print(f"Scheduler job {job.name} missed {behind} tick(s)")
+                index += behind
+            
+            tick = index * job.interval
+            if job.running is not None and not job.running.done():
+                job.overruns += 1
+                SCHEDULER_TICKS.labels(job=job.name, outcome="overrun").inc()
+                print(f"Scheduler job {job.name} overran its {job.interval}s interval; skipping tick {tick}")
+            else:
+                job.running = asyncio.create_task(self._execute(job, tick))
+            
+            index += 1
+    
+    async def _execute(self, job: _Job, tick: float):
+        """Run one tick of a job, recording its lag, duration and outcome."""
+        started = self._now()
+        SCHEDULER_LAG_SECONDS.labels(job=job.name).observe(max(0.0, started - tick))
+        outcome = "cancelled"
+        try:
+            await job.func(tick)
+            job.runs += 1
+            outcome = "ok"
+        except Exception as e:
+            job.errors += 1
+            outcome = "error"
+            print(f"Scheduler job {job.name} failed at tick {tick}: {str(e)}")
+        finally:
+            SCHEDULER_TICKS.labels(job=job.name, outcome=outcome).inc()
+            SCHEDULER_RUN_SECONDS.labels(job=job.name).observe(self._now() - started)
@@ -0,0 +1,133 @@
+"""
+Worker-lifetime event loop and HTTP connection pool for Celery tasks.
+
+Each prefork child gets one asyncio loop and one keep-alive aiohttp session
+(with a DNS cache) when it starts, in ``worker_process_init``. Tasks run
+their coroutines on that loop and send Deribit requests over that session,
+so a tick reuses open TLS connections instead of handshaking again. Both
+are closed, and the database pool disposed, in ``worker_process_shutdown``.
+
+Outside a prefork child (eager tasks, scripts, solo or thread pools) tasks
+fall back to a short-lived loop and client per call.
+"""
+import asyncio
+import threading
+from typing import Awaitable, Optional, TypeVar
+import aiohttp
+from celery import signals
+from app.config import settings
+from app.clients.deribit_client import DeribitClient
+from app.database import engine
+
+T = TypeVar("T")
+
+
+class WorkerRuntime:
+    """
+    Event loop and aiohttp session owned by one worker process.
+    
+    The loop is only used from the thread that started it; calls from any
+    other thread, or before start(), use a temporary loop instead.
+    """
+    
+    def __init__(self):
+        """Initialize an unstarted runtime."""
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._thread_id: Optional[int] = None
+    
+    @property
+    def active(self) -> bool:
+        """Whether the calling thread can use the worker loop."""
+        return (
+            self.loop is not None
+            and not self.loop.is_closed()
+            and threading.get_ident() == self._thread_id
+        )
+    
+    def start(self):
+        """Create the loop and the pooled HTTP session."""
+        if self.active:
+            return
+        
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._thread_id = threading.get_ident()
+        self.session = self.loop.run_until_complete(self._open_session())
+    
+    @staticmethod
+    async def _open_session() -> aiohttp.ClientSession:
+        """Create the session inside the loop it will be used on."""
+        connector = aiohttp.TCPConnector(
+            limit=settings.deribit_pool_size,
+            keepalive_timeout=settings.deribit_keepalive_timeout,
+            ttl_dns_cache=settings.deribit_dns_cache_ttl
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=10))
+    
+    def deribit_client(self) -> DeribitClient:
+        """
+        Return a Deribit client for the current task.
+        
+        Returns:
+            A client on the pooled session when the worker loop is active,
+            otherwise one with its own session (closed by the task)
+        """
+        if self.active:
+            return DeribitClient(session=self.session)
+        return DeribitClient()
+    
+    def run(self, coro: Awaitable[T]) -> T:
+        """
+        Run a coroutine to completion on the worker loop.
+        
+        Args:
+            coro: Coroutine to run
+            
+        Returns:
+            The coroutine's result
+        """
+        if self.active:
+            return self.loop.run_until_complete(coro)
+        
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+    
+    def stop(self):
+        """Close the HTTP session and the loop."""
+        if not self.active:
+            return
+        
+        try:
+            self.loop.run_until_complete(self.session.close())
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        finally:
+            self.loop.close()
+            asyncio.set_event_loop(None)
+            self.loop = None
+            self.session = None
+            self._thread_id = None
+
+
+runtime = WorkerRuntime()
+
+
+@signals.worker_process_init.connect(weak=False)
+def on_worker_process_init(**kwargs):
+    """Start the runtime in a new prefork child."""
+    # Pooled connections inherited from the parent must not be shared
+    engine.dispose(close=False)
+    runtime.start()
+
+
+@signals.worker_process_shutdown.connect(weak=False)
+def on_worker_process_shutdown(**kwargs):
+    """Close the runtime and the database pool as the child exits."""
+    try:
+        runtime.stop()
+    finally:
+        engine.dispose()
@@ -0,0 +1,95 @@
+"""
+Long-lived WebSocket ingestion worker.
+
+Subscribes to Deribit price index channels over a single WebSocket and
+hands every update to a BufferedPriceWriter, which bulk inserts them
+through PriceService. This is an alternative to polling
+``public/get_index_price`` from Celery beat.
+
+Run with ``python -m app.tasks.ws_ingestion``.
+"""
+import argparse
+import asyncio
+import signal
+from typing import List, Optional
+from app.config import settings
+from app.clients.deribit_client import DeribitClient
+from app.metrics import start_metrics_server
+from app.services.price_writer import BufferedPriceWriter
+
+
+async def run_ws_ingestion(
+    tickers: List[str],
+    ws_url: Optional[str] = None,
+    max_updates: Optional[int] = None,
+    stop: Optional[asyncio.Event] = None
+) -> dict:
+    """
+    Stream index prices for the given tickers and save each update.
+    
+    Args:
+        tickers: Tickers to subscribe to (e.g., ['BTC_USD', 'ETH_USD'])
+        ws_url: WebSocket URL override (e.g., a local stub server)
+        max_updates: Stop after this many updates (optional, runs forever by default)
+        stop: Event that ends ingestion (optional); buffered rows are
+            flushed before returning
+        
+    Returns:
+        Writer counters (flushed, dropped and failed rows) at shutdown
+    """
+    # Deribit reports lowercase index names; store them under the configured ticker
+    tickers_by_index = {ticker.lower(): ticker for ticker in tickers}
+    client = DeribitClient(ws_url=ws_url)
+    updates = client.stream_index_prices(tickers)
+    writer = BufferedPriceWriter()
+    stop = stop or asyncio.Event()
+    
+    async def consume():
+        received = 0
+        async for update in updates:
+            ticker = tickers_by_index.get(update["index_name"], update["index_name"].upper())
+            await writer.put(ticker, update["index_price"], update["timestamp"])
+            received += 1
+            
+            if max_updates is not None and received >= max_updates:
+                break
+    
+    await writer.start()
+    consumer = asyncio.create_task(consume())
+    stopped = asyncio.create_task(stop.wait())
+    try:
+        await asyncio.wait({consumer, stopped}, return_when=asyncio.FIRST_COMPLETED)
+        if consumer.done():
+            # Re-raise errors from the stream
+            consumer.result()
+    finally:
+        for task in (consumer, stopped):
+            task.cancel()
+        await asyncio.gather(consumer, stopped, return_exceptions=True)
+        await updates.aclose()
+        await client.close()
+        # Flush whatever is still buffered before exiting
+        await writer.close()
+    
+    return writer.stats
+
+
+async def _main(tickers: List[str], ws_url: Optional[str] = None):
+    """Run until SIGINT or SIGTERM, then flush buffered prices."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    
+    stats = await run_ws_ingestion(tickers, ws_url, stop=stop)
+    print(f"Ingestion stopped: {stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest Deribit index prices over WebSocket")
+    parser.add_argument("--tickers", nargs="+", default=settings.tickers)
+    parser.add_argument("--ws-url", default=None, help="WebSocket URL (defaults to DERIBIT_WS_URL)")
+    args = parser.parse_args()
+    
+    start_metrics_server()
+    asyncio.run(_main(args.tickers, args.ws_url))
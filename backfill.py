@@ -0,0 +1,65 @@
+"""
+Script to backfill price history from Deribit chart data.
+
+    python backfill.py --days 365                              # all configured tickers
+    python backfill.py --ticker BTC_USD --start 2024-01-01 --end 2024-06-30
+    
+Interrupted runs can be restarted with the same arguments; chunks that
+were already stored are skipped.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+from app.config import settings
+from app.database import Base, SessionLocal, engine
+from app.services.backfill_service import BackfillService
+
+
+def _timestamp(value: str) -> int:
+    """Parse an ISO date (UTC unless it has an offset) into a UNIX timestamp."""
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+async def _run(service: BackfillService, tickers, start: int, end: int, concurrency: int):
+    try:
+        return await service.backfill(tickers, start, end, concurrency)
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill ticker_prices from Deribit chart data")
+    parser.add_argument("--ticker", action="append", help="Ticker to backfill, repeatable (default: TICKERS)")
+    parser.add_argument("--start", type=_timestamp, help="Range start, ISO date (default: --days before --end)")
+    parser.add_argument("--end", type=_timestamp, help="Range end, ISO date (default: now)")
+    parser.add_argument("--days", type=int, default=30, help="Days to backfill when --start is not given")
+    parser.add_argument("--concurrency", type=int, default=settings.backfill_concurrency)
+    args = parser.parse_args()
+    
+    end = args.end or int(time.time())
+    start = args.start or end - args.days * 86400
+    tickers = args.ticker or settings.tickers
+    
+    Base.metadata.create_all(bind=engine)
+    
+    db = SessionLocal()
+    try:
+        print(f"Backfilling {', '.join(tickers)} from {start} to {end}...")
+        started = time.perf_counter()
+        summary = asyncio.run(_run(BackfillService(db), tickers, start, end, args.concurrency))
+        elapsed = time.perf_counter() - started
+        
+        for ticker, counts in summary.items():
+            print(
+                f"  {ticker}: {counts['inserted']} inserted, {counts['fetched']} fetched, "
+                f"{counts['skipped']}/{counts['chunks']} chunks skipped, {counts['failed']} failed"
+            )
+        print(f"Done in {elapsed:.1f}s")
+        if any(counts["failed"] for counts in summary.values()):
+            print("Some chunks failed; run the same command again to retry them")
+    finally:
+        db.close()
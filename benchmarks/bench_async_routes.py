@@ -0,0 +1,82 @@
+"""
+Benchmark: async database path vs. sync sessions inside async routes.
+
+Serves the same queries two ways, each in a single uvicorn worker, and
+drives them with concurrent clients:
+
+- ``sync``: the previous setup, sync ``Session``/``PriceService`` called
+  from ``async def`` routes, which blocks the event loop on every query
+- ``async``: the current ``app.main`` routes on ``AsyncSession``
+
+Keep ``--concurrency`` below the pool size (30) unless you want to see the
+sync mode stall: once every pooled connection is checked out, a request
+blocks the event loop waiting for a connection, so the responses that
+would release connections can never finish until the pool times out.
+
+Usage::
+
+    python -m benchmarks.bench_async_routes --rows 100000 --concurrency 20
+"""
+import argparse
+import asyncio
+from typing import Optional
+from fastapi import Depends, FastAPI, Query
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.services.price_service import PriceService
+from benchmarks.common import http_load, seed_prices, uvicorn_server, write_results
+
+BENCH_TICKER = "BENCH_USD"
+
+# The pre-async routes, kept here only as the baseline for this benchmark
+sync_app = FastAPI()
+
+
+@sync_app.get("/health")
+async def health_check():
+    return {"status": "healthy"}
+
+
+@sync_app.get("/api/v1/prices/latest")
+async def sync_latest(ticker: str = Query(...), db: Session = Depends(get_db)):
+    price = PriceService(db).get_latest_price(ticker)
+    return {"ticker": ticker, "price": float(price.price), "timestamp": price.timestamp}
+
+
+@sync_app.get("/api/v1/prices/filter")
+async def sync_filter(ticker: str = Query(...), limit: Optional[int] = Query(None), db: Session = Depends(get_db)):
+    prices, _ = PriceService(db).get_prices_page(ticker, limit)
+    return {"ticker": ticker, "count": len(prices), "prices": [
+        {"id": p.id, "ticker": p.ticker, "price": float(p.price), "timestamp": p.timestamp} for p in prices
+    ]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Rows to seed for the benchmark ticker")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+    
+    seed_prices(BENCH_TICKER, args.rows)
+    paths = [
+        f"/api/v1/prices/latest?ticker={BENCH_TICKER}",
+        f"/api/v1/prices/filter?ticker={BENCH_TICKER}&limit={args.page_size}",
+    ]
+    
+    results = {"benchmark": "async_routes", "rows": args.rows, "concurrency": args.concurrency, "modes": {}}
+    for mode, app_path in (("sync", "benchmarks.bench_async_routes:sync_app"), ("async", "app.main:app")):
+        with uvicorn_server(app_path) as (base_url, _):
+            # Warm up connection pools before measuring
+            asyncio.run(http_load(base_url, paths, args.concurrency, args.concurrency * 2))
+            results["modes"][mode] = asyncio.run(http_load(base_url, paths, args.concurrency, args.requests))
+    
+    sync_rps = results["modes"]["sync"]["throughput_rps"]
+    results["speedup"] = round(results["modes"]["async"]["throughput_rps"] / sync_rps, 2) if sync_rps else None
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
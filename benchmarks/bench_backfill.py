@@ -0,0 +1,98 @@
+"""
+Benchmark: history backfill throughput against the local Deribit stand-in.
+
+Backfills ``--days`` of one-minute history for ``--tickers`` synthetic
+tickers through BackfillService, with the stub adding ``--latency`` to each
+request and the client limited to ``--rate`` requests per second. Reports
+requests and inserted rows per second, and projects the time a year of
+one-minute data for 20 tickers would take at the measured rate.
+
+Rows written by the benchmark are deleted afterwards.
+
+Usage::
+
+    python -m benchmarks.bench_backfill --tickers 4 --days 30
+    python -m benchmarks.bench_backfill --tickers 4 --days 30 --rate 1000   # database-bound
+"""
+import argparse
+import asyncio
+import time
+from sqlalchemy import text
+from app.config import settings
+from app.clients.deribit_client import DeribitClient
+from app.clients.rate_limit import AsyncRateLimiter
+from app.database import Base, SessionLocal, engine
+from app.services.backfill_service import BackfillService
+from benchmarks.common import stub_server, write_results
+
+TICKER_PREFIX = "BACKFILL"
+YEAR_MINUTES_20_TICKERS = 365 * 1440 * 20
+
+
+def _clear(db):
+    """Delete prices, candles and progress rows written by the benchmark."""
+    for table in ("ticker_prices", "price_candles", "backfill_chunks"):
+        db.execute(text(f"DELETE FROM {table} WHERE ticker LIKE :prefix"), {"prefix": f"{TICKER_PREFIX}%"})
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=4)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=settings.deribit_credit_refill_rate / settings.deribit_request_cost,
+        help="Requests per second"
+    )
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub latency per request in seconds")
+    parser.add_argument("--concurrency", type=int, default=settings.backfill_concurrency)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    tickers = [f"{TICKER_PREFIX}{i}_USD" for i in range(args.tickers)]
+    end = int(time.time()) // 86400 * 86400 - 1
+    start = end + 1 - args.days * 86400
+    
+    db = SessionLocal()
+    try:
+        _clear(db)
+        with stub_server(latency=args.latency) as stub:
+            limiter = AsyncRateLimiter(args.rate * settings.deribit_request_cost, settings.deribit_credit_limit)
+            service = BackfillService(db, DeribitClient(base_url=stub.api_url, rate_limiter=limiter))
+            
+            async def run():
+                try:
+                    return await service.backfill(tickers, start, end, args.concurrency)
+                finally:
+                    await service.close()
+            
+            started = time.perf_counter()
+            summary = asyncio.run(run())
+            elapsed = time.perf_counter() - started
+            requests = stub.http_requests
+        _clear(db)
+    finally:
+        db.close()
+    
+    inserted = sum(counts["inserted"] for counts in summary.values())
+    rows_per_s = inserted / elapsed
+    write_results({
+        "benchmark": "backfill",
+        "tickers": args.tickers,
+        "days": args.days,
+        "rate_limit": args.rate,
+        "elapsed_s": round(elapsed, 2),
+        "requests": requests,
+        "requests_per_s": round(requests / elapsed, 1),
+        "rows_inserted": inserted,
+        "rows_per_s": round(rows_per_s),
+        "failed_chunks": sum(counts["failed"] for counts in summary.values()),
+        "projected_year_20_tickers_min": round(YEAR_MINUTES_20_TICKERS / rows_per_s / 60, 1),
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
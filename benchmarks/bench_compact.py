@@ -0,0 +1,130 @@
+"""
+Benchmark: plain vs. compact ticker_prices storage layout.
+
+Builds the plain layout in a scratch schema (``bench_compact``, dropped
+afterwards), fills it with synthetic prices, then migrates it with
+``CompactStorageService.migrate``. Before and after the migration it
+records table and index sizes, and times range reads through the same
+service methods the API uses:
+
+- ``range_rows``: ``AsyncPriceService.get_price_rows`` over ``--range-days``
+- ``range_version``: ``AsyncPriceService.get_price_version`` (count and latest)
+- ``range_arrays``: ``AsyncAnalyticsService.get_price_arrays`` (the stats read)
+
+Usage::
+
+    python -m benchmarks.bench_compact --tickers 10 --rows 100000 --range-days 30
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import Base
+from app.services.analytics_service import AsyncAnalyticsService
+from app.services.compact_service import CompactStorageService
+from app.services.price_service import AsyncPriceService
+from benchmarks.common import summarize, write_results
+
+SCHEMA = "bench_compact"
+START_TIMESTAMP = 1672531200
+
+
+async def time_range_reads(ticker: str, start_date: datetime, rounds: int) -> Dict[str, dict]:
+    """Time each range read ``rounds`` times in the scratch schema."""
+    engine = create_async_engine(
+        settings.async_database_url, connect_args={"server_settings": {"search_path": SCHEMA}}
+    )
+    reads = {
+        "range_rows": lambda db: AsyncPriceService(db).get_price_rows(ticker, start_date),
+        "range_version": lambda db: AsyncPriceService(db).get_price_version(ticker, start_date),
+        "range_arrays": lambda db: AsyncAnalyticsService(db).get_price_arrays(ticker, start_date),
+    }
+    results = {}
+    try:
+        async with AsyncSession(engine) as db:
+            for name, read in reads.items():
+                await read(db)
+                latencies = []
+                started = time.perf_counter()
+                for _ in range(rounds):
+                    round_started = time.perf_counter()
+                    await read(db)
+                    latencies.append(time.perf_counter() - round_started)
+                results[name] = summarize(latencies, time.perf_counter() - started)
+    finally:
+        await engine.dispose()
+    return results
+
+
+def vacuum(engine, table: str) -> None:
+    """VACUUM ANALYZE a table so index-only scans and statistics are current."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"VACUUM ANALYZE {table}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=10, help="Number of tickers to seed")
+    parser.add_argument("--rows", type=int, default=100000, help="One-minute prices per ticker")
+    parser.add_argument("--range-days", type=int, default=30, help="Length of the timed range reads")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+    
+    engine = create_engine(settings.database_url, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    
+    try:
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            connection.execute(text("""
+                INSERT INTO ticker_prices (ticker, price, timestamp)
+                SELECT 'BENCH' || t || '_USD', round((40000 + (i % 1000) / 10.0 + t)::numeric, 8), :start + i * 60
+                FROM generate_series(0, :rows - 1) i, generate_series(0, :tickers - 1) t
+                ORDER BY i, t
+            """), {"start": START_TIMESTAMP, "rows": args.rows, "tickers": args.tickers})
+        
+        ticker = "BENCH0_USD"
+        last_timestamp = START_TIMESTAMP + (args.rows - 1) * 60
+        start_date = datetime.fromtimestamp(last_timestamp - args.range_days * 86400, tz=timezone.utc)
+        results = {
+            "benchmark": "compact",
+            "tickers": args.tickers,
+            "rows": args.rows * args.tickers,
+            "range_days": args.range_days,
+            "layouts": {},
+        }
+        
+        with Session(engine) as db:
+            service = CompactStorageService(db)
+            for layout in ("plain", "compact"):
+                if layout == "compact":
+                    migrate_started = time.perf_counter()
+                    service.migrate()
+                    results["migrate_s"] = round(time.perf_counter() - migrate_started, 3)
+                    db.commit()
+                vacuum(engine, "ticker_prices_compact" if layout == "compact" else "ticker_prices")
+                sizes = service.storage_sizes()
+                db.commit()
+                results["layouts"][layout] = {
+                    "table_mb": round(sizes["table_bytes"] / 2 ** 20, 1),
+                    "index_mb": round(sizes["index_bytes"] / 2 ** 20, 1),
+                    "reads": asyncio.run(time_range_reads(ticker, start_date, args.rounds)),
+                }
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
+    
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: finding missed ingestion slots across tickers.
+
+Seeds ``--tickers`` tickers (``GAP0_USD``, ``GAP1_USD``, ...) with one-minute
+prices ending now, drops every ``--drop-every``-th minute, then times two
+ways of finding the gaps over the whole seeded range:
+
+- ``python``: load each ticker's timestamps and diff them in Python, one
+  query per ticker
+- ``scan``: ``GapService.find_gaps``, one query walking the index for all
+  tickers
+
+Usage::
+
+    python -m benchmarks.bench_gaps --tickers 20 --rows 100000 --drop-every 500
+"""
+import argparse
+import time
+from typing import Dict, List
+from sqlalchemy import text
+from app.database import SessionLocal, engine
+from app.services.gap_service import GapService, PriceGap, ingest_cadence
+from benchmarks.common import seed_prices, summarize, write_results
+
+
+def python_gaps(db, tickers: List[str], start: int, end: int) -> List[PriceGap]:
+    """Find gaps by loading every timestamp, as a script would."""
+    gaps = []
+    for ticker in tickers:
+        cadence = ingest_cadence(ticker)
+        first, last = -(-start // cadence), (min(end, int(time.time()) - cadence) + 1) // cadence - 1
+        slots = db.execute(
+            text("""
+                SELECT timestamp FROM ticker_prices
+                WHERE ticker = :ticker AND timestamp >= :start AND timestamp < :end
+                ORDER BY timestamp
+            """),
+            {"ticker": ticker, "start": first * cadence, "end": (last + 1) * cadence}
+        ).scalars()
+        previous = first - 1
+        for slot in [timestamp // cadence for timestamp in slots] + [last + 1]:
+            if slot - previous > 1:
+                gaps.append(PriceGap(
+                    ticker, (previous + 1) * cadence, slot * cadence - 1, slot - previous - 1
+                ))
+            previous = slot
+    return gaps
+
+
+def measure(tickers: List[str], start: int, end: int, rounds: int) -> Dict[str, dict]:
+    """Time ``rounds`` scans per mode."""
+    results = {}
+    db = SessionLocal()
+    try:
+        modes = {
+            "python": lambda: python_gaps(db, tickers, start, end),
+            "scan": lambda: GapService(db).find_gaps(tickers, start, end),
+        }
+        for mode, scan in modes.items():
+            gaps = scan()
+            latencies = []
+            started = time.perf_counter()
+            for _ in range(rounds):
+                round_started = time.perf_counter()
+                scan()
+                latencies.append(time.perf_counter() - round_started)
+            results[mode] = {
+                "gaps": len(gaps),
+                "missing": sum(gap.missing for gap in gaps),
+                **summarize(latencies, time.perf_counter() - started),
+            }
+    finally:
+        db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=20, help="Tickers to seed")
+    parser.add_argument("--rows", type=int, default=100000, help="One-minute prices to seed per ticker")
+    parser.add_argument("--drop-every", type=int, default=500, help="Delete every n-th minute")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+    
+    now = int(time.time())
+    start = now - now % 60 - args.rows * 60
+    tickers = [f"GAP{i}_USD" for i in range(args.tickers)]
+    for ticker in tickers:
+        seed_prices(ticker, args.rows, start_timestamp=start)
+    db = SessionLocal()
+    try:
+        db.execute(
+            text("DELETE FROM ticker_prices WHERE ticker = ANY(:tickers) AND (timestamp - :start) / 60 % :every = 0"),
+            {"tickers": tickers, "start": start, "every": args.drop_every}
+        )
+        db.commit()
+    finally:
+        db.close()
+    # Refresh the visibility map so the scan can stay index-only
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE ticker_prices"))
+    
+    results = {
+        "benchmark": "gaps",
+        "tickers": args.tickers,
+        "rows": args.rows,
+        "drop_every": args.drop_every,
+        "modes": measure(tickers, start, now, args.rounds),
+    }
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
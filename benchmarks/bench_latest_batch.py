@@ -0,0 +1,91 @@
+"""
+Benchmark: latest prices of many tickers in one batch vs. one call each.
+
+Seeds ``--tickers`` tickers and serves ``app.main`` in a single uvicorn
+worker with the latest price cache disabled, so every request reaches the
+database. Each round fetches the latest price of every ticker three ways:
+
+- ``sequential``: one ``/prices/latest`` call per ticker, one after another
+- ``concurrent``: one ``/prices/latest`` call per ticker, all in flight at once
+- ``batch``: a single ``/prices/latest/batch`` call
+
+Latencies are per round, i.e. the time until a client has all prices.
+
+Usage::
+
+    python -m benchmarks.bench_latest_batch --tickers 30 --rows 10000 --rounds 200
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+import httpx
+from benchmarks.common import seed_prices, summarize, uvicorn_server, write_results
+
+
+async def measure_rounds(base_url: str, tickers: List[str], rounds: int) -> Dict[str, dict]:
+    """Time ``rounds`` fetches of every ticker's latest price in each mode."""
+    single_paths = [f"/api/v1/prices/latest?ticker={ticker}" for ticker in tickers]
+    batch_path = f"/api/v1/prices/latest/batch?tickers={','.join(tickers)}"
+    limits = httpx.Limits(max_connections=len(tickers), max_keepalive_connections=len(tickers))
+    
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def get(path: str) -> None:
+            response = await client.get(path)
+            response.raise_for_status()
+        
+        async def sequential():
+            for path in single_paths:
+                await get(path)
+        
+        async def concurrent():
+            await asyncio.gather(*(get(path) for path in single_paths))
+        
+        async def batch():
+            await get(batch_path)
+        
+        results = {}
+        for mode, fetch in (("sequential", sequential), ("concurrent", concurrent), ("batch", batch)):
+            # Warm up connections before measuring
+            await fetch()
+            latencies: List[float] = []
+            errors = 0
+            started = time.perf_counter()
+            for _ in range(rounds):
+                round_started = time.perf_counter()
+                try:
+                    await fetch()
+                    latencies.append(time.perf_counter() - round_started)
+                except httpx.HTTPError:
+                    errors += 1
+            results[mode] = summarize(latencies, time.perf_counter() - started, errors)
+    
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=30, help="Number of tickers to seed and request")
+    parser.add_argument("--rows", type=int, default=10000, help="Rows to seed per ticker")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+    
+    tickers = [f"BENCH{i}_USD" for i in range(args.tickers)]
+    for ticker in tickers:
+        seed_prices(ticker, args.rows)
+    
+    with uvicorn_server("app.main:app", env={"PRICE_CACHE_ENABLED": "false"}) as (base_url, _):
+        modes = asyncio.run(measure_rounds(base_url, tickers, args.rounds))
+    
+    results = {"benchmark": "latest_batch", "tickers": args.tickers, "rows": args.rows, "modes": modes}
+    batch_p50 = modes["batch"]["p50_ms"]
+    results["speedup_p50"] = {
+        mode: round(modes[mode]["p50_ms"] / batch_p50, 2) if batch_p50 else None
+        for mode in ("sequential", "concurrent")
+    }
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
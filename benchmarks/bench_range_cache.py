@@ -0,0 +1,96 @@
+"""
+Benchmark: historical range reads with and without the range cache.
+
+Seeds ``BENCH_USD`` with one-minute prices ending now, then times the read
+behind ``/prices/filter`` for the last ``--range-days`` days, the way a
+dashboard reload repeats it:
+
+- ``database``: ``AsyncPriceService.get_price_rows`` on every round
+- ``cold``: ``RangeCache.get_price_rows`` with an empty cache (first load)
+- ``warm``: ``RangeCache.get_price_rows`` served from sealed blocks plus the
+  live tail query
+
+Each round also runs ``get_price_version``, as the route does for its ETag.
+
+Usage::
+
+    python -m benchmarks.bench_range_cache --rows 100000 --range-days 30 --bucket 3600
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict
+from app.database import AsyncSessionLocal, async_engine
+from app.services.price_service import AsyncPriceService
+from app.services.range_cache import RangeCache
+from benchmarks.common import seed_prices, summarize, write_results
+
+BENCH_TICKER = "BENCH_USD"
+
+
+async def measure(start_date: datetime, bucket: int, rounds: int) -> Dict[str, dict]:
+    """Time ``rounds`` range reads per mode."""
+    results = {}
+    try:
+        async with AsyncSessionLocal() as db:
+            service = AsyncPriceService(db)
+            
+            async def database():
+                await service.get_price_version(BENCH_TICKER, start_date)
+                return (await service.get_price_rows(BENCH_TICKER, start_date))[0]
+            
+            cache = RangeCache(bucket=bucket)
+            
+            async def cached(reset: bool):
+                nonlocal cache
+                if reset:
+                    cache = RangeCache(bucket=bucket)
+                count, _ = await service.get_price_version(BENCH_TICKER, start_date)
+                return await cache.get_price_rows(service, BENCH_TICKER, start_date, None, count)
+            
+            modes = {
+                "database": database,
+                "cold": lambda: cached(True),
+                "warm": lambda: cached(False),
+            }
+            for mode, read in modes.items():
+                rows = await read()
+                latencies = []
+                started = time.perf_counter()
+                for _ in range(rounds):
+                    round_started = time.perf_counter()
+                    await read()
+                    latencies.append(time.perf_counter() - round_started)
+                results[mode] = {"rows": len(rows), **summarize(latencies, time.perf_counter() - started)}
+            results["cache"] = {"blocks": len(cache._blocks), "mb": round(cache.size / 2 ** 20, 2)}
+    finally:
+        await async_engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="One-minute prices to seed")
+    parser.add_argument("--range-days", type=int, default=30, help="Length of the timed range reads")
+    parser.add_argument("--bucket", type=int, default=3600, help="Cache bucket length in seconds")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+    
+    now = int(time.time())
+    seed_prices(BENCH_TICKER, args.rows, start_timestamp=now - args.rows * 60)
+    start_date = datetime.fromtimestamp(now - args.range_days * 86400, tz=timezone.utc)
+    
+    results = {
+        "benchmark": "range_cache",
+        "rows": args.rows,
+        "range_days": args.range_days,
+        "bucket": args.bucket,
+        "modes": asyncio.run(measure(start_date, args.bucket, args.rounds)),
+    }
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark: price list serialization, Pydantic models vs. column tuples + orjson.
+
+Loads ``--rows`` prices for one ticker and times two stages for each path:
+
+- ``fetch``: reading the rows through AsyncPriceService, as ORM objects
+  (``get_all_prices``) or as (id, price, timestamp) tuples (``get_price_rows``)
+- ``serialize``: turning the rows into response bytes. The ``pydantic``
+  path is what the routes used to do: ``TickerPriceResponse.model_validate``
+  per row, then FastAPI's response validation and ``JSONResponse``. The
+  ``orjson`` and ``columnar`` paths are the current ``_price_list``.
+  
+Each stage reports the median of ``--repeat`` runs.
+
+Usage::
+
+    python -m benchmarks.bench_serialization --rows 100000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.api.routes import _price_list
+from app.api.schemas import PriceFormat, PriceListResponse, TickerPriceResponse
+from app.database import AsyncSessionLocal, async_engine
+from app.services.price_service import AsyncPriceService
+from benchmarks.common import seed_prices, write_results
+
+BENCH_TICKER = "BENCH_USD"
+
+PRICE_LIST_FIELD = create_response_field(name="PriceListResponse", type_=PriceListResponse)
+
+
+async def _median_ms(fn: Callable[[], Awaitable], repeat: int) -> float:
+    """Run ``fn`` ``repeat`` times and return the median wall time in ms."""
+    timings: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 2)
+
+
+async def pydantic_body(prices) -> bytes:
+    """Serialize ORM rows the way the routes did before the fast path."""
+    response = PriceListResponse(
+        ticker=BENCH_TICKER,
+        count=len(prices),
+        prices=[TickerPriceResponse.model_validate(price) for price in prices]
+    )
+    content = await serialize_response(field=PRICE_LIST_FIELD, response_content=response, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+class _RowsService:
+    """Serves pre-fetched rows to ``_price_list`` so only serialization is timed."""
+    
+    def __init__(self, rows):
+        self.rows = rows
+    
+    async def get_price_rows(self, *args):
+        return self.rows, None
+
+
+async def fast_body(rows, response_format: PriceFormat) -> bytes:
+    """Serialize row tuples through the current route helper."""
+    response: ORJSONResponse = await _price_list(
+        _RowsService(rows), BENCH_TICKER, None, None, None, None, response_format
+    )
+    return response.body
+
+
+async def run(rows: int, repeat: int, seed: bool) -> dict:
+    """Seed, then time the fetch and serialize stages of each path."""
+    if seed:
+        seed_prices(BENCH_TICKER, rows)
+    
+    async with AsyncSessionLocal() as db:
+        service = AsyncPriceService(db)
+        
+        
+        async def fetch_orm():
+            # Start from an empty identity map so every run builds new objects
+            db.expunge_all()
+            return await service.get_all_prices(BENCH_TICKER)
+        
+        orm_rows = await fetch_orm()
+        tuple_rows, _ = await service.get_price_rows(BENCH_TICKER)
+        
+        fetch = {
+            "orm_ms": await _median_ms(fetch_orm, repeat),
+            "tuples_ms": await _median_ms(lambda: service.get_price_rows(BENCH_TICKER), repeat),
+        }
+    
+    await async_engine.dispose()
+    
+    serialize = {
+        "pydantic_ms": await _median_ms(lambda: pydantic_body(orm_rows), repeat),
+        "orjson_ms": await _median_ms(lambda: fast_body(tuple_rows, PriceFormat.json), repeat),
+        "columnar_ms": await _median_ms(lambda: fast_body(tuple_rows, PriceFormat.columnar), repeat),
+    }
+    
+    return {
+        "rows": len(tuple_rows),
+        "repeat": repeat,
+        "fetch": fetch,
+        "serialize": serialize,
+        "body_bytes": {
+            "json": len(await fast_body(tuple_rows, PriceFormat.json)),
+            "columnar": len(await fast_body(tuple_rows, PriceFormat.columnar)),
+        },
+        "serialize_speedup": {
+            "orjson": round(serialize["pydantic_ms"] / serialize["orjson_ms"], 2),
+            "columnar": round(serialize["pydantic_ms"] / serialize["columnar_ms"], 2),
+        },
+        "end_to_end_speedup": round(
+            (fetch["orm_ms"] + serialize["pydantic_ms"]) / (fetch["tuples_ms"] + serialize["orjson_ms"]), 2
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Rows to seed for the benchmark ticker")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-seed", action="store_true", help="Reuse rows from a previous run")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+    
+    write_results(asyncio.run(run(args.rows, args.repeat, not args.no_seed)), args.output)
+
+
+if __name__ == "__main__":
+    main()
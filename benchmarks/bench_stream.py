@@ -0,0 +1,171 @@
+"""
+Load test: idle subscribers and fan-out latency of ``/api/v1/prices/stream``.
+
+Serves ``app.main:app`` from a uvicorn subprocess whose latest-price cache
+is fed through ``POST /bench/publish`` instead of Redis; the handler calls
+``LatestPriceCache.handle_message``, exactly what the Redis listener does
+for each published price. The driver then:
+
+1. opens ``--subscribers`` SSE or WebSocket connections (in batches of
+   ``--connect-batch``) and records the server's resident memory before and
+   after, i.e. the cost of an idle subscriber
+2. keeps them idle for ``--idle`` seconds (SSE clients receive heartbeats)
+3. publishes ``--ticks`` prices and measures, per tick, how many clients
+   got it and the delay between publishing and each client receiving it
+   
+Each published price carries the publish wall time as its ``price`` so
+clients can compute delivery latency without extra fields.
+
+Usage::
+
+    python -m benchmarks.bench_stream --subscribers 10000
+    python -m benchmarks.bench_stream --subscribers 10000 --transport websocket
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+import aiohttp
+import orjson
+from fastapi import FastAPI, Request
+from app.api.routes import get_price_cache
+from app.services.price_cache import LatestPriceCache
+from benchmarks.common import percentile, process_memory_mb, raise_file_limit, uvicorn_server, write_results
+
+BENCH_TICKER = "BENCH_USD"
+START_TIMESTAMP = 1700000000
+
+
+def create_stream_app() -> FastAPI:
+    """Return app.main:app with a cache fed by /bench/publish instead of Redis."""
+    raise_file_limit()
+    from app.main import app
+    
+    cache = LatestPriceCache()
+    cache._reset(connected=True)
+    app.dependency_overrides[get_price_cache] = lambda: cache
+    
+    @app.post("/bench/publish")
+    async def publish(request: Request):
+        cache.handle_message(await request.body())
+        return {"ok": True}
+    
+    return app
+
+
+class Subscriber:
+    """One streaming client recording when each tick arrived."""
+    
+    def __init__(self):
+        self.received: Dict[int, float] = {}
+    
+    def on_message(self, payload: bytes):
+        message = orjson.loads(payload)
+        self.received[message["timestamp"]] = time.time() - message["price"]
+    
+    async def run_sse(self, session: aiohttp.ClientSession, url: str, connected: asyncio.Event):
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=None)) as response:
+            connected.set()
+            async for line in response.content:
+                if line.startswith(b"data: "):
+                    self.on_message(line[6:])
+    
+    async def run_websocket(self, session: aiohttp.ClientSession, url: str, connected: asyncio.Event):
+        async with session.ws_connect(url) as websocket:
+            connected.set()
+            async for message in websocket:
+                self.on_message(message.data.encode())
+
+
+async def run(base_url: str, pid: int, args) -> dict:
+    """Connect the subscribers, idle, publish ticks and collect delivery latency."""
+    path = f"/api/v1/prices/stream?tickers={BENCH_TICKER}"
+    url = base_url.replace("http", "ws", 1) + path if args.transport == "websocket" else base_url + path
+    memory_before = process_memory_mb(pid)
+    
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        subscribers: List[Subscriber] = []
+        tasks = []
+        errors = 0
+        started = time.perf_counter()
+        
+        for offset in range(0, args.subscribers, args.connect_batch):
+            events = []
+            for _ in range(min(args.connect_batch, args.subscribers - offset)):
+                subscriber = Subscriber()
+                connected = asyncio.Event()
+                runner = subscriber.run_websocket if args.transport == "websocket" else subscriber.run_sse
+                tasks.append(asyncio.create_task(runner(session, url, connected)))
+                subscribers.append(subscriber)
+                events.append(connected)
+            await asyncio.wait_for(asyncio.gather(*(event.wait() for event in events)), timeout=60)
+        
+        connect_s = time.perf_counter() - started
+        await asyncio.sleep(args.idle)
+        memory_idle = process_memory_mb(pid)
+        
+        ticks = []
+        for tick in range(args.ticks):
+            timestamp = START_TIMESTAMP + tick
+            payload = orjson.dumps({"ticker": BENCH_TICKER, "price": time.time(), "timestamp": timestamp})
+            async with session.post(f"{base_url}/bench/publish", data=payload) as response:
+                response.raise_for_status()
+            
+            deadline = time.monotonic() + args.tick_timeout
+            while time.monotonic() < deadline:
+                if all(timestamp in subscriber.received for subscriber in subscribers):
+                    break
+                await asyncio.sleep(0.05)
+            
+            latencies = [s.received[timestamp] for s in subscribers if timestamp in s.received]
+            ticks.append({
+                "delivered": len(latencies),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+                "max_ms": round(max(latencies, default=0) * 1000, 1),
+            })
+            await asyncio.sleep(args.tick_interval)
+        
+        for task in tasks:
+            task.cancel()
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, Exception) and not isinstance(result, asyncio.CancelledError):
+                errors += 1
+    
+    idle_kb = (memory_idle["rss_mb"] - memory_before["rss_mb"]) * 1024
+    return {
+        "transport": args.transport,
+        "subscribers": args.subscribers,
+        "connect_s": round(connect_s, 2),
+        "server_memory_before": memory_before,
+        "server_memory_idle": memory_idle,
+        "server_kb_per_subscriber": round(idle_kb / args.subscribers, 2),
+        "ticks": ticks,
+        "client_errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--transport", choices=["sse", "websocket"], default="sse")
+    parser.add_argument("--connect-batch", type=int, default=500, help="Connections opened at a time")
+    parser.add_argument("--idle", type=float, default=5.0, help="Seconds to stay idle before publishing")
+    parser.add_argument("--ticks", type=int, default=5, help="Prices to publish")
+    parser.add_argument("--tick-interval", type=float, default=1.0, help="Seconds between ticks")
+    parser.add_argument("--tick-timeout", type=float, default=30.0, help="Seconds to wait for a tick to reach everyone")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+    
+    raise_file_limit()
+    # The cache is fed through /bench/publish, so the app must not start its own
+    env = {"PRICE_CACHE_ENABLED": "false"}
+    with uvicorn_server("benchmarks.bench_stream:create_stream_app", env=env, factory=True) as (base_url, pid):
+        results = asyncio.run(run(base_url, pid, args))
+    
+    write_results({"benchmark": "stream", **results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
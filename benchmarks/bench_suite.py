@@ -0,0 +1,208 @@
+"""
+End-to-end benchmark suite: ingestion against a local Deribit stand-in, and
+the three ``/api/v1/prices*`` endpoints against seeded datasets.
+
+Ingestion runs the real ``fetch_and_save_prices`` Celery task function
+(in-process) against ``DeribitStubServer`` with configurable latency and
+error rate, once per ticker count, one tick every ``--cadence`` seconds.
+Each scenario records tick latency percentiles, saved rows per second,
+failures, ticks that overran the cadence, and process memory.
+
+The API part seeds ``BENCH_USD`` with each ``--sizes`` row count, serves
+``app.main:app`` from a uvicorn subprocess, and loads each endpoint with
+``--concurrency`` clients. It records p50/p99 latency, throughput and the
+server's resident memory.
+
+Results are written as JSON (``--output``) so runs can be compared across
+releases.
+
+Usage::
+
+    python -m benchmarks.bench_suite --ticker-counts 2 10 50 --sizes 10000 100000
+    python -m benchmarks.bench_suite --skip-api --latency 0.2 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+from sqlalchemy import text
+from app.config import settings
+from app.database import Base, SessionLocal, engine
+from app.tasks.price_tasks import fetch_and_save_prices
+from benchmarks.common import (
+    http_load,
+    process_memory_mb,
+    seed_prices,
+    stub_server,
+    summarize,
+    uvicorn_server,
+    write_results,
+)
+
+BENCH_TICKER = "BENCH_USD"
+INGEST_TICKER_PREFIX = "INGEST"
+SEED_START = 1672531200
+SEED_STEP = 60
+
+
+def _clear_ingest_rows():
+    """Delete rows written by ingestion scenarios."""
+    db = SessionLocal()
+    try:
+        for table in ("ticker_prices", "price_candles"):
+            db.execute(
+                text(f"DELETE FROM {table} WHERE ticker LIKE :prefix"),
+                {"prefix": f"{INGEST_TICKER_PREFIX}%"}
+            )
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_ingestion(ticker_count: int, ticks: int, cadence: float, concurrency: int, stub) -> Dict:
+    """
+    Run ``ticks`` ticks of the fetch_and_save_prices task for ``ticker_count`` tickers.
+    
+    Returns:
+        Scenario results
+    """
+    settings.tickers = [f"{INGEST_TICKER_PREFIX}{i}_USD" for i in range(ticker_count)]
+    settings.ingest_concurrency = concurrency
+    stub_requests = stub.http_requests
+    
+    latencies: List[float] = []
+    saved = failed = overruns = failed_ticks = 0
+    started = time.perf_counter()
+    
+    for tick in range(ticks):
+        tick_started = time.perf_counter()
+        try:
+            result = fetch_and_save_prices()
+            saved += result["succeeded"]
+            failed += result["failed"]
+        except RuntimeError:
+            # Every ticker failed in this tick
+            failed += ticker_count
+            failed_ticks += 1
+        elapsed = time.perf_counter() - tick_started
+        latencies.append(elapsed)
+        
+        if elapsed > cadence:
+            overruns += 1
+        elif tick < ticks - 1:
+            time.sleep(cadence - elapsed)
+    
+    total = time.perf_counter() - started
+    tick_summary = summarize(latencies, total)
+    tick_summary.pop("throughput_rps")
+    tick_summary.pop("errors")
+    
+    return {
+        "tickers": ticker_count,
+        "ticks": ticks,
+        "cadence_s": cadence,
+        "tick_latency": tick_summary,
+        "rows_saved": saved,
+        "rows_failed": failed,
+        "failed_ticks": failed_ticks,
+        "saved_rows_per_s": round(saved / total, 1),
+        "overruns": overruns,
+        "stub_requests": stub.http_requests - stub_requests,
+        "memory": process_memory_mb(),
+    }
+
+
+def run_api(size: int, concurrency: int, requests: int, page_size: int) -> Dict:
+    """
+    Seed ``size`` rows and load each price endpoint.
+    
+    Returns:
+        Scenario results keyed by endpoint
+    """
+    seed_prices(BENCH_TICKER, size, SEED_START, SEED_STEP)
+    
+    # A one-day window in the middle of the seeded range
+    middle = SEED_START + size // 2 * SEED_STEP
+    start = datetime.fromtimestamp(middle, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    end = datetime.fromtimestamp(middle + 86400, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+    endpoints = {
+        "prices": f"/api/v1/prices?ticker={BENCH_TICKER}&limit={page_size}",
+        "latest": f"/api/v1/prices/latest?ticker={BENCH_TICKER}",
+        "filter": f"/api/v1/prices/filter?ticker={BENCH_TICKER}&start_date={start}&end_date={end}",
+    }
+    
+    results = {"rows": size, "endpoints": {}}
+    with uvicorn_server("app.main:app") as (base_url, pid):
+        for name, path in endpoints.items():
+            # Warm up connection pools before measuring
+            asyncio.run(http_load(base_url, [path], concurrency, concurrency * 2))
+            summary = asyncio.run(http_load(base_url, [path], concurrency, requests))
+            summary["server_memory"] = process_memory_mb(pid)
+            results["endpoints"][name] = summary
+    
+    return results
+
+
+def _git_revision() -> str:
+    """Return the current git revision, or 'unknown' outside a checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticker-counts", type=int, nargs="+", default=[2, 10, 50])
+    parser.add_argument("--ticks", type=int, default=10, help="Ticks per ingestion scenario")
+    parser.add_argument("--cadence", type=float, default=1.0, help="Seconds between tick starts")
+    parser.add_argument("--ingest-concurrency", type=int, default=settings.ingest_concurrency)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub HTTP latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of stub requests that fail")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="Seeded rows per API scenario")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent API clients")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per endpoint")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--skip-ingestion", action="store_true")
+    parser.add_argument("--skip-api", action="store_true")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    results = {
+        "benchmark": "suite",
+        "meta": {
+            "started_at": datetime.now(tz=timezone.utc).isoformat(),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "args": vars(args),
+        },
+        "ingestion": [],
+        "api": [],
+    }
+    
+    if not args.skip_ingestion:
+        with stub_server(latency=args.latency, error_rate=args.error_rate) as stub:
+            settings.deribit_api_url = stub.api_url
+            try:
+                for ticker_count in args.ticker_counts:
+                    results["ingestion"].append(run_ingestion(
+                        ticker_count, args.ticks, args.cadence, args.ingest_concurrency, stub
+                    ))
+            finally:
+                _clear_ingest_rows()
+    
+    if not args.skip_api:
+        for size in args.sizes:
+            results["api"].append(run_api(size, args.concurrency, args.requests, args.page_size))
+    
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: per-tick overhead of fetch_and_save_prices with and without the
+worker runtime.
+
+Runs ``--ticks`` back-to-back ticks of the task function for ``--tickers``
+synthetic tickers in two modes:
+
+- ``per_task``: the runtime is not started, so each tick creates its own
+  event loop, aiohttp session and connections (the behaviour before the
+  worker runtime existed)
+- ``worker``: the runtime is started once, as ``worker_process_init`` does,
+  so ticks share one loop and one keep-alive session
+  
+Reports tick latency percentiles and the HTTP connections the Deribit
+stand-in accepted. Pass ``--api-url`` to measure against a real (TLS)
+endpoint instead of the local stand-in, where every new connection also
+pays a TLS handshake.
+
+Usage::
+
+    python -m benchmarks.bench_worker --tickers 10 --ticks 50
+    python -m benchmarks.bench_worker --api-url https://www.deribit.com/api/v2 --tickers 2 --ticks 20
+"""
+import argparse
+import contextlib
+import time
+from typing import Dict, List
+from sqlalchemy import text
+from app.config import settings
+from app.database import Base, SessionLocal, engine
+from app.tasks.price_tasks import fetch_and_save_prices
+from app.tasks.worker_runtime import runtime
+from benchmarks.common import stub_server, summarize, write_results
+
+TICKER_PREFIX = "WORKER"
+
+
+def _clear():
+    """Delete rows written by the benchmark."""
+    db = SessionLocal()
+    try:
+        for table in ("ticker_prices", "price_candles"):
+            db.execute(text(f"DELETE FROM {table} WHERE ticker LIKE :prefix"), {"prefix": f"{TICKER_PREFIX}%"})
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_ticks(ticks: int) -> Dict:
+    """Run ``ticks`` ticks back to back and summarize their latency."""
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for _ in range(ticks):
+        tick_started = time.perf_counter()
+        fetch_and_save_prices()
+        latencies.append(time.perf_counter() - tick_started)
+    
+    summary = summarize(latencies, time.perf_counter() - started)
+    summary.pop("errors")
+    summary.pop("throughput_rps")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=10)
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub latency per request in seconds")
+    parser.add_argument("--api-url", help="Deribit API base URL to use instead of the local stand-in")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    if args.api_url:
+        settings.tickers = ["BTC_USD", "ETH_USD", "SOL_USDC", "XRP_USDC"][:args.tickers]
+    else:
+        settings.tickers = [f"{TICKER_PREFIX}{i}_USD" for i in range(args.tickers)]
+        # Measure connection overhead, not the Deribit credit limit
+        settings.deribit_credit_refill_rate = settings.deribit_credit_limit = 10 ** 9
+    
+    results = {"benchmark": "worker_runtime", "tickers": len(settings.tickers), "ticks": args.ticks}
+    for mode in ("per_task", "worker"):
+        stub_context = stub_server(latency=args.latency) if not args.api_url else contextlib.nullcontext()
+        with stub_context as stub:
+            settings.deribit_api_url = args.api_url or stub.api_url
+            if mode == "worker":
+                runtime.start()
+            try:
+                # One warm-up tick, so both modes start with a pooled DB connection
+                fetch_and_save_prices()
+                results[mode] = run_ticks(args.ticks)
+            finally:
+                runtime.stop()
+            if stub is not None:
+                results[mode]["http_connections"] = stub.http_connections
+    
+    results["p50_saved_ms"] = round(results["per_task"]["p50_ms"] - results["worker"]["p50_ms"], 2)
+    _clear()
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
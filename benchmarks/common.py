@@ -0,0 +1,237 @@
+"""
+Shared helpers for benchmark scripts.
+
+Benchmarks run against the database configured in Settings and write
+machine-readable JSON results so runs can be compared between releases.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import statistics
+import resource
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+import httpx
+from sqlalchemy import text
+from app.clients.deribit_stub import DeribitStubServer
+from app.database import Base, SessionLocal, engine
+from app.services.price_service import PriceService
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the pct-th percentile (0-100) using nearest-rank."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Dict[str, float]:
+    """
+    Summarize request latencies (seconds) into throughput and percentiles.
+    
+    Returns:
+        Dictionary with count, errors, throughput (req/s) and p50/p99/mean in ms
+    """
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+    }
+
+
+def seed_prices(ticker: str, count: int, start_timestamp: int = 1672531200, step: int = 60) -> None:
+    """
+    Replace all prices for a ticker with ``count`` synthetic rows via COPY.
+    
+    Args:
+        ticker: Ticker to seed (existing rows and candles are deleted)
+        count: Number of rows
+        start_timestamp: Timestamp of the first row
+        step: Seconds between rows
+    """
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.execute(text("DELETE FROM ticker_prices WHERE ticker = :ticker"), {"ticker": ticker})
+        db.execute(text("DELETE FROM price_candles WHERE ticker = :ticker"), {"ticker": ticker})
+        db.commit()
+        
+        service = PriceService(db)
+        batch = 50000
+        for offset in range(0, count, batch):
+            rows = [
+                (ticker, 40000.0 + (i % 1000) / 10, start_timestamp + i * step)
+                for i in range(offset, min(count, offset + batch))
+            ]
+            service.save_prices(rows, use_copy=True)
+        db.execute(text("ANALYZE ticker_prices"))
+        db.commit()
+    finally:
+        db.close()
+
+
+def raise_file_limit() -> int:
+    """Raise this process's open file limit to the hard limit and return it."""
+    _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+def free_port() -> int:
+    """Return a free TCP port on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def process_memory_mb(pid: Optional[int] = None) -> Dict[str, float]:
+    """
+    Return current and peak resident memory of a process in MB.
+    
+    Args:
+        pid: Process to inspect (optional, defaults to the current process)
+        
+    Returns:
+        Dictionary with rss_mb and peak_rss_mb
+    """
+    if pid is None:
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        pid = os.getpid()
+    else:
+        peak_kb = None
+    
+    values = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "VmHWM"):
+                values[key] = int(value.split()[0])
+    
+    return {
+        "rss_mb": round(values.get("VmRSS", 0) / 1024, 1),
+        "peak_rss_mb": round((peak_kb or values.get("VmHWM", 0)) / 1024, 1),
+    }
+
+
+@contextlib.contextmanager
+def stub_server(**kwargs) -> Iterator[DeribitStubServer]:
+    """
+    Run a DeribitStubServer on its own event loop in a background thread.
+    
+    Keyword arguments are passed to DeribitStubServer. Running it off the
+    caller's thread lets synchronous code (e.g. Celery task functions) talk
+    to it.
+    
+    Yields:
+        The started server
+    """
+    server = DeribitStubServer(**kwargs)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result(timeout=10)
+    try:
+        yield server
+    finally:
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result(timeout=10)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=10)
+        loop.close()
+
+
+@contextlib.contextmanager
+def uvicorn_server(
+    app_path: str,
+    port: Optional[int] = None,
+    env: Optional[Dict[str, str]] = None,
+    factory: bool = False
+) -> Iterator[Tuple[str, int]]:
+    """
+    Run ``app_path`` (module:attribute) in a single uvicorn worker subprocess.
+    
+    Args:
+        app_path: Application import path
+        port: Port to listen on (optional, a free port by default)
+        env: Extra environment variables for the server (optional)
+        factory: Treat ``app_path`` as a function returning the application
+        
+    Yields:
+        Tuple of (base URL, server process id)
+    """
+    port = port or free_port()
+    command = [sys.executable, "-m", "uvicorn", app_path, "--port", str(port), "--log-level", "warning"]
+    if factory:
+        command.append("--factory")
+    process = subprocess.Popen(command, env={**os.environ, **(env or {})})
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(f"{base_url}/health", timeout=1)
+                break
+            except httpx.TransportError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError(f"Server for {app_path} did not start")
+                time.sleep(0.2)
+        yield base_url, process.pid
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+async def http_load(
+    base_url: str,
+    paths: List[str],
+    concurrency: int,
+    requests: int,
+    headers: Optional[Dict[str, str]] = None
+) -> Dict[str, float]:
+    """
+    Issue ``requests`` GETs cycling through ``paths`` from ``concurrency`` clients.
+    
+    Returns:
+        Summary from ``summarize``
+    """
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60, headers=headers) as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(paths[i % len(paths)])
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - started)
+                except httpx.HTTPError:
+                    errors += 1
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    
+    return summarize(latencies, elapsed, errors)
+
+
+def write_results(results: dict, output: Optional[str]) -> None:
+    """Print results as JSON and optionally write them to a file."""
+    payload = json.dumps(results, indent=2)
+    print(payload)
+    if output:
+        with open(output, "w") as f:
+            f.write(payload + "\n")
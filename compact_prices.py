@@ -0,0 +1,48 @@
+"""
+Script to move ticker_prices to the compact storage layout.
+
+    python compact_prices.py migrate       # online copy, then swap in the compact view
+    python compact_prices.py sizes         # print table and index sizes
+    python compact_prices.py drop-legacy   # drop the pre-migration table once verified
+
+Run every process with COMPACT_PRICES=true after the migration.
+"""
+import argparse
+from app.database import Base, SessionLocal, engine
+from app.services.compact_service import CompactStorageService
+
+
+def print_sizes(service: CompactStorageService, label: str) -> None:
+    """Print the table and index sizes of the layout in use."""
+    sizes = service.storage_sizes()
+    print(
+        f"  {label}: table {sizes['table_bytes'] / 2 ** 20:.1f} MiB, "
+        f"indexes {sizes['index_bytes'] / 2 ** 20:.1f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the compact ticker_prices layout")
+    parser.add_argument("command", choices=["migrate", "sizes", "drop-legacy"])
+    parser.add_argument("--batch-size", type=int, default=50000, help="Rows copied per transaction")
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    
+    db = SessionLocal()
+    try:
+        service = CompactStorageService(db)
+        
+        if args.command == "migrate":
+            print_sizes(service, "before")
+            print("Copying ticker_prices into ticker_prices_compact...")
+            rows = service.migrate(args.batch_size, progress=lambda copied: print(f"  {copied} rows copied"))
+            print(f"ticker_prices is now a view over {rows} compact rows; ticker_prices_legacy is kept")
+            print_sizes(service, "after")
+        elif args.command == "sizes":
+            print_sizes(service, "compact" if service.is_compact() else "plain")
+        else:
+            dropped = service.drop_legacy()
+            print("Dropped ticker_prices_legacy" if dropped else "No ticker_prices_legacy table")
+    finally:
+        db.close()
@@ -0,0 +1,46 @@
+"""
+Script to enforce one price per ticker and timestamp on an existing database.
+Deletes duplicate prices (keeping the first one stored), creates the
+uq_ticker_timestamp unique index and drops the indexes it replaces.
+Candles are rebuilt if any duplicates were removed.
+"""
+from sqlalchemy import text
+from app.database import Base, SessionLocal, engine
+from app.services.candle_service import CandleService
+
+# Indexes created by earlier versions of TickerPrice; ix_ticker_prices_id
+# duplicated the primary key index
+REPLACED_INDEXES = [
+    "idx_ticker_timestamp",
+    "ix_ticker_prices_id",
+    "ix_ticker_prices_ticker",
+    "ix_ticker_prices_timestamp",
+]
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    
+    db = SessionLocal()
+    try:
+        print("Removing duplicate prices...")
+        db.execute(text("LOCK TABLE ticker_prices IN SHARE ROW EXCLUSIVE MODE"))
+        deleted = db.execute(text("""
+            DELETE FROM ticker_prices newer
+            USING ticker_prices older
+            WHERE newer.ticker = older.ticker
+              AND newer.timestamp = older.timestamp
+              AND newer.id > older.id
+        """)).rowcount
+        print(f"  {deleted} duplicates removed")
+        
+        db.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uq_ticker_timestamp ON ticker_prices (ticker, timestamp)"))
+        for index_name in REPLACED_INDEXES:
+            db.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+        db.commit()
+        
+        if deleted:
+            print("Rebuilding candles...")
+            CandleService(db).rebuild()
+        print("Unique (ticker, timestamp) index in place!")
+    finally:
+        db.close()
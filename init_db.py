@@ -2,10 +2,18 @@
 Script to initialize the database tables.
 Can be run manually if needed.
 """
-from app.database import Base, engine
+from app.config import settings
+from app.database import Base, SessionLocal, engine
+from app.services.compact_service import CompactStorageService
 
 if __name__ == "__main__":
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    if settings.compact_prices:
+        db = SessionLocal()
+        try:
+            CompactStorageService(db).migrate()
+        finally:
+            db.close()
     print("Database tables created successfully!")
 
@@ -0,0 +1,44 @@
+"""
+Script to manage monthly partitions of the ticker_prices table.
+
+    python manage_partitions.py convert     # one-off: partition an existing table online
+    python manage_partitions.py ensure      # create upcoming monthly partitions
+    python manage_partitions.py retention   # downsample and drop old partitions
+"""
+import argparse
+from app.database import Base, SessionLocal, engine
+from app.services.partition_service import PartitionService
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage ticker_prices partitions")
+    parser.add_argument("command", choices=["convert", "ensure", "retention"])
+    parser.add_argument("--months-ahead", type=int, help="Future months to create (default: PARTITION_MONTHS_AHEAD)")
+    parser.add_argument("--raw-days", type=int, help="Days of raw ticks to keep (default: PARTITION_RAW_RETENTION_DAYS)")
+    parser.add_argument("--drop-days", type=int, help="Drop partitions older than this (default: PARTITION_DROP_AFTER_DAYS)")
+    parser.add_argument("--batch-size", type=int, default=50000, help="Rows copied per transaction by convert")
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    
+    db = SessionLocal()
+    try:
+        service = PartitionService(db)
+        
+        if args.command == "convert":
+            print("Converting ticker_prices to a partitioned table...")
+            moved = service.convert(
+                args.months_ahead, args.batch_size, progress=lambda copied: print(f"  {copied} rows copied")
+            )
+            print(f"ticker_prices is now partitioned with {moved} rows")
+        elif args.command == "ensure":
+            created = service.ensure_partitions(args.months_ahead)
+            print(f"Created partitions: {', '.join(created) or 'none'}")
+        else:
+            result = service.apply_retention(args.raw_days, args.drop_days)
+            print(f"Downsampled partitions: {', '.join(result['downsampled']) or 'none'}")
+            print(f"Dropped partitions: {', '.join(result['dropped']) or 'none'}")
+        
+        for partition in service.list_partitions():
+            print(f"  {partition.name}: [{partition.lower}, {partition.upper})")
+    finally:
+        db.close()
@@ -0,0 +1,24 @@
+"""
+Script to rebuild OHLC candle rollups from existing price history.
+Run after enabling candles on a database that already has prices.
+"""
+import argparse
+from app.database import Base, SessionLocal, engine
+from app.services.candle_service import CandleService
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild OHLC candles from ticker_prices")
+    parser.add_argument("--ticker", help="Only rebuild this ticker (default: all tickers)")
+    args = parser.parse_args()
+    
+    Base.metadata.create_all(bind=engine)
+    
+    db = SessionLocal()
+    try:
+        print(f"Rebuilding candles for {args.ticker or 'all tickers'}...")
+        written = CandleService(db).rebuild(args.ticker)
+        for interval, count in written.items():
+            print(f"  {interval}: {count} candles")
+        print("Candles rebuilt successfully!")
+    finally:
+        db.close()
@@ -3,7 +3,7 @@ Pytest configuration and fixtures.
 """
 import pytest
 from unittest.mock import Mock
-from app.database import SessionLocal, Base, engine
+from app.database import SessionLocal, AsyncSessionLocal, Base, engine, async_engine
 
 
 @pytest.fixture(scope="function")
@@ -21,3 +21,17 @@ def db_session():
     session.close()
     Base.metadata.drop_all(bind=engine)
 
+
+@pytest.fixture(scope="function")
+async def async_db_session():
+    """Create a test async database session."""
+    Base.metadata.create_all(bind=engine)
+    
+    session = AsyncSessionLocal()
+    
+    yield session
+    
+    # Cleanup; pooled asyncpg connections are bound to this test's event loop
+    await session.close()
+    await async_engine.dispose()
+    Base.metadata.drop_all(bind=engine)
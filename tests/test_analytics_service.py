@@ -0,0 +1,169 @@
+"""
+Unit tests for the price statistics service.
+"""
+import math
+import time
+import numpy as np
+import pytest
+from datetime import datetime, timezone
+from app.models import TickerPrice
+from app.services.analytics_service import AsyncAnalyticsService, lttb_indices, price_stats
+
+
+class TestPriceStats:
+    """Test cases for price_stats."""
+    
+    def test_statistics(self):
+        """Test each statistic against a hand-checked series."""
+        timestamps = np.array([0, 60, 120, 300, 360], dtype=np.int64)
+        prices = np.array([100.0, 110.0, 99.0, 88.0, 121.0])
+        
+        stats = price_stats(timestamps, prices, window=2)
+        
+        assert stats["count"] == 5
+        assert stats["min"] == 88.0
+        assert stats["max"] == 121.0
+        assert stats["mean"] == pytest.approx(103.6)
+        # 100 and 110 held 60s each, 99 held 180s, 88 held 60s
+        assert stats["twap"] == pytest.approx((100 * 60 + 110 * 60 + 99 * 180 + 88 * 60) / 360)
+        assert stats["simple_return"] == pytest.approx(0.21)
+        assert stats["log_return"] == pytest.approx(math.log(1.21))
+        assert stats["mean_simple_return"] == pytest.approx((0.1 - 0.1 - 1 / 9 + 0.375) / 4)
+        
+        log_returns = np.diff(np.log(prices))
+        assert stats["volatility"] == pytest.approx(math.sqrt((log_returns ** 2).sum()))
+        rolling = [math.sqrt(log_returns[i] ** 2 + log_returns[i + 1] ** 2) for i in range(3)]
+        assert stats["rolling_volatility"]["last"] == pytest.approx(rolling[-1])
+        assert stats["rolling_volatility"]["max"] == pytest.approx(max(rolling))
+        
+        # 110 -> 88 is the largest fall from a peak
+        assert stats["max_drawdown"] == pytest.approx(0.2)
+        assert stats["drawdown_peak_timestamp"] == 60
+        assert stats["drawdown_trough_timestamp"] == 300
+    
+    def test_short_series(self):
+        """Test statistics that need more samples are None."""
+        empty = price_stats(np.array([], dtype=np.int64), np.array([]), window=10)
+        single = price_stats(np.array([60]), np.array([100.0]), window=10)
+        rising = price_stats(np.arange(5) * 60, np.arange(1.0, 6.0), window=10)
+        
+        assert empty["count"] == 0 and empty["mean"] is None
+        assert single["twap"] == 100.0
+        assert single["log_return"] is None
+        assert rising["volatility"] is not None
+        assert rising["rolling_volatility"] is None
+        assert rising["max_drawdown"] == 0.0
+        assert rising["drawdown_peak_timestamp"] is None
+    
+    def test_million_points(self):
+        """Test a million-point series is summarized well under a second."""
+        rng = np.random.default_rng(1)
+        timestamps = np.arange(1_000_000, dtype=np.int64) * 60
+        prices = 40000.0 * np.exp(np.cumsum(rng.normal(0, 0.001, 1_000_000)))
+        
+        started = time.perf_counter()
+        stats = price_stats(timestamps, prices, window=1440)
+        
+        assert time.perf_counter() - started < 0.5
+        assert stats["count"] == 1_000_000
+
+
+class TestLttbIndices:
+    """Test cases for lttb_indices."""
+    
+    def test_keeps_spikes(self):
+        """Test the endpoints and the spike of each bucket are kept."""
+        timestamps = np.arange(11) * 60
+        prices = np.array([10.0, 10, 10, 50, 10, 10, 10, -30, 10, 10, 10])
+        
+        selected = lttb_indices(timestamps, prices, max_points=4)
+        
+        # Middle points 1-9 form buckets [1, 5) and [5, 10)
+        assert selected.tolist() == [0, 3, 7, 10]
+    
+    def test_short_series(self):
+        """Test series no longer than max_points are returned whole."""
+        assert lttb_indices(np.arange(3), np.ones(3), max_points=5).tolist() == [0, 1, 2]
+        assert lttb_indices(np.arange(0), np.ones(0), max_points=5).tolist() == []
+    
+    def test_point_count(self):
+        """Test exactly max_points ascending points are kept from a long series."""
+        rng = np.random.default_rng(1)
+        prices = np.cumsum(rng.normal(0, 1, 100000))
+        
+        selected = lttb_indices(np.arange(100000) * 60, prices, max_points=1500)
+        
+        assert len(selected) == 1500
+        assert (np.diff(selected) > 0).all()
+
+
+class TestAsyncAnalyticsService:
+    """Test cases for AsyncAnalyticsService against the test database."""
+    
+    async def test_get_stats(self, async_db_session):
+        """Test arrays load oldest first within the date range."""
+        async_db_session.add_all(
+            TickerPrice(ticker="BTC_USD", price=45000 + i, timestamp=1699123200 + i * 60)
+            for i in range(10)
+        )
+        async_db_session.add(TickerPrice(ticker="ETH_USD", price=2500, timestamp=1699123200))
+        await async_db_session.commit()
+        service = AsyncAnalyticsService(async_db_session)
+        
+        start = datetime.fromtimestamp(1699123200 + 120, tz=timezone.utc)
+        timestamps, prices = await service.get_price_arrays("BTC_USD", start_date=start)
+        stats = await service.get_stats("BTC_USD", window=3)
+        
+        assert timestamps.tolist() == [1699123200 + i * 60 for i in range(2, 10)]
+        assert prices.dtype == np.float64 and prices[0] == 45002.0
+        assert stats["count"] == 10
+        assert stats["last"] == 45009.0
+        assert stats["rolling_volatility"] is not None
+        
+        timestamps, prices = await service.get_price_arrays("XRP_USD")
+        assert len(timestamps) == 0 and len(prices) == 0
+    
+    async def test_downsampled_rows(self, async_db_session):
+        """Test both methods return real rows, newest first, within max_points."""
+        async_db_session.add_all(
+            TickerPrice(ticker="BTC_USD", price=45000 + (i % 10) * 10, timestamp=1699123200 + i * 60)
+            for i in range(100)
+        )
+        await async_db_session.commit()
+        service = AsyncAnalyticsService(async_db_session)
+        
+        lttb = await service.get_lttb_rows("BTC_USD", max_points=10)
+        minmax = await service.get_minmax_rows("BTC_USD", max_points=10)
+        everything = await service.get_minmax_rows("BTC_USD", max_points=1000)
+        
+        assert len(lttb) == 10
+        assert lttb[0][2] == 1699123200 + 99 * 60 and lttb[-1][2] == 1699123200
+        # Five buckets of 20 prices, each holding 45000 and 45090 twice
+        assert len(minmax) == 10
+        assert sorted(price for _, price, _ in minmax) == [45000.0] * 5 + [45090.0] * 5
+        assert [timestamp for _, _, timestamp in minmax] == sorted((t for _, _, t in minmax), reverse=True)
+        assert len(everything) == 100
+        assert await service.get_lttb_rows("XRP_USD", max_points=10) == []
+    
+    async def test_lttb_keeps_spikes_from_preselection(self, async_db_session):
+        """Test the database preselection keeps the spikes and endpoints LTTB needs."""
+        prices = [100.0 + (i % 7) * 0.01 for i in range(5000)]
+        prices[1234] = 150.0
+        prices[3777] = 50.0
+        async_db_session.add_all(
+            TickerPrice(ticker="BTC_USD", price=price, timestamp=1699123200 + i * 60)
+            for i, price in enumerate(prices)
+        )
+        await async_db_session.commit()
+        service = AsyncAnalyticsService(async_db_session)
+        
+        rows = await service.get_lttb_rows("BTC_USD", max_points=50)
+        timestamps = np.arange(5000) * 60 + 1699123200
+        expected = lttb_indices(timestamps, np.array(prices), max_points=50)
+        
+        assert len(rows) == 50
+        assert rows[0][2] == timestamps[-1] and rows[-1][2] == timestamps[0]
+        assert {150.0, 50.0} <= {price for _, price, _ in rows}
+        # Same extremes as LTTB over every row
+        assert max(price for _, price, _ in rows) == max(np.array(prices)[expected])
+        assert min(price for _, price, _ in rows) == min(np.array(prices)[expected])
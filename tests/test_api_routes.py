@@ -1,11 +1,21 @@
 """
 Unit tests for API routes.
 """
+import json
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch
+from starlette.websockets import WebSocketDisconnect
+from unittest.mock import AsyncMock, Mock, patch
+from app.config import settings
 from app.main import app
-from app.models import TickerPrice
+from app.models import PriceCandle, TickerPrice
+from app.api.pagination import decode_cursor, encode_cursor
+from app.api.routes import get_price_cache, get_range_cache
+from app.services.gap_service import PriceGap
+from app.services.price_cache import LatestPriceCache
 
 
 class TestAPIRoutes:
@@ -26,11 +36,18 @@ class TestAPIRoutes:
             timestamp=1699123456
         )
     
+    @staticmethod
+    async def _aiter(items):
+        """Wrap a list in an async iterator, like a streamed result."""
+        for item in items:
+            yield item
+    
     def test_get_all_prices_success(self, client, mock_ticker_price):
         """Test successful retrieval of all prices."""
-        with patch("app.api.routes.PriceService") as mock_service_class:
-            mock_service = Mock()
-            mock_service.get_all_prices.return_value = [mock_ticker_price]
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.get_price_version.return_value = (1, 1699123456)
+            mock_service.get_price_rows.return_value = ([(1, 45000.50, 1699123456)], None)
             mock_service_class.return_value = mock_service
             
             response = client.get("/api/v1/prices?ticker=BTC_USD")
@@ -39,7 +56,31 @@ class TestAPIRoutes:
             data = response.json()
             assert data["ticker"] == "BTC_USD"
             assert data["count"] == 1
-            assert len(data["prices"]) == 1
+            assert data["prices"] == [
+                {"id": 1, "ticker": "BTC_USD", "price": 45000.50, "timestamp": 1699123456}
+            ]
+            mock_service.get_price_rows.assert_called_once_with("BTC_USD", None, None, None, None)
+    
+    def test_get_all_prices_columnar(self, client):
+        """Test the columnar format returns parallel timestamp and price arrays."""
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.get_price_version.return_value = (1, 1699123456)
+            mock_service.get_price_rows.return_value = (
+                [(2, 45100.0, 1699123460), (1, 45000.5, 1699123456)], None
+            )
+            mock_service_class.return_value = mock_service
+            
+            response = client.get("/api/v1/prices?ticker=BTC_USD&format=columnar")
+            
+            assert response.status_code == 200
+            assert response.json() == {
+                "ticker": "BTC_USD",
+                "count": 2,
+                "timestamps": [1699123460, 1699123456],
+                "prices": [45100.0, 45000.5],
+                "next_cursor": None,
+            }
     
     def test_get_all_prices_missing_ticker(self, client):
         """Test error when ticker parameter is missing."""
@@ -49,8 +90,8 @@ class TestAPIRoutes:
     
     def test_get_latest_price_success(self, client, mock_ticker_price):
         """Test successful retrieval of latest price."""
-        with patch("app.api.routes.PriceService") as mock_service_class:
-            mock_service = Mock()
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
             mock_service.get_latest_price.return_value = mock_ticker_price
             mock_service_class.return_value = mock_service
             
@@ -64,8 +105,8 @@ class TestAPIRoutes:
     
     def test_get_latest_price_not_found(self, client):
         """Test retrieval of latest price when no data exists."""
-        with patch("app.api.routes.PriceService") as mock_service_class:
-            mock_service = Mock()
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
             mock_service.get_latest_price.return_value = None
             mock_service_class.return_value = mock_service
             
@@ -77,11 +118,64 @@ class TestAPIRoutes:
             assert data["price"] is None
             assert data["timestamp"] is None
     
+    def test_get_latest_price_from_cache(self, client):
+        """Test a cached latest price is served without querying the database."""
+        cache = Mock()
+        cache.get_or_load = AsyncMock(return_value=(45100.0, 1699123460))
+        app.dependency_overrides[get_price_cache] = lambda: cache
+        try:
+            with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+                response = client.get("/api/v1/prices/latest?ticker=BTC_USD")
+                
+                assert response.status_code == 200
+                assert response.json() == {"ticker": "BTC_USD", "price": 45100.0, "timestamp": 1699123460}
+                mock_service_class.assert_not_called()
+        finally:
+            app.dependency_overrides.clear()
+    
+    def test_get_latest_prices_batch(self, client):
+        """Test the latest prices of many tickers are returned as a map."""
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.get_latest_prices.return_value = {
+                "BTC_USD": (45000.5, 1699123456), "ETH_USD": (2500.0, 1699123450)
+            }
+            mock_service_class.return_value = mock_service
+            
+            response = client.get("/api/v1/prices/latest/batch?tickers=BTC_USD,ETH_USD,XRP_USD")
+            
+            assert response.status_code == 200
+            assert response.json() == {
+                "count": 2,
+                "prices": {
+                    "BTC_USD": {"price": 45000.5, "timestamp": 1699123456},
+                    "ETH_USD": {"price": 2500.0, "timestamp": 1699123450},
+                    "XRP_USD": None,
+                },
+            }
+            mock_service.get_latest_prices.assert_awaited_once_with(["BTC_USD", "ETH_USD", "XRP_USD"])
+            
+            etag = response.headers["ETag"]
+            response = client.get(
+                "/api/v1/prices/latest/batch?tickers=BTC_USD,ETH_USD,XRP_USD",
+                headers={"If-None-Match": etag}
+            )
+            assert response.status_code == 304
+    
+    def test_get_latest_prices_batch_too_many_tickers(self, client, monkeypatch):
+        """Test error when more tickers are requested than allowed."""
+        monkeypatch.setattr("app.api.routes.settings.max_latest_tickers", 2)
+        
+        response = client.get("/api/v1/prices/latest/batch?tickers=BTC_USD,ETH_USD,XRP_USD")
+        
+        assert response.status_code == 400
+    
     def test_get_price_by_date_success(self, client, mock_ticker_price):
         """Test successful retrieval of prices filtered by date."""
-        with patch("app.api.routes.PriceService") as mock_service_class:
-            mock_service = Mock()
-            mock_service.get_price_by_date.return_value = [mock_ticker_price]
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.get_price_version.return_value = (1, 1699123456)
+            mock_service.get_price_rows.return_value = ([(1, 45000.50, 1699123456)], None)
             mock_service_class.return_value = mock_service
             
             response = client.get(
@@ -93,10 +187,32 @@ class TestAPIRoutes:
             assert data["ticker"] == "BTC_USD"
             assert data["count"] == 1
     
+    def test_get_price_by_date_uses_range_cache(self, client):
+        """Test unpaginated ranges are served by the range cache, checked against the ETag count."""
+        cache = Mock(get_price_rows=AsyncMock(return_value=[(1, 45000.50, 1699123456)]))
+        app.dependency_overrides[get_range_cache] = lambda: cache
+        try:
+            with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+                mock_service = AsyncMock()
+                mock_service.get_price_version.return_value = (1, 1699123456)
+                mock_service.get_price_rows.return_value = ([(1, 45000.50, 1699123456)], None)
+                mock_service_class.return_value = mock_service
+                
+                response = client.get("/api/v1/prices/filter?ticker=BTC_USD&start_date=2023-11-01")
+                paged = client.get("/api/v1/prices/filter?ticker=BTC_USD&start_date=2023-11-01&limit=10")
+            
+            assert response.json()["count"] == 1
+            assert paged.status_code == 200
+            cache.get_price_rows.assert_awaited_once()
+            assert cache.get_price_rows.call_args.args[-1] == 1
+            mock_service.get_price_rows.assert_awaited_once()
+        finally:
+            app.dependency_overrides.clear()
+    
     def test_get_price_by_date_invalid_format(self, client):
         """Test error when date format is invalid."""
-        with patch("app.api.routes.PriceService") as mock_service_class:
-            mock_service = Mock()
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
             mock_service_class.return_value = mock_service
             
             response = client.get(
@@ -104,4 +220,374 @@ class TestAPIRoutes:
             )
             
             assert response.status_code == 400
-
+    
+    
+    def test_get_all_prices_paginated(self, client, mock_ticker_price):
+        """Test keyset pagination returns a cursor for the next page."""
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.get_price_version.return_value = (1, 1699123456)
+            mock_service.get_price_rows.return_value = ([(1, 45000.50, 1699123456)], (1699123456, 1))
+            mock_service_class.return_value = mock_service
+            
+            response = client.get("/api/v1/prices?ticker=BTC_USD&limit=1")
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert data["count"] == 1
+            assert decode_cursor(data["next_cursor"]) == (1699123456, 1)
+            mock_service.get_price_rows.assert_called_once_with("BTC_USD", None, None, 1, None)
+    
+    def test_get_price_by_date_with_cursor(self, client, mock_ticker_price):
+        """Test that a cursor is decoded and passed to the service."""
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.get_price_version.return_value = (1, 1699123456)
+            mock_service.get_price_rows.return_value = ([(1, 45000.50, 1699123456)], None)
+            mock_service_class.return_value = mock_service
+            
+            cursor = encode_cursor(1699123456, 7)
+            response = client.get(f"/api/v1/prices/filter?ticker=BTC_USD&limit=10&cursor={cursor}")
+            
+            assert response.status_code == 200
+            assert response.json()["next_cursor"] is None
+            args = mock_service.get_price_rows.call_args[0]
+            assert args[3:] == (10, (1699123456, 7))
+    
+    def test_get_all_prices_invalid_cursor(self, client):
+        """Test error when cursor is malformed."""
+        with patch("app.api.routes.AsyncPriceService"):
+            response = client.get("/api/v1/prices?ticker=BTC_USD&limit=10&cursor=not-a-cursor")
+            
+            assert response.status_code == 400
+    
+    def test_get_all_prices_ndjson_stream(self, client, mock_ticker_price):
+        """Test streaming all prices as NDJSON."""
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.get_price_version.return_value = (2, 1699123456)
+            mock_service.iter_prices = Mock(return_value=self._aiter([mock_ticker_price, mock_ticker_price]))
+            mock_service_class.return_value = mock_service
+            
+            response = client.get("/api/v1/prices?ticker=BTC_USD&format=ndjson")
+            
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/x-ndjson"
+            lines = response.text.strip().split("\n")
+            assert len(lines) == 2
+            assert json.loads(lines[0])["price"] == 45000.50
+    
+    def test_get_price_by_date_cache_headers(self, client):
+        """Test list responses carry validators and revalidating Cache-Control."""
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.get_price_version.return_value = (1, 1699123456)
+            mock_service.get_price_rows.return_value = ([(1, 45000.50, 1699123456)], None)
+            mock_service_class.return_value = mock_service
+            
+            started = int(time.time())
+            response = client.get("/api/v1/prices/filter?ticker=BTC_USD&start_date=2023-11-01")
+            
+            assert response.status_code == 200
+            assert response.headers["etag"].startswith('"')
+            # First time this version was seen, not the latest price timestamp
+            assert parsedate_to_datetime(response.headers["last-modified"]).timestamp() >= started
+            # Latest row is long past its next ingest, so clients must revalidate
+            assert response.headers["cache-control"] == "public, max-age=0"
+    
+    def test_get_price_by_date_past_range_cacheable(self, client):
+        """Test a range that ended in the past is cached for HISTORY_MAX_AGE, not forever."""
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.get_price_version.return_value = (1, 1699123456)
+            mock_service.get_price_rows.return_value = ([(1, 45000.50, 1699123456)], None)
+            mock_service_class.return_value = mock_service
+            
+            response = client.get(
+                "/api/v1/prices/filter?ticker=BTC_USD&start_date=2023-11-01&end_date=2023-11-30"
+            )
+            
+            assert response.headers["cache-control"] == f"public, max-age={settings.history_max_age}"
+    
+    def test_get_price_by_date_recent_past_range_waits_for_repair(self, client):
+        """Test a past range gap repair can still fill is cached until the next repair run."""
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.get_price_version.return_value = (1, 1699123456)
+            mock_service.get_price_rows.return_value = ([(1, 45000.50, 1699123456)], None)
+            mock_service_class.return_value = mock_service
+            
+            end = datetime.fromtimestamp(time.time() - 3 * settings.ingest_interval, tz=timezone.utc)
+            response = client.get(
+                f"/api/v1/prices/filter?ticker=BTC_USD&end_date={end:%Y-%m-%dT%H:%M:%S}"
+            )
+            
+            max_age = min(settings.history_max_age, settings.gap_scan_interval)
+            assert response.headers["cache-control"] == f"public, max-age={max_age}"
+    
+    def test_get_prices_page_runs_one_query(self, client):
+        """Test pages, cursor pages and streams skip the range version query."""
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.get_price_rows.return_value = ([(2, 45000.50, 1699123516)], (1699123516, 2))
+            mock_service.iter_prices = Mock(return_value=self._aiter([]))
+            mock_service_class.return_value = mock_service
+            
+            cursor = encode_cursor(1699123576, 3)
+            for url in (
+                "/api/v1/prices?ticker=BTC_USD&limit=1",
+                f"/api/v1/prices?ticker=BTC_USD&limit=1&cursor={cursor}",
+                f"/api/v1/prices/filter?ticker=BTC_USD&cursor={cursor}",
+                "/api/v1/prices?ticker=BTC_USD&format=ndjson",
+            ):
+                mock_service.reset_mock()
+                response = client.get(url)
+                
+                assert response.status_code == 200
+                assert [name for name, _, _ in mock_service.mock_calls] in (["get_price_rows"], ["iter_prices"])
+    
+    def test_get_prices_page_not_modified(self, client):
+        """Test a page's ETag follows its rows and a match returns 304."""
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.get_price_rows.return_value = ([(2, 45000.50, 1699123516)], (1699123516, 2))
+            mock_service_class.return_value = mock_service
+            
+            cursor = encode_cursor(1699123576, 3)
+            url = f"/api/v1/prices?ticker=BTC_USD&limit=1&cursor={cursor}"
+            etag = client.get(url).headers["etag"]
+            response = client.get(url, headers={"If-None-Match": etag})
+            
+            assert response.status_code == 304
+            
+            # A backfilled row changes the page
+            mock_service.get_price_rows.return_value = ([(9, 45010.0, 1699123546)], (1699123546, 9))
+            response = client.get(url, headers={"If-None-Match": etag})
+            
+            assert response.status_code == 200
+            assert response.headers["etag"] != etag
+            mock_service.get_price_version.assert_not_called()
+    
+    def test_get_all_prices_not_modified(self, client):
+        """Test a matching If-None-Match returns 304 without reading rows."""
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.get_price_version.return_value = (1, 1699123456)
+            mock_service.get_price_rows.return_value = ([(1, 45000.50, 1699123456)], None)
+            mock_service_class.return_value = mock_service
+            
+            etag = client.get("/api/v1/prices?ticker=BTC_USD").headers["etag"]
+            mock_service.get_price_rows.reset_mock()
+            
+            response = client.get("/api/v1/prices?ticker=BTC_USD", headers={"If-None-Match": etag})
+            
+            assert response.status_code == 304
+            assert response.headers["etag"] == etag
+            assert response.content == b""
+            mock_service.get_price_rows.assert_not_called()
+            
+            # A new row changes the version and the ETag
+            mock_service.get_price_version.return_value = (2, 1699123516)
+            response = client.get("/api/v1/prices?ticker=BTC_USD", headers={"If-None-Match": etag})
+            
+            assert response.status_code == 200
+            assert response.headers["etag"] != etag
+    
+    def test_get_all_prices_etag_depends_on_format(self, client):
+        """Test different representations of the same data get different ETags."""
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.get_price_version.return_value = (1, 1699123456)
+            mock_service.get_price_rows.return_value = ([(1, 45000.50, 1699123456)], None)
+            mock_service_class.return_value = mock_service
+            
+            json_etag = client.get("/api/v1/prices?ticker=BTC_USD").headers["etag"]
+            columnar_etag = client.get("/api/v1/prices?ticker=BTC_USD&format=columnar").headers["etag"]
+            
+            assert json_etag != columnar_etag
+    
+    def test_get_latest_price_if_modified_since(self, client):
+        """Test If-Modified-Since returns 304 until the price changes."""
+        cache = Mock()
+        cache.get_or_load = AsyncMock(return_value=(45100.0, 1699123460))
+        app.dependency_overrides[get_price_cache] = lambda: cache
+        try:
+            modified = client.get("/api/v1/prices/latest?ticker=BTC_USD").headers["last-modified"]
+            response = client.get(
+                "/api/v1/prices/latest?ticker=BTC_USD",
+                headers={"If-Modified-Since": modified}
+            )
+            assert response.status_code == 304
+            
+            time.sleep(1)
+            cache.get_or_load.return_value = (45200.0, 1699123520)
+            response = client.get(
+                "/api/v1/prices/latest?ticker=BTC_USD",
+                headers={"If-Modified-Since": modified}
+            )
+            assert response.status_code == 200
+            assert parsedate_to_datetime(response.headers["last-modified"]) > parsedate_to_datetime(modified)
+        finally:
+            app.dependency_overrides.clear()
+    
+    def test_stream_prices_requires_cache(self, client):
+        """Test the SSE stream is unavailable without the latest-price cache."""
+        app.dependency_overrides[get_price_cache] = lambda: None
+        try:
+            response = client.get("/api/v1/prices/stream?tickers=BTC_USD")
+            
+            assert response.status_code == 503
+        finally:
+            app.dependency_overrides.clear()
+    
+    def test_stream_prices_websocket(self, client):
+        """Test the WebSocket stream sends the cached price and unsubscribes on close."""
+        cache = LatestPriceCache(client=Mock())
+        cache._reset(connected=True)
+        cache.update("BTC_USD", 45100.0, 1699123460)
+        app.dependency_overrides[get_price_cache] = lambda: cache
+        try:
+            with client.websocket_connect("/api/v1/prices/stream?tickers=BTC_USD,ETH_USD") as websocket:
+                assert websocket.receive_json() == {"ticker": "BTC_USD", "price": 45100.0, "timestamp": 1699123460}
+                assert set(cache._subscriptions) == {"BTC_USD", "ETH_USD"}
+            
+            # The server notices the disconnect asynchronously
+            for _ in range(50):
+                if not cache._subscriptions:
+                    break
+                time.sleep(0.01)
+            assert cache._subscriptions == {}
+        finally:
+            app.dependency_overrides.clear()
+    
+    def test_stream_prices_websocket_empty_tickers(self, client):
+        """Test a WebSocket without tickers is closed with a policy violation."""
+        app.dependency_overrides[get_price_cache] = lambda: LatestPriceCache(client=Mock())
+        try:
+            with pytest.raises(WebSocketDisconnect) as exc_info:
+                with client.websocket_connect("/api/v1/prices/stream?tickers=,"):
+                    pass
+            assert exc_info.value.code == 1008
+        finally:
+            app.dependency_overrides.clear()
+    
+    def test_get_candles_success(self, client):
+        """Test successful retrieval of candles."""
+        candle = PriceCandle(
+            ticker="BTC_USD", interval="1d", bucket=1699056000,
+            open=45000.0, high=46000.0, low=44000.0, close=45500.0,
+            open_timestamp=1699056000, close_timestamp=1699142340, count=1440
+        )
+        with patch("app.api.routes.AsyncCandleService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.get_candles.return_value = [candle]
+            mock_service_class.return_value = mock_service
+            
+            response = client.get("/api/v1/prices/candles?ticker=BTC_USD&interval=1d&start_date=2023-11-01")
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert data["interval"] == "1d"
+            assert data["count"] == 1
+            assert data["candles"][0]["high"] == 46000.0
+            assert mock_service.get_candles.call_args[0][1] == "1d"
+    
+    def test_get_price_by_date_downsampled(self, client):
+        """Test max_points returns the downsampled rows chosen by the method."""
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class, \
+                patch("app.api.routes.AsyncAnalyticsService") as mock_analytics_class:
+            mock_service = AsyncMock()
+            mock_service.get_price_version.return_value = (100000, 1699123576)
+            mock_service_class.return_value = mock_service
+            mock_analytics = AsyncMock()
+            mock_analytics.get_minmax_rows.return_value = [(9, 45100.0, 1699123576), (2, 44900.0, 1699123216)]
+            mock_analytics_class.return_value = mock_analytics
+            
+            response = client.get(
+                "/api/v1/prices/filter?ticker=BTC_USD&start_date=2023-11-01&max_points=500&method=minmax&format=columnar"
+            )
+            
+            assert response.status_code == 200
+            assert response.json() == {
+                "ticker": "BTC_USD",
+                "count": 2,
+                "timestamps": [1699123576, 1699123216],
+                "prices": [45100.0, 44900.0],
+                "next_cursor": None,
+            }
+            assert mock_analytics.get_minmax_rows.call_args[0][3] == 500
+            mock_analytics.get_lttb_rows.assert_not_called()
+            mock_service.get_price_rows.assert_not_called()
+    
+    def test_get_all_prices_downsampled_with_limit(self, client):
+        """Test error when max_points is combined with pagination."""
+        with patch("app.api.routes.AsyncPriceService"):
+            response = client.get("/api/v1/prices?ticker=BTC_USD&max_points=500&limit=100")
+            
+            assert response.status_code == 400
+    
+    def test_get_price_gaps(self, client):
+        """Test gaps are listed with the missing slots of every requested ticker."""
+        with patch("app.api.routes.AsyncGapService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.find_gaps.return_value = [PriceGap("BTC_USD", 1699000020, 1699000199, 3)]
+            mock_service_class.return_value = mock_service
+            
+            response = client.get(
+                "/api/v1/prices/gaps?tickers=BTC_USD,ETH_USD&start_date=2023-11-03T08:00:00&end_date=2023-11-03T09:00:00"
+            )
+            
+            assert response.status_code == 200
+            assert response.json() == {
+                "start": 1698998400,
+                "end": 1699002000,
+                "count": 1,
+                "missing": {"BTC_USD": 3, "ETH_USD": 0},
+                "gaps": [{"ticker": "BTC_USD", "start": 1699000020, "end": 1699000199, "missing": 3}],
+            }
+            mock_service.find_gaps.assert_awaited_once_with(["BTC_USD", "ETH_USD"], 1698998400, 1699002000)
+    
+    def test_get_price_gaps_default_range(self, client, monkeypatch):
+        """Test the scan defaults to the configured lookback ending now."""
+        monkeypatch.setattr("app.api.routes.settings.tickers", ["BTC_USD"])
+        with patch("app.api.routes.AsyncGapService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.find_gaps.return_value = []
+            mock_service_class.return_value = mock_service
+            
+            response = client.get("/api/v1/prices/gaps")
+            
+            body = response.json()
+            assert response.status_code == 200
+            assert body["end"] - body["start"] == 86400
+            assert body["missing"] == {"BTC_USD": 0}
+    
+    def test_get_price_stats_success(self, client):
+        """Test statistics are returned with validators for the range."""
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class, \
+                patch("app.api.routes.AsyncAnalyticsService") as mock_analytics_class:
+            mock_service = AsyncMock()
+            mock_service.get_price_version.return_value = (3, 1699123576)
+            mock_service_class.return_value = mock_service
+            mock_analytics = AsyncMock()
+            mock_analytics.get_stats.return_value = {"count": 3, "window": 2, "twap": 45000.5}
+            mock_analytics_class.return_value = mock_analytics
+            
+            response = client.get("/api/v1/prices/stats?ticker=BTC_USD&start_date=2023-11-01&window=2")
+            
+            assert response.status_code == 200
+            assert response.json() == {"ticker": "BTC_USD", "count": 3, "window": 2, "twap": 45000.5}
+            assert "ETag" in response.headers
+            assert mock_analytics.get_stats.call_args[0][3] == 2
+    
+    def test_get_price_stats_invalid_window(self, client):
+        """Test error when the rolling window is too small."""
+        response = client.get("/api/v1/prices/stats?ticker=BTC_USD&window=1")
+        
+        assert response.status_code == 422
+    
+    def test_get_candles_invalid_interval(self, client):
+        """Test error when interval is not supported."""
+        response = client.get("/api/v1/prices/candles?ticker=BTC_USD&interval=7m")
+        
+        assert response.status_code == 422
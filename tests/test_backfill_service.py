@@ -0,0 +1,237 @@
+"""
+Unit tests for the history backfill service.
+"""
+import asyncio
+import time
+import pytest
+from sqlalchemy import func, select
+from app.clients.circuit_breaker import reset_circuit_breakers
+from app.clients.deribit_client import DeribitClient
+from app.clients.deribit_stub import DeribitStubServer
+from app.clients.rate_limit import AsyncRateLimiter
+from app.models import BackfillChunk, PriceCandle, TickerPrice
+from app.services.backfill_service import (
+    BackfillService,
+    backfill_instrument,
+    chunk_ranges,
+    one_per_slot,
+    repair_resolution,
+)
+from app.services.gap_service import GapService, PriceGap
+
+# 2023-12-29T00:00:00Z (a multiple of 100 minutes), and ten 100-minute chunks after it
+START = 1703808000
+END = START + 1000 * 60 - 1
+
+
+class TestChunking:
+    """Test cases for chunk and instrument helpers."""
+    
+    def test_chunk_ranges_aligned(self):
+        """Test chunks cover the range exactly, aligned to the chunk grid."""
+        chunks = chunk_ranges(START + 30, START + 250, 100)
+        
+        assert chunks == [
+            (START + 30, START + 99, False),
+            (START + 100, START + 199, True),
+            (START + 200, START + 250, False),
+        ]
+    
+    def test_repair_resolution(self):
+        """Test the coarsest chart resolution that still has a point in every slot is used."""
+        assert repair_resolution(15) is None
+        assert repair_resolution(60) == "1"
+        assert repair_resolution(90) == "1"
+        assert repair_resolution(300) == "5"
+        assert repair_resolution(3600) == "60"
+    
+    def test_one_per_slot(self):
+        """Test only the first chart point of each slot is kept."""
+        rows = [(START, 1.0), (START + 60, 2.0), (START + 120, 3.0), (START + 180, 4.0)]
+        
+        assert one_per_slot(rows, 90) == [(START, 1.0), (START + 120, 3.0), (START + 180, 4.0)]
+    
+    def test_backfill_instrument(self, monkeypatch):
+        """Test tickers map to perpetuals unless configured explicitly."""
+        monkeypatch.setattr("app.services.backfill_service.settings.backfill_instruments", {"ETH_USD": "ETH-INDEX"})
+        
+        assert backfill_instrument("BTC_USD") == "BTC-PERPETUAL"
+        assert backfill_instrument("SOL_USDC") == "SOL_USDC-PERPETUAL"
+        assert backfill_instrument("ETH_USD") == "ETH-INDEX"
+
+
+class TestRateLimiter:
+    """Test cases for AsyncRateLimiter."""
+    
+    async def test_limits_concurrent_callers(self):
+        """Test concurrent acquires are spread out to the configured rate."""
+        limiter = AsyncRateLimiter(rate=50, burst=5)
+        started = time.monotonic()
+        
+        await asyncio.gather(*(limiter.acquire() for _ in range(15)))
+        
+        # 5 from the burst, then 10 at 50/s
+        assert time.monotonic() - started >= 0.18
+
+
+class TestBackfillService:
+    """Test cases for BackfillService against the stub server and test database."""
+    
+    @pytest.fixture
+    def settings(self, monkeypatch):
+        """Use 100-minute chunks."""
+        monkeypatch.setattr("app.services.backfill_service.settings.backfill_chunk_size", 100)
+    
+    @staticmethod
+    def _count(db, model, **filters):
+        return db.scalar(select(func.count()).select_from(model).filter_by(**filters))
+    
+    async def test_backfill_inserts_and_skips_existing(self, db_session, settings):
+        """Test every minute is stored once, keeping prices that already exist."""
+        db_session.add(TickerPrice(ticker="BTC_USD", price=1, timestamp=START + 60))
+        db_session.commit()
+        
+        async with DeribitStubServer() as server:
+            service = BackfillService(db_session, DeribitClient(base_url=server.api_url))
+            summary = await service.backfill(["BTC_USD", "ETH_USD"], START, END, concurrency=4)
+            await service.close()
+        
+        assert summary["BTC_USD"] == {"chunks": 10, "skipped": 0, "failed": 0, "fetched": 1000, "inserted": 999}
+        assert summary["ETH_USD"]["inserted"] == 1000
+        assert self._count(db_session, TickerPrice, ticker="BTC_USD") == 1000
+        assert db_session.scalar(
+            select(TickerPrice.price).where(TickerPrice.ticker == "BTC_USD", TickerPrice.timestamp == START + 60)
+        ) == 1
+        
+        day = db_session.get(PriceCandle, ("ETH_USD", "1d", START))
+        assert day.count == 1000
+        assert float(day.close) == DeribitStubServer.history_price("ETH-PERPETUAL", END - 59)
+    
+    async def test_backfill_skips_slots_with_live_ticks(self, db_session, settings):
+        """Test a live tick off the minute mark keeps its slot, so candles count one price per minute."""
+        db_session.add_all([
+            TickerPrice(ticker="BTC_USD", price=1, timestamp=START + 60 + 17),
+            TickerPrice(ticker="BTC_USD", price=2, timestamp=START + 6000 + 42),
+        ])
+        db_session.commit()
+        
+        async with DeribitStubServer() as server:
+            service = BackfillService(db_session, DeribitClient(base_url=server.api_url))
+            summary = await service.backfill(["BTC_USD"], START, END)
+            await service.close()
+        
+        assert summary["BTC_USD"]["inserted"] == 998
+        assert self._count(db_session, TickerPrice, ticker="BTC_USD") == 1000
+        assert db_session.get(PriceCandle, ("BTC_USD", "1d", START)).count == 998
+    
+    async def test_backfill_resumes(self, db_session, settings):
+        """Test a rerun only fetches chunks that are not recorded as complete."""
+        async with DeribitStubServer(error_rate=1.0) as server:
+            service = BackfillService(db_session, DeribitClient(base_url=server.api_url, max_retries=0))
+            
+            failed = await service.backfill(["BTC_USD"], START, END)
+            assert failed["BTC_USD"]["failed"] == 10
+            assert self._count(db_session, BackfillChunk) == 0
+            
+            server.error_rate = 0.0
+            reset_circuit_breakers()
+            first = await service.backfill(["BTC_USD"], START, START + 500 * 60 - 1)
+            requests = server.http_requests
+            second = await service.backfill(["BTC_USD"], START, END)
+            await service.close()
+        
+        assert first["BTC_USD"]["inserted"] == 500
+        assert second["BTC_USD"]["skipped"] == 5
+        assert server.http_requests - requests == 5
+        assert self._count(db_session, TickerPrice, ticker="BTC_USD") == 1000
+        assert self._count(db_session, BackfillChunk, ticker="BTC_USD") == 10
+    
+    async def test_recent_chunk_not_marked_complete(self, db_session, settings):
+        """Test the chunk that is still filling up is fetched again on the next run."""
+        now = int(time.time())
+        
+        async with DeribitStubServer() as server:
+            service = BackfillService(db_session, DeribitClient(base_url=server.api_url))
+            await service.backfill(["BTC_USD"], now - now % 6000, now)
+            await service.close()
+        
+        assert self._count(db_session, BackfillChunk) == 0
+    
+    async def test_repair_fills_gaps_in_complete_chunks(self, db_session, settings):
+        """Test repairs refetch the gaps found by GapService despite complete chunks."""
+        async with DeribitStubServer() as server:
+            service = BackfillService(db_session, DeribitClient(base_url=server.api_url))
+            await service.backfill(["BTC_USD"], START, END)
+            db_session.query(TickerPrice).filter(
+                TickerPrice.timestamp.between(START + 120, START + 359)
+                | TickerPrice.timestamp.between(START + 30000, START + 36059)
+            ).delete(synchronize_session=False)
+            db_session.commit()
+            
+            gaps = GapService(db_session).find_gaps(["BTC_USD"], START, END)
+            summary = await service.repair(gaps)
+            await service.close()
+        
+        assert [gap.missing for gap in gaps] == [4, 101]
+        assert summary["BTC_USD"] == {
+            "gaps": 2, "missing": 105, "skipped": 0, "chunks": 3, "failed": 0, "fetched": 105, "inserted": 105
+        }
+        assert GapService(db_session).find_gaps(["BTC_USD"], START, END) == []
+    
+    async def test_repair_stores_one_price_per_slot(self, db_session, settings, monkeypatch):
+        """Test a cadence above a minute gets one repaired price per slot, not one per chart point."""
+        monkeypatch.setattr("app.services.backfill_service.settings.ingest_cadences", {"BTC_USD": 90})
+        db_session.add_all([
+            TickerPrice(ticker="BTC_USD", price=1, timestamp=timestamp)
+            for timestamp in range(START, START + 90 * 100, 90)
+            if not START + 90 * 10 <= timestamp < START + 90 * 40
+        ])
+        db_session.commit()
+        
+        async with DeribitStubServer() as server:
+            service = BackfillService(db_session, DeribitClient(base_url=server.api_url))
+            gaps = GapService(db_session).find_gaps(["BTC_USD"], START, START + 90 * 100 - 1)
+            summary = await service.repair(gaps)
+            await service.close()
+        
+        slots = db_session.scalars(
+            select(TickerPrice.timestamp / 90).where(TickerPrice.ticker == "BTC_USD")
+        ).all()
+        
+        assert [gap.missing for gap in gaps] == [30]
+        # One-minute points fall into every 90-second slot, some twice
+        assert summary["BTC_USD"]["fetched"] == 45
+        assert summary["BTC_USD"]["inserted"] == 30
+        assert len(slots) == len(set(slots)) == 100
+    
+    async def test_repair_skips_sub_minute_cadence(self, db_session, settings, monkeypatch):
+        """Test slots shorter than any chart resolution are skipped instead of fetched."""
+        monkeypatch.setattr("app.services.backfill_service.settings.ingest_cadences", {"BTC_USD": 15})
+        
+        async with DeribitStubServer() as server:
+            service = BackfillService(db_session, DeribitClient(base_url=server.api_url))
+            summary = await service.repair([PriceGap("BTC_USD", START, START + 599, 40)])
+            await service.close()
+        
+        assert summary["BTC_USD"]["skipped"] == 40
+        assert summary["BTC_USD"]["chunks"] == 0
+        assert server.http_requests == 0
+        assert self._count(db_session, TickerPrice) == 0
+    
+    async def test_repair_skips_slots_before_raw_retention(self, db_session, settings, monkeypatch):
+        """Test with partitioning, only slots inside the raw retention window are fetched."""
+        monkeypatch.setattr("app.services.partition_service.settings.price_partitioning", True)
+        monkeypatch.setattr("app.services.partition_service.settings.partition_raw_retention_days", 1)
+        horizon = int(time.time()) - 86400
+        start = horizon - horizon % 60 - 600
+        
+        async with DeribitStubServer() as server:
+            service = BackfillService(db_session, DeribitClient(base_url=server.api_url))
+            summary = await service.repair([PriceGap("BTC_USD", start, start + 1199, 20)])
+            await service.close()
+        
+        oldest = db_session.scalar(select(func.min(TickerPrice.timestamp)))
+        
+        assert summary["BTC_USD"]["skipped"] in (10, 11)
+        assert summary["BTC_USD"]["skipped"] + summary["BTC_USD"]["inserted"] == 20
+        assert oldest >= horizon
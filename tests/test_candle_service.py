@@ -0,0 +1,97 @@
+"""
+Unit tests for CandleService.
+"""
+import pytest
+from unittest.mock import Mock
+from datetime import datetime, timezone
+from app.services.candle_service import CandleService, CANDLE_INTERVALS
+from app.models import PriceCandle, TickerPrice
+
+
+class TestCandleService:
+    """Test cases for CandleService."""
+    
+    @pytest.fixture
+    def mock_db(self):
+        """Create a mock database session."""
+        return Mock()
+    
+    def test_apply_prices_preaggregates_buckets(self, mock_db):
+        """Test that a batch is folded into one upsert row per candle."""
+        service = CandleService(mock_db)
+        
+        service.apply_prices([
+            ("BTC_USD", 100.0, 1699999800),
+            ("BTC_USD", 120.0, 1699999860),
+            ("BTC_USD", 90.0, 1699999810),
+        ])
+        
+        rows = mock_db.execute.call_args[0][1]
+        # 2 distinct 1m buckets, 1 each for 5m, 1h and 1d
+        assert len(rows) == 5
+        assert {row["interval"] for row in rows} == {"1m", "5m", "1h", "1d"}
+        mock_db.execute.assert_called_once()
+    
+    def test_apply_prices_empty_batch(self, mock_db):
+        """Test that an empty batch does not touch the database."""
+        CandleService(mock_db).apply_prices([])
+        
+        mock_db.execute.assert_not_called()
+    
+    def test_apply_and_get_candles(self, db_session):
+        """Test incremental updates produce correct OHLC values."""
+        service = CandleService(db_session)
+        
+        service.apply_prices([("BTC_USD", 100.0, 1699999980), ("BTC_USD", 130.0, 1700000010)])
+        service.apply_prices([("BTC_USD", 80.0, 1700000025)])
+        # A late, out-of-order price must not become the close
+        service.apply_prices([("BTC_USD", 110.0, 1699999990)])
+        db_session.commit()
+        
+        candles = service.get_candles("BTC_USD", "1m")
+        
+        assert len(candles) == 1
+        candle = candles[0]
+        assert candle.bucket == 1699999980
+        assert float(candle.open) == 100.0
+        assert float(candle.high) == 130.0
+        assert float(candle.low) == 80.0
+        assert float(candle.close) == 80.0
+        assert candle.count == 4
+    
+    def test_rebuild_matches_incremental(self, db_session):
+        """Test that a rebuild reproduces the incrementally maintained candles."""
+        prices = [("BTC_USD", 100.0 + i % 7, 1700000000 + i * 60) for i in range(200)]
+        db_session.add_all(TickerPrice(ticker=t, price=p, timestamp=ts) for t, p, ts in prices)
+        service = CandleService(db_session)
+        service.apply_prices(prices)
+        db_session.commit()
+        
+        def snapshot():
+            return {
+                (c.interval, c.bucket): (float(c.open), float(c.high), float(c.low), float(c.close), c.count)
+                for c in db_session.query(PriceCandle).all()
+            }
+        
+        incremental = snapshot()
+        written = service.rebuild("BTC_USD")
+        db_session.expire_all()
+        
+        assert snapshot() == incremental
+        assert set(written) == set(CANDLE_INTERVALS)
+        assert written["1m"] == 200
+    
+    def test_get_candles_date_range(self, db_session):
+        """Test that the date range filter selects whole buckets."""
+        service = CandleService(db_session)
+        service.apply_prices([("ETH_USD", 2000.0 + i, 1700006400 + i * 3600) for i in range(48)])
+        db_session.commit()
+        
+        candles = service.get_candles(
+            "ETH_USD",
+            "1h",
+            datetime.fromtimestamp(1700006400 + 3600 * 10 + 5, tz=timezone.utc),
+            datetime.fromtimestamp(1700006400 + 3600 * 20, tz=timezone.utc)
+        )
+        
+        assert [c.bucket for c in candles] == [1700006400 + 3600 * i for i in range(10, 21)]
@@ -0,0 +1,106 @@
+"""
+Tests for the compact ticker_prices storage layout.
+"""
+import pytest
+from decimal import Decimal
+from unittest.mock import Mock
+from sqlalchemy import text
+from app.database import SessionLocal
+from app.models import TickerPrice
+from app.services.compact_service import LEGACY_TABLE, VIEW_INSERT_TRIGGER, CompactStorageService, to_fixed
+from app.services.partition_service import PartitionService
+from app.services.price_service import PriceService, SaveResult
+
+
+class TestCompactStorageService:
+    """Test cases for CompactStorageService against the test database."""
+    
+    @pytest.fixture
+    def compact(self, db_session, monkeypatch):
+        """Seed prices in the plain layout, then migrate two rows per batch."""
+        price_service = PriceService(db_session, publisher=Mock())
+        price_service.save_prices([("BTC_USD", 45000.12345678 + i, 1699123200 + i * 60) for i in range(5)])
+        price_service.save_prices([("ETH_USD", 2500.5, 1699123200)])
+        
+        def insert_during_copy(copied):
+            # A write from another connection between batches
+            if copied == 2:
+                other = SessionLocal()
+                other.add(TickerPrice(ticker="SOL_USD", price=60.25, timestamp=1699123200))
+                other.commit()
+                other.close()
+        
+        service = CompactStorageService(db_session)
+        assert service.migrate(batch_size=2, progress=insert_during_copy) == 7
+        monkeypatch.setattr("app.config.settings.compact_prices", True)
+        yield service
+        
+        # Let drop_all find tables again
+        db_session.rollback()
+        db_session.execute(text("DROP VIEW IF EXISTS ticker_prices"))
+        db_session.execute(text(f"DROP FUNCTION IF EXISTS {VIEW_INSERT_TRIGGER}()"))
+        db_session.execute(text(f"DROP TABLE IF EXISTS {LEGACY_TABLE}"))
+        db_session.commit()
+    
+    def test_migrate_keeps_rows_and_ids(self, db_session, compact):
+        """Test the view returns every row, including one written mid-copy."""
+        legacy = db_session.execute(text(
+            f"SELECT id, ticker, price, timestamp FROM {LEGACY_TABLE} ORDER BY id"
+        )).all()
+        prices = db_session.query(TickerPrice).order_by(TickerPrice.id).all()
+        
+        assert compact.is_compact()
+        assert compact.migrate() == 0
+        assert [(p.id, p.ticker, p.price, p.timestamp) for p in prices] == [tuple(row) for row in legacy]
+        assert prices[0].price == Decimal("45000.12345678")
+        assert "SOL_USD" in {p.ticker for p in prices}
+    
+    def test_writes_go_to_compact_table(self, db_session, compact):
+        """Test saves are idempotent and continue the id sequence."""
+        price_service = PriceService(db_session, publisher=Mock())
+        last_id = db_session.execute(text(f"SELECT max(id) FROM {LEGACY_TABLE}")).scalar()
+        
+        assert price_service.save_prices(
+            [("BTC_USD", 1.0, 1699123200), ("XRP_USD", 0.61, 1699123200)], use_copy=True
+        ) == SaveResult(1, 1)
+        assert price_service.save_prices([("XRP_USD", 0.62, 1699123260)]) == SaveResult(1, 0)
+        saved = price_service.save_price("BTC_USD", 45100.5, 1699123800)
+        
+        assert saved.id > last_id
+        assert price_service.save_price("BTC_USD", 1.0, 1699123800) is None
+        assert price_service.get_latest_price("BTC_USD").price == Decimal("45100.5")
+        assert [p.price for p in price_service.get_all_prices("XRP_USD")] == [Decimal("0.62"), Decimal("0.61")]
+        assert db_session.execute(text("SELECT price FROM ticker_prices_compact ORDER BY id DESC LIMIT 1")).scalar() == to_fixed(45100.5)
+    
+    def test_writes_without_compact_setting(self, db_session, compact, monkeypatch):
+        """Test processes without COMPACT_PRICES still write through the view."""
+        monkeypatch.setattr("app.config.settings.compact_prices", False)
+        price_service = PriceService(db_session, publisher=Mock())
+        last_id = db_session.execute(text(f"SELECT max(id) FROM {LEGACY_TABLE}")).scalar()
+        
+        assert price_service.save_prices([("BTC_USD", 1.0, 1699123200), ("ADA_USD", 0.3, 1699123200)]) == SaveResult(1, 1)
+        assert price_service.save_prices(
+            [("ADA_USD", 0.3, 1699123200), ("ADA_USD", 0.31, 1699123260)], use_copy=True
+        ) == SaveResult(1, 1)
+        assert price_service.save_price("ADA_USD", 0.3, 1699123200) is None
+        assert price_service.save_price("ADA_USD", 0.315, 1699123290).id > last_id
+        added = TickerPrice(ticker="ADA_USD", price=0.32, timestamp=1699123320)
+        db_session.add(added)
+        db_session.commit()
+        
+        ada = db_session.query(TickerPrice).filter(TickerPrice.ticker == "ADA_USD").order_by(TickerPrice.timestamp)
+        assert added.id > last_id
+        assert [float(p.price) for p in ada] == [0.3, 0.31, 0.315, 0.32]
+        assert db_session.execute(text("SELECT count(*) FROM ticker_prices_compact")).scalar() == 11
+    
+    def test_storage_sizes(self, compact):
+        """Test sizes cover the compact table and dictionary."""
+        sizes = compact.storage_sizes()
+        
+        assert sizes["table_bytes"] > 0
+        assert sizes["index_bytes"] > 0
+    
+    def test_partitioning_refused(self, compact):
+        """Test the compact view cannot be partitioned."""
+        with pytest.raises(ValueError):
+            PartitionService(compact.db).convert()
@@ -1,10 +1,23 @@
 """
 Unit tests for DeribitClient.
 """
+import asyncio
+import time
 import pytest
 import aiohttp
 from unittest.mock import AsyncMock, patch
+from app.clients.circuit_breaker import CircuitOpenError, get_circuit_breaker
 from app.clients.deribit_client import DeribitClient
+from app.clients.deribit_stub import DeribitStubServer
+from app.clients.rate_limit import AsyncRateLimiter
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    """Retry almost immediately and open circuits after two failures."""
+    monkeypatch.setattr("app.clients.deribit_client.settings.deribit_retry_base_delay", 0.01)
+    monkeypatch.setattr("app.clients.circuit_breaker.settings.deribit_breaker_failure_threshold", 2)
+    monkeypatch.setattr("app.clients.circuit_breaker.settings.deribit_breaker_reset_timeout", 0.2)
 
 
 class TestDeribitClient:
@@ -61,4 +74,89 @@ class TestDeribitClient:
                 
                 with pytest.raises(ValueError, match="Deribit API error"):
                     await client.get_index_price("INVALID")
-
+    
+    @pytest.mark.asyncio
+    async def test_get_index_price_from_stub(self):
+        """Test a real HTTP round-trip against the local Deribit stub."""
+        async with DeribitStubServer(latency=0.01) as server:
+            async with DeribitClient(base_url=server.api_url) as client:
+                result = await client.get_index_price("BTC_USD")
+        
+        assert result["index_price"] > 0
+        assert result["timestamp"] < 1e10
+        assert server.http_requests == 1
+    
+    @pytest.mark.asyncio
+    async def test_get_index_price_stub_errors(self):
+        """Test stub failures surface as client errors."""
+        async with DeribitStubServer(error_rate=1.0) as server:
+            async with DeribitClient(base_url=server.api_url, max_retries=0) as client:
+                with pytest.raises(aiohttp.ClientError):
+                    await client.get_index_price("BTC_USD")
+        
+        assert server.http_errors == 1
+    
+    @pytest.mark.asyncio
+    async def test_rate_limiter_spends_request_cost(self):
+        """Test requests wait for credits once the pool is spent."""
+        limiter = AsyncRateLimiter(rate=10000, burst=1000)
+        
+        async with DeribitStubServer() as server:
+            async with DeribitClient(base_url=server.api_url, rate_limiter=limiter) as client:
+                started = time.monotonic()
+                await asyncio.gather(*(client.get_index_price("BTC_USD") for _ in range(4)))
+        
+        # 2 requests from the pool, 2 more at 500 credits per 0.05s
+        assert time.monotonic() - started >= 0.09
+    
+    @pytest.mark.asyncio
+    async def test_retries_throttled_requests(self, fast_retries):
+        """Test 429 too_many_requests responses are retried until they succeed."""
+        async with DeribitStubServer(rate_limit=20, rate_burst=1) as server:
+            async with DeribitClient(base_url=server.api_url, max_retries=10) as client:
+                results = await asyncio.gather(*(client.get_index_price("BTC_USD") for _ in range(3)))
+        
+        assert all(result["index_price"] > 0 for result in results)
+        assert server.http_throttled > 0
+        assert server.http_requests == server.http_throttled + 3
+    
+    @pytest.mark.asyncio
+    async def test_retries_server_errors_then_gives_up(self, fast_retries):
+        """Test 5xx responses are retried max_retries times before failing."""
+        async with DeribitStubServer(error_rate=1.0) as server:
+            async with DeribitClient(base_url=server.api_url, max_retries=1) as client:
+                with pytest.raises(aiohttp.ClientError, match="after 2 attempts"):
+                    await client.get_index_price("BTC_USD")
+        
+        assert server.http_errors == 2
+    
+    @pytest.mark.asyncio
+    async def test_api_errors_not_retried(self, fast_retries):
+        """Test Deribit errors other than throttling fail on the first attempt."""
+        async with DeribitStubServer() as server:
+            async with DeribitClient(base_url=server.api_url) as client:
+                with patch.object(client, "_get_session", side_effect=ValueError("Deribit API error: bad")):
+                    with pytest.raises(ValueError):
+                        await client.get_index_price("BTC_USD")
+        
+        assert get_circuit_breaker(server.api_url, "public/get_index_price").failures == 0
+    
+    @pytest.mark.asyncio
+    async def test_circuit_breaker_fails_fast_and_recovers(self, fast_retries):
+        """Test an open circuit rejects calls without a request, then lets a trial through."""
+        async with DeribitStubServer(error_rate=1.0) as server:
+            async with DeribitClient(base_url=server.api_url, max_retries=0) as client:
+                for _ in range(2):
+                    with pytest.raises(aiohttp.ClientError):
+                        await client.get_index_price("BTC_USD")
+                
+                with pytest.raises(CircuitOpenError):
+                    await client.get_index_price("BTC_USD")
+                assert server.http_requests == 2
+                
+                server.error_rate = 0.0
+                await asyncio.sleep(0.2)
+                result = await client.get_index_price("BTC_USD")
+        
+        assert result["index_price"] > 0
+        assert get_circuit_breaker(server.api_url, "public/get_index_price").state == "closed"
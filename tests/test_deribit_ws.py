@@ -0,0 +1,111 @@
+"""
+Tests for the Deribit WebSocket subscription mode against the local stub.
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from app.clients.deribit_client import DeribitClient
+from app.clients.deribit_stub import DeribitStubServer
+from app.models import TickerPrice
+from app.tasks.ws_ingestion import run_ws_ingestion
+
+
+class TestDeribitWebSocket:
+    """Test cases for DeribitClient.stream_index_prices."""
+    
+    @pytest.mark.asyncio
+    async def test_stream_index_prices(self):
+        """Test that subscribed index updates are yielded."""
+        async with DeribitStubServer(publish_interval=0.01) as server:
+            async with DeribitClient(ws_url=server.ws_url) as client:
+                updates = client.stream_index_prices(["BTC_USD", "ETH_USD"])
+                received = [await updates.__anext__() for _ in range(6)]
+                await updates.aclose()
+        
+        assert {update["index_name"] for update in received} == {"btc_usd", "eth_usd"}
+        assert all(update["index_price"] > 0 for update in received)
+        # Timestamps are converted from milliseconds to seconds
+        assert all(update["timestamp"] < 1e10 for update in received)
+    
+    @pytest.mark.asyncio
+    async def test_reconnects_and_resubscribes(self):
+        """Test that a dropped connection is re-established and resubscribed."""
+        async with DeribitStubServer(publish_interval=0.01) as server:
+            async with DeribitClient(ws_url=server.ws_url) as client:
+                with patch("app.clients.deribit_client.settings") as mock_settings:
+                    mock_settings.deribit_ws_heartbeat_interval = 10
+                    mock_settings.deribit_ws_reconnect_min_delay = 0.01
+                    mock_settings.deribit_ws_reconnect_max_delay = 0.05
+                    
+                    updates = client.stream_index_prices(["BTC_USD"])
+                    await updates.__anext__()
+                    await server.drop_connections()
+                    
+                    # Keep reading until updates arrive on a second connection
+                    await asyncio.wait_for(self._read_until(updates, lambda: server.subscribe_count >= 2), 5)
+                    await updates.__anext__()
+                    await updates.aclose()
+        
+        assert server.subscribe_count >= 2
+    
+    @pytest.mark.asyncio
+    async def test_answers_heartbeat_test_requests(self):
+        """Test that heartbeat test requests are answered with public/test."""
+        async with DeribitStubServer(publish_interval=0.01) as server:
+            async with DeribitClient(ws_url=server.ws_url) as client:
+                updates = client.stream_index_prices(["BTC_USD"], heartbeat_interval=0.05)
+                await asyncio.wait_for(self._read_until(updates, lambda: server.heartbeat_replies >= 2), 5)
+                await updates.aclose()
+        
+        assert server.heartbeat_replies >= 2
+    
+    @pytest.mark.asyncio
+    async def test_rejected_subscription_raises(self):
+        """Test that a subscription error from Deribit is raised, not retried."""
+        async with DeribitStubServer() as server:
+            async with DeribitClient(ws_url=server.ws_url) as client:
+                with patch("app.clients.deribit_client.PRICE_INDEX_CHANNEL", "bogus.{}"):
+                    updates = client.stream_index_prices(["BTC_USD"])
+                    with pytest.raises(ValueError, match="Deribit API error"):
+                        await updates.__anext__()
+    
+    @pytest.mark.asyncio
+    async def test_run_ws_ingestion_buffers_updates(self):
+        """Test that the ingestion worker hands updates to the buffered writer."""
+        async with DeribitStubServer(publish_interval=0.01) as server:
+            with patch("app.tasks.ws_ingestion.BufferedPriceWriter") as mock_writer_class:
+                writer = Mock()
+                writer.start = AsyncMock()
+                writer.put = AsyncMock(return_value=True)
+                writer.close = AsyncMock()
+                writer.stats = {"flushed_rows": 3}
+                mock_writer_class.return_value = writer
+                
+                stats = await run_ws_ingestion(["BTC_USD"], ws_url=server.ws_url, max_updates=3)
+        
+        assert stats == {"flushed_rows": 3}
+        assert writer.put.await_count == 3
+        assert writer.put.call_args[0][0] == "BTC_USD"
+        writer.close.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_run_ws_ingestion_flushes_on_stop(self, db_session):
+        """Test that setting the stop event, as SIGTERM does, flushes buffered rows."""
+        stop = asyncio.Event()
+        with patch("app.services.price_writer.settings.write_flush_interval", 60):
+            async with DeribitStubServer(publish_interval=0.01) as server:
+                ingestion = asyncio.create_task(run_ws_ingestion(["BTC_USD"], ws_url=server.ws_url, stop=stop))
+                await asyncio.sleep(0.2)
+                stop.set()
+                stats = await asyncio.wait_for(ingestion, 5)
+        
+        assert stats["flushed_rows"] > 0
+        assert stats["buffered"] == 0
+        stored = db_session.query(TickerPrice).filter(TickerPrice.ticker == "BTC_USD").count()
+        assert stored == stats["flushed_rows"] - stats["duplicate_rows"]
+    
+    @staticmethod
+    async def _read_until(updates, condition):
+        """Consume updates until condition() holds."""
+        while not condition():
+            await updates.__anext__()
@@ -0,0 +1,70 @@
+"""
+Unit tests for the ingestion gap scanner.
+"""
+from app.models import TickerPrice
+from app.services.gap_service import AsyncGapService, GapService, PriceGap, gap_query
+
+# 2023-11-14T22:13:20Z is not minute-aligned; START is the next minute
+START = 1700000040
+
+
+def _seed(db, ticker: str, minutes, offset: int = 7):
+    """Insert one price per listed minute after START, a few seconds into the minute."""
+    db.add_all(TickerPrice(ticker=ticker, price=1, timestamp=START + offset + i * 60) for i in minutes)
+    db.commit()
+
+
+class TestGapService:
+    """Test cases for GapService against the test database."""
+    
+    def test_find_gaps(self, db_session):
+        """Test leading, inner and trailing gaps, and a ticker without prices."""
+        _seed(db_session, "BTC_USD", [i for i in range(2, 100) if i not in (10, 11, 12, 50)])
+        
+        gaps = GapService(db_session).find_gaps(["BTC_USD", "ETH_USD"], START, START + 100 * 60 - 1)
+        
+        assert gaps == [
+            PriceGap("BTC_USD", START, START + 119, 2),
+            PriceGap("BTC_USD", START + 600, START + 779, 3),
+            PriceGap("BTC_USD", START + 3000, START + 3059, 1),
+            PriceGap("ETH_USD", START, START + 5999, 100),
+        ]
+    
+    def test_complete_range_has_no_gaps(self, db_session):
+        """Test partial slots at the range edges are not expected."""
+        _seed(db_session, "BTC_USD", range(100))
+        
+        assert GapService(db_session).find_gaps(["BTC_USD"], START + 30, START + 100 * 60 - 10) == []
+    
+    def test_ticker_cadence(self, db_session, monkeypatch):
+        """Test each ticker is checked against its own ingest cadence."""
+        monkeypatch.setattr("app.services.gap_service.settings.ingest_cadences", {"ETH_USD": 300})
+        _seed(db_session, "BTC_USD", range(0, 30, 5))
+        _seed(db_session, "ETH_USD", range(0, 30, 5))
+        
+        gaps = GapService(db_session).find_gaps(["BTC_USD", "ETH_USD"], START, START + 30 * 60 - 1)
+        
+        assert {gap.ticker for gap in gaps} == {"BTC_USD"}
+        assert sum(gap.missing for gap in gaps) == 24
+    
+    def test_open_slot_not_reported(self):
+        """Test the slot whose tick may still be running is not checked."""
+        _, params = gap_query(["BTC_USD"], START, START + 3600, now=START + 600 + 30)
+        
+        # The slot starting at START + 540 ended 30s ago, less than one cadence
+        assert params["first_slots"] == [START // 60]
+        assert params["last_slots"] == [START // 60 + 8]
+    
+    async def test_async_find_gaps(self, async_db_session):
+        """Test the API's async scan finds the same gaps."""
+        async_db_session.add_all(
+            TickerPrice(ticker="BTC_USD", price=1, timestamp=START + 7 + i * 60) for i in (0, 1, 5, 9)
+        )
+        await async_db_session.commit()
+        
+        gaps = await AsyncGapService(async_db_session).find_gaps(["BTC_USD"], START, START + 599)
+        
+        assert gaps == [
+            PriceGap("BTC_USD", START + 120, START + 299, 3),
+            PriceGap("BTC_USD", START + 360, START + 539, 3),
+        ]
@@ -0,0 +1,102 @@
+"""
+Tests for Prometheus instrumentation.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from unittest.mock import AsyncMock, patch
+from app.main import app
+from app.metrics import track_query
+from app.clients.deribit_client import DeribitClient
+from app.clients.deribit_stub import DeribitStubServer
+
+
+def _sample(name, labels):
+    """Read a metric sample from the default registry (0 when absent)."""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestMetrics:
+    """Test cases for metrics collection and exposure."""
+    
+    def test_track_query_records_duration_and_rows(self):
+        """Test sync methods record one observation and their row count."""
+        @track_query("test_sync")
+        def query():
+            return ["a", "b", "c"]
+        
+        query()
+        
+        assert _sample("db_query_seconds_count", {"operation": "test_sync"}) == 1
+        assert _sample("db_rows_total", {"operation": "test_sync"}) == 3
+    
+    @pytest.mark.asyncio
+    async def test_track_query_async_page(self):
+        """Test async methods returning (rows, cursor) count the page rows."""
+        @track_query("test_async")
+        async def query():
+            return ["a", "b"], (1699123456, 2)
+        
+        assert await query() == (["a", "b"], (1699123456, 2))
+        assert _sample("db_rows_total", {"operation": "test_async"}) == 2
+    
+    @pytest.mark.asyncio
+    async def test_track_query_fixed_rows(self):
+        """Test a fixed row count overrides the shape of aggregate results."""
+        @track_query("test_version", rows=1)
+        async def query():
+            return 5000, 1699123456
+        
+        await query()
+        
+        assert _sample("db_rows_total", {"operation": "test_version"}) == 1
+    
+    @pytest.mark.asyncio
+    async def test_track_query_records_failures(self):
+        """Test sync and async methods that raise still record their duration."""
+        @track_query("test_failing")
+        def query():
+            raise RuntimeError("boom")
+        
+        @track_query("test_failing_async")
+        async def async_query():
+            raise RuntimeError("boom")
+        
+        with pytest.raises(RuntimeError):
+            query()
+        with pytest.raises(RuntimeError):
+            await async_query()
+        
+        assert _sample("db_query_seconds_count", {"operation": "test_failing"}) == 1
+        assert _sample("db_query_seconds_count", {"operation": "test_failing_async"}) == 1
+        assert _sample("db_rows_total", {"operation": "test_failing"}) == 0
+    
+    @pytest.mark.asyncio
+    async def test_deribit_request_latency(self):
+        """Test Deribit calls are timed and labelled by outcome."""
+        labels = {"method": "get_index_price", "status": "error"}
+        before = _sample("deribit_request_seconds_count", labels)
+        
+        async with DeribitStubServer(error_rate=1.0) as server:
+            async with DeribitClient(base_url=server.api_url, max_retries=0) as client:
+                with pytest.raises(Exception):
+                    await client.get_index_price("BTC_USD")
+        
+        assert _sample("deribit_request_seconds_count", labels) == before + 1
+    
+    def test_metrics_endpoint_exposes_route_metrics(self):
+        """Test /metrics reports request latency and bytes by route template."""
+        client = TestClient(app)
+        with patch("app.api.routes.AsyncPriceService") as mock_service_class:
+            mock_service = AsyncMock()
+            mock_service.get_price_version.return_value = (1, 1699123456)
+            mock_service.get_price_rows.return_value = ([(1, 45000.5, 1699123456)], None)
+            mock_service_class.return_value = mock_service
+            client.get("/api/v1/prices?ticker=BTC_USD")
+        
+        response = client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'http_request_seconds_count{method="GET",route="/api/v1/prices",status="200"}' in response.text
+        assert _sample("http_response_bytes_total", {"route": "/api/v1/prices"}) > 0
@@ -0,0 +1,22 @@
+"""
+Unit tests for pagination cursor helpers.
+"""
+import pytest
+from app.api.pagination import encode_cursor, decode_cursor
+
+
+class TestPaginationCursor:
+    """Test cases for cursor encoding."""
+    
+    def test_round_trip(self):
+        """Test that a cursor decodes to the values it was built from."""
+        cursor = encode_cursor(1699123456, 42)
+        
+        assert decode_cursor(cursor) == (1699123456, 42)
+        assert "=" not in cursor
+    
+    @pytest.mark.parametrize("cursor", ["", "not-a-cursor", "MTIz", "!!!"])
+    def test_decode_invalid(self, cursor):
+        """Test that malformed cursors raise ValueError."""
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
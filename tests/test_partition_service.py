@@ -0,0 +1,190 @@
+"""
+Tests for ticker_prices partition management.
+"""
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import Mock, patch
+from sqlalchemy import text
+from app.database import SessionLocal
+from app.models import TickerPrice
+from app.services.partition_service import (
+    DEFAULT_PARTITION,
+    PartitionService,
+    month_start,
+    next_month,
+    partition_name,
+)
+from app.services.price_service import PriceService
+from app.tasks.maintenance_tasks import maintain_price_partitions
+
+DAY = 86400
+
+
+class TestPartitionHelpers:
+    """Test cases for month boundary helpers."""
+    
+    def test_month_boundaries(self):
+        """Test month starts, year rollover and partition names."""
+        december = int(datetime(2023, 12, 1, tzinfo=timezone.utc).timestamp())
+        
+        assert month_start(december + 15 * DAY + 3600) == december
+        assert next_month(december) == int(datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp())
+        assert partition_name(december) == "ticker_prices_p202312"
+
+
+class TestPartitionService:
+    """Test cases for PartitionService against the test database."""
+    
+    @pytest.fixture
+    def now(self):
+        return int(datetime.now(tz=timezone.utc).timestamp())
+    
+    @pytest.fixture
+    def partitioned(self, db_session, now):
+        """Seed an hour of ticks 200 days ago and today, then partition the table."""
+        price_service = PriceService(db_session, publisher=Mock())
+        old = now - 200 * DAY
+        price_service.save_prices([("BTC_USD", 40000.0 + i, old + i * 60) for i in range(60)])
+        price_service.save_prices([("BTC_USD", 50000.0 + i, now - i * 60) for i in range(60)])
+        
+        service = PartitionService(db_session)
+        assert service.convert(months_ahead=1) == 120
+        return service
+    
+    def _count(self, db_session, table):
+        return db_session.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+    
+    def test_convert_creates_monthly_partitions(self, db_session, partitioned, now):
+        """Test conversion keeps every row and covers old, current and next months."""
+        names = [partition.name for partition in partitioned.list_partitions()]
+        
+        assert partitioned.is_partitioned()
+        assert partitioned.convert() == 0
+        assert partition_name(month_start(now - 200 * DAY)) == names[0]
+        assert partition_name(next_month(month_start(now))) == names[-1]
+        assert self._count(db_session, "ticker_prices") == 120
+        assert self._count(db_session, DEFAULT_PARTITION) == 0
+    
+    def test_convert_is_online(self, db_session, now):
+        """Test writes from other connections succeed during the copy and are kept."""
+        PriceService(db_session, publisher=Mock()).save_prices([("BTC_USD", 1.0 + i, now - i * 60) for i in range(10)])
+        
+        def insert_during_copy(copied):
+            other = SessionLocal()
+            # Fails instead of hanging if the copy held an exclusive lock
+            other.execute(text("SET lock_timeout = '2s'"))
+            other.add(TickerPrice(ticker="ETH_USD", price=2500.0, timestamp=now - copied))
+            other.commit()
+            other.close()
+        
+        service = PartitionService(db_session)
+        assert service.convert(months_ahead=0, batch_size=4, progress=insert_during_copy) == 13
+        
+        indexes = db_session.execute(
+            text("SELECT indexname FROM pg_indexes WHERE tablename = 'ticker_prices'")
+        ).scalars().all()
+        saved = PriceService(db_session, publisher=Mock()).save_price("BTC_USD", 2.0, now + 60)
+        
+        assert service.is_partitioned()
+        assert self._count(db_session, "ticker_prices WHERE ticker = 'ETH_USD'") == 3
+        assert set(indexes) >= {"ticker_prices_pkey", "uq_ticker_timestamp"}
+        assert saved.id > 13
+    
+    def test_range_query_prunes_partitions(self, db_session, partitioned, now):
+        """Test a date-range query only scans the partition for its month."""
+        plan = "\n".join(db_session.execute(text(
+            "EXPLAIN SELECT * FROM ticker_prices "
+            "WHERE ticker = 'BTC_USD' AND timestamp >= :start AND timestamp <= :end"
+        ), {"start": now - 600, "end": now}).scalars())
+        
+        assert partition_name(month_start(now - 600)) in plan
+        assert partition_name(month_start(now - 200 * DAY)) not in plan
+    
+    def test_ensure_partitions_moves_rows_from_default(self, db_session, partitioned, now):
+        """Test backfilled rows outside every partition get their own month."""
+        backfilled = now - 400 * DAY
+        PriceService(db_session, publisher=Mock()).save_price("BTC_USD", 30000.0, backfilled)
+        
+        created = partitioned.ensure_partitions()
+        
+        assert partition_name(month_start(backfilled)) in created
+        assert self._count(db_session, DEFAULT_PARTITION) == 0
+        assert self._count(db_session, partition_name(month_start(backfilled))) == 1
+    
+    def test_apply_retention_downsamples_then_drops(self, db_session, partitioned, now):
+        """Test old months are downsampled to one row per interval, then dropped."""
+        old_name = partition_name(month_start(now - 200 * DAY))
+        
+        result = partitioned.apply_retention(raw_days=90, interval=3600)
+        
+        assert old_name + "_ds" in result["downsampled"]
+        assert self._count(db_session, "ticker_prices") == 60 + (
+            self._count(db_session, old_name + "_ds")
+        )
+        assert self._count(db_session, old_name + "_ds") <= 2
+        
+        result = partitioned.apply_retention(raw_days=90, drop_days=150)
+        
+        assert old_name + "_ds" in result["dropped"]
+        assert self._count(db_session, "ticker_prices") == 60
+    
+    def test_apply_retention_releases_parent_between_partitions(self, db_session, now, monkeypatch):
+        """Test writes to ticker_prices succeed between two partition swaps."""
+        old, older = now - 200 * DAY, now - 260 * DAY
+        PriceService(db_session, publisher=Mock()).save_prices(
+            [("BTC_USD", 40000.0 + i, start + i * 60) for start in (old, older) for i in range(60)]
+        )
+        service = PartitionService(db_session)
+        service.convert(months_ahead=0)
+        downsample = service._downsample
+        written = []
+        
+        def downsample_then_write(partition, interval):
+            name = downsample(partition, interval)
+            other = SessionLocal()
+            # Fails instead of hanging if the parent were still locked
+            other.execute(text("SET lock_timeout = '2s'"))
+            other.add(TickerPrice(ticker="ETH_USD", price=2500.0, timestamp=now - len(written)))
+            other.commit()
+            other.close()
+            written.append(name)
+            return name
+        
+        monkeypatch.setattr(service, "_downsample", downsample_then_write)
+        result = service.apply_retention(raw_days=90, interval=3600)
+        
+        assert result["downsampled"] == written
+        assert partition_name(month_start(older)) + "_ds" in written
+        assert partition_name(month_start(old)) + "_ds" in written
+        assert self._count(db_session, "ticker_prices WHERE ticker = 'ETH_USD'") == len(written)
+
+class TestMaintenanceTasks:
+    """Test cases for the partition maintenance task."""
+    
+    def test_skipped_when_disabled(self):
+        """Test the task is a no-op unless partitioning is enabled."""
+        with patch("app.tasks.maintenance_tasks.settings") as mock_settings, \
+                patch("app.tasks.maintenance_tasks.PartitionService") as mock_service_class:
+            mock_settings.price_partitioning = False
+            
+            assert maintain_price_partitions() == {"skipped": "partitioning disabled"}
+            mock_service_class.assert_not_called()
+    
+    def test_creates_and_applies_retention(self):
+        """Test the task reports created, downsampled and dropped partitions."""
+        with patch("app.tasks.maintenance_tasks.settings") as mock_settings, \
+                patch("app.tasks.maintenance_tasks.SessionLocal"), \
+                patch("app.tasks.maintenance_tasks.PartitionService") as mock_service_class:
+            mock_settings.price_partitioning = True
+            service = mock_service_class.return_value
+            service.is_partitioned.return_value = True
+            service.ensure_partitions.return_value = ["ticker_prices_p202402"]
+            service.apply_retention.return_value = {"downsampled": ["ticker_prices_p202310_ds"], "dropped": []}
+            
+            result = maintain_price_partitions()
+        
+        assert result == {
+            "created": ["ticker_prices_p202402"],
+            "downsampled": ["ticker_prices_p202310_ds"],
+            "dropped": [],
+        }
@@ -0,0 +1,228 @@
+"""
+Unit tests for the Redis-backed latest-price cache.
+"""
+import asyncio
+import json
+import pytest
+import redis
+from unittest.mock import AsyncMock, Mock
+from app.api.routes import _sse_events
+from app.services.price_cache import LatestPriceCache, PricePublisher, latest_by_ticker
+
+
+class FakePubSub:
+    """Stands in for redis.asyncio PubSub, replaying scripted messages."""
+    
+    def __init__(self, messages, error=None):
+        self.messages = messages
+        self.error = error
+        self.subscribed = []
+        self.closed = False
+    
+    async def subscribe(self, channel):
+        self.subscribed.append(channel)
+    
+    async def listen(self):
+        for message in self.messages:
+            yield message
+        if self.error:
+            raise self.error
+        await asyncio.Event().wait()
+    
+    async def aclose(self):
+        self.closed = True
+
+
+def _message(ticker, price, timestamp):
+    """Build a pub/sub message as PricePublisher sends it."""
+    payload = json.dumps({"ticker": ticker, "price": price, "timestamp": timestamp}).encode()
+    return {"type": "message", "data": payload}
+
+
+SUBSCRIBED = {"type": "subscribe", "data": 1}
+
+
+class TestPricePublisher:
+    """Test cases for PricePublisher."""
+    
+    def test_latest_by_ticker(self):
+        """Test batches are reduced to the newest price per ticker."""
+        latest = latest_by_ticker([
+            ("BTC_USD", 45000.0, 1699123456),
+            ("BTC_USD", 45100.0, 1699123460),
+            ("BTC_USD", 44900.0, 1699123450),
+            ("ETH_USD", 2500.0, 1699123456),
+        ])
+        
+        assert latest == {"BTC_USD": (45100.0, 1699123460), "ETH_USD": (2500.0, 1699123456)}
+    
+    def test_publish_prices(self):
+        """Test one message is published per ticker."""
+        client = Mock()
+        publisher = PricePublisher(client=client, channel="prices:test")
+        
+        published = publisher.publish_prices([
+            ("BTC_USD", 45000.0, 1699123456),
+            ("BTC_USD", 45100.0, 1699123460),
+        ])
+        
+        assert published == 1
+        channel, payload = client.publish.call_args.args
+        assert channel == "prices:test"
+        assert json.loads(payload) == {"ticker": "BTC_USD", "price": 45100.0, "timestamp": 1699123460}
+    
+    def test_publish_prices_redis_down(self):
+        """Test a Redis outage does not propagate to the caller."""
+        client = Mock()
+        client.publish.side_effect = redis.ConnectionError("refused")
+        publisher = PricePublisher(client=client)
+        
+        assert publisher.publish_prices([("BTC_USD", 45000.0, 1699123456)]) == 0
+
+
+class TestLatestPriceCache:
+    """Test cases for LatestPriceCache."""
+    
+    @pytest.fixture
+    def cache(self):
+        """Create a cache with a connected subscription."""
+        cache = LatestPriceCache(client=Mock(), channel="prices:test")
+        cache.connected = True
+        return cache
+    
+    def test_update_keeps_newest(self, cache):
+        """Test an older price never replaces a newer one."""
+        assert cache.update("BTC_USD", 45100.0, 1699123460)
+        assert not cache.update("BTC_USD", 45000.0, 1699123456)
+        
+        assert cache.get("BTC_USD") == (45100.0, 1699123460)
+    
+    def test_get_while_disconnected(self, cache):
+        """Test nothing is served or stored without a live subscription."""
+        cache.update("BTC_USD", 45000.0, 1699123456)
+        cache.connected = False
+        
+        assert cache.get("BTC_USD") is None
+        assert not cache.update("ETH_USD", 2500.0, 1699123456)
+    
+    async def test_get_or_load_miss_then_hit(self, cache):
+        """Test a miss loads from the database and later calls hit memory."""
+        loader = AsyncMock(return_value=(45000.0, 1699123456))
+        
+        assert await cache.get_or_load("BTC_USD", loader) == (45000.0, 1699123456)
+        assert await cache.get_or_load("BTC_USD", loader) == (45000.0, 1699123456)
+        
+        loader.assert_awaited_once_with("BTC_USD")
+        assert (cache.hits, cache.misses) == (1, 1)
+    
+    async def test_get_or_load_discards_read_across_reset(self, cache):
+        """Test a read started before a resubscribe is not cached."""
+        async def loader(ticker):
+            cache._reset(connected=True)
+            return 45000.0, 1699123456
+        
+        assert await cache.get_or_load("BTC_USD", loader) == (45000.0, 1699123456)
+        assert cache.get("BTC_USD") is None
+    
+    async def test_get_many_or_load_loads_misses_together(self, cache):
+        """Test cached tickers are served from memory and misses share one load."""
+        cache.update("BTC_USD", 45100.0, 1699123460)
+        loader = AsyncMock(return_value={"ETH_USD": (2500.0, 1699123456)})
+        
+        latest = await cache.get_many_or_load(["ETH_USD", "BTC_USD", "XRP_USD"], loader)
+        
+        assert list(latest.items()) == [("ETH_USD", (2500.0, 1699123456)), ("BTC_USD", (45100.0, 1699123460))]
+        loader.assert_awaited_once_with(["ETH_USD", "XRP_USD"])
+        assert cache.get("ETH_USD") == (2500.0, 1699123456)
+        assert (cache.hits, cache.misses) == (1, 2)
+    
+    def test_handle_message(self, cache):
+        """Test published messages update the map and bad ones are ignored."""
+        cache.handle_message(_message("BTC_USD", 45000.0, 1699123456)["data"])
+        cache.handle_message(b"not json")
+        
+        assert cache.get("BTC_USD") == (45000.0, 1699123456)
+    
+    async def test_handle_message_pushes_to_subscribers(self, cache):
+        """Test new prices reach only subscribers of their ticker, older ones nobody."""
+        btc = cache.subscribe(["BTC_USD"])
+        both = cache.subscribe(["BTC_USD", "ETH_USD"])
+        
+        cache.handle_message(_message("BTC_USD", 45100.0, 1699123460)["data"])
+        cache.handle_message(_message("ETH_USD", 2500.0, 1699123460)["data"])
+        cache.handle_message(_message("BTC_USD", 45000.0, 1699123456)["data"])
+        
+        assert btc.pending() == 1
+        assert json.loads(await btc.get()) == {"ticker": "BTC_USD", "price": 45100.0, "timestamp": 1699123460}
+        assert both.pending() == 2
+        
+        cache.unsubscribe(btc)
+        cache.unsubscribe(both)
+        assert cache.broadcast("BTC_USD", 45200.0, 1699123520) == 0
+    
+    async def test_slow_subscriber_drops_oldest(self, cache):
+        """Test a full queue drops its oldest update instead of blocking the broadcast."""
+        slow = cache.subscribe(["BTC_USD"], maxsize=2)
+        
+        for i in range(5):
+            cache.broadcast("BTC_USD", 45000.0 + i, 1699123456 + i)
+        
+        assert slow.dropped == 3
+        assert [json.loads(await slow.get())["price"] for _ in range(2)] == [45003.0, 45004.0]
+    
+    async def test_sse_events(self, cache):
+        """Test the SSE stream sends a snapshot, then updates, and unsubscribes on close."""
+        cache.update("BTC_USD", 45000.0, 1699123456)
+        events = _sse_events(cache, ["BTC_USD"])
+        
+        assert await events.__anext__() == b": connected\n\n"
+        snapshot = await events.__anext__()
+        assert snapshot.startswith(b"event: price\ndata: ")
+        assert json.loads(snapshot.split(b"data: ")[1])["timestamp"] == 1699123456
+        
+        cache.handle_message(_message("BTC_USD", 45100.0, 1699123460)["data"])
+        update = await events.__anext__()
+        assert json.loads(update.split(b"data: ")[1])["price"] == 45100.0
+        
+        await events.aclose()
+        assert cache._subscriptions == {}
+    
+    async def test_subscription_applies_messages(self):
+        """Test the background subscription marks the cache live and applies messages."""
+        pubsub = FakePubSub([SUBSCRIBED, _message("BTC_USD", 45000.0, 1699123456)])
+        client = Mock(pubsub=Mock(return_value=pubsub), aclose=AsyncMock())
+        cache = LatestPriceCache(client=client, channel="prices:test")
+        
+        await cache.start()
+        await asyncio.sleep(0.01)
+        
+        assert pubsub.subscribed == ["prices:test"]
+        assert cache.connected
+        assert cache.get("BTC_USD") == (45000.0, 1699123456)
+        
+        await cache.close()
+        assert pubsub.closed
+        assert not cache.connected
+    
+    async def test_disconnect_clears_cache(self, monkeypatch):
+        """Test a dropped subscription empties the map until resubscribed."""
+        monkeypatch.setattr("app.services.price_cache.settings.price_cache_reconnect_min_delay", 0.05)
+        first = FakePubSub(
+            [SUBSCRIBED, _message("BTC_USD", 45000.0, 1699123456)],
+            error=redis.ConnectionError("connection lost")
+        )
+        second = FakePubSub([SUBSCRIBED])
+        client = Mock(pubsub=Mock(side_effect=[first, second]), aclose=AsyncMock())
+        cache = LatestPriceCache(client=client)
+        
+        await cache.start()
+        await asyncio.sleep(0.01)
+        
+        assert not cache.connected
+        assert cache.get("BTC_USD") is None
+        
+        await asyncio.sleep(0.1)
+        assert cache.connected
+        assert cache.get("BTC_USD") is None
+        
+        await cache.close()
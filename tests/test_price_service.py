@@ -1,10 +1,13 @@
 """
 Unit tests for PriceService.
 """
+import asyncio
+import threading
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
-from datetime import datetime
-from app.services.price_service import PriceService
+from datetime import datetime, timezone
+from sqlalchemy.dialects import postgresql
+from app.services.price_service import AsyncPriceService, PriceService
 from app.models import TickerPrice
 
 
@@ -39,15 +42,26 @@ class TestPriceService:
             result = await price_service.fetch_and_save_price("BTC_USD")
             
             # Verify database operations
-            mock_db.add.assert_called_once()
+            mock_db.scalar.assert_called_once()
             mock_db.commit.assert_called_once()
-            mock_db.refresh.assert_called_once()
+            assert result is mock_db.scalar.return_value
             
-            # Verify the saved object
-            saved_ticker = mock_db.add.call_args[0][0]
-            assert saved_ticker.ticker == "BTC_USD"
-            assert float(saved_ticker.price) == 45000.50
-            assert saved_ticker.timestamp == 1699123456
+            # Verify the upserted row
+            params = mock_db.scalar.call_args[0][0].compile(dialect=postgresql.dialect()).params
+            assert params["ticker"] == "BTC_USD"
+            assert float(params["price"]) == 45000.50
+            assert params["timestamp"] == 1699123456
+    
+    def test_save_price_duplicate(self, price_service, mock_db):
+        """Test that a price already stored for the timestamp is not written again."""
+        mock_db.scalar.return_value = None
+        publisher = Mock()
+        
+        result = PriceService(mock_db, publisher=publisher).save_price("BTC_USD", 45000.50, 1699123456)
+        
+        assert result is None
+        mock_db.commit.assert_not_called()
+        publisher.publish_prices.assert_not_called()
     
     def test_get_all_prices(self, price_service, mock_db):
         """Test retrieving all prices for a ticker."""
@@ -108,4 +122,197 @@ class TestPriceService:
         
         assert len(result) == 1
         assert result[0].ticker == "BTC_USD"
+    
+    
+    def test_get_prices_page_returns_next_cursor(self, price_service, mock_db):
+        """Test keyset pagination returns the last row as next cursor."""
+        mock_prices = [
+            TickerPrice(id=3, ticker="BTC_USD", price=45200.00, timestamp=1699123458),
+            TickerPrice(id=2, ticker="BTC_USD", price=45100.75, timestamp=1699123457),
+            TickerPrice(id=1, ticker="BTC_USD", price=45000.50, timestamp=1699123456),
+        ]
+        mock_query = Mock()
+        mock_query.filter.return_value.order_by.return_value.limit.return_value.all.return_value = mock_prices
+        mock_db.query.return_value = mock_query
+        
+        prices, next_cursor = price_service.get_prices_page("BTC_USD", limit=2)
+        
+        assert len(prices) == 2
+        assert next_cursor == (1699123457, 2)
+        mock_query.filter.return_value.order_by.return_value.limit.assert_called_once_with(3)
+    
+    def test_get_prices_page_last_page(self, price_service, mock_db):
+        """Test that the last page has no next cursor."""
+        mock_prices = [
+            TickerPrice(id=1, ticker="BTC_USD", price=45000.50, timestamp=1699123456),
+        ]
+        mock_query = Mock()
+        mock_query.filter.return_value.order_by.return_value.limit.return_value.all.return_value = mock_prices
+        mock_db.query.return_value = mock_query
+        
+        prices, next_cursor = price_service.get_prices_page("BTC_USD", limit=2, cursor=(1699123457, 2))
+        
+        assert len(prices) == 1
+        assert next_cursor is None
+    
+    @pytest.mark.asyncio
+    async def test_fetch_and_save_prices_isolates_failures(self, price_service, mock_db):
+        """Test that one failing ticker does not abort the others."""
+        mock_db.execute.return_value.tuples.return_value.all.return_value = [
+            ("BTC_USD", 1699123456), ("SOL_USDC", 1699123456)
+        ]
+        
+        async def fake_get_index_price(ticker):
+            if ticker == "XRP_USD":
+                raise ValueError("Deribit API error: unknown index")
+            return {"index_price": 100.0, "timestamp": 1699123456}
+        
+        with patch.object(
+            price_service.deribit_client,
+            "get_index_price",
+            side_effect=fake_get_index_price
+        ):
+            results = await price_service.fetch_and_save_prices(["BTC_USD", "XRP_USD", "SOL_USDC"])
+        
+        assert results["BTC_USD"]["status"] == "ok"
+        assert results["SOL_USDC"]["price"] == 100.0
+        assert results["XRP_USD"]["status"] == "error"
+        assert "unknown index" in results["XRP_USD"]["error"]
+        assert all("elapsed_ms" in result for result in results.values())
+        # Successful prices are saved together in one transaction
+        mock_db.commit.assert_called_once()
+        saved = mock_db.execute.call_args_list[0][0][1]
+        assert {row["ticker"] for row in saved} == {"BTC_USD", "SOL_USDC"}
+    
+    @pytest.mark.asyncio
+    async def test_fetch_and_save_prices_saves_off_the_loop(self, price_service):
+        """Test the blocking save runs in a worker thread, not on the event loop."""
+        loop_thread = threading.get_ident()
+        save_threads = []
+        
+        with patch.object(
+            price_service.deribit_client,
+            "get_index_price",
+            AsyncMock(return_value={"index_price": 1.0, "timestamp": 1699123456})
+        ), patch.object(price_service, "save_prices", side_effect=lambda prices: save_threads.append(threading.get_ident())):
+            await price_service.fetch_and_save_prices(["BTC_USD"])
+        
+        assert len(save_threads) == 1
+        assert save_threads[0] != loop_thread
+    
+    @pytest.mark.asyncio
+    async def test_fetch_and_save_prices_respects_concurrency(self, price_service):
+        """Test that no more than `concurrency` requests are in flight."""
+        in_flight = 0
+        peak = 0
+        
+        async def fake_get_index_price(ticker):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return {"index_price": 1.0, "timestamp": 1699123456}
+        
+        with patch.object(
+            price_service.deribit_client,
+            "get_index_price",
+            side_effect=fake_get_index_price
+        ):
+            results = await price_service.fetch_and_save_prices(
+                [f"T{i}_USD" for i in range(10)], concurrency=3
+            )
+        
+        assert len(results) == 10
+        assert peak == 3
 
+
+class TestAsyncPriceService:
+    """Test cases for AsyncPriceService against the test database."""
+    
+    @pytest.fixture
+    async def seeded_session(self, async_db_session):
+        """Seed 25 BTC_USD prices one minute apart."""
+        async_db_session.add_all(
+            TickerPrice(ticker="BTC_USD", price=45000 + i, timestamp=1699123200 + i * 60)
+            for i in range(25)
+        )
+        async_db_session.add(TickerPrice(ticker="ETH_USD", price=2500, timestamp=1699123200))
+        await async_db_session.commit()
+        return async_db_session
+    
+    async def test_get_all_and_latest(self, seeded_session):
+        """Test reading all prices and the latest price."""
+        service = AsyncPriceService(seeded_session)
+        
+        prices = await service.get_all_prices("BTC_USD")
+        latest = await service.get_latest_price("BTC_USD")
+        
+        assert len(prices) == 25
+        assert latest.timestamp == 1699123200 + 24 * 60
+        assert prices[0].timestamp == latest.timestamp
+        assert await service.get_latest_price("XRP_USD") is None
+    
+    async def test_get_latest_prices(self, seeded_session):
+        """Test the latest price of several tickers comes back from one query."""
+        service = AsyncPriceService(seeded_session)
+        
+        latest = await service.get_latest_prices(["BTC_USD", "XRP_USD", "ETH_USD"])
+        
+        assert latest == {"BTC_USD": (45024.0, 1699123200 + 24 * 60), "ETH_USD": (2500.0, 1699123200)}
+    
+    async def test_get_price_by_date(self, seeded_session):
+        """Test filtering by an inclusive date range."""
+        service = AsyncPriceService(seeded_session)
+        start = datetime.fromtimestamp(1699123200 + 10 * 60, tz=timezone.utc)
+        end = datetime.fromtimestamp(1699123200 + 14 * 60, tz=timezone.utc)
+        
+        prices = await service.get_price_by_date("BTC_USD", start, end)
+        
+        assert [p.timestamp for p in prices] == [1699123200 + i * 60 for i in range(14, 9, -1)]
+    
+    async def test_pages_cover_range_without_overlap(self, seeded_session):
+        """Test that following cursors visits every row exactly once."""
+        service = AsyncPriceService(seeded_session)
+        seen, cursor = [], None
+        
+        while True:
+            page, cursor = await service.get_prices_page("BTC_USD", 10, cursor)
+            seen.extend(p.timestamp for p in page)
+            if cursor is None:
+                break
+        
+        assert len(seen) == 25
+        assert seen == sorted(set(seen), reverse=True)
+    
+    async def test_iter_prices_streams_all_rows(self, seeded_session):
+        """Test streaming with a batch size smaller than the result."""
+        service = AsyncPriceService(seeded_session)
+        
+        timestamps = [p.timestamp async for p in service.iter_prices("BTC_USD", batch_size=4)]
+        
+        assert len(timestamps) == 25
+        assert timestamps == sorted(timestamps, reverse=True)
+    
+    async def test_get_price_rows(self, seeded_session):
+        """Test column tuples come back as floats and page like get_prices_page."""
+        service = AsyncPriceService(seeded_session)
+        
+        rows, cursor = await service.get_price_rows("BTC_USD", limit=10)
+        rest, last_cursor = await service.get_price_rows("BTC_USD", cursor=cursor)
+        
+        assert len(rows) == 10 and len(rest) == 15
+        assert last_cursor is None
+        price_id, price, timestamp = rows[0]
+        assert isinstance(price, float) and price == 45024.0
+        assert timestamp == 1699123200 + 24 * 60
+        assert cursor == (rows[-1][2], rows[-1][0])
+    
+    async def test_get_price_version(self, seeded_session):
+        """Test the version reflects the range's row count and latest timestamp."""
+        service = AsyncPriceService(seeded_session)
+        end = datetime.fromtimestamp(1699123200 + 9 * 60, tz=timezone.utc)
+        
+        assert await service.get_price_version("BTC_USD") == (25, 1699123200 + 24 * 60)
+        assert await service.get_price_version("BTC_USD", end_date=end) == (10, 1699123200 + 9 * 60)
+        assert await service.get_price_version("XRP_USD") == (0, None)
@@ -0,0 +1,153 @@
+"""
+Unit tests for Celery price tasks.
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from app.clients.deribit_stub import DeribitStubServer
+from app.metrics import PRICE_GAP_SLOTS
+from app.services.gap_service import PriceGap
+from app.tasks.celery_app import celery_app
+from app.tasks.price_tasks import backfill_prices, fetch_and_save_prices, repair_price_gaps
+from app.tasks.worker_runtime import WorkerRuntime
+
+
+class TestPriceTasks:
+    """Test cases for price fetching tasks."""
+    
+    @pytest.fixture
+    def mock_service(self):
+        """Patch the session factory and PriceService used by the task."""
+        with patch("app.tasks.price_tasks.SessionLocal"), \
+                patch("app.tasks.price_tasks.PriceService") as mock_service_class:
+            service = Mock()
+            service.close = AsyncMock()
+            mock_service_class.return_value = service
+            yield service
+    
+    def test_fetch_and_save_prices_reports_results(self, mock_service):
+        """Test that the task uses configured tickers and reports per-ticker results."""
+        mock_service.fetch_and_save_prices = AsyncMock(return_value={
+            "BTC_USD": {"status": "ok", "price": 45000.5, "timestamp": 1699123456, "elapsed_ms": 12.0},
+            "ETH_USD": {"status": "error", "error": "timeout", "elapsed_ms": 10000.0},
+        })
+        
+        with patch("app.tasks.price_tasks.settings") as mock_settings:
+            mock_settings.tickers = ["BTC_USD", "ETH_USD"]
+            mock_settings.ingest_concurrency = 5
+            result = fetch_and_save_prices()
+        
+        mock_service.fetch_and_save_prices.assert_awaited_once_with(["BTC_USD", "ETH_USD"], 5)
+        mock_service.close.assert_awaited_once()
+        assert result["succeeded"] == 1
+        assert result["failed"] == 1
+        assert result["tickers"]["ETH_USD"]["error"] == "timeout"
+        assert "elapsed_ms" in result
+    
+    def test_fetch_and_save_prices_all_failed(self, mock_service):
+        """Test that the task fails when every ticker fails."""
+        mock_service.fetch_and_save_prices = AsyncMock(return_value={
+            "BTC_USD": {"status": "error", "error": "timeout", "elapsed_ms": 10000.0},
+        })
+        
+        with pytest.raises(RuntimeError, match="all tickers"):
+            fetch_and_save_prices()
+    
+    def test_backfill_prices_has_own_time_limits(self):
+        """Test a backfill is not killed by the ingest tick's 30-second limit."""
+        assert backfill_prices.time_limit > celery_app.conf.task_time_limit
+        assert backfill_prices.time_limit > backfill_prices.soft_time_limit > celery_app.conf.task_soft_time_limit
+    
+    def test_repair_price_gaps_has_own_time_limits(self):
+        """Test a repair run may outlast an ingest tick but not the scan interval."""
+        assert celery_app.conf.task_time_limit < repair_price_gaps.time_limit <= 900
+        assert repair_price_gaps.soft_time_limit < repair_price_gaps.time_limit
+    
+    def test_repair_price_gaps(self):
+        """Test found gaps are exported per ticker and handed to BackfillService.repair."""
+        gaps = [PriceGap("BTC_USD", 1699000020, 1699000199, 3)]
+        with patch("app.tasks.price_tasks.SessionLocal"), \
+                patch("app.tasks.price_tasks.GapService") as mock_gap_class, \
+                patch("app.tasks.price_tasks.BackfillService") as mock_backfill_class:
+            mock_gap_class.return_value.find_gaps.return_value = gaps
+            backfill = Mock(close=AsyncMock(), repair=AsyncMock(return_value={"BTC_USD": {"inserted": 3}}))
+            mock_backfill_class.return_value = backfill
+            
+            result = repair_price_gaps(["BTC_USD", "ETH_USD"], lookback=600)
+        
+        tickers, start, end = mock_gap_class.return_value.find_gaps.call_args.args
+        assert tickers == ["BTC_USD", "ETH_USD"]
+        assert end - start == 600
+        backfill.repair.assert_awaited_once_with(gaps)
+        backfill.close.assert_awaited_once()
+        assert result == {"gaps": 1, "missing": 3, "tickers": {"BTC_USD": {"inserted": 3}}}
+        assert PRICE_GAP_SLOTS.labels(ticker="BTC_USD")._value.get() == 3
+        assert PRICE_GAP_SLOTS.labels(ticker="ETH_USD")._value.get() == 0
+    
+    def test_repair_price_gaps_without_gaps(self):
+        """Test nothing is fetched when no slot is missing."""
+        with patch("app.tasks.price_tasks.SessionLocal"), \
+                patch("app.tasks.price_tasks.GapService") as mock_gap_class, \
+                patch("app.tasks.price_tasks.BackfillService") as mock_backfill_class:
+            mock_gap_class.return_value.find_gaps.return_value = []
+            
+            result = repair_price_gaps(["BTC_USD"])
+        
+        mock_backfill_class.assert_not_called()
+        assert result == {"gaps": 0, "missing": 0, "tickers": {}}
+    
+    def test_repair_price_gaps_clipped_to_raw_retention(self, monkeypatch):
+        """Test with partitioning, the scan does not reach into downsampled history."""
+        monkeypatch.setattr("app.services.partition_service.settings.price_partitioning", True)
+        monkeypatch.setattr("app.services.partition_service.settings.partition_raw_retention_days", 1)
+        with patch("app.tasks.price_tasks.SessionLocal"), \
+                patch("app.tasks.price_tasks.GapService") as mock_gap_class:
+            mock_gap_class.return_value.find_gaps.return_value = []
+            
+            repair_price_gaps(["BTC_USD"], lookback=7 * 86400)
+        
+        _, start, end = mock_gap_class.return_value.find_gaps.call_args.args
+        assert end - start == 86400
+
+
+async def _running_loop():
+    return asyncio.get_running_loop()
+
+
+class TestWorkerRuntime:
+    """Test cases for the worker-lifetime loop and HTTP session."""
+    
+    def test_tasks_share_loop_and_session(self):
+        """Test consecutive runs reuse one loop and one pooled session."""
+        runtime = WorkerRuntime()
+        runtime.start()
+        stub = DeribitStubServer()
+        try:
+            runtime.run(stub.start())
+            
+            for _ in range(2):
+                client = runtime.deribit_client()
+                client.base_url = stub.api_url
+                assert runtime.run(client.get_index_price("BTC_USD"))["index_price"] > 0
+                runtime.run(client.close())
+                assert runtime.run(_running_loop()) is runtime.loop
+            
+            session = runtime.session
+            assert client._session is session
+            assert stub.http_connections == 1
+            assert not session.closed
+            runtime.run(stub.stop())
+        finally:
+            runtime.stop()
+        
+        assert session.closed
+        assert runtime.loop is None
+    
+    def test_falls_back_before_start(self):
+        """Test an unstarted runtime gives each call its own loop and client session."""
+        runtime = WorkerRuntime()
+        
+        assert not runtime.active
+        # The temporary loop is closed once the call returns
+        assert runtime.run(_running_loop()).is_closed()
+        assert runtime.deribit_client()._owns_session
@@ -0,0 +1,169 @@
+"""
+Unit tests for BufferedPriceWriter.
+"""
+import asyncio
+import pytest
+from unittest.mock import patch
+from app.database import SessionLocal
+from app.models import TickerPrice
+from app.services.price_service import SaveResult
+from app.services.price_writer import BufferedPriceWriter
+
+
+class TestBufferedPriceWriter:
+    """Test cases for BufferedPriceWriter."""
+    
+    @pytest.fixture
+    def written(self):
+        """Capture batches instead of writing them to the database."""
+        batches = []
+        with patch.object(BufferedPriceWriter, "_write", side_effect=lambda rows: batches.append(rows) or SaveResult(len(rows), 0)):
+            yield batches
+    
+    @pytest.mark.asyncio
+    async def test_flushes_on_batch_size(self, written):
+        """Test that reaching batch_size triggers a flush."""
+        writer = BufferedPriceWriter(batch_size=3, flush_interval=60)
+        await writer.start()
+        
+        for i in range(3):
+            await writer.put("BTC_USD", 100.0 + i, 1699123456 + i)
+        await asyncio.sleep(0.05)
+        
+        assert len(written) == 1
+        assert len(written[0]) == 3
+        assert writer.stats["flushed_rows"] == 3
+        await writer.close()
+    
+    @pytest.mark.asyncio
+    async def test_flushes_on_interval(self, written):
+        """Test that buffered rows are flushed after flush_interval."""
+        writer = BufferedPriceWriter(batch_size=100, flush_interval=0.02)
+        await writer.start()
+        
+        await writer.put("BTC_USD", 100.0, 1699123456)
+        await asyncio.sleep(0.1)
+        
+        assert written == [[("BTC_USD", 100.0, 1699123456)]]
+        await writer.close()
+    
+    @pytest.mark.asyncio
+    async def test_close_flushes_remaining(self, written):
+        """Test that close flushes rows still in the buffer."""
+        writer = BufferedPriceWriter(batch_size=100, flush_interval=60)
+        await writer.start()
+        
+        await writer.put("BTC_USD", 100.0, 1699123456)
+        await writer.put("ETH_USD", 2500.0, 1699123456)
+        await writer.close()
+        
+        assert sum(len(batch) for batch in written) == 2
+        assert writer.stats["buffered"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_drops_when_full_without_flusher(self, written):
+        """Test that puts give up and count drops when no space frees up."""
+        writer = BufferedPriceWriter(batch_size=100, max_buffer=2, put_timeout=0.01)
+        
+        assert await writer.put("BTC_USD", 1.0, 1)
+        assert await writer.put("BTC_USD", 2.0, 2)
+        assert not await writer.put("BTC_USD", 3.0, 3)
+        
+        assert writer.stats["dropped_rows"] == 1
+        assert writer.stats["buffered"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_backpressure_waits_for_flush(self, written):
+        """Test that a full buffer blocks put until a flush frees space."""
+        writer = BufferedPriceWriter(batch_size=100, flush_interval=60, max_buffer=2, put_timeout=1)
+        await writer.start()
+        
+        for i in range(5):
+            assert await writer.put("BTC_USD", float(i), i)
+        await writer.close()
+        
+        assert writer.stats["dropped_rows"] == 0
+        assert writer.stats["flushed_rows"] == 5
+    
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_counted(self, monkeypatch):
+        """Test that a write failing every retry is counted instead of crashing the loop."""
+        monkeypatch.setattr("app.services.price_writer.settings.write_retry_base_delay", 0.01)
+        with patch.object(BufferedPriceWriter, "_write", side_effect=RuntimeError("db down")) as write:
+            writer = BufferedPriceWriter(batch_size=100, flush_interval=60, max_retries=2)
+            await writer.put("BTC_USD", 100.0, 1699123456)
+            await writer.flush()
+        
+        assert write.call_count == 3
+        assert writer.stats["failed_rows"] == 1
+        assert writer.stats["retries"] == 2
+        assert writer.stats["flushed_rows"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_transient_flush_error_is_retried(self, monkeypatch):
+        """Test that a batch survives a transient write error, while puts keep buffering."""
+        monkeypatch.setattr("app.services.price_writer.settings.write_retry_base_delay", 0.05)
+        batches = []
+        
+        def write(rows):
+            if not batches:
+                batches.append(None)
+                raise RuntimeError("connection reset")
+            batches.append(rows)
+            return SaveResult(len(rows), 0)
+        
+        with patch.object(BufferedPriceWriter, "_write", side_effect=write):
+            writer = BufferedPriceWriter(batch_size=100, flush_interval=60)
+            await writer.put("BTC_USD", 100.0, 1699123456)
+            flush = asyncio.create_task(writer.flush())
+            await asyncio.sleep(0.01)
+            assert await writer.put("BTC_USD", 101.0, 1699123457)
+            await flush
+        
+        assert batches[1] == [("BTC_USD", 100.0, 1699123456)]
+        assert writer.stats["flushed_rows"] == 1
+        assert writer.stats["failed_rows"] == 0
+        assert writer.stats["retries"] == 1
+        assert writer.stats["buffered"] == 1
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("use_copy", [False, True])
+    async def test_writes_to_database(self, db_session, use_copy):
+        """Test that a flush inserts rows with INSERT or COPY."""
+        async with BufferedPriceWriter(SessionLocal, batch_size=100, use_copy=use_copy) as writer:
+            for i in range(10):
+                await writer.put("BTC_USD", 45000.0 + i, 1699123456 + i)
+        
+        prices = db_session.query(TickerPrice).order_by(TickerPrice.timestamp).all()
+        assert len(prices) == 10
+        assert float(prices[-1].price) == 45009.0
+    
+    @pytest.mark.asyncio
+    async def test_flush_does_not_build_price_service(self, db_session):
+        """Test that flushes write through save_new_prices without a Deribit client."""
+        with patch("app.services.price_service.DeribitClient") as client_class:
+            async with BufferedPriceWriter(SessionLocal, batch_size=2) as writer:
+                for i in range(6):
+                    await writer.put("BTC_USD", 45000.0 + i, 1699123456 + i)
+        
+        client_class.assert_not_called()
+        assert writer.stats["flushed_rows"] == 6
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("use_copy", [False, True])
+    async def test_skips_duplicates(self, db_session, use_copy):
+        """Test that prices already stored, or repeated in a batch, are written once."""
+        async with BufferedPriceWriter(SessionLocal, batch_size=100, use_copy=use_copy) as writer:
+            for i in range(5):
+                await writer.put("BTC_USD", 45000.0 + i, 1699123456 + i)
+            await writer.flush()
+            for i in range(3, 8):
+                await writer.put("BTC_USD", 46000.0 + i, 1699123456 + i)
+            await writer.put("BTC_USD", 47000.0, 1699123456 + 7)
+        
+        prices = db_session.query(TickerPrice).order_by(TickerPrice.timestamp).all()
+        assert len(prices) == 8
+        # The first write wins
+        assert float(prices[3].price) == 45003.0
+        assert float(prices[7].price) == 46007.0
+        assert writer.stats["duplicate_rows"] == 3
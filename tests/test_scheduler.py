@@ -0,0 +1,105 @@
+"""
+Unit tests for the aligned scheduler and the polling ingestion daemon.
+"""
+import asyncio
+import time
+from sqlalchemy import select
+from app.clients.deribit_client import DeribitClient
+from app.clients.deribit_stub import DeribitStubServer
+from app.models import TickerPrice
+from app.tasks.poll_ingestion import cadence_groups, run_poll_ingestion
+from app.tasks.scheduler import AlignedScheduler
+
+
+async def _run_for(scheduler: AlignedScheduler, seconds: float):
+    stop = asyncio.Event()
+    asyncio.get_running_loop().call_later(seconds, stop.set)
+    await scheduler.run(stop)
+
+
+class TestAlignedScheduler:
+    """Test cases for AlignedScheduler."""
+    
+    async def test_ticks_fall_on_interval_boundaries(self):
+        """Test every run gets a boundary timestamp and starts right after it."""
+        ticks = []
+        lags = []
+        
+        async def job(tick):
+            ticks.append(tick)
+            lags.append(time.time() - tick)
+        
+        scheduler = AlignedScheduler()
+        scheduler.add_job("fast", 0.05, job)
+        await _run_for(scheduler, 0.33)
+        
+        assert len(ticks) >= 5
+        assert all(abs(tick / 0.05 - round(tick / 0.05)) < 1e-6 for tick in ticks)
+        assert all(abs(b - a - 0.05) < 1e-6 for a, b in zip(ticks, ticks[1:]))
+        assert max(lags) < 0.03
+    
+    async def test_overrun_skips_tick_instead_of_stacking(self):
+        """Test a run that outlasts its interval makes the next tick skip."""
+        running = []
+        
+        async def slow_job(tick):
+            running.append(tick)
+            assert len(running) == 1
+            await asyncio.sleep(0.08)
+            running.remove(tick)
+        
+        scheduler = AlignedScheduler()
+        scheduler.add_job("slow", 0.05, slow_job)
+        await _run_for(scheduler, 0.4)
+        
+        stats = scheduler.stats["slow"]
+        assert stats["overruns"] >= 2
+        assert stats["errors"] == 0
+        assert stats["runs"] >= 2
+    
+    async def test_missed_ticks_are_skipped(self):
+        """Test ticks that pass while the loop is blocked are dropped, not replayed."""
+        ticks = []
+        
+        async def blocking_job(tick):
+            ticks.append(tick)
+            if len(ticks) == 1:
+                time.sleep(0.17)
+        
+        scheduler = AlignedScheduler()
+        scheduler.add_job("blocked", 0.05, blocking_job)
+        await _run_for(scheduler, 0.4)
+        
+        assert scheduler.stats["blocked"]["missed"] >= 2
+        # After the block, runs resume from the latest boundary
+        assert round((ticks[1] - ticks[0]) / 0.05) >= 3
+
+
+class TestPollIngestion:
+    """Test cases for the polling ingestion daemon."""
+    
+    def test_cadence_groups(self, monkeypatch):
+        """Test tickers without their own cadence use INGEST_INTERVAL."""
+        monkeypatch.setattr("app.tasks.poll_ingestion.settings.ingest_interval", 60)
+        
+        groups = cadence_groups(["BTC_USD", "ETH_USD", "SOL_USDC"], {"BTC_USD": 1, "SOL_USDC": 1})
+        
+        assert groups == {1: ["BTC_USD", "SOL_USDC"], 60: ["ETH_USD"]}
+    
+    async def test_prices_stored_on_boundaries(self, db_session, monkeypatch):
+        """Test the daemon stores prices under the aligned tick timestamps."""
+        monkeypatch.setattr("app.tasks.poll_ingestion.settings.ingest_cadences", {"BTC_USD": 1, "ETH_USD": 2})
+        stop = asyncio.Event()
+        
+        async with DeribitStubServer() as server:
+            client = DeribitClient(base_url=server.api_url)
+            asyncio.get_running_loop().call_later(2.5, stop.set)
+            stats = await run_poll_ingestion(["BTC_USD", "ETH_USD"], stop, client)
+        
+        rows = db_session.execute(select(TickerPrice.ticker, TickerPrice.timestamp)).all()
+        btc = sorted(timestamp for ticker, timestamp in rows if ticker == "BTC_USD")
+        eth = [timestamp for ticker, timestamp in rows if ticker == "ETH_USD"]
+        
+        assert stats["ingest_1s"]["runs"] >= 2
+        assert [b - a for a, b in zip(btc, btc[1:])] == [1] * (len(btc) - 1)
+        assert eth and all(timestamp % 2 == 0 for timestamp in eth)